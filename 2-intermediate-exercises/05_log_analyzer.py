@@ -7,11 +7,30 @@ This exercise focuses on parsing logs, finding patterns, and generating insights
 """
 
 import re
+import os
+import sys
+import bz2
+import glob
+import gzip
 import json
-from datetime import datetime, timedelta
-from collections import defaultdict, Counter
-from typing import Dict, List, Any, Optional, Tuple
+import lzma
+import math
+import heapq
+import hashlib
+import mmap
+import time
+import random
+import multiprocessing
+import importlib.machinery
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from datetime import datetime, timedelta, timezone
+from collections import defaultdict, deque, Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Iterator
 from dataclasses import dataclass
+from functools import lru_cache
 from enum import Enum
 
 class LogLevel(Enum):
@@ -34,6 +53,1317 @@ class LogEntry:
     request_id: Optional[str] = None
     raw_line: str = ""
 
+# Size of the window handed to the line splitter when streaming a log file
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+
+def _decode_line(raw_line: bytes) -> str:
+    """
+    Decode one line split off at b"\n", dropping a trailing CR.
+    
+    Every reader (memory-mapped, decompressing and following) splits on
+    b"\n" only and decodes through here, so a log yields the same lines
+    whether or not it is compressed; other control characters such as a
+    lone "\r" or "\x0c" stay inside the line.
+    """
+    return raw_line.rstrip(b"\r").decode('utf-8', errors='replace')
+
+def _iter_mapped_lines(file_path: str, chunk_size: int = STREAM_CHUNK_SIZE,
+                       start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the lines of a file through a read-only memory map.
+    
+    The file is split into windows of roughly ``chunk_size`` bytes that always
+    end on a newline, so only one window is decoded at a time and the resident
+    set does not grow with the file size.
+    
+    Args:
+        file_path (str): Path to the file
+        chunk_size (int): Approximate number of bytes decoded per window
+        start (int): Byte offset to start at (must be a line start)
+        end (int, optional): Byte offset to stop at; defaults to end of file
+        
+    Yields:
+        str: Decoded lines without their line terminators
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    
+    with open(file_path, 'rb') as handle:
+        size = os.fstat(handle.fileno()).st_size
+        stop = size if end is None else min(end, size)
+        if start >= stop:
+            return
+        
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            position = start
+            while position < stop:
+                window_end = min(position + chunk_size, stop)
+                if window_end < stop:
+                    newline = buffer.rfind(b"\n", position, window_end)
+                    if newline == -1:
+                        # A single line is longer than the window: extend to its end
+                        newline = buffer.find(b"\n", window_end, stop)
+                        window_end = stop if newline == -1 else newline + 1
+                    else:
+                        window_end = newline + 1
+                
+                lines = buffer[position:window_end].split(b"\n")
+                if not lines[-1]:
+                    # The window ends with a newline, not with a final line
+                    lines.pop()
+                for raw_line in lines:
+                    yield _decode_line(raw_line)
+                position = window_end
+
+# Magic bytes of the rotated-log archive formats read transparently
+_COMPRESSION_FORMATS = [
+    (b"\x1f\x8b", 'gzip', gzip.open),
+    (b"BZh", 'bz2', bz2.open),
+    (b"\xfd7zXZ\x00", 'xz', lzma.open),
+]
+
+def _detect_compression(file_path: str) -> Optional[str]:
+    """
+    Identify a compressed file by its magic bytes (not its extension).
+    
+    Args:
+        file_path (str): Path to the file
+        
+    Returns:
+        str or None: "gzip", "bz2" or "xz", or None for plain files
+    """
+    with open(file_path, 'rb') as handle:
+        header = handle.read(6)
+    for magic, name, _ in _COMPRESSION_FORMATS:
+        if header.startswith(magic):
+            return name
+    return None
+
+def _iter_stream_lines(stream, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yield decoded lines from a binary stream read in fixed-size chunks.
+    
+    Args:
+        stream: Binary file-like object, e.g. a decompressing reader
+        chunk_size (int): Number of bytes read per chunk
+        
+    Yields:
+        str: Decoded lines without their line terminators
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    
+    pending = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for raw_line in lines:
+            yield _decode_line(raw_line)
+    if pending:
+        yield _decode_line(pending)
+
+def _iter_log_lines(file_path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yield the lines of a plain or compressed log file.
+    
+    Plain files are memory-mapped; gzip, bz2 and xz files are decompressed
+    on the fly without being extracted to disk.
+    
+    Args:
+        file_path (str): Path to the file
+        chunk_size (int): Approximate number of bytes handled per window
+        
+    Yields:
+        str: Decoded lines without their line terminators
+    """
+    compression = _detect_compression(file_path)
+    if compression is None:
+        yield from _iter_mapped_lines(file_path, chunk_size)
+        return
+    
+    opener = next(opener for _, name, opener in _COMPRESSION_FORMATS if name == compression)
+    with opener(file_path, 'rb') as stream:
+        yield from _iter_stream_lines(stream, chunk_size)
+
+def _newline_aligned_ranges(file_path: str, parts: int) -> List[Tuple[int, int]]:
+    """
+    Split a file into contiguous byte ranges that start on line boundaries.
+    
+    Args:
+        file_path (str): Path to the file
+        parts (int): Desired number of ranges
+        
+    Returns:
+        list: (start, end) byte offsets covering the whole file, in order
+    """
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return []
+    
+    step = max(1, size // max(1, parts))
+    boundaries = [0]
+    with open(file_path, 'rb') as handle:
+        for target in range(step, size, step):
+            if target <= boundaries[-1]:
+                continue
+            # Finish the line containing byte target-1 so the next range starts fresh
+            handle.seek(target - 1)
+            handle.readline()
+            boundary = handle.tell()
+            if boundary >= size:
+                break
+            boundaries.append(boundary)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+def _importable_by_workers(cls: type) -> bool:
+    """
+    Whether a freshly started process can import cls by its module name.
+    
+    spawn and forkserver workers unpickle the job function, the analyzer
+    class and the parsed LogEntry objects by importing their module. A
+    module loaded from a path under a name that is not on sys.path (such
+    as this exercise file, whose name is not a valid module name) cannot
+    be imported there.
+    """
+    module_name = cls.__module__
+    if module_name == '__main__':
+        # Workers re-run the main script, which needs a file to run
+        return getattr(sys.modules['__main__'], '__file__', None) is not None
+    try:
+        return importlib.machinery.PathFinder.find_spec(module_name.partition('.')[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+def _parse_byte_range(analyzer_class: type, patterns: Dict[str, str],
+                      custom_patterns: Dict[str, str], file_path: str,
+                      start: int, end: int, log_format: str) -> List[LogEntry]:
+    """
+    Parse one byte range of a log file in a worker process.
+    
+    A fresh analyzer of the caller's class is configured with the caller's
+    patterns so that parse_log_line behaves exactly as in the parent.
+    """
+    analyzer = analyzer_class()
+    analyzer.patterns = patterns
+    analyzer.custom_patterns = custom_patterns
+    
+    entries = []
+    for line in _iter_mapped_lines(file_path, start=start, end=end):
+        if not line.strip():
+            continue
+        entry = analyzer.parse_log_line(line, log_format)
+        if entry is not None:
+            entries.append(entry)
+    return entries
+
+# Epoch used for the int64 timestamp columns (naive datetimes are taken as UTC)
+_EPOCH = datetime(1970, 1, 1)
+_LEVELS_BY_CODE = list(LogLevel)
+_LEVEL_CODES = {level: code for code, level in enumerate(_LEVELS_BY_CODE)}
+
+def _to_epoch_us(timestamp: datetime) -> int:
+    """Convert a datetime to integer microseconds since the epoch."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = timestamp - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+def _from_epoch_us(value: int) -> datetime:
+    """Convert integer microseconds since the epoch back to a naive datetime."""
+    return _EPOCH + timedelta(microseconds=value)
+
+def _interval_us(interval_minutes: int) -> int:
+    """Convert a timeline bucket width in minutes to microseconds."""
+    if interval_minutes <= 0:
+        raise ValueError("interval_minutes must be positive")
+    return interval_minutes * 60 * 1_000_000
+
+def _bucket_start(timestamp_us: int, interval_us: int) -> int:
+    """Round epoch microseconds down to the start of their time bucket."""
+    return timestamp_us - timestamp_us % interval_us
+
+class _InternedColumn:
+    """
+    String column stored as integer codes into a shared vocabulary.
+    
+    Code 0 is reserved for None so optional fields cost four bytes per row.
+    """
+    
+    def __init__(self):
+        self.codes = array('I')
+        self.values: List[Optional[str]] = [None]
+        self._lookup: Dict[str, int] = {}
+    
+    def append(self, value: Optional[str]) -> None:
+        if value is None:
+            self.codes.append(0)
+            return
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(sys.intern(value))
+            self._lookup[value] = code
+        self.codes.append(code)
+    
+    def __getitem__(self, index: int) -> Optional[str]:
+        return self.values[self.codes[index]]
+    
+    def nbytes(self) -> int:
+        return self.codes.itemsize * len(self.codes) + sum(
+            sys.getsizeof(value) for value in self.values if value is not None
+        )
+
+class LogEntryView:
+    """
+    Read-only, per-entry view into a ColumnarLogStore.
+    
+    Exposes the same attributes as LogEntry; raw_line is not retained by the
+    columnar store and is always an empty string.
+    """
+    
+    __slots__ = ('_store', '_index')
+    
+    def __init__(self, store: "ColumnarLogStore", index: int):
+        self._store = store
+        self._index = index
+    
+    @property
+    def timestamp(self) -> datetime:
+        return _from_epoch_us(self._store.timestamps[self._index])
+    
+    @property
+    def level(self) -> LogLevel:
+        return _LEVELS_BY_CODE[self._store.levels[self._index]]
+    
+    @property
+    def message(self) -> str:
+        return self._store.message(self._index)
+    
+    @property
+    def source(self) -> Optional[str]:
+        return self._store.sources[self._index]
+    
+    @property
+    def thread_id(self) -> Optional[str]:
+        return self._store.thread_ids[self._index]
+    
+    @property
+    def user_id(self) -> Optional[str]:
+        return self._store.user_ids[self._index]
+    
+    @property
+    def request_id(self) -> Optional[str]:
+        return self._store.request_ids[self._index]
+    
+    @property
+    def raw_line(self) -> str:
+        return ""
+    
+    def to_entry(self) -> LogEntry:
+        """Materialize the view as a regular LogEntry."""
+        return LogEntry(
+            timestamp=self.timestamp,
+            level=self.level,
+            message=self.message,
+            source=self.source,
+            thread_id=self.thread_id,
+            user_id=self.user_id,
+            request_id=self.request_id
+        )
+    
+    def __repr__(self) -> str:
+        return f"LogEntryView({self._index}, {self.level.value}, {self.message[:40]!r})"
+
+class ColumnarLogStore:
+    """
+    Compact, column-oriented storage for parsed log entries.
+    
+    Timestamps are kept as int64 epoch microseconds, levels as uint8 codes,
+    source/thread/user/request ids as interned code columns and all messages
+    in one UTF-8 buffer addressed by offsets. Aggregations scan the typed
+    arrays directly instead of touching per-entry objects.
+    
+    A store loaded from an on-disk cache holds read-only memoryviews into the
+    mapped file instead of arrays and cannot be appended to.
+    """
+    
+    def __init__(self):
+        self.timestamps = array('q')
+        self.levels = array('B')
+        self.sources = _InternedColumn()
+        self.thread_ids = _InternedColumn()
+        self.user_ids = _InternedColumn()
+        self.request_ids = _InternedColumn()
+        self.message_buffer = bytearray()
+        self.message_offsets = array('Q', [0])
+        self.time_index: Optional["TimeIndex"] = None
+        self.level_positions = array('Q')
+        self.level_offsets: Optional[List[int]] = None
+        self.read_only = False
+        self._mapping: Optional[mmap.mmap] = None
+    
+    def append(self, entry: LogEntry) -> None:
+        """
+        Append one entry to every column.
+        
+        Args:
+            entry (LogEntry): Entry to store
+        """
+        if self.read_only:
+            raise ValueError("Cannot append to a read-only (cache-backed) store")
+        self.time_index = None
+        self.level_offsets = None
+        self.timestamps.append(_to_epoch_us(entry.timestamp))
+        self.levels.append(_LEVEL_CODES[entry.level])
+        self.sources.append(entry.source)
+        self.thread_ids.append(entry.thread_id)
+        self.user_ids.append(entry.user_id)
+        self.request_ids.append(entry.request_id)
+        self.message_buffer += entry.message.encode('utf-8')
+        self.message_offsets.append(len(self.message_buffer))
+    
+    def extend(self, entries: Iterable[LogEntry]) -> int:
+        """
+        Append many entries.
+        
+        Args:
+            entries (iterable): Entries to store
+            
+        Returns:
+            int: Number of entries appended
+        """
+        before = len(self)
+        for entry in entries:
+            self.append(entry)
+        return len(self) - before
+    
+    def __len__(self) -> int:
+        return len(self.levels)
+    
+    def __getitem__(self, index: int) -> LogEntryView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("log entry index out of range")
+        return LogEntryView(self, index)
+    
+    def __iter__(self) -> Iterator[LogEntryView]:
+        for index in range(len(self)):
+            yield LogEntryView(self, index)
+    
+    def message(self, index: int) -> str:
+        """Decode the message of one entry from the shared buffer."""
+        start, end = self.message_offsets[index], self.message_offsets[index + 1]
+        return str(self.message_buffer[start:end], 'utf-8')
+    
+    def level_counts(self) -> Dict[str, int]:
+        """
+        Count entries per log level.
+        
+        Returns:
+            dict: Mapping of level name to entry count (levels with no entries omitted)
+        """
+        levels = bytes(self.levels)
+        counts = {}
+        for code, level in enumerate(_LEVELS_BY_CODE):
+            count = levels.count(code)
+            if count:
+                counts[level.value] = count
+        return counts
+    
+    def time_bounds(self) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Get the earliest and latest timestamps.
+        
+        Returns:
+            tuple or None: (first, last) datetimes, or None when empty
+        """
+        if not self.timestamps:
+            return None
+        return _from_epoch_us(min(self.timestamps)), _from_epoch_us(max(self.timestamps))
+    
+    def timeline_counts(self, interval_minutes: int = 60) -> Dict[datetime, Dict[str, int]]:
+        """
+        Count entries per level in fixed-width time buckets.
+        
+        Args:
+            interval_minutes (int): Bucket width in minutes
+            
+        Returns:
+            dict: Bucket start time mapped to per-level counts, in time order
+        """
+        width = _interval_us(interval_minutes)
+        pairs = Counter(zip([_bucket_start(ts, width) for ts in self.timestamps], self.levels))
+        
+        timeline: Dict[datetime, Dict[str, int]] = {}
+        for bucket, code in sorted(pairs):
+            counts = timeline.setdefault(_from_epoch_us(bucket), {})
+            counts[_LEVELS_BY_CODE[code].value] = pairs[(bucket, code)]
+        return timeline
+    
+    def message_counts(self, levels: Iterable[LogLevel] = (LogLevel.ERROR, LogLevel.CRITICAL)) -> Counter:
+        """
+        Count identical messages among entries of the given levels.
+        
+        Args:
+            levels (iterable): Levels to include
+            
+        Returns:
+            Counter: Message text mapped to number of occurrences
+        """
+        wanted = bytes(_LEVEL_CODES[level] for level in levels)
+        buffer, offsets = self.message_buffer, self.message_offsets
+        
+        raw_counts = Counter(
+            bytes(buffer[offsets[index]:offsets[index + 1]])
+            for index, code in enumerate(self.levels) if code in wanted
+        )
+        return Counter({message.decode('utf-8'): count for message, count in raw_counts.items()})
+    
+    def build_indexes(self) -> None:
+        """
+        Build the time index and the per-level position index.
+        
+        Both are written to and restored from the on-disk cache.
+        """
+        self.time_index = TimeIndex.from_timestamps(self.timestamps)
+        
+        by_level = [array('Q') for _ in _LEVELS_BY_CODE]
+        for position, code in enumerate(self.levels):
+            by_level[code].append(position)
+        self.level_positions = array('Q')
+        self.level_offsets = [0]
+        for positions in by_level:
+            self.level_positions.extend(positions)
+            self.level_offsets.append(len(self.level_positions))
+    
+    def positions_for_level(self, level: LogLevel) -> Any:
+        """
+        Get the positions of all entries with one level, via the level index.
+        
+        Args:
+            level (LogLevel): Level to look up
+            
+        Returns:
+            sequence: Ascending entry positions
+        """
+        if self.level_offsets is None:
+            self.build_indexes()
+        code = _LEVEL_CODES[level]
+        return self.level_positions[self.level_offsets[code]:self.level_offsets[code + 1]]
+    
+    def range_positions(self, start_time: datetime, end_time: datetime) -> Any:
+        """
+        Get the positions of entries in a time range, via the time index.
+        
+        Args:
+            start_time (datetime): Start of range (inclusive)
+            end_time (datetime): End of range (inclusive)
+            
+        Returns:
+            sequence: Entry positions in timestamp order
+        """
+        if self.time_index is None:
+            self.build_indexes()
+        return self.time_index.range_positions(_to_epoch_us(start_time), _to_epoch_us(end_time))
+    
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the columns, in bytes.
+        
+        Returns:
+            int: Size of the arrays, message buffer and interned vocabularies
+        """
+        arrays = (self.timestamps, self.levels, self.message_offsets)
+        return (sum(column.itemsize * len(column) for column in arrays)
+                + len(self.message_buffer)
+                + sum(column.nbytes() for column in
+                      (self.sources, self.thread_ids, self.user_ids, self.request_ids)))
+
+class TimeIndex:
+    """
+    Sorted timestamp index for range queries with bisect.
+    
+    Keys are epoch microseconds kept in ascending order next to the position
+    of the entry they came from. In-order appends are O(1); an out-of-order
+    insert is placed with bisect and shifts the tail of the arrays.
+    """
+    
+    def __init__(self):
+        self.keys = array('q')
+        self.positions = array('Q')
+        self.out_of_order_inserts = 0
+    
+    @classmethod
+    def from_timestamps(cls, timestamps: Iterable[int]) -> "TimeIndex":
+        """
+        Build an index over a sequence of epoch-microsecond timestamps.
+        
+        Args:
+            timestamps (iterable): Timestamps, position i belongs to entry i
+            
+        Returns:
+            TimeIndex: Index sorted by timestamp (stable for equal keys)
+        """
+        timestamps = timestamps if isinstance(timestamps, array) else array('q', timestamps)
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        index = cls()
+        index.keys = array('q', [timestamps[position] for position in order])
+        index.positions = array('Q', order)
+        return index
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def add(self, timestamp_us: int, position: int) -> None:
+        """
+        Add one key, keeping the index sorted.
+        
+        Args:
+            timestamp_us (int): Entry timestamp in epoch microseconds
+            position (int): Position of the entry in its container
+        """
+        if not self.keys or timestamp_us >= self.keys[-1]:
+            self.keys.append(timestamp_us)
+            self.positions.append(position)
+            return
+        
+        slot = bisect_right(self.keys, timestamp_us)
+        self.keys.insert(slot, timestamp_us)
+        self.positions.insert(slot, position)
+        self.out_of_order_inserts += 1
+    
+    def range_positions(self, start_us: int, end_us: int) -> array:
+        """
+        Get entry positions with start_us <= timestamp <= end_us.
+        
+        Args:
+            start_us (int): Start of range in epoch microseconds
+            end_us (int): End of range in epoch microseconds
+            
+        Returns:
+            array: Positions in timestamp order
+        """
+        low = bisect_left(self.keys, start_us)
+        high = bisect_right(self.keys, end_us, low)
+        return self.positions[low:high]
+    
+    def iter_buckets(self, interval_us: int) -> Iterator[Tuple[int, int, int]]:
+        """
+        Walk the non-empty fixed-width time buckets.
+        
+        Each boundary is located with one bisect, so empty stretches of time
+        cost nothing and the walk is O(buckets * log n).
+        
+        Args:
+            interval_us (int): Bucket width in microseconds
+            
+        Yields:
+            tuple: (bucket_start_us, low, high) where positions[low:high]
+                fall into the bucket
+        """
+        if interval_us <= 0:
+            raise ValueError("interval must be positive")
+        
+        keys = self.keys
+        low = 0
+        while low < len(keys):
+            bucket = _bucket_start(keys[low], interval_us)
+            high = bisect_left(keys, bucket + interval_us, low)
+            yield bucket, low, high
+            low = high
+
+# Sidecar cache layout: magic, uint64 header length, JSON header, then
+# 8-byte aligned raw column sections described by the header.
+_CACHE_MAGIC = b"LACACHE\x01"
+_CACHE_VERSION = 1
+_CACHE_SUFFIX = ".lacache"
+_CACHE_COLUMNS = ('sources', 'thread_ids', 'user_ids', 'request_ids')
+
+def _cache_key(file_path: str, pattern_hash: str) -> Dict[str, Any]:
+    """Describe the source file state a cache is valid for."""
+    file_stat = os.stat(file_path)
+    return {
+        'version': _CACHE_VERSION,
+        'byteorder': sys.byteorder,
+        'size': file_stat.st_size,
+        'mtime_ns': file_stat.st_mtime_ns,
+        'pattern_hash': pattern_hash
+    }
+
+def _write_column_cache(cache_path: str, store: ColumnarLogStore, key: Dict[str, Any]) -> None:
+    """
+    Write a store and its indexes to a sidecar cache file.
+    
+    The file is written next to its final name and renamed into place, so
+    readers never see a partially written cache. On failure the temporary
+    file is removed and the OSError is re-raised.
+    """
+    if store.time_index is None or store.level_offsets is None:
+        store.build_indexes()
+    
+    sections = [
+        ('timestamps', store.timestamps),
+        ('levels', store.levels),
+        ('message_offsets', store.message_offsets),
+        ('message_buffer', store.message_buffer),
+        ('time_keys', store.time_index.keys),
+        ('time_positions', store.time_index.positions),
+        ('level_positions', store.level_positions),
+    ] + [(name, getattr(store, name).codes) for name in _CACHE_COLUMNS]
+    
+    layout, offset = {}, 0
+    for name, data in sections:
+        view = memoryview(data)
+        layout[name] = [offset, view.nbytes, view.format]
+        offset += (view.nbytes + 7) // 8 * 8
+    
+    header = json.dumps({
+        'key': key,
+        'count': len(store),
+        'level_offsets': store.level_offsets,
+        'vocabularies': {name: getattr(store, name).values[1:] for name in _CACHE_COLUMNS},
+        'sections': layout
+    }).encode('utf-8')
+    data_start = (len(_CACHE_MAGIC) + 8 + len(header) + 7) // 8 * 8
+    
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as handle:
+            handle.write(_CACHE_MAGIC)
+            handle.write(len(header).to_bytes(8, 'little'))
+            handle.write(header)
+            for name, data in sections:
+                handle.seek(data_start + layout[name][0])
+                handle.write(memoryview(data))
+            handle.truncate(data_start + offset)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _read_column_cache(cache_path: str, key: Dict[str, Any]) -> Optional[ColumnarLogStore]:
+    """
+    Map a sidecar cache back into a read-only store.
+    
+    Returns None when the cache is missing, unreadable, corrupt or was
+    written for a different file state or pattern set.
+    """
+    try:
+        handle = open(cache_path, 'rb')
+    except OSError:
+        return None
+    
+    with handle:
+        if os.fstat(handle.fileno()).st_size < len(_CACHE_MAGIC) + 8:
+            return None
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    try:
+        if mapping[:len(_CACHE_MAGIC)] != _CACHE_MAGIC:
+            raise ValueError("bad magic")
+        header_start = len(_CACHE_MAGIC) + 8
+        header_length = int.from_bytes(mapping[len(_CACHE_MAGIC):header_start], 'little')
+        header = json.loads(mapping[header_start:header_start + header_length])
+        if header['key'] != key:
+            raise ValueError("stale cache")
+        
+        data_start = (header_start + header_length + 7) // 8 * 8
+        buffer = memoryview(mapping)
+        
+        def section(name: str) -> memoryview:
+            offset, length, view_format = header['sections'][name]
+            start = data_start + offset
+            if start + length > len(mapping):
+                raise ValueError("truncated cache")
+            return buffer[start:start + length].cast(view_format)
+        
+        store = ColumnarLogStore()
+        store.timestamps = section('timestamps')
+        store.levels = section('levels')
+        store.message_offsets = section('message_offsets')
+        store.message_buffer = section('message_buffer')
+        for name in _CACHE_COLUMNS:
+            column = getattr(store, name)
+            column.codes = section(name)
+            column.values = [None] + [sys.intern(value) for value in header['vocabularies'][name]]
+        
+        store.time_index = TimeIndex()
+        store.time_index.keys = section('time_keys')
+        store.time_index.positions = section('time_positions')
+        store.level_positions = section('level_positions')
+        store.level_offsets = header['level_offsets']
+        store.read_only = True
+        store._mapping = mapping
+        return store
+    except (ValueError, KeyError, TypeError):
+        # Views into the mapping may still exist; let garbage collection unmap it
+        return None
+
+_REGEX_METACHARACTERS = set('.^$*+?{}[]|()')
+_QUANTIFIERS = set('*+?{')
+_INLINE_FLAGS = re.compile(r'\(\?[aiLmsux]+[:)]')
+
+def _required_literal(pattern: str) -> str:
+    """
+    Find a literal substring that every match of a regex must contain.
+    
+    Only top-level literal runs are considered; groups, character classes,
+    escapes like \\d and optional characters end a run. Patterns with a
+    top-level alternation or inline flags return an empty string, which
+    disables prefiltering for them.
+    
+    Args:
+        pattern (str): Regex pattern
+        
+    Returns:
+        str: Longest required literal, or "" if none could be proven
+    """
+    if _INLINE_FLAGS.search(pattern):
+        return ""
+    
+    runs, current = [], []
+    depth, i = 0, 0
+    while i < len(pattern):
+        char = pattern[i]
+        literal = None
+        if char == '\\' and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            i += 2
+            if depth == 0 and not escaped.isalnum():
+                literal = escaped
+        elif char == '[':
+            # Skip the whole character class, including an escaped or leading ']'
+            i += 2 if pattern[i + 1:i + 2] == ']' else 1
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            i += 1
+        elif char == '{':
+            # Skip a {m,n} quantifier body; the quantified char was already dropped
+            close = pattern.find('}', i)
+            i = len(pattern) if close == -1 else close + 1
+        elif char == '(':
+            depth += 1
+            i += 1
+        elif char == ')':
+            depth -= 1
+            i += 1
+        elif char == '|':
+            if depth == 0:
+                return ""
+            i += 1
+        else:
+            i += 1
+            if depth == 0 and char not in _REGEX_METACHARACTERS:
+                literal = char
+        
+        if literal is not None and pattern[i:i + 1] not in _QUANTIFIERS:
+            current.append(literal)
+            continue
+        if literal is not None and pattern[i:i + 1] == '+':
+            # One occurrence is still required; the run cannot continue past it
+            current.append(literal)
+        runs.append("".join(current))
+        current = []
+    runs.append("".join(current))
+    return max(runs, key=len)
+
+class PatternEngine:
+    """
+    Compiled, prefiltered form of a set of named regex patterns.
+    
+    Every pattern is compiled once. Patterns with a required literal (e.g.
+    "@" for emails or "user" for user ids) are only run on text containing
+    that literal, which skips most regex passes on typical log lines.
+    Engines are cached per pattern set; use PatternEngine.for_patterns.
+    """
+    
+    def __init__(self, patterns: Dict[str, str]):
+        """
+        Compile a pattern set.
+        
+        Args:
+            patterns (dict): Pattern name mapped to regex string
+        """
+        self.patterns = dict(patterns)
+        self.compiled = {name: re.compile(pattern) for name, pattern in self.patterns.items()}
+        self.prefilters = {name: _required_literal(pattern) for name, pattern in self.patterns.items()}
+        self._plan = [(name, self.prefilters[name], self.compiled[name])
+                      for name in self.patterns]
+    
+    @classmethod
+    def for_patterns(cls, patterns: Dict[str, str]) -> "PatternEngine":
+        """
+        Get the cached engine for a pattern set, compiling it on first use.
+        
+        Args:
+            patterns (dict): Pattern name mapped to regex string
+            
+        Returns:
+            PatternEngine: Shared engine for this exact set of patterns
+        """
+        return _cached_pattern_engine(tuple(sorted(patterns.items())))
+    
+    def search(self, name: str, text: str) -> Optional[re.Match]:
+        """
+        Search text with one named pattern.
+        
+        Args:
+            name (str): Pattern name
+            text (str): Text to search
+            
+        Returns:
+            Match or None: First match, if any
+        """
+        literal = self.prefilters[name]
+        if literal and literal not in text:
+            return None
+        return self.compiled[name].search(text)
+    
+    def extract(self, text: str) -> Dict[str, List[Any]]:
+        """
+        Run every pattern over text.
+        
+        Args:
+            text (str): Text to search
+            
+        Returns:
+            dict: Pattern name mapped to re.findall results, for patterns that matched
+        """
+        found = {}
+        for name, literal, compiled in self._plan:
+            if literal and literal not in text:
+                continue
+            matches = compiled.findall(text)
+            if matches:
+                found[name] = matches
+        return found
+    
+    def extract_first(self, text: str) -> Dict[str, str]:
+        """
+        Get the first match of every pattern.
+        
+        Args:
+            text (str): Text to search
+            
+        Returns:
+            dict: Pattern name mapped to the first capture group (or whole
+                match for patterns without groups), for patterns that matched
+        """
+        found = {}
+        for name, literal, compiled in self._plan:
+            if literal and literal not in text:
+                continue
+            match = compiled.search(text)
+            if match:
+                found[name] = match.group(1) if compiled.groups else match.group(0)
+        return found
+
+@lru_cache(maxsize=32)
+def _cached_pattern_engine(pattern_items: Tuple[Tuple[str, str], ...]) -> PatternEngine:
+    """Build (once per distinct pattern set) the engine for PatternEngine.for_patterns."""
+    return PatternEngine(dict(pattern_items))
+
+class SpaceSavingCounter:
+    """
+    Space-Saving sketch for approximate top-N counting.
+    
+    At most ``capacity`` items are tracked. When a new item arrives and the
+    sketch is full, the item with the smallest count is replaced and the new
+    item inherits that count as its error. Guarantees, with N the total
+    number of added occurrences:
+    
+    - every reported count overestimates the true count by at most
+      error(item) <= N / capacity, and never underestimates it;
+    - every item whose true count exceeds N / capacity is tracked.
+    
+    Merging two sketches keeps these bounds with N = N1 + N2.
+    """
+    
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize an empty sketch.
+        
+        Args:
+            capacity (int): Maximum number of tracked items
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self.counts: Dict[Any, int] = {}
+        self.errors: Dict[Any, int] = {}
+        self._heap: List[Tuple[int, int, Any]] = []
+        self._sequence = 0
+    
+    def _push(self, item: Any) -> None:
+        # Lazy min-heap: stale (count, item) pairs are skipped on eviction
+        self._sequence += 1
+        heapq.heappush(self._heap, (self.counts[item], self._sequence, item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, index, key) for index, (key, count) in enumerate(self.counts.items())]
+            heapq.heapify(self._heap)
+    
+    def _pop_minimum(self) -> Tuple[Any, int]:
+        while True:
+            count, _, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return item, count
+    
+    def add(self, item: Any, count: int = 1) -> None:
+        """
+        Count occurrences of an item.
+        
+        Args:
+            item: Hashable item, e.g. an error message
+            count (int): Number of occurrences to add
+        """
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            evicted, minimum = self._pop_minimum()
+            del self.counts[evicted]
+            del self.errors[evicted]
+            self.counts[item] = minimum + count
+            self.errors[item] = minimum
+        self._push(item)
+    
+    @property
+    def error_bound(self) -> float:
+        """Maximum overestimate of any reported count (N / capacity)."""
+        return self.total / self.capacity
+    
+    def estimate(self, item: Any) -> Tuple[int, int]:
+        """
+        Estimate the count of one item.
+        
+        Args:
+            item: Item to look up
+            
+        Returns:
+            tuple: (estimated_count, max_overestimate); untracked items
+                report (0, smallest tracked count) when the sketch is full
+        """
+        if item in self.counts:
+            return self.counts[item], self.errors[item]
+        return 0, self._floor()
+    
+    def _floor(self) -> int:
+        """Upper bound on the count of any untracked item."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+    
+    def top(self, n: int = 10) -> List[Tuple[Any, int]]:
+        """
+        Get the n items with the highest estimated counts.
+        
+        Args:
+            n (int): Number of items to return
+            
+        Returns:
+            list: (item, estimated_count) tuples, highest first
+        """
+        return heapq.nlargest(n, self.counts.items(), key=lambda pair: pair[1])
+    
+    def merge(self, other: "SpaceSavingCounter") -> "SpaceSavingCounter":
+        """
+        Combine two sketches, e.g. built from different files.
+        
+        Items missing from a full sketch are assumed to have that sketch's
+        smallest count, which keeps every merged count an overestimate.
+        
+        Args:
+            other (SpaceSavingCounter): Sketch to merge with
+            
+        Returns:
+            SpaceSavingCounter: New sketch with this sketch's capacity
+        """
+        floor_a, floor_b = self._floor(), other._floor()
+        combined = {}
+        for item in set(self.counts) | set(other.counts):
+            count = self.counts.get(item, floor_a) + other.counts.get(item, floor_b)
+            error = self.errors.get(item, floor_a) + other.errors.get(item, floor_b)
+            combined[item] = (count, error)
+        
+        merged = SpaceSavingCounter(self.capacity)
+        merged.total = self.total + other.total
+        for item, (count, error) in heapq.nlargest(self.capacity, combined.items(),
+                                                   key=lambda pair: pair[1][0]):
+            merged.counts[item] = count
+            merged.errors[item] = error
+            merged._push(item)
+        return merged
+
+class LatencyHistogram:
+    """
+    Log-bucketed (HDR-style) histogram for approximate percentiles.
+    
+    Positive values fall into buckets whose bounds grow geometrically by
+    gamma = (1 + relative_error) / (1 - relative_error). Reporting each
+    bucket by its midpoint means every percentile is within
+    ``relative_error`` of a true sample value at that rank, regardless of
+    how many samples were added. Memory grows with log(max / min), not
+    with the number of samples. Histograms with the same relative_error
+    merge by adding bucket counts.
+    """
+    
+    def __init__(self, relative_error: float = 0.01):
+        """
+        Initialize an empty histogram.
+        
+        Args:
+            relative_error (float): Relative accuracy of reported values, in (0, 1)
+        """
+        if not 0 < relative_error < 1:
+            raise ValueError("relative_error must be in (0, 1)")
+        self.relative_error = relative_error
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = defaultdict(int)
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+    
+    def add(self, value: float) -> None:
+        """
+        Record one latency sample.
+        
+        Args:
+            value (float): Latency (values <= 0 are counted as zero)
+        """
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            self.buckets[math.ceil(math.log(value) / self._log_gamma)] += 1
+    
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Get an approximate percentile.
+        
+        Args:
+            percent (float): Percentile in [0, 100]
+            
+        Returns:
+            float or None: Approximate value at that percentile, None if empty
+        """
+        if not 0 <= percent <= 100:
+            raise ValueError("percent must be in [0, 100]")
+        if self.count == 0:
+            return None
+        
+        rank = percent / 100 * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+    
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+    
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """
+        Combine two histograms, e.g. built from different files.
+        
+        Args:
+            other (LatencyHistogram): Histogram with the same relative_error
+            
+        Returns:
+            LatencyHistogram: New histogram holding both sets of samples
+        """
+        if other.relative_error != self.relative_error:
+            raise ValueError("Cannot merge histograms with different relative_error")
+        merged = LatencyHistogram(self.relative_error)
+        for source in (self, other):
+            for index, count in source.buckets.items():
+                merged.buckets[index] += count
+            merged.zero_count += source.zero_count
+            merged.count += source.count
+            merged.total += source.total
+        bounds = [value for value in (self.min, other.min, self.max, other.max) if value is not None]
+        if bounds:
+            merged.min, merged.max = min(bounds), max(bounds)
+        return merged
+    
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get the usual latency figures.
+        
+        Returns:
+            dict: count, avg/min/max latency, p50/p90/p95/p99 and relative_error
+        """
+        return {
+            'count': self.count,
+            'avg_latency': self.mean or 0.0,
+            'min_latency': self.min,
+            'max_latency': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'relative_error': self.relative_error
+        }
+
+# Literal attack signatures, matched case-insensitively anywhere in a message
+SECURITY_SIGNATURES = {
+    'sql_injection': ["' or '1'='1", "' or 1=1", "\" or \"1\"=\"1", "union select",
+                      "drop table", "information_schema", "xp_cmdshell", "sleep(", "'; --"],
+    'xss': ["<script", "javascript:", "onerror=", "onload=", "document.cookie"],
+    'path_traversal': ["../", "..\\", "%2e%2e%2f", "/etc/passwd", "/etc/shadow"],
+    'command_injection': ["; rm -rf", "&& cat ", "| nc ", "$(curl", "$(wget", "/bin/sh"],
+}
+
+_FAILED_LOGIN = re.compile(
+    r'failed (?:login|password|authentication)|login failed'
+    r'|authentication failed|invalid (?:password|credentials)'
+)
+
+_IP_ADDRESS = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
+
+class SecurityScanner:
+    """
+    Single-pass security scanner for log entries.
+    
+    Each message is lowercased once and all literal signatures are folded
+    into one alternation (longest first), so a message is scanned by the C
+    regex engine once for signatures and once for failed logins regardless
+    of how many signatures are configured; the IP address is only extracted
+    from messages that produced a finding. Failed logins
+    are counted per source IP in a sliding time window to detect brute
+    force attempts; only timestamps inside the window are kept, and IPs
+    with none are forgotten once the IP map has doubled since the last
+    prune, so pruning stays amortized O(1) per entry.
+    """
+    
+    # IP map size below which idle IPs are never pruned
+    PRUNE_THRESHOLD = 10_000
+    
+    def __init__(self, signatures: Optional[Dict[str, List[str]]] = None,
+                 brute_force_threshold: int = 5, window_seconds: int = 60):
+        """
+        Initialize the scanner.
+        
+        Args:
+            signatures (dict, optional): Issue type mapped to literal
+                signatures; defaults to SECURITY_SIGNATURES
+            brute_force_threshold (int): Failed logins from one IP within the
+                window that count as brute force
+            window_seconds (int): Sliding window length in seconds
+        """
+        signatures = SECURITY_SIGNATURES if signatures is None else signatures
+        self._categories = {literal.casefold(): category
+                            for category, literals in signatures.items()
+                            for literal in literals}
+        literals = sorted(self._categories, key=len, reverse=True)
+        # Matched case-insensitively against the original message so the
+        # match offsets index the text the signature is sliced from
+        self._signature_regex = (re.compile('|'.join(map(re.escape, literals)), re.IGNORECASE)
+                                 if literals else None)
+        self.brute_force_threshold = brute_force_threshold
+        self.window = timedelta(seconds=window_seconds)
+        self._failed_logins: Dict[str, deque] = defaultdict(deque)
+        self._prune_at = self.PRUNE_THRESHOLD
+    
+    def scan_entry(self, entry: LogEntry) -> List[Dict[str, Any]]:
+        """
+        Scan one entry.
+        
+        Args:
+            entry (LogEntry): Entry to scan
+            
+        Returns:
+            list: Issues found in this entry (brute force is reported on the
+                entry that crosses the threshold)
+        """
+        message = entry.message
+        issues = []
+        if self._signature_regex is not None:
+            reported = set()
+            for match in self._signature_regex.finditer(message):
+                signature = match.group()
+                category = self._categories[signature.casefold()]
+                if category in reported:
+                    continue
+                reported.add(category)
+                issues.append({
+                    'type': category,
+                    'severity': 'high',
+                    'description': f"{category.replace('_', ' ')} signature {signature!r}: {message}",
+                    'signature': signature,
+                    'timestamp': entry.timestamp,
+                    'ip_address': None
+                })
+        
+        failed_login = _FAILED_LOGIN.search(message.lower()) is not None
+        if not issues and not failed_login:
+            return issues
+        ip_match = _IP_ADDRESS.search(message)
+        ip_address = ip_match.group() if ip_match else None
+        for issue in issues:
+            issue['ip_address'] = ip_address
+        
+        if failed_login and ip_address:
+            attempts = self._failed_logins[ip_address]
+            attempts.append(entry.timestamp)
+            while attempts and entry.timestamp - attempts[0] > self.window:
+                attempts.popleft()
+            if len(attempts) == self.brute_force_threshold:
+                issues.append({
+                    'type': 'brute_force',
+                    'severity': 'critical',
+                    'description': (f"{len(attempts)} failed logins from {ip_address} "
+                                    f"within {int(self.window.total_seconds())}s"),
+                    'signature': None,
+                    'timestamp': entry.timestamp,
+                    'ip_address': ip_address
+                })
+        return issues
+    
+    def scan(self, entries: Iterable[LogEntry]) -> Iterator[Dict[str, Any]]:
+        """
+        Scan a stream of entries in time order.
+        
+        Args:
+            entries (iterable): Entries to scan
+            
+        Yields:
+            dict: Issues with type, severity, description, timestamp and ip_address
+        """
+        for entry in entries:
+            yield from self.scan_entry(entry)
+            if len(self._failed_logins) > self._prune_at:
+                self._prune(entry.timestamp)
+    
+    def _prune(self, now: datetime) -> None:
+        """Forget IPs with no failed login inside the window."""
+        for ip_address in [ip for ip, attempts in self._failed_logins.items()
+                           if not attempts or now - attempts[-1] > self.window]:
+            del self._failed_logins[ip_address]
+        # Live IPs are kept, so wait for the map to double before scanning
+        # it again; the entries added in between pay for the next prune
+        self._prune_at = max(self.PRUNE_THRESHOLD, 2 * len(self._failed_logins))
+
 class LogAnalyzer:
     """
     Comprehensive log file analyzer with pattern matching and statistics.
@@ -53,6 +1383,8 @@ class LogAnalyzer:
             'request_id': r'request[_-]?id[:\s=]+([a-zA-Z0-9-]+)'
         }
         self.custom_patterns = {}
+        self.column_store: Optional[ColumnarLogStore] = None
+        self.time_index: Optional[TimeIndex] = None
     
     def parse_log_line(self, line: str, log_format: str = "standard") -> Optional[LogEntry]:
         """
@@ -82,7 +1414,260 @@ class LogAnalyzer:
             
         TODO: Implement this method
         """
-        pass
+        pass
+    
+    def iter_log_file(self, file_path: str, log_format: str = "standard",
+                      chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[LogEntry]:
+        """
+        Lazily parse a log file without storing the entries.
+        
+        Unlike load_log_file, nothing is added to self.log_entries; entries are
+        produced one at a time so the stream can be fed through the
+        stream_filter_by_level, stream_filter_by_time_range and
+        stream_search_by_pattern stages:
+        
+            entries = analyzer.iter_log_file("app.log")
+            errors = analyzer.stream_filter_by_level(entries, LogLevel.ERROR)
+            for entry in analyzer.stream_search_by_pattern(errors, "timeout", False):
+                ...
+        
+        Args:
+            file_path (str): Path to log file
+            log_format (str): Log format type
+            chunk_size (int): Approximate number of bytes read per window
+            
+        Yields:
+            LogEntry: Successfully parsed entries, in file order
+        """
+        for line in _iter_log_lines(file_path, chunk_size):
+            if not line.strip():
+                continue
+            entry = self.parse_log_line(line, log_format)
+            if entry is not None:
+                yield entry
+    
+    def load_log_file_cached(self, file_path: str, log_format: str = "standard",
+                             cache_path: Optional[str] = None) -> int:
+        """
+        Load a log file into self.column_store through a sidecar cache.
+        
+        The cache holds the parsed columns plus the time and level indexes
+        and is keyed by the file's size and mtime and by a hash of the
+        pattern set, log format and analyzer class. A valid cache is
+        memory-mapped instead of re-parsing; a missing or stale one is
+        rebuilt by parsing the file. Failing to write the cache does not
+        fail the load.
+        
+        Args:
+            file_path (str): Path to log file
+            log_format (str): Log format type
+            cache_path (str, optional): Cache location; defaults to
+                file_path + ".lacache"
+            
+        Returns:
+            int: Number of entries in the loaded store
+        """
+        cache_path = cache_path or file_path + _CACHE_SUFFIX
+        key = _cache_key(file_path, self._pattern_set_hash(log_format))
+        
+        store = _read_column_cache(cache_path, key)
+        if store is None:
+            store = ColumnarLogStore()
+            store.extend(self.iter_log_file(file_path, log_format))
+            store.build_indexes()
+            if _cache_key(file_path, key['pattern_hash']) == key:
+                try:
+                    _write_column_cache(cache_path, store, key)
+                except OSError:
+                    # The cache only saves work; an unwritable location
+                    # leaves the freshly parsed store usable
+                    pass
+        
+        self.column_store = store
+        return len(store)
+    
+    def _pattern_set_hash(self, log_format: str) -> str:
+        """Fingerprint everything that influences how lines are parsed."""
+        parser = type(self)
+        fingerprint = json.dumps({
+            'parser': f"{parser.__module__}.{parser.__qualname__}",
+            'log_format': log_format,
+            'patterns': self.patterns,
+            'custom_patterns': self.custom_patterns
+        }, sort_keys=True)
+        return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+    
+    def iter_log_files(self, paths: Any, log_format: str = "standard") -> Iterator[LogEntry]:
+        """
+        Lazily parse several (possibly compressed) log files in time order.
+        
+        Files are ordered by the timestamp of their first parsable entry, so
+        rotated sets such as app.log, app.log.1.gz, app.log.2.bz2 come out
+        oldest first regardless of their names. Files with no parsable
+        entries are skipped.
+        
+        Args:
+            paths (str or list): Glob pattern, or an explicit list of paths
+            log_format (str): Log format type
+            
+        Yields:
+            LogEntry: Entries of all files, file by file in timestamp order
+        """
+        file_paths = sorted(glob.glob(paths)) if isinstance(paths, str) else list(paths)
+        
+        first_timestamps = []
+        for file_path in file_paths:
+            entries = self.iter_log_file(file_path, log_format)
+            first = next(entries, None)
+            entries.close()
+            if first is not None:
+                first_timestamps.append((first.timestamp, file_path))
+        
+        first_timestamps.sort(key=lambda pair: pair[0])
+        return chain.from_iterable(self.iter_log_file(file_path, log_format)
+                                   for _, file_path in first_timestamps)
+    
+    def load_log_files(self, paths: Any, log_format: str = "standard") -> int:
+        """
+        Load several (possibly compressed) log files in timestamp order.
+        
+        Args:
+            paths (str or list): Glob pattern, or an explicit list of paths
+            log_format (str): Log format type
+            
+        Returns:
+            int: Number of entries appended to self.log_entries
+        """
+        before = len(self.log_entries)
+        self.log_entries.extend(self.iter_log_files(paths, log_format))
+        return len(self.log_entries) - before
+    
+    def load_log_file_columnar(self, file_path: str, log_format: str = "standard") -> int:
+        """
+        Stream a log file into a ColumnarLogStore kept in self.column_store.
+        
+        Use this instead of load_log_file for large files: the store's
+        level_counts, time_bounds, timeline_counts and message_counts back
+        generate_statistics, generate_timeline and find_frequent_errors
+        without holding a LogEntry per line.
+        
+        Args:
+            file_path (str): Path to log file
+            log_format (str): Log format type
+            
+        Returns:
+            int: Number of entries added to the store
+        """
+        if self.column_store is None:
+            self.column_store = ColumnarLogStore()
+        return self.column_store.extend(self.iter_log_file(file_path, log_format))
+    
+    def load_log_file_parallel(self, file_path: str, log_format: str = "standard",
+                               workers: Optional[int] = None,
+                               ranges_per_worker: int = 4,
+                               mp_context: Optional[Any] = None) -> int:
+        """
+        Parse a log file across worker processes and append the entries.
+        
+        The file is cut into newline-aligned byte ranges which are parsed by
+        a ProcessPoolExecutor using this analyzer's class, patterns and
+        custom_patterns. Results are merged back in file order. Compressed
+        files cannot be split and are parsed sequentially. Workers started
+        with spawn or forkserver must import the analyzer's module by name;
+        when they cannot, the ranges are parsed sequentially in this process.
+        
+        Args:
+            file_path (str): Path to log file
+            log_format (str): Log format type
+            workers (int, optional): Number of processes; defaults to CPU count
+            ranges_per_worker (int): Ranges per process, for load balancing
+            mp_context (optional): multiprocessing context for the pool;
+                defaults to the current start method
+            
+        Returns:
+            int: Number of successfully parsed entries
+        """
+        if _detect_compression(file_path) is not None:
+            # Compressed streams cannot be split at byte offsets
+            return self._merge_parsed_ranges([list(self.iter_log_file(file_path, log_format))])
+        
+        workers = workers or os.cpu_count() or 1
+        ranges = _newline_aligned_ranges(file_path, workers * max(1, ranges_per_worker))
+        
+        jobs = [(type(self), self.patterns, self.custom_patterns, file_path, start, end, log_format)
+                for start, end in ranges]
+        mp_context = mp_context or multiprocessing.get_context()
+        forked = mp_context.get_start_method() == 'fork'
+        if workers == 1 or len(jobs) <= 1 or not (forked or _importable_by_workers(type(self))):
+            results = (_parse_byte_range(*job) for job in jobs)
+            return self._merge_parsed_ranges(results)
+        
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+            # map() yields results in submission order, i.e. file order
+            results = executor.map(_parse_byte_range, *zip(*jobs))
+            return self._merge_parsed_ranges(results)
+    
+    def _merge_parsed_ranges(self, results: Iterable[List[LogEntry]]) -> int:
+        """Append per-range results to self.log_entries and return the count."""
+        loaded = 0
+        for entries in results:
+            self.log_entries.extend(entries)
+            loaded += len(entries)
+        return loaded
+    
+    def follow(self, file_path: str, log_format: str = "standard",
+               interval_minutes: int = 60, from_start: bool = True,
+               store_entries: bool = False) -> "LogFollower":
+        """
+        Start following a live log file.
+        
+        Call poll() on the returned follower periodically; its stats
+        attribute holds rolling counters updated in O(new lines).
+        
+        Args:
+            file_path (str): Path of the log file to follow
+            log_format (str): Log format type
+            interval_minutes (int): Timeline bucket width for the rolling stats
+            from_start (bool): Parse existing content on the first poll
+            store_entries (bool): Also append parsed entries to self.log_entries
+            
+        Returns:
+            LogFollower: Follower bound to this analyzer
+        """
+        return LogFollower(self, file_path, log_format, interval_minutes,
+                           from_start, store_entries)
+    
+    def add_entry(self, entry: LogEntry) -> None:
+        """
+        Append an entry to self.log_entries and keep the time index current.
+        
+        Entries may arrive out of timestamp order; the index places them with
+        bisect instead of being rebuilt.
+        
+        Args:
+            entry (LogEntry): Parsed entry to store
+        """
+        self.log_entries.append(entry)
+        if self.time_index is not None and len(self.time_index) == len(self.log_entries) - 1:
+            self.time_index.add(_to_epoch_us(entry.timestamp), len(self.log_entries) - 1)
+    
+    def build_time_index(self) -> TimeIndex:
+        """
+        Sort the timestamps of self.log_entries into a fresh TimeIndex.
+        
+        Returns:
+            TimeIndex: The index, also stored in self.time_index
+        """
+        self.time_index = TimeIndex.from_timestamps(
+            _to_epoch_us(entry.timestamp) for entry in self.log_entries
+        )
+        return self.time_index
+    
+    def _current_time_index(self) -> TimeIndex:
+        """Return the time index, rebuilding it if entries were added behind its back."""
+        if self.time_index is None or len(self.time_index) != len(self.log_entries):
+            return self.build_time_index()
+        return self.time_index
     
     def filter_by_level(self, level: LogLevel) -> List[LogEntry]:
         """
@@ -114,6 +1699,25 @@ class LogAnalyzer:
         """
         pass
     
+    def filter_by_time_range_indexed(self, start_time: datetime,
+                                     end_time: datetime) -> List[LogEntry]:
+        """
+        Filter log entries by time range using the sorted time index.
+        
+        Runs in O(log n + k) instead of scanning every entry.
+        
+        Args:
+            start_time (datetime): Start of time range (inclusive)
+            end_time (datetime): End of time range (inclusive)
+            
+        Returns:
+            list: Entries in the range, ordered by timestamp
+        """
+        positions = self._current_time_index().range_positions(
+            _to_epoch_us(start_time), _to_epoch_us(end_time)
+        )
+        return [self.log_entries[position] for position in positions]
+    
     def search_by_pattern(self, pattern: str, use_regex: bool = True) -> List[LogEntry]:
         """
         Search log entries by pattern.
@@ -129,6 +1733,64 @@ class LogAnalyzer:
         """
         pass
     
+    def stream_filter_by_level(self, entries: Iterable[LogEntry],
+                               level: LogLevel) -> Iterator[LogEntry]:
+        """
+        Pipeline stage that keeps entries of one severity level.
+        
+        Args:
+            entries (iterable): Source entries, e.g. from iter_log_file
+            level (LogLevel): Log level to keep
+            
+        Yields:
+            LogEntry: Entries with the requested level
+        """
+        for entry in entries:
+            if entry.level == level:
+                yield entry
+    
+    def stream_filter_by_time_range(self, entries: Iterable[LogEntry],
+                                    start_time: datetime,
+                                    end_time: datetime) -> Iterator[LogEntry]:
+        """
+        Pipeline stage that keeps entries inside a time range (inclusive).
+        
+        Args:
+            entries (iterable): Source entries, e.g. from iter_log_file
+            start_time (datetime): Start of time range
+            end_time (datetime): End of time range
+            
+        Yields:
+            LogEntry: Entries whose timestamp lies in the range
+        """
+        for entry in entries:
+            if start_time <= entry.timestamp <= end_time:
+                yield entry
+    
+    def stream_search_by_pattern(self, entries: Iterable[LogEntry], pattern: str,
+                                 use_regex: bool = True) -> Iterator[LogEntry]:
+        """
+        Pipeline stage that keeps entries whose message matches a pattern.
+        
+        Args:
+            entries (iterable): Source entries, e.g. from iter_log_file
+            pattern (str): Search pattern
+            use_regex (bool): Whether to use regex matching; plain text
+                matching is case-insensitive
+            
+        Yields:
+            LogEntry: Matching entries
+        """
+        if use_regex:
+            matcher = re.compile(pattern).search
+        else:
+            needle = pattern.lower()
+            matcher = lambda message: needle in message.lower()
+        
+        for entry in entries:
+            if matcher(entry.message):
+                yield entry
+    
     def find_error_patterns(self) -> Dict[str, List[LogEntry]]:
         """
         Find common error patterns in logs.
@@ -168,6 +1830,29 @@ class LogAnalyzer:
         """
         pass
     
+    def detect_anomalies_streaming(self, entries: Optional[Iterable[LogEntry]] = None,
+                                   threshold_multiplier: float = 2.0,
+                                   interval_minutes: int = 5, alpha: float = 0.3,
+                                   warmup_buckets: int = 5) -> Iterator[Dict[str, Any]]:
+        """
+        Detect volume and error-count anomalies in a single bounded-memory pass.
+        
+        Args:
+            entries (iterable, optional): Entries in time order, e.g. from
+                iter_log_file; defaults to self.log_entries
+            threshold_multiplier (float): Standard deviations above the
+                moving mean that count as an anomaly
+            interval_minutes (int): Bucket width in minutes
+            alpha (float): EWMA smoothing factor
+            warmup_buckets (int): Buckets used to seed the baseline
+            
+        Yields:
+            dict: Anomalies with type, timestamp, value, expected and threshold
+        """
+        detector = StreamingAnomalyDetector(interval_minutes, threshold_multiplier,
+                                            ('volume', 'errors'), alpha, warmup_buckets)
+        return detector.process(self.log_entries if entries is None else entries)
+    
     def generate_statistics(self) -> Dict[str, Any]:
         """
         Generate comprehensive log statistics.
@@ -193,6 +1878,43 @@ class LogAnalyzer:
         """
         pass
     
+    def build_error_sketch(self, entries: Optional[Iterable[LogEntry]] = None,
+                           capacity: int = 1000) -> SpaceSavingCounter:
+        """
+        Count ERROR/CRITICAL messages into a mergeable Space-Saving sketch.
+        
+        Sketches built per file can be combined with SpaceSavingCounter.merge.
+        
+        Args:
+            entries (iterable, optional): Entries to scan; defaults to self.log_entries
+            capacity (int): Number of distinct messages tracked
+            
+        Returns:
+            SpaceSavingCounter: Sketch of error message counts
+        """
+        sketch = SpaceSavingCounter(capacity)
+        for entry in (self.log_entries if entries is None else entries):
+            if entry.level in (LogLevel.ERROR, LogLevel.CRITICAL):
+                sketch.add(entry.message)
+        return sketch
+    
+    def find_frequent_errors_approx(self, top_n: int = 10, capacity: int = 1000,
+                                    entries: Optional[Iterable[LogEntry]] = None) -> List[Tuple[str, int]]:
+        """
+        Find the most frequent error messages in bounded memory.
+        
+        Counts may overestimate by at most (number of errors) / capacity.
+        
+        Args:
+            top_n (int): Number of top errors to return
+            capacity (int): Number of distinct messages tracked
+            entries (iterable, optional): Entries to scan; defaults to self.log_entries
+            
+        Returns:
+            list: List of (error_message, estimated_count) tuples
+        """
+        return self.build_error_sketch(entries, capacity).top(top_n)
+    
     def analyze_user_activity(self) -> Dict[str, Any]:
         """
         Analyze user activity patterns from logs.
@@ -215,6 +1937,26 @@ class LogAnalyzer:
         """
         pass
     
+    def scan_security_issues(self, entries: Optional[Iterable[LogEntry]] = None,
+                             brute_force_threshold: int = 5,
+                             window_seconds: int = 60) -> List[Dict[str, Any]]:
+        """
+        Scan entries for attack signatures and brute-force logins in one pass.
+        
+        Args:
+            entries (iterable, optional): Entries in time order, e.g. from
+                iter_log_file; defaults to self.log_entries
+            brute_force_threshold (int): Failed logins from one IP within the
+                window that count as brute force
+            window_seconds (int): Sliding window length in seconds
+            
+        Returns:
+            list: List of potential security issues
+        """
+        scanner = SecurityScanner(brute_force_threshold=brute_force_threshold,
+                                  window_seconds=window_seconds)
+        return list(scanner.scan(self.log_entries if entries is None else entries))
+    
     def generate_timeline(self, interval_minutes: int = 60) -> Dict[datetime, Dict[str, int]]:
         """
         Generate a timeline of log events.
@@ -229,6 +1971,28 @@ class LogAnalyzer:
         """
         pass
     
+    def generate_timeline_indexed(self, interval_minutes: int = 60) -> Dict[datetime, Dict[str, int]]:
+        """
+        Generate a timeline of log events from the sorted time index.
+        
+        Bucket boundaries are found by bisecting the index, so no per-entry
+        datetime arithmetic is needed and empty intervals are skipped.
+        
+        Args:
+            interval_minutes (int): Time interval for grouping events
+            
+        Returns:
+            dict: Bucket start time mapped to per-level counts, in time order
+        """
+        width = _interval_us(interval_minutes)
+        index = self._current_time_index()
+        timeline = {}
+        for bucket, low, high in index.iter_buckets(width):
+            counts = Counter(self.log_entries[position].level.value
+                             for position in index.positions[low:high])
+            timeline[_from_epoch_us(bucket)] = dict(counts)
+        return timeline
+    
     def export_analysis_report(self, file_path: str, format_type: str = "json") -> bool:
         """
         Export analysis report to file.
@@ -256,6 +2020,31 @@ class LogAnalyzer:
         """
         pass
     
+    def get_pattern_engine(self) -> PatternEngine:
+        """
+        Get the compiled engine for the built-in plus custom patterns.
+        
+        Custom patterns override built-ins of the same name. The engine is
+        shared between analyzers with identical pattern sets and is only
+        rebuilt when self.patterns or self.custom_patterns change.
+        
+        Returns:
+            PatternEngine: Engine for the current pattern set
+        """
+        return PatternEngine.for_patterns({**self.patterns, **self.custom_patterns})
+    
+    def extract_fields(self, text: str) -> Dict[str, str]:
+        """
+        Extract the first value of every known pattern from a line.
+        
+        Args:
+            text (str): Raw log line or message
+            
+        Returns:
+            dict: Pattern name mapped to the extracted value
+        """
+        return self.get_pattern_engine().extract_first(text)
+    
     def extract_custom_fields(self, entry: LogEntry) -> Dict[str, str]:
         """
         Extract custom fields from log entry using registered patterns.
@@ -270,6 +2059,478 @@ class LogAnalyzer:
         """
         pass
 
+# Latency figures such as "completed in 150ms" or "timeout after 30s"
+_LATENCY_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(ms|s)\b')
+
+def _extract_latency_ms(message: str) -> Optional[float]:
+    """Return the first latency mentioned in a message, in milliseconds."""
+    match = _LATENCY_PATTERN.search(message)
+    if not match:
+        return None
+    value = float(match.group(1))
+    return value if match.group(2) == 'ms' else value * 1000
+
+class RunningStats:
+    """
+    Welford's online mean and variance in O(1) memory.
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+    
+    def add(self, value: float) -> None:
+        """
+        Fold one observation into the running moments.
+        
+        Args:
+            value (float): Observation
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+    
+    @property
+    def variance(self) -> float:
+        """Sample variance (0.0 until two observations were seen)."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+    
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+class EwmaStats:
+    """
+    Exponentially weighted moving mean and variance.
+    
+    Recent observations dominate, so the baseline follows slow drifts in
+    traffic while a sudden jump still stands out against it.
+    """
+    
+    def __init__(self, alpha: float, mean: float = 0.0, variance: float = 0.0):
+        """
+        Initialize the moving window.
+        
+        Args:
+            alpha (float): Smoothing factor in (0, 1]; higher forgets faster
+            mean (float): Initial mean
+            variance (float): Initial variance
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.mean = mean
+        self.variance = variance
+    
+    def add(self, value: float) -> None:
+        """
+        Fold one observation into the moving window.
+        
+        Args:
+            value (float): Observation
+        """
+        delta = value - self.mean
+        increment = self.alpha * delta
+        self.mean += increment
+        self.variance = (1 - self.alpha) * (self.variance + delta * increment)
+    
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+class StreamingAnomalyDetector:
+    """
+    Per-time-bucket anomaly detection over a stream of log entries.
+    
+    Entries are grouped into fixed-width buckets. When a bucket closes, each
+    tracked metric is compared against its baseline: Welford statistics over
+    the first warmup_buckets seed an exponentially weighted mean/variance
+    that then tracks the stream. A bucket is flagged when a metric exceeds
+    mean + threshold_multiplier * stddev. Memory use is constant in the
+    number of entries. Entries are expected in (roughly) time order; late
+    entries are counted in the currently open bucket.
+    
+    Supported metrics:
+        volume: number of entries in the bucket
+        errors: number of ERROR/CRITICAL entries
+        latency: mean latency (ms) mentioned in the bucket's messages
+    """
+    
+    ANOMALY_TYPES = {
+        'volume': 'volume_spike',
+        'errors': 'error_spike',
+        'latency': 'latency_degradation'
+    }
+    
+    def __init__(self, interval_minutes: int = 5, threshold_multiplier: float = 2.0,
+                 metrics: Tuple[str, ...] = ('volume', 'errors'), alpha: float = 0.3,
+                 warmup_buckets: int = 5, min_stddev: float = 1.0):
+        """
+        Initialize the detector.
+        
+        Args:
+            interval_minutes (int): Bucket width in minutes
+            threshold_multiplier (float): Standard deviations above the mean to flag
+            metrics (tuple): Metrics to track (see class docstring)
+            alpha (float): EWMA smoothing factor
+            warmup_buckets (int): Buckets observed before anything is flagged
+            min_stddev (float): Lower bound on the stddev used for thresholds,
+                so perfectly steady baselines do not flag tiny deviations
+        """
+        unknown = set(metrics) - set(self.ANOMALY_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {sorted(unknown)}")
+        
+        self.interval_us = _interval_us(interval_minutes)
+        self.interval_minutes = interval_minutes
+        self.threshold_multiplier = threshold_multiplier
+        self.metrics = tuple(metrics)
+        self.alpha = alpha
+        self.warmup_buckets = warmup_buckets
+        self.min_stddev = min_stddev
+        self.warmup = {metric: RunningStats() for metric in self.metrics}
+        self.baselines: Dict[str, EwmaStats] = {}
+        self.buckets_seen = 0
+        self._bucket: Optional[int] = None
+        self._reset_bucket()
+    
+    def _reset_bucket(self) -> None:
+        self._count = 0
+        self._errors = 0
+        self._latency_total = 0.0
+        self._latency_count = 0
+    
+    def _bucket_metrics(self) -> Dict[str, Optional[float]]:
+        values = {'volume': float(self._count), 'errors': float(self._errors)}
+        values['latency'] = (self._latency_total / self._latency_count
+                             if self._latency_count else None)
+        return values
+    
+    def _observe(self, bucket: int, values: Dict[str, Optional[float]]) -> List[Dict[str, Any]]:
+        """Score one closed bucket and fold it into the baselines."""
+        anomalies = []
+        self.buckets_seen += 1
+        for metric in self.metrics:
+            value = values[metric]
+            if value is None:
+                continue
+            
+            baseline = self.baselines.get(metric)
+            if baseline is None:
+                warmup = self.warmup[metric]
+                warmup.add(value)
+                if warmup.count >= self.warmup_buckets:
+                    self.baselines[metric] = EwmaStats(self.alpha, warmup.mean, warmup.variance)
+                continue
+            
+            threshold = baseline.mean + self.threshold_multiplier * max(baseline.stddev, self.min_stddev)
+            if value > threshold:
+                anomalies.append({
+                    'type': self.ANOMALY_TYPES[metric],
+                    'metric': metric,
+                    'timestamp': _from_epoch_us(bucket),
+                    'interval_minutes': self.interval_minutes,
+                    'value': value,
+                    'expected': baseline.mean,
+                    'threshold': threshold
+                })
+            baseline.add(value)
+        return anomalies
+    
+    def _close_until(self, bucket: int) -> List[Dict[str, Any]]:
+        """Close the open bucket and any empty buckets before `bucket`."""
+        anomalies = self._observe(self._bucket, self._bucket_metrics())
+        self._reset_bucket()
+        
+        # Empty buckets count as zero volume; one window's worth is enough
+        # to decay the baseline, so long gaps cost O(1/alpha) at most.
+        gap = (bucket - self._bucket) // self.interval_us - 1
+        empty = self._bucket_metrics()
+        for step in range(min(gap, int(math.ceil(3 / self.alpha)))):
+            anomalies.extend(self._observe(self._bucket + (step + 1) * self.interval_us, empty))
+        return anomalies
+    
+    def feed(self, entry: LogEntry) -> List[Dict[str, Any]]:
+        """
+        Add one entry, closing its predecessor bucket if it starts a new one.
+        
+        Args:
+            entry (LogEntry): Next entry of the stream
+            
+        Returns:
+            list: Anomalies found in buckets closed by this entry
+        """
+        timestamp_us = _to_epoch_us(entry.timestamp)
+        bucket = _bucket_start(timestamp_us, self.interval_us)
+        
+        anomalies = []
+        if self._bucket is None:
+            self._bucket = bucket
+        elif bucket > self._bucket:
+            anomalies = self._close_until(bucket)
+            self._bucket = bucket
+        
+        self._count += 1
+        if entry.level in (LogLevel.ERROR, LogLevel.CRITICAL):
+            self._errors += 1
+        if 'latency' in self.metrics:
+            latency = _extract_latency_ms(entry.message)
+            if latency is not None:
+                self._latency_total += latency
+                self._latency_count += 1
+        return anomalies
+    
+    def flush(self) -> List[Dict[str, Any]]:
+        """
+        Close the open bucket at the end of the stream.
+        
+        Returns:
+            list: Anomalies found in the final bucket
+        """
+        if self._bucket is None or self._count == 0:
+            return []
+        anomalies = self._observe(self._bucket, self._bucket_metrics())
+        self._reset_bucket()
+        return anomalies
+    
+    def process(self, entries: Iterable[LogEntry]) -> Iterator[Dict[str, Any]]:
+        """
+        Run the detector over a stream, yielding anomalies as buckets close.
+        
+        Args:
+            entries (iterable): Log entries in time order
+            
+        Yields:
+            dict: Anomaly descriptions
+        """
+        for entry in entries:
+            yield from self.feed(entry)
+        yield from self.flush()
+
+class RollingLogStatistics:
+    """
+    Incrementally maintained log statistics.
+    
+    Each update is O(1), so counters for generate_statistics,
+    find_frequent_errors and generate_timeline can be kept current while
+    following a live log instead of being recomputed from scratch.
+    """
+    
+    def __init__(self, interval_minutes: int = 60):
+        """
+        Initialize empty counters.
+        
+        Args:
+            interval_minutes (int): Timeline bucket width in minutes
+        """
+        self.interval_us = _interval_us(interval_minutes)
+        self.interval_minutes = interval_minutes
+        self.reset()
+    
+    def reset(self) -> None:
+        """Clear all counters."""
+        self.total_entries = 0
+        self.level_counts: Counter = Counter()
+        self.error_messages: Counter = Counter()
+        self.timeline: Dict[int, Counter] = defaultdict(Counter)
+        self.first_timestamp: Optional[datetime] = None
+        self.last_timestamp: Optional[datetime] = None
+    
+    def update(self, entry: LogEntry) -> None:
+        """
+        Fold one entry into the counters.
+        
+        Args:
+            entry (LogEntry): Newly parsed entry
+        """
+        self.total_entries += 1
+        self.level_counts[entry.level.value] += 1
+        if entry.level in (LogLevel.ERROR, LogLevel.CRITICAL):
+            self.error_messages[entry.message] += 1
+        
+        if self.first_timestamp is None or entry.timestamp < self.first_timestamp:
+            self.first_timestamp = entry.timestamp
+        if self.last_timestamp is None or entry.timestamp > self.last_timestamp:
+            self.last_timestamp = entry.timestamp
+        
+        bucket = _bucket_start(_to_epoch_us(entry.timestamp), self.interval_us)
+        self.timeline[bucket][entry.level.value] += 1
+    
+    def statistics(self) -> Dict[str, Any]:
+        """
+        Get the running statistics.
+        
+        Returns:
+            dict: total_entries, level_counts, first/last timestamps and time_span
+        """
+        time_span = None
+        if self.first_timestamp is not None:
+            time_span = self.last_timestamp - self.first_timestamp
+        return {
+            'total_entries': self.total_entries,
+            'level_counts': dict(self.level_counts),
+            'first_timestamp': self.first_timestamp,
+            'last_timestamp': self.last_timestamp,
+            'time_span': time_span
+        }
+    
+    def frequent_errors(self, top_n: int = 10) -> List[Tuple[str, int]]:
+        """
+        Get the most frequent ERROR/CRITICAL messages so far.
+        
+        Args:
+            top_n (int): Number of top errors to return
+            
+        Returns:
+            list: List of (error_message, count) tuples
+        """
+        return self.error_messages.most_common(top_n)
+    
+    def timeline_snapshot(self) -> Dict[datetime, Dict[str, int]]:
+        """
+        Get the running timeline.
+        
+        Returns:
+            dict: Bucket start time mapped to per-level counts, in time order
+        """
+        return {_from_epoch_us(bucket): dict(self.timeline[bucket]) for bucket in sorted(self.timeline)}
+
+class LogFollower:
+    """
+    Tail-follow a growing log file, parsing only appended bytes.
+    
+    The follower keeps its file handle and offset between polls. When the
+    path is rotated to a new inode, the rest of the old file is drained
+    before switching; when the file is truncated, reading restarts at the
+    beginning. A trailing line without a newline is held back until it is
+    completed.
+    """
+    
+    def __init__(self, analyzer: "LogAnalyzer", file_path: str, log_format: str = "standard",
+                 interval_minutes: int = 60, from_start: bool = True,
+                 store_entries: bool = False):
+        """
+        Initialize the follower.
+        
+        Args:
+            analyzer (LogAnalyzer): Analyzer whose parse_log_line is used
+            file_path (str): Path of the log file to follow
+            log_format (str): Log format type
+            interval_minutes (int): Timeline bucket width for the rolling stats
+            from_start (bool): Parse existing content on the first poll;
+                if False, only lines appended later are read
+            store_entries (bool): Also append parsed entries to analyzer.log_entries
+        """
+        self.analyzer = analyzer
+        self.file_path = file_path
+        self.log_format = log_format
+        self.store_entries = store_entries
+        self.stats = RollingLogStatistics(interval_minutes)
+        self.offset = 0
+        self.inode: Optional[Tuple[int, int]] = None
+        self.rotations = 0
+        self.truncations = 0
+        self._handle = None
+        self._partial = b""
+        self._from_start = from_start
+    
+    def _open(self) -> bool:
+        """Open the current file at the path; False if it does not exist yet."""
+        try:
+            self._handle = open(self.file_path, 'rb')
+        except FileNotFoundError:
+            return False
+        file_stat = os.fstat(self._handle.fileno())
+        self.inode = (file_stat.st_dev, file_stat.st_ino)
+        self.offset = 0
+        self._partial = b""
+        if not self._from_start:
+            self.offset = file_stat.st_size
+            self._handle.seek(self.offset)
+            self._from_start = True
+        return True
+    
+    def _read_appended(self) -> List[LogEntry]:
+        """Parse complete lines appended since the last read."""
+        entries = []
+        while True:
+            data = self._handle.read(STREAM_CHUNK_SIZE)
+            if not data:
+                break
+            self.offset += len(data)
+            lines = (self._partial + data).split(b"\n")
+            self._partial = lines.pop()
+            entries.extend(self._parse_lines(lines))
+        return entries
+    
+    def _parse_lines(self, raw_lines: List[bytes]) -> List[LogEntry]:
+        """Parse complete raw lines, updating the stats (and analyzer if storing)."""
+        entries = []
+        for raw_line in raw_lines:
+            line = _decode_line(raw_line)
+            if not line.strip():
+                continue
+            entry = self.analyzer.parse_log_line(line, self.log_format)
+            if entry is None:
+                continue
+            self.stats.update(entry)
+            if self.store_entries:
+                self.analyzer.add_entry(entry)
+            entries.append(entry)
+        return entries
+    
+    def poll(self) -> List[LogEntry]:
+        """
+        Read and parse whatever was appended since the previous poll.
+        
+        Returns:
+            list: Newly parsed entries, in file order
+        """
+        if self._handle is None and not self._open():
+            return []
+        
+        entries = []
+        try:
+            path_stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            path_stat = None
+        
+        if path_stat is not None and (path_stat.st_dev, path_stat.st_ino) != self.inode:
+            # Rotated: finish the old file, then continue with the new one
+            entries.extend(self._read_appended())
+            if self._partial:
+                # Nothing more will be appended to the old file, so an
+                # unterminated last line is complete
+                entries.extend(self._parse_lines([self._partial]))
+                self._partial = b""
+            self._handle.close()
+            self._handle = None
+            self.rotations += 1
+            if not self._open():
+                return entries
+        elif os.fstat(self._handle.fileno()).st_size < self.offset:
+            self._handle.seek(0)
+            self.offset = 0
+            self._partial = b""
+            self.truncations += 1
+        
+        entries.extend(self._read_appended())
+        return entries
+    
+    def close(self) -> None:
+        """Close the underlying file handle."""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+    
+    def __enter__(self) -> "LogFollower":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
 class PerformanceAnalyzer:
     """
     Specialized analyzer for performance monitoring logs.
@@ -296,6 +2557,44 @@ class PerformanceAnalyzer:
         """
         pass
     
+    def build_latency_histogram(self, entries: Optional[Iterable[LogEntry]] = None,
+                                relative_error: float = 0.01) -> LatencyHistogram:
+        """
+        Collect message latencies into a mergeable histogram.
+        
+        Args:
+            entries (iterable, optional): Entries to scan; defaults to the
+                log analyzer's log_entries
+            relative_error (float): Relative accuracy of the percentiles
+            
+        Returns:
+            LatencyHistogram: Histogram of latencies in milliseconds
+        """
+        histogram = LatencyHistogram(relative_error)
+        for entry in (self.log_analyzer.log_entries if entries is None else entries):
+            latency = _extract_latency_ms(entry.message)
+            if latency is not None:
+                histogram.add(latency)
+        return histogram
+    
+    def analyze_request_latency_approx(self, entries: Optional[Iterable[LogEntry]] = None,
+                                       relative_error: float = 0.01) -> Dict[str, Any]:
+        """
+        Analyze request latency without keeping every sample.
+        
+        Percentiles are within relative_error of the exact values; count,
+        average, min and max are exact.
+        
+        Args:
+            entries (iterable, optional): Entries to scan; defaults to the
+                log analyzer's log_entries
+            relative_error (float): Relative accuracy of the percentiles
+            
+        Returns:
+            dict: Latency analysis results
+        """
+        return self.build_latency_histogram(entries, relative_error).summary()
+    
     def find_slow_queries(self, threshold_ms: int = 1000) -> List[Dict[str, Any]]:
         """
         Find slow database queries in logs.
@@ -331,6 +2630,32 @@ class PerformanceAnalyzer:
         TODO: Implement this method
         """
         pass
+    
+    def detect_performance_degradation_streaming(self, entries: Optional[Iterable[LogEntry]] = None,
+                                                 threshold_multiplier: float = 2.0,
+                                                 interval_minutes: int = 5, alpha: float = 0.3,
+                                                 warmup_buckets: int = 5) -> Iterator[Dict[str, Any]]:
+        """
+        Detect rising per-bucket mean latency in a single bounded-memory pass.
+        
+        Latencies are read from messages such as "completed in 150ms" or
+        "timeout after 30s".
+        
+        Args:
+            entries (iterable, optional): Entries in time order; defaults to
+                the log analyzer's log_entries
+            threshold_multiplier (float): Standard deviations above the
+                moving mean that count as degradation
+            interval_minutes (int): Bucket width in minutes
+            alpha (float): EWMA smoothing factor
+            warmup_buckets (int): Buckets used to seed the baseline
+            
+        Yields:
+            dict: Issues of type "latency_degradation"
+        """
+        detector = StreamingAnomalyDetector(interval_minutes, threshold_multiplier,
+                                            ('latency',), alpha, warmup_buckets)
+        return detector.process(self.log_analyzer.log_entries if entries is None else entries)
 
 def create_sample_log_data() -> List[str]:
     """
@@ -355,6 +2680,129 @@ def create_test_log_file(filename: str, num_entries: int = 1000) -> None:
     """
     pass
 
+def benchmark_time_index(sizes: Tuple[int, ...] = (1_000_000, 10_000_000),
+                         window_minutes: int = 5, queries: int = 20,
+                         seed: int = 42) -> Dict[int, Dict[str, float]]:
+    """
+    Compare linear time-range scans with TimeIndex lookups.
+    
+    Timestamps span one week with ~1% of them out of order, matching what
+    load-time sorting has to cope with. Both paths run over the same
+    int64 timestamp array so the numbers isolate the search strategy.
+    
+    Args:
+        sizes (tuple): Entry counts to benchmark
+        window_minutes (int): Width of each queried window
+        queries (int): Number of random windows per size
+        seed (int): Random seed for reproducible data
+        
+    Returns:
+        dict: Per size, build/linear/indexed timings in ms and the speedup
+    """
+    rng = random.Random(seed)
+    week_us = 7 * 24 * 3600 * 1_000_000
+    window_us = window_minutes * 60 * 1_000_000
+    results = {}
+    
+    for size in sizes:
+        step = week_us // size
+        timestamps = array('q', (i * step for i in range(size)))
+        for _ in range(size // 100):
+            i, j = rng.randrange(size), rng.randrange(size)
+            timestamps[i], timestamps[j] = timestamps[j], timestamps[i]
+        windows = [(start, start + window_us)
+                   for start in (rng.randrange(week_us - window_us) for _ in range(queries))]
+        
+        started = time.perf_counter()
+        index = TimeIndex.from_timestamps(timestamps)
+        build_ms = (time.perf_counter() - started) * 1000
+        
+        started = time.perf_counter()
+        linear_hits = 0
+        for low, high in windows:
+            linear_hits += sum(1 for ts in timestamps if low <= ts <= high)
+        linear_ms = (time.perf_counter() - started) * 1000 / queries
+        
+        started = time.perf_counter()
+        indexed_hits = 0
+        for low, high in windows:
+            indexed_hits += len(index.range_positions(low, high))
+        indexed_ms = (time.perf_counter() - started) * 1000 / queries
+        
+        if linear_hits != indexed_hits:
+            raise AssertionError("indexed and linear scans disagree")
+        
+        results[size] = {
+            'build_ms': build_ms,
+            'linear_query_ms': linear_ms,
+            'indexed_query_ms': indexed_ms,
+            'speedup': linear_ms / indexed_ms if indexed_ms else float('inf')
+        }
+    return results
+
+def _benchmark_log_lines(count: int, seed: int = 42) -> List[str]:
+    """Generate varied standard-format log lines for the benchmarks."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 15, 0, 0, 0)
+    templates = [
+        "Request completed in {ms}ms request_id=req-{n}",
+        "Failed login attempt for user: admin from IP: 192.168.{a}.{b}",
+        "GET https://api.example.com/v1/items/{n} returned {code}",
+        "Notification sent to user{n}@example.com user_id={n}",
+        "Database connection failed: timeout after {ms}ms",
+        "Cache refreshed with {n} keys",
+    ]
+    levels = ["DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR"]
+    lines = []
+    for i in range(count):
+        message = rng.choice(templates).format(
+            ms=rng.randint(5, 3000), n=rng.randint(1, 99999),
+            a=rng.randint(0, 255), b=rng.randint(0, 255), code=rng.choice([200, 404, 500])
+        )
+        timestamp = (start + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+        lines.append(f"{timestamp} {rng.choice(levels)} [worker-{i % 8}] {message}")
+    return lines
+
+def benchmark_pattern_engine(line_count: int = 50_000, seed: int = 42) -> Dict[str, float]:
+    """
+    Measure pattern extraction throughput with and without PatternEngine.
+    
+    The baseline runs re.findall with the raw pattern strings for every line,
+    as a per-line implementation of extract_custom_fields would.
+    
+    Args:
+        line_count (int): Number of synthetic log lines
+        seed (int): Random seed for reproducible data
+        
+    Returns:
+        dict: Lines per second for both paths and the speedup
+    """
+    lines = _benchmark_log_lines(line_count, seed)
+    analyzer = LogAnalyzer()
+    analyzer.custom_patterns = {
+        "transaction_id": r"txn[_-]?([a-zA-Z0-9]+)",
+        "response_time": r"response_time[:\s=]+(\d+)ms",
+        "api_endpoint": r"(GET|POST|PUT|DELETE)\s+(/[\w/]+)"
+    }
+    patterns = {**analyzer.patterns, **analyzer.custom_patterns}
+    
+    started = time.perf_counter()
+    for line in lines:
+        {name: re.findall(pattern, line) for name, pattern in patterns.items()}
+    baseline_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    engine = analyzer.get_pattern_engine()
+    for line in lines:
+        engine.extract(line)
+    engine_seconds = time.perf_counter() - started
+    
+    return {
+        'baseline_lines_per_sec': line_count / baseline_seconds,
+        'engine_lines_per_sec': line_count / engine_seconds,
+        'speedup': baseline_seconds / engine_seconds
+    }
+
 # Test cases and demonstrations
 if __name__ == "__main__":
     print("=== Log Analyzer Exercise ===\n")
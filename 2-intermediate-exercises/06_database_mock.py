@@ -6,11 +6,35 @@ Task: Create a comprehensive database mock system for testing.
 This exercise focuses on simulating database operations without requiring a real database.
 """
 
+import re
+import asyncio
+import sys
+import gc
+import os
 import json
+import math
+import mmap
 import uuid
+import time
+import heapq
+import random
+import pickle
+import struct
+import operator
+import threading
+import tempfile
+import tracemalloc
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque, Counter
+from contextlib import ExitStack, asynccontextmanager, contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union, Callable
-from dataclasses import dataclass, asdict
+from functools import lru_cache
+from itertools import cycle, islice, repeat
+from operator import itemgetter, methodcaller
+from typing import Dict, List, Any, Optional, Union, Callable, Tuple, Iterable, Iterator, AsyncIterator
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 import copy
 
@@ -32,138 +56,4317 @@ class QueryResult:
     error_message: Optional[str] = None
     execution_time_ms: float = 0.0
 
-class DatabaseMock:
+_MISSING = object()
+
+@lru_cache(maxsize=256)
+def _like_regex(pattern: str) -> 're.Pattern':
+    """Translate a SQL LIKE pattern (% and _ wildcards) into a compiled regex."""
+    translated = ''.join('.*' if char == '%' else '.' if char == '_' else re.escape(char)
+                         for char in pattern)
+    return re.compile(translated + r'\Z', re.DOTALL)
+
+def _like(value: Any, pattern: str) -> bool:
+    return isinstance(value, str) and _like_regex(pattern).match(value) is not None
+
+def _comparison(compare: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    """NULL never satisfies an ordering comparison."""
+    return lambda value, operand: value is not None and operand is not None and compare(value, operand)
+
+CONDITION_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '>': _comparison(operator.gt),
+    '>=': _comparison(operator.ge),
+    '<': _comparison(operator.lt),
+    '<=': _comparison(operator.le),
+    'in': lambda value, options: value in options,
+    'like': _like,
+}
+
+def normalize_conditions(conditions: Optional[Dict[str, Any]]) -> List[Tuple[str, str, Any]]:
     """
-    A comprehensive database mock for testing database operations.
+    Flatten WHERE conditions into (column, operator, operand) triples.
+    
+    A plain value means equality; a dict maps operators from
+    CONDITION_OPERATORS to operands, e.g. {"age": {">=": 18, "<": 65}}.
+    
+    Args:
+        conditions (dict, optional): Conditions to normalize
+        
+    Returns:
+        list: (column, operator, operand) triples
+        
+    Raises:
+        ValueError: If an operator is not supported
+    """
+    triples = []
+    for column, condition in (conditions or {}).items():
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                op = op.lower()
+                if op not in CONDITION_OPERATORS:
+                    raise ValueError(f"Unsupported operator {op!r} for column {column!r}")
+                triples.append((column, op, operand))
+        else:
+            triples.append((column, '=', condition))
+    return triples
+
+def _compile_check(column: str, op: str, operand: Any) -> Callable[[Dict[str, Any]], bool]:
+    """Build a closure specialized for one condition."""
+    if op == '=':
+        return lambda row: row.get(column) == operand
+    if op == '!=':
+        return lambda row: row.get(column) != operand
+    if op == 'in':
+        try:
+            options = frozenset(operand)
+        except TypeError:
+            options = list(operand)
+        return lambda row: row.get(column) in options
+    if op == 'like':
+        match = _like_regex(operand).match
+        return lambda row: isinstance(value := row.get(column), str) and match(value) is not None
+    if operand is None:
+        return lambda row: False
+    compare = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le}[op]
+    return lambda row: (value := row.get(column)) is not None and compare(value, operand)
+
+def _chain_checks(checks: List[Callable[[Dict[str, Any]], bool]]) -> Callable[[Dict[str, Any]], bool]:
+    if len(checks) == 1:
+        return checks[0]
+    first, rest = checks[0], _chain_checks(checks[1:])
+    return lambda row: first(row) and rest(row)
+
+def compile_predicate(triples: List[Tuple[str, str, Any]]) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Build a single row predicate from normalized conditions.
+    
+    Each condition becomes a closure specialized for its operator, and the
+    closures are chained in the given order with short-circuiting, so
+    callers should pass the most selective conditions first.
+    
+    Args:
+        triples (list): (column, operator, operand) triples
+        
+    Returns:
+        callable: Function taking a row dict and returning True on a match
+    """
+    if not triples:
+        return lambda row: True
+    return _chain_checks([_compile_check(column, op, operand) for column, op, operand in triples])
+
+def _lookup_keys(conditions: List[Tuple[str, Any]]) -> set:
+    """Intersect the key sets named by equality and IN conditions."""
+    keys = None
+    for op, operand in conditions:
+        if op in ('=', 'in'):
+            named = {operand} if op == '=' else set(operand)
+            keys = named if keys is None else keys & named
+    return keys if keys is not None else set()
+
+def _order_key(value: Any) -> Tuple[bool, Any]:
+    """Sort key placing NULLs after all values without comparing them to values."""
+    return (True, 0) if value is None else (False, value)
+
+def _parse_order_by(order_by: str) -> Tuple[str, bool]:
+    """Split "column [ASC|DESC]" into the column and whether it is descending."""
+    column, _, direction = order_by.strip().partition(' ')
+    direction = direction.strip().upper()
+    if not column or direction not in ('', 'ASC', 'DESC'):
+        raise ValueError(f"Invalid order_by {order_by!r}")
+    return column, direction == 'DESC'
+
+class HashIndex:
+    """
+    Secondary index mapping column values to rows for equality lookups.
+    
+    Rows are keyed by identity inside each bucket, so removal is O(1) even
+    for low-cardinality columns.
+    """
+    
+    kind = "hash"
+    operators = frozenset({'=', 'in'})
+    
+    def __init__(self, column: str):
+        """
+        Initialize an empty index.
+        
+        Args:
+            column (str): Indexed column name
+        """
+        self.column = column
+        self._buckets: Dict[Any, Dict[int, Dict[str, Any]]] = {}
+    
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets.values())
+    
+    def add(self, row: Dict[str, Any]) -> None:
+        """Index a row under its current column value."""
+        key = row.get(self.column)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = {}
+        bucket[id(row)] = row
+    
+    def indexed_values(self, values: Iterable[Any]) -> set:
+        """Return the given values that at least one indexed row has."""
+        return self._buckets.keys() & values
+    
+    def add_many(self, rows: List[Dict[str, Any]]) -> None:
+        """Index a batch of rows."""
+        buckets = self._buckets
+        for key, row in zip(map(methodcaller('get', self.column), rows), rows):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {id(row): row}
+            else:
+                bucket[id(row)] = row
+    
+    def remove(self, row: Dict[str, Any], value: Any = _MISSING) -> None:
+        """
+        Remove a row from the index.
+        
+        Args:
+            row (dict): Indexed row
+            value (any, optional): Value the row was indexed under, if the
+                row has since been modified
+        """
+        key = row.get(self.column) if value is _MISSING else value
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.pop(id(row), None)
+            if not bucket:
+                del self._buckets[key]
+    
+    def candidates(self, conditions: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Look up rows satisfying all given conditions on the indexed column.
+        
+        Args:
+            conditions (list): (operator, operand) pairs using only
+                operators in self.operators
+            
+        Returns:
+            list: Matching rows
+        """
+        rows = []
+        for key in _lookup_keys(conditions):
+            bucket = self._buckets.get(key)
+            if bucket:
+                rows.extend(bucket.values())
+        return rows
+    
+    def distinct_count(self) -> int:
+        """Return the exact number of distinct indexed values."""
+        return len(self._buckets)
+
+class SortedIndex:
+    """
+    Secondary index keeping rows ordered by column value for range lookups.
+    
+    New rows are buffered and merged on the next lookup, so a burst of
+    inserts costs one sort instead of one list shift per row. NULLs are
+    kept apart because they do not order against other values.
+    """
+    
+    kind = "sorted"
+    operators = frozenset({'=', 'in', '>', '>=', '<', '<='})
+    
+    def __init__(self, column: str):
+        """
+        Initialize an empty index.
+        
+        Args:
+            column (str): Indexed column name
+        """
+        self.column = column
+        self._keys: List[Any] = []
+        self._rows: List[Dict[str, Any]] = []
+        self._pending: List[Tuple[Any, Dict[str, Any]]] = []
+        self._nulls: Dict[int, Dict[str, Any]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._keys) + len(self._pending) + len(self._nulls)
+    
+    def add(self, row: Dict[str, Any]) -> None:
+        """Index a row under its current column value."""
+        key = row.get(self.column)
+        if key is None:
+            self._nulls[id(row)] = row
+        else:
+            self._pending.append((key, row))
+    
+    def indexed_values(self, values: Iterable[Any]) -> set:
+        """Return the given non-NULL values that at least one indexed row has."""
+        self._merge_pending()
+        keys = self._keys
+        found = set()
+        for value in values:
+            position = bisect_left(keys, value)
+            if position < len(keys) and keys[position] == value:
+                found.add(value)
+        return found
+    
+    def add_many(self, rows: List[Dict[str, Any]]) -> None:
+        """Index a batch of rows."""
+        keys = list(map(methodcaller('get', self.column), rows))
+        if None in keys:
+            for row in rows:
+                self.add(row)
+        else:
+            self._pending.extend(zip(keys, rows))
+    
+    def remove(self, row: Dict[str, Any], value: Any = _MISSING) -> None:
+        """
+        Remove a row from the index.
+        
+        Args:
+            row (dict): Indexed row
+            value (any, optional): Value the row was indexed under, if the
+                row has since been modified
+        """
+        key = row.get(self.column) if value is _MISSING else value
+        if key is None:
+            self._nulls.pop(id(row), None)
+            return
+        self._merge_pending()
+        position = bisect_left(self._keys, key)
+        end = bisect_right(self._keys, key, position)
+        for i in range(position, end):
+            if self._rows[i] is row:
+                del self._keys[i]
+                del self._rows[i]
+                return
+    
+    def _merge_pending(self) -> None:
+        if not self._pending:
+            return
+        self._pending.sort(key=itemgetter(0))
+        if self._keys:
+            merged = list(heapq.merge(zip(self._keys, self._rows), self._pending, key=itemgetter(0)))
+        else:
+            merged = self._pending
+        self._keys = [key for key, _ in merged]
+        self._rows = [row for _, row in merged]
+        self._pending = []
+    
+    def range(self, low: Any = None, high: Any = None,
+              low_inclusive: bool = True, high_inclusive: bool = True) -> List[Dict[str, Any]]:
+        """
+        Return rows whose value lies between two bounds, in value order.
+        
+        Args:
+            low (any, optional): Lower bound, unbounded if None
+            high (any, optional): Upper bound, unbounded if None
+            low_inclusive (bool): Whether the lower bound matches
+            high_inclusive (bool): Whether the upper bound matches
+            
+        Returns:
+            list: Matching rows
+        """
+        self._merge_pending()
+        start = 0 if low is None else (
+            bisect_left(self._keys, low) if low_inclusive else bisect_right(self._keys, low))
+        end = len(self._keys) if high is None else (
+            bisect_right(self._keys, high) if high_inclusive else bisect_left(self._keys, high))
+        return self._rows[start:end] if start < end else []
+    
+    def candidates(self, conditions: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Look up rows satisfying all given conditions on the indexed column.
+        
+        Range operators are folded into one pair of bounds; equality and IN
+        keys are then clipped to those bounds.
+        
+        Args:
+            conditions (list): (operator, operand) pairs using only
+                operators in self.operators
+            
+        Returns:
+            list: Matching rows, in value order
+        """
+        low = high = None
+        low_inclusive = high_inclusive = True
+        for op, operand in conditions:
+            if op in ('=', 'in'):
+                continue
+            if operand is None:
+                return []
+            if op in ('>', '>=') and (low is None or operand > low or
+                                      (operand == low and op == '>')):
+                low, low_inclusive = operand, op == '>='
+            elif op in ('<', '<=') and (high is None or operand < high or
+                                        (operand == high and op == '<')):
+                high, high_inclusive = operand, op == '<='
+        
+        if not any(op in ('=', 'in') for op, _ in conditions):
+            return self.range(low, high, low_inclusive, high_inclusive)
+        
+        keys = _lookup_keys(conditions)
+        rows = list(self._nulls.values()) if None in keys and low is None and high is None else []
+        bounds = [(op, operand) for op, operand in conditions if op not in ('=', 'in')]
+        for key in sorted(key for key in keys if key is not None and
+                          all(CONDITION_OPERATORS[op](key, operand) for op, operand in bounds)):
+            rows.extend(self.range(key, key))
+        return rows
+    
+    def distinct_count(self) -> Optional[int]:
+        """Distinct values are not tracked by sorted indexes."""
+        return None
+
+INDEX_TYPES = {index_type.kind: index_type for index_type in (HashIndex, SortedIndex)}
+
+@dataclass
+class ColumnStatistics:
+    """Cardinality statistics for one column, as gathered by DatabaseMock.analyze."""
+    distinct: int
+    nulls: int
+    minimum: Any = None
+    maximum: Any = None
+
+@dataclass
+class QueryPlan:
+    """Access path and filter order chosen by DatabaseMock.plan_query."""
+    table_name: str
+    row_count: int
+    estimated_rows: float
+    index_column: Optional[str] = None
+    index_kind: Optional[str] = None
+    index_conditions: List[Tuple[str, Any]] = field(default_factory=list)
+    filters: List[Tuple[str, str, Any, float]] = field(default_factory=list)
+    predicate: Callable[[Dict[str, Any]], bool] = field(default=lambda row: True, repr=False)
+
+def _combined_selectivity(estimates: List[Tuple[str, float]]) -> float:
+    """
+    Combine selectivities of several conditions on the same column.
+    
+    Equality and IN conditions take the most selective one, lower and upper
+    range bounds are intersected, and anything else is assumed independent.
+    """
+    equal = min((s for op, s in estimates if op in ('=', 'in')), default=1.0)
+    lower = min((s for op, s in estimates if op in ('>', '>=')), default=None)
+    upper = min((s for op, s in estimates if op in ('<', '<=')), default=None)
+    if lower is not None and upper is not None:
+        bounded = max(0.0, lower + upper - 1.0)
+    else:
+        bounded = lower if lower is not None else upper if upper is not None else 1.0
+    combined = min(equal, bounded)
+    for op, s in estimates:
+        if op in ('!=', 'like'):
+            combined *= s
+    return combined
+
+# Relative cost of evaluating one condition, used to order the filters
+_OPERATOR_COSTS = {'like': 4.0, 'in': 1.5}
+_DEFAULT_RANGE_SELECTIVITY = 1 / 3
+_DEFAULT_LIKE_SELECTIVITY = 0.1
+
+def estimate_selectivity(stats: Optional[ColumnStatistics], row_count: int,
+                         op: str, operand: Any) -> float:
+    """
+    Estimate the fraction of rows satisfying one condition.
+    
+    Equality assumes uniformly distributed distinct values; ranges over
+    numeric columns interpolate between the column minimum and maximum.
+    
+    Args:
+        stats (ColumnStatistics, optional): Statistics for the column; None
+            if the column never appears in the table
+        row_count (int): Rows in the table
+        op (str): Condition operator
+        operand (any): Condition operand
+        
+    Returns:
+        float: Estimated selectivity between 0 and 1
+    """
+    if not row_count:
+        return 0.0
+    if stats is None:
+        # Every row reads the column as NULL
+        return 1.0 if (op == '=' and operand is None) or (op == '!=' and operand is not None) else 0.0
+    null_fraction = stats.nulls / row_count
+    value_fraction = 1.0 - null_fraction
+    equal = value_fraction / stats.distinct if stats.distinct else 0.0
+    
+    if op == '=':
+        return null_fraction if operand is None else equal
+    if op == '!=':
+        return 1.0 - (null_fraction if operand is None else equal)
+    if op == 'in':
+        options = list(operand)
+        return min(1.0, sum(null_fraction if option is None else equal for option in set(options)))
+    if op == 'like':
+        if '%' not in operand and '_' not in operand:
+            return equal
+        return value_fraction * _DEFAULT_LIKE_SELECTIVITY
+    
+    if operand is None:
+        return 0.0
+    low, high = stats.minimum, stats.maximum
+    numeric = all(isinstance(value, (int, float)) and not isinstance(value, bool)
+                  for value in (low, high, operand))
+    if not numeric:
+        return value_fraction * _DEFAULT_RANGE_SELECTIVITY
+    if high == low:
+        return value_fraction if CONDITION_OPERATORS[op](low, operand) else 0.0
+    below = min(1.0, max(0.0, (operand - low) / (high - low)))
+    return value_fraction * (below if op in ('<', '<=') else 1.0 - below)
+
+# array typecodes for fixed-width schema types
+_COLUMN_TYPECODES = {'int': 'q', 'float': 'd', 'bool': 'b'}
+
+# Python types accepted for each schema type; bool is not accepted as int
+_SCHEMA_TYPES = {'int': {int}, 'float': {int, float}, 'str': {str}, 'bool': {bool}}
+_NONE_TYPE = type(None)
+
+class _TypedColumn:
+    """Fixed-width column stored in an array with a NULL bitmap."""
+    
+    def __init__(self, typecode: str, cast: Callable[[Any], Any]):
+        self.values = array(typecode)
+        self.nulls = bytearray()
+        self.null_count = 0
+        self.cast = cast
+    
+    def append(self, value: Any) -> None:
+        if value is None:
+            self.values.append(0)
+            self.nulls.append(1)
+            self.null_count += 1
+        else:
+            self.values.append(value)
+            self.nulls.append(0)
+    
+    def extend(self, values: List[Any]) -> None:
+        if None in values:
+            for value in values:
+                self.append(value)
+            return
+        self.values.extend(values)
+        self.nulls.extend(bytes(len(values)))
+    
+    def get(self, position: int) -> Any:
+        return None if self.nulls[position] else self.cast(self.values[position])
+    
+    def set(self, position: int, value: Any) -> None:
+        self.values[position] = 0 if value is None else value
+        self.null_count += (value is None) - self.nulls[position]
+        self.nulls[position] = value is None
+    
+    def truncate(self, length: int) -> None:
+        self.null_count -= self.nulls.count(1, length)
+        del self.values[length:]
+        del self.nulls[length:]
+    
+    def matching(self, positions: Iterable[int], op: str, operand: Any) -> List[int]:
+        compare = CONDITION_OPERATORS[op]
+        values = self.values
+        if self.null_count == 0:
+            return [i for i in positions if compare(values[i], operand)]
+        nulls = self.nulls
+        return [i for i in positions if compare(None if nulls[i] else values[i], operand)]
+    
+    def present(self, positions: Optional[Iterable[int]]) -> List[Any]:
+        """Non-NULL values at the given positions (all positions if None)."""
+        if positions is None and self.null_count == 0:
+            return self.values
+        nulls, values = self.nulls, self.values
+        return [values[i] for i in (range(len(values)) if positions is None else positions)
+                if not nulls[i]]
+    
+    def compact(self, keep: List[int]) -> None:
+        self.values = array(self.values.typecode, (self.values[i] for i in keep))
+        self.nulls = bytearray(self.nulls[i] for i in keep)
+        self.null_count = self.nulls.count(1)
+    
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values) + len(self.nulls)
+
+class _InternedColumn:
+    """String column stored as codes into a table of distinct values."""
+    
+    # Once this many values are seen, switch to packing if most are distinct
+    PACKING_THRESHOLD = 1024
+    
+    def __init__(self):
+        self.codes = array('I')
+        self.values: List[Optional[str]] = [None]  # code 0 is NULL
+        self.lookup: Dict[str, int] = {}
+    
+    def _code(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        if not isinstance(value, str):
+            raise TypeError(f"expected str, got {type(value).__name__}")
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+    
+    def append(self, value: Optional[str]) -> None:
+        self.codes.append(self._code(value))
+    
+    def extend(self, values: List[Optional[str]]) -> None:
+        self.codes.extend(map(self._code, values))
+    
+    def should_pack(self) -> bool:
+        """Whether packing the strings would be smaller than interning them."""
+        return (len(self.codes) >= self.PACKING_THRESHOLD and
+                len(self.values) * 2 > len(self.codes))
+    
+    def get(self, position: int) -> Optional[str]:
+        return self.values[self.codes[position]]
+    
+    def set(self, position: int, value: Optional[str]) -> None:
+        self.codes[position] = self._code(value)
+    
+    def truncate(self, length: int) -> None:
+        del self.codes[length:]
+    
+    def matching(self, positions: Iterable[int], op: str, operand: Any) -> List[int]:
+        # Evaluate the condition once per distinct value, then compare codes
+        compare = CONDITION_OPERATORS[op]
+        accepted = {code for code, value in enumerate(self.values) if compare(value, operand)}
+        codes = self.codes
+        if not accepted:
+            return []
+        if len(accepted) == 1:
+            (code,) = accepted
+            return [i for i in positions if codes[i] == code]
+        return [i for i in positions if codes[i] in accepted]
+    
+    def present(self, positions: Optional[Iterable[int]]) -> List[str]:
+        values, codes = self.values, self.codes
+        return [values[codes[i]] for i in (range(len(codes)) if positions is None else positions)
+                if codes[i]]
+    
+    def compact(self, keep: List[int]) -> None:
+        self.codes = array('I', (self.codes[i] for i in keep))
+    
+    def nbytes(self) -> int:
+        return self.codes.itemsize * len(self.codes) + sum(
+            sys.getsizeof(value) for value in self.values[1:])
+
+class _PackedStringColumn:
+    """
+    String column packed into one UTF-8 buffer for mostly-distinct values.
+    
+    Updates append the new text and repoint the row, so the old bytes stay
+    in the buffer until the table is compacted.
+    """
+    
+    def __init__(self):
+        self.buffer = bytearray()
+        self.starts = array('Q')
+        self.lengths = array('I')
+        self.nulls = bytearray()
+        self.repointed_end = 0  # end of the furthest text written by set()
+    
+    @classmethod
+    def from_values(cls, values: Iterable[Optional[str]]) -> '_PackedStringColumn':
+        column = cls()
+        for value in values:
+            column.append(value)
+        return column
+    
+    def _pack(self, value: Optional[str]) -> Tuple[int, int]:
+        if value is None:
+            return 0, 0
+        if not isinstance(value, str):
+            raise TypeError(f"expected str, got {type(value).__name__}")
+        encoded = value.encode('utf-8')
+        start = len(self.buffer)
+        self.buffer += encoded
+        return start, len(encoded)
+    
+    def append(self, value: Optional[str]) -> None:
+        start, length = self._pack(value)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.nulls.append(value is None)
+    
+    def extend(self, values: List[Optional[str]]) -> None:
+        for value in values:
+            self.append(value)
+    
+    def get(self, position: int) -> Optional[str]:
+        if self.nulls[position]:
+            return None
+        start = self.starts[position]
+        return self.buffer[start:start + self.lengths[position]].decode('utf-8')
+    
+    def set(self, position: int, value: Optional[str]) -> None:
+        start, length = self.starts[position], self.lengths[position] = self._pack(value)
+        self.nulls[position] = value is None
+        if value is not None:
+            self.repointed_end = max(self.repointed_end, start + length)
+    
+    def truncate(self, length: int) -> None:
+        # Appended text is laid out in row order, so the removed rows' text
+        # starts at their first non-NULL value (NULLs record start 0); text
+        # that set() wrote for surviving rows may lie past it and is kept
+        removed = [start for start, null in zip(self.starts[length:], self.nulls[length:])
+                   if not null]
+        if removed:
+            del self.buffer[max(min(removed), self.repointed_end):]
+        del self.starts[length:]
+        del self.lengths[length:]
+        del self.nulls[length:]
+    
+    def matching(self, positions: Iterable[int], op: str, operand: Any) -> List[int]:
+        compare = CONDITION_OPERATORS[op]
+        if op == '=' and isinstance(operand, str):
+            # Compare encoded bytes, skipping rows of the wrong length
+            encoded = operand.encode('utf-8')
+            size, buffer, starts, lengths = len(encoded), self.buffer, self.starts, self.lengths
+            return [i for i in positions if lengths[i] == size and not self.nulls[i] and
+                    buffer[starts[i]:starts[i] + size] == encoded]
+        get = self.get
+        return [i for i in positions if compare(get(i), operand)]
+    
+    def present(self, positions: Optional[Iterable[int]]) -> List[str]:
+        get, nulls = self.get, self.nulls
+        return [get(i) for i in (range(len(nulls)) if positions is None else positions)
+                if not nulls[i]]
+    
+    def compact(self, keep: Iterable[int]) -> None:
+        values = [self.get(i) for i in keep]
+        self.__init__()
+        for value in values:
+            self.append(value)
+    
+    def nbytes(self) -> int:
+        return len(self.buffer) + 12 * len(self.starts) + len(self.nulls)
+
+class _ObjectColumn:
+    """Fallback column for values without a compact representation."""
+    
+    def __init__(self):
+        self.values: List[Any] = []
+    
+    def append(self, value: Any) -> None:
+        self.values.append(value)
+    
+    def extend(self, values: List[Any]) -> None:
+        self.values.extend(values)
+    
+    def get(self, position: int) -> Any:
+        return self.values[position]
+    
+    def set(self, position: int, value: Any) -> None:
+        self.values[position] = value
+    
+    def truncate(self, length: int) -> None:
+        del self.values[length:]
+    
+    def matching(self, positions: Iterable[int], op: str, operand: Any) -> List[int]:
+        compare = CONDITION_OPERATORS[op]
+        values = self.values
+        return [i for i in positions if compare(values[i], operand)]
+    
+    def present(self, positions: Optional[Iterable[int]]) -> List[Any]:
+        values = self.values
+        return [values[i] for i in (range(len(values)) if positions is None else positions)
+                if values[i] is not None]
+    
+    def compact(self, keep: List[int]) -> None:
+        self.values = [self.values[i] for i in keep]
+    
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.values)
+
+def _make_column(definition: Dict[str, Any]):
+    column_type = definition.get('type')
+    if column_type in _COLUMN_TYPECODES:
+        return _TypedColumn(_COLUMN_TYPECODES[column_type], {'int': int, 'float': float, 'bool': bool}[column_type])
+    if column_type == 'str':
+        return _InternedColumn()
+    return _ObjectColumn()
+
+class ColumnarTable:
+    """
+    Column-oriented table storage.
+    
+    Each schema column is stored in its own typed array ("int", "float" and
+    "bool" columns) or string column, so a row costs a few bytes per column
+    instead of a dict. String columns are interned while values repeat and
+    switch to a packed UTF-8 buffer once most values turn out to be
+    distinct. Deletes set a tombstone and the arrays
+    are compacted once half the rows are dead, unless an open cursor has
+    pinned the current positions. Rows are addressed by position and only
+    materialized as dicts when read.
     """
     
-    def __init__(self, auto_commit: bool = True):
+    def __init__(self, schema: Dict[str, Any]):
+        """
+        Initialize empty storage for a schema.
+        
+        Args:
+            schema (dict): Table schema in the create_table format
+        """
+        self.schema = schema
+        self.columns = {name: _make_column(definition or {}) for name, definition in schema.items()}
+        self.deleted = bytearray()
+        self.deleted_count = 0
+        self.pins = 0  # open cursors holding row positions
+    
+    def __len__(self) -> int:
+        return len(self.deleted) - self.deleted_count
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.rows(self.live_positions()))
+    
+    def live_positions(self) -> Iterable[int]:
+        """Return the positions of rows that are not deleted."""
+        if not self.deleted_count:
+            return range(len(self.deleted))
+        deleted = self.deleted
+        return [i for i in range(len(deleted)) if not deleted[i]]
+    
+    def append(self, row: Dict[str, Any]) -> int:
+        """
+        Append a row.
+        
+        Args:
+            row (dict): Row values; missing columns are stored as NULL
+            
+        Returns:
+            int: Position of the new row
+            
+        Raises:
+            KeyError: If the row has a column outside the schema
+            TypeError: If a value does not fit its column type
+        """
+        unknown = row.keys() - self.columns.keys()
+        if unknown:
+            raise KeyError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        position = len(self.deleted)
+        for name, column in self.columns.items():
+            try:
+                column.append(row.get(name))
+            except (TypeError, OverflowError):
+                # Keep the columns aligned before reporting the bad value
+                for appended in self.columns.values():
+                    appended.truncate(position)
+                raise TypeError(f"Invalid value for column {name!r}: {row.get(name)!r}")
+        self.deleted.append(0)
+        if position % _InternedColumn.PACKING_THRESHOLD == 0:
+            self._pack_distinct_strings()
+        return position
+    
+    def extend(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Append a batch of rows one column at a time.
+        
+        Args:
+            rows (list): Row dicts; missing columns are stored as NULL
+            
+        Returns:
+            int: Position of the first new row
+            
+        Raises:
+            KeyError: If a row has a column outside the schema
+            TypeError: If a value does not fit its column type; no rows
+                are added
+        """
+        unknown = set().union(*rows) - self.columns.keys()
+        if unknown:
+            raise KeyError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        position = len(self.deleted)
+        for name, column in self.columns.items():
+            try:
+                column.extend([row.get(name) for row in rows])
+            except (TypeError, OverflowError) as error:
+                for appended in self.columns.values():
+                    appended.truncate(position)
+                raise TypeError(f"Invalid value for column {name!r}: {error}")
+        self.deleted.extend(bytes(len(rows)))
+        self._pack_distinct_strings()
+        return position
+    
+    def _pack_distinct_strings(self) -> None:
+        for name, column in self.columns.items():
+            if isinstance(column, _InternedColumn) and column.should_pack():
+                self.columns[name] = _PackedStringColumn.from_values(
+                    column.get(i) for i in range(len(column.codes)))
+    
+    def row(self, position: int, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Materialize one row as a dict."""
+        return {name: self.columns[name].get(position) for name in (columns or self.columns)}
+    
+    def rows(self, positions: Iterable[int], columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Materialize rows as dicts.
+        
+        Args:
+            positions (iterable): Row positions
+            columns (list, optional): Columns to include, default all
+            
+        Returns:
+            list: Row dicts
+        """
+        getters = [(name, self.columns[name].get) for name in (columns or self.columns)]
+        return [{name: get(position) for name, get in getters} for position in positions]
+    
+    def find(self, conditions: Dict[str, Any] = None) -> List[int]:
+        """
+        Return positions of live rows matching WHERE conditions.
+        
+        Conditions are evaluated column at a time, each narrowing the
+        candidate positions; string conditions are evaluated once per
+        distinct value.
+        
+        Args:
+            conditions (dict, optional): Conditions in the format accepted by
+                normalize_conditions
+            
+        Returns:
+            list: Matching positions in table order
+        """
+        positions = self.live_positions()
+        for column, op, operand in normalize_conditions(conditions):
+            if column not in self.columns:
+                positions = [i for i in positions if CONDITION_OPERATORS[op](None, operand)]
+            else:
+                positions = self.columns[column].matching(positions, op, operand)
+            if not positions:
+                break
+        return list(positions)
+    
+    def update(self, positions: Iterable[int], changes: Dict[str, Any]) -> int:
+        """
+        Set column values on rows.
+        
+        Args:
+            positions (iterable): Row positions
+            changes (dict): Column values to set
+            
+        Returns:
+            int: Number of rows updated
+        """
+        unknown = changes.keys() - self.columns.keys()
+        if unknown:
+            raise KeyError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        count = 0
+        for position in positions:
+            for name, value in changes.items():
+                self.columns[name].set(position, value)
+            count += 1
+        return count
+    
+    def delete(self, positions: Iterable[int]) -> int:
+        """
+        Tombstone rows, compacting storage once half the rows are dead.
+        
+        Args:
+            positions (iterable): Row positions
+            
+        Returns:
+            int: Number of rows deleted
+        """
+        count = 0
+        for position in positions:
+            if not self.deleted[position]:
+                self.deleted[position] = 1
+                count += 1
+        self.deleted_count += count
+        if not self.pins and self.deleted_count * 2 > len(self.deleted):
+            self.compact()
+        return count
+    
+    def pin(self) -> None:
+        """Keep positions stable until a matching unpin; deletes only tombstone."""
+        self.pins += 1
+    
+    def unpin(self) -> None:
+        """Release a pin, running any compaction it held back."""
+        self.pins -= 1
+        if not self.pins and self.deleted_count * 2 > len(self.deleted):
+            self.compact()
+    
+    def compact(self) -> None:
+        """Drop tombstoned rows from every column; positions are renumbered."""
+        keep = self.live_positions()
+        for column in self.columns.values():
+            column.compact(keep)
+        self.deleted = bytearray(len(keep))
+        self.deleted_count = 0
+    
+    def aggregate(self, column: str, function: str, positions: Optional[Iterable[int]] = None) -> Any:
+        """
+        Aggregate a column over live rows.
+        
+        Args:
+            column (str): Column name
+            function (str): "count", "sum", "avg", "min" or "max"
+            positions (iterable, optional): Restrict to these positions
+            
+        Returns:
+            any: Aggregate over non-NULL values (None for an empty avg/min/max)
+        """
+        if positions is None and self.deleted_count:
+            positions = self.live_positions()
+        return _aggregate(self.columns[column].present(positions), function)
+    
+    def nbytes(self) -> int:
+        """Return the approximate storage size in bytes."""
+        return len(self.deleted) + sum(column.nbytes() for column in self.columns.values())
+    
+    def describe(self) -> Dict[str, Any]:
+        """
+        Summarize the storage in the shape get_table_info reports.
+        
+        Returns:
+            dict: Record count, columns, storage kind and size
+        """
+        return {
+            'record_count': len(self),
+            'columns': list(self.columns),
+            'storage': 'columnar',
+            'deleted_rows': self.deleted_count,
+            'nbytes': self.nbytes()
+        }
+    
+    def dump_state(self) -> Dict[str, Any]:
+        """
+        Export the arrays behind the table as builtin types for snapshots.
+        
+        Returns:
+            dict: State accepted by from_state
+        """
+        return {
+            'schema': self.schema,
+            'columns': {name: (type(column).__name__, vars(column))
+                        for name, column in self.columns.items()},
+            'deleted': self.deleted,
+            'deleted_count': self.deleted_count
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'ColumnarTable':
+        """
+        Rebuild a table from dump_state output without re-appending rows.
+        
+        Args:
+            state (dict): Output of dump_state
+            
+        Returns:
+            ColumnarTable: The restored table
+        """
+        table = cls.__new__(cls)
+        table.schema = state['schema']
+        table.columns = {}
+        for name, (kind, attributes) in state['columns'].items():
+            column = _COLUMN_CLASSES[kind].__new__(_COLUMN_CLASSES[kind])
+            column.__dict__.update(attributes)
+            table.columns[name] = column
+        table.deleted = state['deleted']
+        table.deleted_count = state['deleted_count']
+        table.pins = 0
+        return table
+
+_COLUMN_CLASSES = {column_class.__name__: column_class for column_class in
+                   (_TypedColumn, _InternedColumn, _PackedStringColumn, _ObjectColumn)}
+
+def _aggregate(values: List[Any], function: str) -> Any:
+    if function == 'count':
+        return len(values)
+    if function == 'sum':
+        return sum(values)
+    if function == 'avg':
+        return sum(values) / len(values) if len(values) else None
+    if function in ('min', 'max'):
+        return (min if function == 'min' else max)(values) if len(values) else None
+    raise ValueError(f"Unknown aggregate function {function!r}")
+
+class TransactionConflict(Exception):
+    """Raised when two transactions update the same row version."""
+    pass
+
+class Transaction:
+    """
+    Snapshot handle for multi-version concurrency control.
+    
+    A transaction sees every version created by itself or by transactions
+    that committed before it began, and never sees later or concurrent
+    changes. Use it as a context manager to commit on success and roll back
+    on error.
+    """
+    
+    def __init__(self, manager: 'TransactionManager', txid: int, active: frozenset):
+        """
+        Initialize a transaction; use TransactionManager.begin instead.
+        
+        Args:
+            manager (TransactionManager): Owning manager
+            txid (int): Transaction id, also the snapshot's upper bound
+            active (frozenset): Ids of transactions in progress at start
+        """
+        self.manager = manager
+        self.txid = txid
+        self.active = active
+        self.xmin = min(active, default=txid)
+        self.status = "active"
+    
+    def sees(self, creator: int) -> bool:
+        """Whether changes made by transaction `creator` are in this snapshot."""
+        return creator == self.txid or (creator < self.txid and creator not in self.active
+                                        and creator not in self.manager.aborted)
+    
+    def commit(self) -> bool:
+        """Commit the transaction; returns False if it already ended."""
+        return self.manager.finish(self, "committed")
+    
+    def rollback(self) -> bool:
+        """Roll the transaction back; returns False if it already ended."""
+        return self.manager.finish(self, "aborted")
+    
+    def __enter__(self) -> 'Transaction':
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+class TransactionManager:
+    """
+    Allocates transaction ids and tracks which transactions are running.
+    
+    Committing or rolling back only updates these sets, so both are O(1)
+    regardless of how many rows the transaction changed; versions left by
+    aborted transactions are invisible immediately and reclaimed by vacuum.
+    """
+    
+    def __init__(self):
+        """Initialize with no transactions."""
+        self.next_txid = 1
+        self.running: Dict[int, Transaction] = {}
+        self.aborted: set = set()
+        self.lock = threading.Lock()
+    
+    def begin(self) -> Transaction:
+        """
+        Start a transaction with a snapshot of the current committed state.
+        
+        Returns:
+            Transaction: The new transaction
+        """
+        with self.lock:
+            txid = self.next_txid
+            self.next_txid += 1
+            transaction = Transaction(self, txid, frozenset(self.running))
+            self.running[txid] = transaction
+        return transaction
+    
+    def finish(self, transaction: Transaction, status: str) -> bool:
+        """
+        End a transaction as "committed" or "aborted".
+        
+        Args:
+            transaction (Transaction): Transaction to end
+            status (str): Final status
+            
+        Returns:
+            bool: False if the transaction had already ended
+        """
+        with self.lock:
+            if self.running.pop(transaction.txid, None) is None:
+                return False
+            if status == "aborted":
+                self.aborted.add(transaction.txid)
+            transaction.status = status
+        return True
+    
+    def is_running(self, txid: int) -> bool:
+        return txid in self.running
+    
+    def horizon(self) -> int:
+        """Oldest transaction id any running snapshot may still need."""
+        with self.lock:
+            return min((transaction.xmin for transaction in self.running.values()),
+                       default=self.next_txid)
+
+# Creator stamp for reclaimed versions; no snapshot id is ever this large
+_NEVER_VISIBLE = sys.maxsize
+
+class RowVersion:
+    """One version of a row: its data and the transactions that created and deleted it."""
+    
+    __slots__ = ('data', 'created_by', 'deleted_by')
+    
+    def __init__(self, data: Dict[str, Any], created_by: int):
+        self.data = data
+        self.created_by = created_by
+        self.deleted_by = 0
+
+class VersionedTable:
+    """
+    Row storage keeping every version of each row until vacuumed.
+    
+    Inserts append a version, updates append a new version and stamp the
+    old one as deleted, and deletes only stamp. Readers filter versions by
+    their transaction's snapshot, so they never block writers and never
+    see partial transactions. Returned row dicts are shared with the
+    stored version and must not be modified.
+    """
+    
+    def __init__(self, schema: Dict[str, Any], manager: TransactionManager):
+        """
+        Initialize empty versioned storage.
+        
+        Args:
+            schema (dict): Table schema in the create_table format
+            manager (TransactionManager): Manager issuing transactions
+        """
+        self.schema = schema
+        self.manager = manager
+        self.versions: List[RowVersion] = []
+        self.lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate rows as of the latest committed state."""
+        transaction = self.manager.begin()
+        try:
+            yield from self.scan(transaction)
+        finally:
+            transaction.rollback()
+    
+    def _visible(self, version: RowVersion, transaction: Transaction) -> bool:
+        if not transaction.sees(version.created_by):
+            return False
+        deleted_by = version.deleted_by
+        return not deleted_by or not transaction.sees(deleted_by)
+    
+    def scan(self, transaction: Transaction, conditions: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        Return rows visible to a transaction that match WHERE conditions.
+        
+        Args:
+            transaction (Transaction): Reading transaction
+            conditions (dict, optional): WHERE conditions
+            
+        Returns:
+            list: Matching rows (read-only)
+        """
+        predicate = compile_predicate(normalize_conditions(conditions))
+        visible = self._visible
+        return [version.data for version in self.versions
+                if visible(version, transaction) and predicate(version.data)]
+    
+    def iter_scan(self, transaction: Transaction,
+                  conditions: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """Lazily yield the rows scan would return, stopping at the versions present at the call."""
+        predicate = compile_predicate(normalize_conditions(conditions))
+        visible = self._visible
+        versions = self.versions
+        return (version.data for version in islice(versions, len(versions))
+                if visible(version, transaction) and predicate(version.data))
+    
+    def insert(self, transaction: Transaction, row: Dict[str, Any]) -> None:
+        """Add a row created by a transaction."""
+        version = RowVersion(dict(row), transaction.txid)
+        with self.lock:
+            self.versions.append(version)
+    
+    def insert_many(self, transaction: Transaction, rows: List[Dict[str, Any]]) -> None:
+        """Add a batch of rows created by a transaction."""
+        txid = transaction.txid
+        versions = [RowVersion(dict(row), txid) for row in rows]
+        with self.lock:
+            self.versions.extend(versions)
+    
+    def _claim(self, transaction: Transaction, conditions: Dict[str, Any]) -> List[RowVersion]:
+        """Stamp matching visible versions as deleted by the transaction."""
+        predicate = compile_predicate(normalize_conditions(conditions))
+        visible = self._visible
+        claimed = []
+        with self.lock:
+            for version in self.versions:
+                if not (visible(version, transaction) and predicate(version.data)):
+                    continue
+                deleted_by = version.deleted_by
+                if deleted_by and deleted_by not in self.manager.aborted:
+                    # Another running transaction, or one that committed after our snapshot
+                    raise TransactionConflict(
+                        f"Row updated concurrently by transaction {deleted_by}")
+                claimed.append(version)
+            for version in claimed:
+                version.deleted_by = transaction.txid
+        return claimed
+    
+    def update(self, transaction: Transaction, conditions: Dict[str, Any],
+               changes: Dict[str, Any]) -> int:
+        """
+        Write new versions of matching rows.
+        
+        Args:
+            transaction (Transaction): Writing transaction
+            conditions (dict): WHERE conditions
+            changes (dict): Column values to set
+            
+        Returns:
+            int: Number of rows updated
+            
+        Raises:
+            TransactionConflict: If a matching row has an uncommitted or
+                newer committed change from another transaction
+        """
+        claimed = self._claim(transaction, conditions)
+        with self.lock:
+            self.versions.extend(RowVersion({**version.data, **changes}, transaction.txid)
+                                 for version in claimed)
+        return len(claimed)
+    
+    def delete(self, transaction: Transaction, conditions: Dict[str, Any]) -> int:
+        """
+        Delete matching rows as of the transaction.
+        
+        Args:
+            transaction (Transaction): Writing transaction
+            conditions (dict): WHERE conditions
+            
+        Returns:
+            int: Number of rows deleted
+            
+        Raises:
+            TransactionConflict: As for update
+        """
+        return len(self._claim(transaction, conditions))
+    
+    def vacuum(self) -> int:
+        """
+        Reclaim versions no running or future snapshot can see.
+        
+        That covers versions created by aborted transactions and versions
+        deleted by transactions that committed before the oldest running
+        snapshot began. Deletion stamps left by aborted transactions are
+        cleared.
+        
+        Returns:
+            int: Number of versions reclaimed
+        """
+        horizon = self.manager.horizon()
+        aborted = self.manager.aborted
+        running = self.manager.is_running
+        
+        def dead(version):
+            if version.created_by in aborted:
+                # Readers still walking the old list must not see it once
+                # the aborted id is forgotten
+                version.created_by = _NEVER_VISIBLE
+                return True
+            deleted_by = version.deleted_by
+            if not deleted_by:
+                return False
+            if deleted_by in aborted:
+                version.deleted_by = 0
+                return False
+            return deleted_by < horizon and not running(deleted_by)
+        
+        with self.lock:
+            kept = [version for version in self.versions if not dead(version)]
+            reclaimed = len(self.versions) - len(kept)
+            self.versions = kept
+        return reclaimed
+
+class TableShard:
+    """One partition of a ShardedTable: rows keyed by primary key, indexes and a lock."""
+    
+    __slots__ = ('rows', 'indexes', 'lock')
+    
+    def __init__(self):
+        self.rows: Dict[Any, Dict[str, Any]] = {}
+        self.indexes: Dict[str, Any] = {}
+        # Reentrant so callers can hold it around several table calls
+        self.lock = threading.RLock()
+
+class ShardedTable:
+    """
+    Row storage hash-partitioned by primary key across independent shards.
+    
+    Each shard keeps its rows in a dict keyed by primary key, its own
+    secondary indexes and its own lock, so writers to different shards
+    never wait for each other. Conditions that pin the primary key with =
+    or IN are routed to the owning shards; all others fan out to every
+    shard. Rows are returned as copies taken under the shard lock, so
+    readers never see a half-applied update. Hold shard_for(key).lock to
+    make several calls on one key atomic.
+    """
+    
+    def __init__(self, schema: Dict[str, Any], shard_count: int = 8):
+        """
+        Initialize empty sharded storage.
+        
+        Args:
+            schema (dict): Table schema in the create_table format
+            shard_count (int): Number of shards
+            
+        Raises:
+            ValueError: If the schema has no primary key column
+        """
+        key = next((column for column, definition in schema.items()
+                    if definition and definition.get('primary_key')), None)
+        if key is None:
+            raise ValueError("Sharded storage needs a primary key column")
+        self.schema = schema
+        self.key = key
+        self.shards = [TableShard() for _ in range(shard_count)]
+        self.index_kinds: Dict[str, str] = {}
+    
+    def __len__(self) -> int:
+        return sum(len(shard.rows) for shard in self.shards)
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate copies of the rows, one shard at a time."""
+        for shard in self.shards:
+            with shard.lock:
+                rows = list(map(dict, shard.rows.values()))
+            yield from rows
+    
+    def shard_for(self, key: Any) -> TableShard:
+        """Return the shard owning a primary key value."""
+        return self.shards[hash(key) % len(self.shards)]
+    
+    def shard_sizes(self) -> List[int]:
+        """Return the number of rows in each shard."""
+        return [len(shard.rows) for shard in self.shards]
+    
+    def _route(self, triples: List[Tuple[str, str, Any]]) -> List[Tuple[TableShard, Optional[List[Any]]]]:
+        """Pair each shard to visit with the primary keys to look up there, None meaning scan."""
+        pinned = [(op, operand) for column, op, operand in triples
+                  if column == self.key and op in ('=', 'in')]
+        if pinned:
+            try:
+                keys = _lookup_keys(pinned)
+            except TypeError:
+                pinned = None
+        if not pinned:
+            return [(shard, None) for shard in self.shards]
+        by_shard: Dict[int, List[Any]] = defaultdict(list)
+        for key in keys:
+            by_shard[hash(key) % len(self.shards)].append(key)
+        return [(self.shards[number], shard_keys) for number, shard_keys in sorted(by_shard.items())]
+    
+    def _matching(self, shard: TableShard, keys: Optional[List[Any]],
+                  triples: List[Tuple[str, str, Any]],
+                  predicate: Callable[[Dict[str, Any]], bool]) -> List[Dict[str, Any]]:
+        """Matching stored rows of one shard; the caller holds its lock."""
+        if keys is not None:
+            rows = shard.rows
+            candidates = [rows[key] for key in keys if key in rows]
+        else:
+            candidates = shard.rows.values()
+            for column, index in shard.indexes.items():
+                served = [(op, operand) for name, op, operand in triples
+                          if name == column and op in index.operators]
+                if served:
+                    candidates = index.candidates(served)
+                    break
+        return list(filter(predicate, candidates))
+    
+    def find(self, conditions: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        Return copies of the rows matching WHERE conditions.
+        
+        Args:
+            conditions (dict, optional): WHERE conditions
+            
+        Returns:
+            list: Matching rows, grouped by shard
+        """
+        return list(self.iter_find(conditions))
+    
+    def iter_find(self, conditions: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """Lazily yield the rows find would return, copying one shard at a time."""
+        triples = normalize_conditions(conditions)
+        predicate = compile_predicate(triples)
+        for shard, keys in self._route(triples):
+            with shard.lock:
+                found = list(map(dict, self._matching(shard, keys, triples, predicate)))
+            yield from found
+    
+    def insert(self, row: Dict[str, Any]) -> None:
+        """
+        Store a copy of a row in the shard owning its primary key.
+        
+        Args:
+            row (dict): Row to store
+            
+        Raises:
+            ValueError: If the primary key is missing or already stored
+        """
+        key = row.get(self.key)
+        if key is None:
+            raise ValueError(f"Sharded row is missing primary key '{self.key}'")
+        row = dict(row)
+        shard = self.shard_for(key)
+        with shard.lock:
+            if key in shard.rows:
+                raise ValueError(f"Duplicate primary key {key!r}")
+            shard.rows[key] = row
+            for index in shard.indexes.values():
+                index.add(row)
+    
+    def insert_many(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Store copies of a batch of rows; either all are stored or none.
+        
+        The owning shards are locked in shard order, so concurrent batches
+        cannot deadlock.
+        
+        Args:
+            rows (list): Rows to store
+            
+        Raises:
+            ValueError: If a primary key is missing, repeated or already stored
+        """
+        by_shard: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        seen = set()
+        for row in rows:
+            key = row.get(self.key)
+            if key is None:
+                raise ValueError(f"Sharded row is missing primary key '{self.key}'")
+            if key in seen:
+                raise ValueError(f"Duplicate primary key {key!r}")
+            seen.add(key)
+            by_shard[hash(key) % len(self.shards)].append(dict(row))
+        
+        with ExitStack() as stack:
+            targets = [(self.shards[number], by_shard[number]) for number in sorted(by_shard)]
+            for shard, _ in targets:
+                stack.enter_context(shard.lock)
+            for shard, shard_rows in targets:
+                stored = shard.rows.keys() & map(itemgetter(self.key), shard_rows)
+                if stored:
+                    raise ValueError(f"Duplicate primary key {min(stored, key=repr)!r}")
+            for shard, shard_rows in targets:
+                shard.rows.update(zip(map(itemgetter(self.key), shard_rows), shard_rows))
+                for index in shard.indexes.values():
+                    index.add_many(shard_rows)
+    
+    def update(self, conditions: Dict[str, Any], changes: Dict[str, Any]) -> int:
+        """
+        Apply changes to every row matching WHERE conditions.
+        
+        Args:
+            conditions (dict): WHERE conditions
+            changes (dict): Column values to set
+            
+        Returns:
+            int: Number of rows updated
+            
+        Raises:
+            ValueError: If changes include the primary key, which would move
+                rows between shards
+        """
+        if self.key in changes:
+            raise ValueError(f"Primary key '{self.key}' of a sharded table cannot be updated")
+        triples = normalize_conditions(conditions)
+        predicate = compile_predicate(triples)
+        updated = 0
+        for shard, keys in self._route(triples):
+            with shard.lock:
+                indexes = [index for column, index in shard.indexes.items() if column in changes]
+                for row in self._matching(shard, keys, triples, predicate):
+                    for index in indexes:
+                        index.remove(row)
+                    row.update(changes)
+                    for index in indexes:
+                        index.add(row)
+                    updated += 1
+        return updated
+    
+    def delete(self, conditions: Dict[str, Any]) -> int:
+        """
+        Delete every row matching WHERE conditions.
+        
+        Args:
+            conditions (dict): WHERE conditions
+            
+        Returns:
+            int: Number of rows deleted
+        """
+        triples = normalize_conditions(conditions)
+        predicate = compile_predicate(triples)
+        deleted = 0
+        for shard, keys in self._route(triples):
+            with shard.lock:
+                for row in self._matching(shard, keys, triples, predicate):
+                    del shard.rows[row[self.key]]
+                    for index in shard.indexes.values():
+                        index.remove(row)
+                    deleted += 1
+        return deleted
+    
+    def create_index(self, column: str, kind: str = "hash") -> None:
+        """Build a secondary index of the given kind in every shard."""
+        for shard in self.shards:
+            with shard.lock:
+                index = INDEX_TYPES[kind](column)
+                index.add_many(list(shard.rows.values()))
+                shard.indexes[column] = index
+        self.index_kinds[column] = kind
+    
+    def drop_index(self, column: str) -> bool:
+        """Drop a secondary index from every shard; returns False if there was none."""
+        if self.index_kinds.pop(column, None) is None:
+            return False
+        for shard in self.shards:
+            with shard.lock:
+                shard.indexes.pop(column, None)
+        return True
+
+class SQLSyntaxError(ValueError):
+    """Raised for SQL outside the subset compile_sql understands."""
+    pass
+
+_SQL_TOKEN = re.compile(r"""\s*(?:
+    (?P<number>\d+(?:\.\d*)?)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<param>\?)
+  | (?P<name>[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)?)
+  | (?P<op><>|!=|<=|>=|[=<>(),+\-*/;])
+)""", re.VERBOSE)
+
+_SQL_AGGREGATES = {'COUNT', 'SUM', 'AVG', 'MIN', 'MAX'}
+_SQL_CLAUSE_KEYWORDS = {'WHERE', 'JOIN', 'INNER', 'LEFT', 'OUTER', 'ON', 'GROUP', 'ORDER',
+                        'LIMIT', 'OFFSET', 'AS', 'SET', 'VALUES'}
+_SQL_COMPARISONS = {'=': '=', '!=': '!=', '<>': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+_SQL_ARITHMETIC = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv}
+
+def _tokenize_sql(query: str) -> List[Tuple[str, Any]]:
+    tokens = []
+    position, end = 0, len(query.rstrip())
+    while position < end:
+        match = _SQL_TOKEN.match(query, position)
+        if match is None or match.end() == position:
+            raise SQLSyntaxError(f"Unexpected character at position {position}: {query[position:position + 10]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'number':
+            tokens.append((kind, float(text) if '.' in text else int(text)))
+        elif kind == 'string':
+            tokens.append((kind, text[1:-1].replace("''", "'")))
+        elif kind == 'name' and text.upper() in ('TRUE', 'FALSE', 'NULL'):
+            tokens.append(('literal', {'TRUE': True, 'FALSE': False, 'NULL': None}[text.upper()]))
+        else:
+            tokens.append((kind, text))
+        position = match.end()
+    if tokens and tokens[-1] == ('op', ';'):
+        tokens.pop()
+    tokens.append(('end', None))
+    return tokens
+
+@dataclass
+class SQLStatement:
+    """
+    Parsed SQL statement with its WHERE clause and expressions compiled.
+    
+    Parameters stay unbound, so one statement serves every execution of
+    the same query text. `conditions` holds the WHERE clause as
+    (column, operator, value) terms when it is a plain conjunction, which
+    lets it be handed to find_rows and its indexes; `predicate` evaluates
+    any WHERE clause as (row, params) -> bool.
+    """
+    kind: str
+    table: str
+    alias: Optional[str] = None
+    columns: List[Tuple[str, Any, str]] = field(default_factory=list)  # (kind, expression, label)
+    join: Optional[Dict[str, Any]] = None
+    conditions: Optional[List[Tuple[str, str, Any]]] = None
+    predicate: Optional[Callable[[Dict[str, Any], List[Any]], bool]] = None
+    group_by: List[str] = field(default_factory=list)
+    order_by: List[Tuple[str, bool]] = field(default_factory=list)
+    limit: Any = None
+    offset: Any = None
+    insert_columns: Optional[List[str]] = None
+    values: List[List[Any]] = field(default_factory=list)
+    assignments: List[Tuple[str, Callable[[Dict[str, Any], List[Any]], Any], bool]] = field(default_factory=list)
+    parameter_count: int = 0
+
+def _bind(value: Tuple[str, Any], params: List[Any]) -> Any:
+    if value[0] == 'param':
+        return params[value[1]]
+    if value[0] == 'list':
+        return [_bind(item, params) for item in value[1]]
+    return value[1]
+
+class _SQLParser:
+    """Recursive-descent parser for the SQL subset."""
+    
+    def __init__(self, query: str):
+        self.tokens = _tokenize_sql(query)
+        self.position = 0
+        self.parameters = 0
+        self.qualifiers: set = set()
+    
+    def peek(self) -> Tuple[str, Any]:
+        return self.tokens[self.position]
+    
+    def advance(self) -> Tuple[str, Any]:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+    
+    def keyword(self, *words: str) -> bool:
+        """Consume the next token if it is one of the given keywords."""
+        kind, value = self.peek()
+        if kind == 'name' and value.upper() in words:
+            self.position += 1
+            return True
+        return False
+    
+    def expect_keyword(self, word: str) -> None:
+        if not self.keyword(word):
+            raise SQLSyntaxError(f"Expected {word}, found {self.peek()[1]!r}")
+    
+    def symbol(self, symbol: str) -> bool:
+        if self.peek() == ('op', symbol):
+            self.position += 1
+            return True
+        return False
+    
+    def expect_symbol(self, symbol: str) -> None:
+        if not self.symbol(symbol):
+            raise SQLSyntaxError(f"Expected {symbol!r}, found {self.peek()[1]!r}")
+    
+    def identifier(self) -> str:
+        kind, value = self.advance()
+        if kind != 'name' or value.upper() in _SQL_CLAUSE_KEYWORDS:
+            raise SQLSyntaxError(f"Expected a name, found {value!r}")
+        return value
+    
+    def column(self) -> str:
+        name = self.identifier()
+        qualifier, _, column = name.rpartition('.')
+        # Qualifiers are only kept when a join makes them meaningful
+        return name if qualifier and qualifier not in self.qualifiers else column
+    
+    def value(self) -> Tuple[str, Any]:
+        kind, value = self.advance()
+        if kind == 'param':
+            self.parameters += 1
+            return ('param', self.parameters - 1)
+        if kind in ('number', 'string', 'literal'):
+            return ('literal', value)
+        if (kind, value) == ('op', '-') and self.peek()[0] == 'number':
+            return ('literal', -self.advance()[1])
+        raise SQLSyntaxError(f"Expected a value, found {value!r}")
+    
+    def parse(self) -> SQLStatement:
+        kind, value = self.peek()
+        word = value.upper() if kind == 'name' else None
+        parsers = {'SELECT': self.select, 'INSERT': self.insert,
+                   'UPDATE': self.update, 'DELETE': self.delete}
+        if word not in parsers:
+            raise SQLSyntaxError(f"Unsupported statement starting with {value!r}")
+        self.advance()
+        statement = parsers[word]()
+        if self.peek()[0] != 'end':
+            raise SQLSyntaxError(f"Unexpected {self.peek()[1]!r}")
+        statement.parameter_count = self.parameters
+        return statement
+    
+    def table_reference(self) -> Tuple[str, Optional[str]]:
+        table = self.identifier()
+        self.keyword('AS')
+        kind, value = self.peek()
+        alias = None
+        if kind == 'name' and value.upper() not in _SQL_CLAUSE_KEYWORDS:
+            alias = self.advance()[1]
+        return table, alias
+    
+    def select(self) -> SQLStatement:
+        start = self.position
+        # Skip ahead to FROM so column qualifiers can be resolved
+        depth = 0
+        while True:
+            kind, value = self.advance()
+            if kind == 'end':
+                raise SQLSyntaxError("Expected FROM")
+            if kind == 'name' and value.upper() == 'FROM' and depth == 0:
+                break
+            if kind == 'op':
+                depth += {'(': 1, ')': -1}.get(value, 0)
+        table, alias = self.table_reference()
+        statement = SQLStatement('select', table, alias)
+        self.qualifiers = {table, alias} - {None}
+        if self.keyword('INNER', 'LEFT', 'JOIN'):
+            join_kind = self.tokens[self.position - 1][1].upper()
+            if join_kind == 'LEFT':
+                self.keyword('OUTER')
+            if join_kind != 'JOIN':
+                self.expect_keyword('JOIN')
+            right_table, right_alias = self.table_reference()
+            right_name = right_alias or right_table
+            self.qualifiers = set()  # keep qualified names for joins
+            self.expect_keyword('ON')
+            keys = {}
+            for side in ('first', 'second'):
+                if side == 'second':
+                    self.expect_symbol('=')
+                qualifier, _, column = self.identifier().rpartition('.')
+                if qualifier:
+                    keys['right' if qualifier in (right_table, right_name) else 'left'] = column
+                else:
+                    keys['left' if 'left' not in keys else 'right'] = column
+            if len(keys) != 2:
+                raise SQLSyntaxError("JOIN ... ON must compare a column of each table")
+            statement.join = {'table': right_table, 'alias': right_name,
+                              'left': keys['left'], 'right': keys['right'],
+                              'outer': join_kind == 'LEFT'}
+        clauses = self.position
+        
+        self.position = start
+        statement.columns = self.select_list()
+        if not self.keyword('FROM'):
+            raise SQLSyntaxError(f"Unexpected {self.peek()[1]!r} in select list")
+        self.position = clauses
+        
+        if self.keyword('WHERE'):
+            self.where(statement)
+        if self.keyword('GROUP'):
+            self.expect_keyword('BY')
+            statement.group_by = [self.column()]
+            while self.symbol(','):
+                statement.group_by.append(self.column())
+        if self.keyword('ORDER'):
+            self.expect_keyword('BY')
+            statement.order_by = [self.order_item()]
+            while self.symbol(','):
+                statement.order_by.append(self.order_item())
+        if self.keyword('LIMIT'):
+            statement.limit = self.value()
+            if self.keyword('OFFSET'):
+                statement.offset = self.value()
+        
+        aggregated = any(kind == 'aggregate' for kind, _, _ in statement.columns)
+        if aggregated or statement.group_by:
+            loose = [label for kind, expression, label in statement.columns
+                     if kind == 'column' and expression not in statement.group_by]
+            if loose or any(kind == 'star' for kind, _, _ in statement.columns):
+                raise SQLSyntaxError("Selected columns must appear in GROUP BY")
+        return statement
+    
+    def select_list(self) -> List[Tuple[str, Any, str]]:
+        items = []
+        while True:
+            if self.symbol('*'):
+                items.append(('star', None, '*'))
+            else:
+                kind, value = self.peek()
+                if kind == 'name' and value.upper() in _SQL_AGGREGATES and \
+                        self.tokens[self.position + 1] == ('op', '('):
+                    function = self.advance()[1].upper()
+                    self.expect_symbol('(')
+                    argument = None if self.symbol('*') else self.column()
+                    self.expect_symbol(')')
+                    if argument is None and function != 'COUNT':
+                        raise SQLSyntaxError(f"{function}(*) is not supported")
+                    item = ('aggregate', (function, argument), f"{function}({argument or '*'})")
+                else:
+                    column = self.column()
+                    item = ('column', column, column)
+                if self.keyword('AS'):
+                    item = item[:2] + (self.identifier(),)
+                items.append(item)
+            if not self.symbol(','):
+                return items
+    
+    def order_item(self) -> Tuple[str, bool]:
+        column = self.column()
+        descending = self.keyword('DESC')
+        if not descending:
+            self.keyword('ASC')
+        return column, descending
+    
+    def where(self, statement: SQLStatement) -> None:
+        condition = self.condition()
+        terms = []
+        if self._conjunction(condition, terms):
+            statement.conditions = terms
+        statement.predicate = self._compile_condition(condition)
+    
+    def _conjunction(self, condition, terms: List[Tuple[str, str, Any]]) -> bool:
+        if condition[0] == 'compare':
+            terms.append(condition[1:])
+            return True
+        if condition[0] == 'and':
+            return all(self._conjunction(part, terms) for part in condition[1])
+        return False
+    
+    def condition(self):
+        parts = [self.conjunction()]
+        while self.keyword('OR'):
+            parts.append(self.conjunction())
+        return parts[0] if len(parts) == 1 else ('or', parts)
+    
+    def conjunction(self):
+        parts = [self.negation()]
+        while self.keyword('AND'):
+            parts.append(self.negation())
+        return parts[0] if len(parts) == 1 else ('and', parts)
+    
+    def negation(self):
+        if self.keyword('NOT'):
+            return ('not', self.negation())
+        if self.symbol('('):
+            condition = self.condition()
+            self.expect_symbol(')')
+            return condition
+        return self.comparison()
+    
+    def comparison(self):
+        column = self.column()
+        kind, value = self.peek()
+        if kind == 'op' and value in _SQL_COMPARISONS:
+            self.advance()
+            return ('compare', column, _SQL_COMPARISONS[value], self.value())
+        if self.keyword('IS'):
+            negated = self.keyword('NOT')
+            if self.advance() != ('literal', None):
+                raise SQLSyntaxError("Expected NULL after IS")
+            return ('compare', column, '!=' if negated else '=', ('literal', None))
+        if self.keyword('BETWEEN'):
+            low = self.value()
+            self.expect_keyword('AND')
+            return ('and', [('compare', column, '>=', low), ('compare', column, '<=', self.value())])
+        negated = self.keyword('NOT')
+        if self.keyword('LIKE'):
+            condition = ('compare', column, 'like', self.value())
+        elif self.keyword('IN'):
+            self.expect_symbol('(')
+            options = [self.value()]
+            while self.symbol(','):
+                options.append(self.value())
+            self.expect_symbol(')')
+            condition = ('compare', column, 'in', ('list', options))
+        else:
+            raise SQLSyntaxError(f"Expected a comparison after {column!r}, found {value!r}")
+        return ('not', condition) if negated else condition
+    
+    def _compile_condition(self, condition) -> Callable[[Dict[str, Any], List[Any]], bool]:
+        kind = condition[0]
+        if kind == 'compare':
+            _, column, op, value = condition
+            compare = CONDITION_OPERATORS[op]
+            if value[0] == 'literal':
+                operand = value[1]
+                return lambda row, params: compare(row.get(column), operand)
+            return lambda row, params: compare(row.get(column), _bind(value, params))
+        if kind == 'not':
+            inner = self._compile_condition(condition[1])
+            return lambda row, params: not inner(row, params)
+        parts = [self._compile_condition(part) for part in condition[1]]
+        if kind == 'and':
+            return lambda row, params: all(part(row, params) for part in parts)
+        return lambda row, params: any(part(row, params) for part in parts)
+    
+    def expression(self) -> Tuple[Callable[[Dict[str, Any], List[Any]], Any], bool]:
+        """Parse arithmetic; returns (evaluator, whether it reads the row)."""
+        left, reads_row = self.term()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('+', '-'):
+            left, reads_row = self._arithmetic(left, reads_row, self.advance()[1], self.term())
+        return left, reads_row
+    
+    def term(self):
+        left, reads_row = self.atom()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('*', '/'):
+            left, reads_row = self._arithmetic(left, reads_row, self.advance()[1], self.atom())
+        return left, reads_row
+    
+    def _arithmetic(self, left, left_reads, symbol, right_pair):
+        right, right_reads = right_pair
+        apply = _SQL_ARITHMETIC[symbol]
+        return (lambda row, params: apply(left(row, params), right(row, params)),
+                left_reads or right_reads)
+    
+    def atom(self):
+        if self.symbol('('):
+            result = self.expression()
+            self.expect_symbol(')')
+            return result
+        if self.peek()[0] == 'name':
+            column = self.column()
+            return (lambda row, params: row.get(column)), True
+        value = self.value()
+        return (lambda row, params: _bind(value, params)), False
+    
+    def insert(self) -> SQLStatement:
+        self.expect_keyword('INTO')
+        statement = SQLStatement('insert', self.identifier())
+        if self.symbol('('):
+            statement.insert_columns = [self.identifier()]
+            while self.symbol(','):
+                statement.insert_columns.append(self.identifier())
+            self.expect_symbol(')')
+        self.expect_keyword('VALUES')
+        while True:
+            self.expect_symbol('(')
+            row = [self.value()]
+            while self.symbol(','):
+                row.append(self.value())
+            self.expect_symbol(')')
+            statement.values.append(row)
+            if not self.symbol(','):
+                return statement
+    
+    def update(self) -> SQLStatement:
+        statement = SQLStatement('update', self.identifier())
+        self.qualifiers = {statement.table}
+        self.expect_keyword('SET')
+        while True:
+            column = self.column()
+            self.expect_symbol('=')
+            evaluate, reads_row = self.expression()
+            statement.assignments.append((column, evaluate, reads_row))
+            if not self.symbol(','):
+                break
+        if self.keyword('WHERE'):
+            self.where(statement)
+        return statement
+    
+    def delete(self) -> SQLStatement:
+        self.expect_keyword('FROM')
+        statement = SQLStatement('delete', self.identifier())
+        self.qualifiers = {statement.table}
+        if self.keyword('WHERE'):
+            self.where(statement)
+        return statement
+
+@lru_cache(maxsize=512)
+def compile_sql(query: str) -> SQLStatement:
+    """
+    Parse a statement of the supported SQL subset, caching by query text.
+    
+    Supported: SELECT (columns, *, COUNT/SUM/AVG/MIN/MAX, one INNER or LEFT
+    JOIN, WHERE, GROUP BY, ORDER BY, LIMIT/OFFSET), INSERT ... VALUES,
+    UPDATE ... SET with arithmetic, and DELETE. WHERE supports comparisons,
+    LIKE, IN, BETWEEN, IS [NOT] NULL, AND, OR, NOT and parentheses; values
+    may be literals or ? parameters. Statements are cached in an LRU keyed
+    by the exact query text, so repeated parameterized queries are parsed
+    once; compile_sql.cache_info() reports hits and misses.
+    
+    Args:
+        query (str): SQL text
+        
+    Returns:
+        SQLStatement: Compiled statement; shared between callers, do not modify
+        
+    Raises:
+        SQLSyntaxError: If the query is outside the supported subset
+    """
+    return _SQLParser(query).parse()
+
+# Value types whose columns are snapshotted as raw arrays
+_SNAPSHOT_TYPECODES = {int: 'q', float: 'd', bool: 'b'}
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Suspend cyclic garbage collection while allocating many containers at once."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _encode_column(values: List[Any]) -> Tuple[str, bytes]:
+    """Encode a column as raw array bytes when its values share a type, else pickle it."""
+    types = set(map(type, values))
+    if len(types) == 1:
+        typecode = _SNAPSHOT_TYPECODES.get(types.pop())
+        if typecode is not None:
+            try:
+                return typecode, array(typecode, values).tobytes()
+            except OverflowError:
+                pass
+    return 'pickle', pickle.dumps(values, pickle.HIGHEST_PROTOCOL)
+
+def _decode_column(encoding: str, data: memoryview) -> List[Any]:
+    if encoding == 'pickle':
+        return pickle.loads(data)
+    values = data.cast(encoding).tolist()
+    return list(map(bool, values)) if encoding == 'b' else values
+
+def _rows_from_columns(names: List[str], columns: List[List[Any]]) -> List[Dict[str, Any]]:
+    """Build row dicts column by column; copying a presized template avoids per-row resizing."""
+    count = len(columns[0]) if columns else 0
+    rows = list(map(dict.copy, repeat(dict.fromkeys(names), count)))
+    for name, values in zip(names, columns):
+        deque(map(operator.setitem, rows, repeat(name), values), maxlen=0)
+    return rows
+
+class DurableStorage:
+    """
+    Write-ahead log and snapshot files that keep a DatabaseMock on disk.
+    
+    Every write is appended to wal.log as a length- and CRC-prefixed pickle
+    record. A checkpoint writes all tables to snapshot.db, column by
+    column (raw array bytes for int/float/bool columns), and starts a new
+    log generation; startup memory-maps the snapshot and replays only the
+    log records written after it. A torn record at the end of the log,
+    left by a crash mid-write, is discarded.
+    """
+    
+    SNAPSHOT_MAGIC = b'DBMSNAP1'
+    WAL_MAGIC = b'DBMWAL01'
+    _HEADER = struct.Struct('<8sQ')  # magic, header length or WAL generation
+    _RECORD = struct.Struct('<II')   # payload length, CRC32
+    
+    def __init__(self, directory: str, checkpoint_every: int = 100_000, fsync: bool = False):
+        """
+        Initialize storage in a directory, creating it if needed.
+        
+        Args:
+            directory (str): Directory for snapshot.db and wal.log
+            checkpoint_every (int): Log records after which to checkpoint
+                automatically; 0 disables automatic checkpoints
+            fsync (bool): Whether to fsync every record, not just flush it
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, 'snapshot.db')
+        self.wal_path = os.path.join(directory, 'wal.log')
+        self.checkpoint_every = checkpoint_every
+        self.fsync = fsync
+        self.generation = 0
+        self.records_since_checkpoint = 0
+        self.wal = None
+        self.lock = threading.Lock()
+    
+    def read_snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Load the snapshot's tables through a read-only memory map.
+        
+        Returns:
+            list: One dict per table with name, schema, storage and indexes,
+                plus "rows" (row and mvcc tables) or "table" (columnar)
+        """
+        if not os.path.exists(self.snapshot_path):
+            return []
+        with open(self.snapshot_path, 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, header_length = self._HEADER.unpack_from(mapped)
+            if magic != self.SNAPSHOT_MAGIC:
+                raise ValueError(f"{self.snapshot_path} is not a DatabaseMock snapshot")
+            view = memoryview(mapped)
+            try:
+                start = self._HEADER.size
+                header = pickle.loads(view[start:start + header_length])
+                base = start + header_length
+                tables = []
+                for entry in header['tables']:
+                    segments = {name: view[base + offset:base + offset + length]
+                                for name, (offset, length) in entry.pop('segments').items()}
+                    if entry['storage'] == 'columnar':
+                        entry['table'] = ColumnarTable.from_state(pickle.loads(segments['table']))
+                    elif 'rows' in segments:
+                        entry['rows'] = pickle.loads(segments['rows'])
+                    else:
+                        columns = [_decode_column(encoding, segments[name])
+                                   for name, encoding in entry.pop('encodings')]
+                        names = entry.pop('columns')
+                        entry['rows'] = _rows_from_columns(names, columns)
+                    segments.clear()
+                    tables.append(entry)
+            finally:
+                # The map cannot close while slices of it are alive
+                view.release()
+        self.generation = header['generation']
+        return tables
+    
+    def recover(self) -> List[Tuple]:
+        """
+        Read the log records written after the snapshot and open the log for appending.
+        
+        Returns:
+            list: Records to replay, oldest first
+        """
+        records = []
+        valid_length = 0
+        if os.path.exists(self.wal_path):
+            with open(self.wal_path, 'rb') as file:
+                data = file.read()
+            if len(data) >= self._HEADER.size:
+                magic, generation = self._HEADER.unpack_from(data)
+                if magic != self.WAL_MAGIC:
+                    raise ValueError(f"{self.wal_path} is not a DatabaseMock write-ahead log")
+                position = valid_length = self._HEADER.size
+                while position + self._RECORD.size <= len(data):
+                    length, checksum = self._RECORD.unpack_from(data, position)
+                    payload = data[position + self._RECORD.size:position + self._RECORD.size + length]
+                    if len(payload) != length or zlib.crc32(payload) != checksum:
+                        break
+                    records.append(pickle.loads(payload))
+                    position = valid_length = position + self._RECORD.size + length
+                if generation < self.generation:
+                    # Written before the latest checkpoint, which already holds it
+                    records, valid_length = [], 0
+        if valid_length:
+            with open(self.wal_path, 'r+b') as file:
+                file.truncate(valid_length)
+            self.wal = open(self.wal_path, 'ab')
+        else:
+            self._start_wal()
+        self.records_since_checkpoint = len(records)
+        return records
+    
+    def _start_wal(self) -> None:
+        """Atomically replace the log with an empty one for the current generation."""
+        if self.wal is not None:
+            self.wal.close()
+        temporary = self.wal_path + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(self._HEADER.pack(self.WAL_MAGIC, self.generation))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.wal_path)
+        self.wal = open(self.wal_path, 'ab')
+    
+    def append(self, record: Tuple) -> bool:
+        """
+        Append a record to the log.
+        
+        Args:
+            record (tuple): Operation name and arguments
+            
+        Returns:
+            bool: Whether checkpoint_every records have accumulated
+        """
+        payload = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.wal.write(self._RECORD.pack(len(payload), zlib.crc32(payload)) + payload)
+            self.wal.flush()
+            if self.fsync:
+                os.fsync(self.wal.fileno())
+            self.records_since_checkpoint += 1
+            return 0 < self.checkpoint_every <= self.records_since_checkpoint
+    
+    def write_snapshot(self, tables: List[Dict[str, Any]]) -> None:
+        """
+        Atomically replace the snapshot and start a new log generation.
+        
+        Args:
+            tables (list): One dict per table with name, schema, storage and
+                indexes, plus "rows" (list of dicts) or "table" (ColumnarTable)
+        """
+        segments = []
+        offset = 0
+        entries = []
+        
+        def add_segment(data: bytes) -> Tuple[int, int]:
+            nonlocal offset
+            segments.append(data)
+            offset += len(data)
+            return offset - len(data), len(data)
+        
+        for table in tables:
+            entry = {key: table[key] for key in ('name', 'schema', 'storage', 'indexes')}
+            entry['segments'] = placed = {}
+            if 'table' in table:
+                placed['table'] = add_segment(pickle.dumps(table['table'].dump_state(),
+                                                           pickle.HIGHEST_PROTOCOL))
+            else:
+                rows = table['rows']
+                names = list(rows[0]) if rows else []
+                keys = rows[0].keys() if rows else None
+                if all(row.keys() == keys for row in rows):
+                    entry['columns'] = names
+                    entry['encodings'] = []
+                    for name in names:
+                        encoding, data = _encode_column([row[name] for row in rows])
+                        entry['encodings'].append((name, encoding))
+                        placed[name] = add_segment(data)
+                else:
+                    placed['rows'] = add_segment(pickle.dumps(rows, pickle.HIGHEST_PROTOCOL))
+            entries.append(entry)
+        
+        with self.lock:
+            self.generation += 1
+            header = pickle.dumps({'generation': self.generation, 'tables': entries},
+                                  pickle.HIGHEST_PROTOCOL)
+            temporary = self.snapshot_path + '.tmp'
+            with open(temporary, 'wb') as file:
+                file.write(self._HEADER.pack(self.SNAPSHOT_MAGIC, len(header)))
+                file.write(header)
+                for data in segments:
+                    file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.snapshot_path)
+            # A crash before the new log exists leaves an older generation,
+            # which recover() skips because the snapshot already includes it
+            self._start_wal()
+            self.records_since_checkpoint = 0
+    
+    def close(self) -> None:
+        """Close the log file."""
+        with self.lock:
+            if self.wal is not None:
+                self.wal.close()
+                self.wal = None
+
+class QueryLog:
+    """
+    Bounded query log keeping the most recent entries in a ring buffer.
+    
+    Only a sample of entries is stored (every 1/sample_rate-th, so sampling
+    is deterministic), and once `capacity` entries are held the oldest is
+    dropped on each append. Per-query-type counters and latency histograms
+    are updated for every entry, sampled or not, and take constant memory.
+    Supports len(), iteration, indexing and clear() like the list it
+    replaces.
+    """
+    
+    # Upper bounds of the latency histogram buckets, in milliseconds
+    LATENCY_BUCKETS_MS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+                          25, 50, 100, 250, 500, 1000, float('inf'))
+    
+    def __init__(self, capacity: int = 10_000, sample_rate: float = 1.0,
+                 counters: bool = True, histograms: bool = True):
+        """
+        Initialize an empty log.
+        
+        Args:
+            capacity (int): Maximum number of entries kept
+            sample_rate (float): Fraction of entries stored, 0.0 to 1.0
+            counters (bool): Whether to count entries per query type
+            histograms (bool): Whether to keep latency histograms per type
+            
+        Raises:
+            ValueError: If capacity or sample_rate is out of range
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0.0 and 1.0")
+        self.entries: deque = deque(maxlen=capacity)
+        self.sample_rate = sample_rate
+        self.counters: Optional[Counter] = Counter() if counters else None
+        self.histograms: Optional[Dict[str, List[int]]] = {} if histograms else None
+        self.recorded = 0
+        self._credit = 0.0
+        self.lock = threading.Lock()
+    
+    @property
+    def capacity(self) -> int:
+        return self.entries.maxlen
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.entries)
+    
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        return self.entries[position]
+    
+    def append(self, entry: Dict[str, Any]) -> bool:
+        """
+        Record a query.
+        
+        Args:
+            entry (dict): Log entry; "query_type" and "execution_time_ms"
+                feed the counters and histograms
+            
+        Returns:
+            bool: Whether the entry was sampled into the ring
+        """
+        query_type = entry.get('query_type')
+        with self.lock:
+            self.recorded += 1
+            if self.counters is not None:
+                self.counters[query_type] += 1
+            if self.histograms is not None:
+                buckets = self.histograms.get(query_type)
+                if buckets is None:
+                    buckets = self.histograms[query_type] = [0] * len(self.LATENCY_BUCKETS_MS)
+                buckets[bisect_left(self.LATENCY_BUCKETS_MS, entry.get('execution_time_ms', 0.0))] += 1
+            self._credit += self.sample_rate
+            if self._credit < 1.0:
+                return False
+            self._credit -= 1.0
+            self.entries.append(entry)
+        return True
+    
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return the newest entries, oldest first, copying only those.
+        
+        The lock is held while copying so concurrent appends cannot mutate
+        the ring mid-iteration.
+        
+        Args:
+            limit (int, optional): Maximum number of entries, default all
+            
+        Returns:
+            list: Log entries
+        """
+        with self.lock:
+            if limit is None:
+                return list(self.entries)
+            newest = list(islice(reversed(self.entries), limit))
+        newest.reverse()
+        return newest
+    
+    def clear(self) -> None:
+        """Drop all entries, counters and histograms."""
+        with self.lock:
+            self.entries.clear()
+            self.recorded = 0
+            self._credit = 0.0
+            if self.counters is not None:
+                self.counters.clear()
+            if self.histograms is not None:
+                self.histograms.clear()
+    
+    def latency_summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize the latency histograms per query type.
+        
+        Percentiles are reported as the upper bound of the bucket they fall
+        in, so they over-estimate by at most one bucket.
+        
+        Returns:
+            dict: For each query type, its count, p50/p95/p99 bounds in
+                milliseconds and the non-empty buckets
+        """
+        summary = {}
+        for query_type, buckets in (self.histograms or {}).items():
+            count = sum(buckets)
+            summary[query_type] = {
+                'count': count,
+                **{f'p{percentile}_ms': self._bucket_bound(buckets, count * percentile / 100)
+                   for percentile in (50, 95, 99)},
+                'buckets': {bound: n for bound, n in zip(self.LATENCY_BUCKETS_MS, buckets) if n}
+            }
+        return summary
+    
+    def _bucket_bound(self, buckets: List[int], rank: float) -> float:
+        seen = 0
+        for bound, count in zip(self.LATENCY_BUCKETS_MS, buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.LATENCY_BUCKETS_MS[-1]
+
+class LatencyProfile:
+    """
+    Latency distribution replayed from a precomputed sample buffer.
+    
+    Samples are drawn once when the profile is built and then cycled, so
+    sample() is one step of a C iterator instead of a random draw. Seeded
+    profiles replay the same sequence on every run; the buffer repeats
+    after buffer_size calls.
+    """
+    
+    def __init__(self, samples_ms: Iterable[float]):
+        """
+        Initialize a profile replaying the given samples in order.
+        
+        Args:
+            samples_ms (iterable): Latencies in milliseconds
+            
+        Raises:
+            ValueError: If there are no samples or one is negative
+        """
+        self.samples_ms = array('d', samples_ms)
+        if not self.samples_ms:
+            raise ValueError("A latency profile needs at least one sample")
+        if min(self.samples_ms) < 0:
+            raise ValueError("Latency samples cannot be negative")
+        # Returns the next latency in milliseconds without a Python frame
+        self.sample: Callable[[], float] = cycle(self.samples_ms).__next__
+    
+    @classmethod
+    def constant(cls, latency_ms: float) -> 'LatencyProfile':
+        """Profile that always returns latency_ms."""
+        return cls([latency_ms])
+    
+    @classmethod
+    def normal(cls, mean_ms: float, stddev_ms: float, buffer_size: int = 4096,
+               seed: Optional[int] = None) -> 'LatencyProfile':
+        """Normally distributed latency, clipped at zero."""
+        rng = random.Random(seed)
+        return cls(max(0.0, rng.gauss(mean_ms, stddev_ms)) for _ in range(buffer_size))
+    
+    @classmethod
+    def lognormal(cls, median_ms: float, sigma: float, buffer_size: int = 4096,
+                  seed: Optional[int] = None) -> 'LatencyProfile':
+        """
+        Log-normally distributed latency, the usual shape of service tail latency.
+        
+        Args:
+            median_ms (float): Median latency
+            sigma (float): Standard deviation of the log of the latency; 1.0
+                puts p99 at about ten times the median
+            buffer_size (int): Number of precomputed samples
+            seed (int, optional): Random seed
+        """
+        rng = random.Random(seed)
+        mu = math.log(median_ms)
+        return cls(rng.lognormvariate(mu, sigma) for _ in range(buffer_size))
+    
+    @classmethod
+    def histogram(cls, buckets: Dict[float, int], buffer_size: int = 4096,
+                  seed: Optional[int] = None,
+                  bounds: Iterable[float] = QueryLog.LATENCY_BUCKETS_MS) -> 'LatencyProfile':
+        """
+        Replay a recorded latency histogram.
+        
+        Buckets are chosen in proportion to their counts, and a latency is
+        drawn uniformly between the bucket's lower and upper bound. The
+        "buckets" of QueryLog.latency_summary() can be passed directly; an
+        unbounded last bucket replays as its lower bound.
+        
+        Args:
+            buckets (dict): Bucket upper bound in milliseconds mapped to count
+            buffer_size (int): Number of precomputed samples
+            seed (int, optional): Random seed
+            bounds (iterable): Every bucket bound of the recording, used to
+                find the lower bound of each non-empty bucket
+            
+        Raises:
+            ValueError: If no bucket has a positive count
+        """
+        if sum(buckets.values()) <= 0:
+            raise ValueError("The histogram has no recorded latencies")
+        edges = sorted(set(bounds) | set(buckets))
+        ranges = []
+        for upper, count in sorted(buckets.items()):
+            position = edges.index(upper)
+            lower = edges[position - 1] if position else 0.0
+            ranges.append((lower, lower if math.isinf(upper) else upper, count))
+        rng = random.Random(seed)
+        chosen = rng.choices(ranges, weights=[count for _, _, count in ranges], k=buffer_size)
+        return cls(rng.uniform(lower, upper) for lower, upper, _ in chosen)
+
+class FailureProfile:
+    """
+    Failure pattern replayed from a precomputed buffer of outcomes.
+    
+    Like LatencyProfile, outcomes are drawn once and cycled, so without
+    windows should_fail() is one iterator step. A time-windowed profile
+    also checks the clock and fails only inside one of its windows.
+    """
+    
+    def __init__(self, outcomes: Iterable[bool],
+                 windows: Optional[List[Tuple[float, float]]] = None,
+                 period_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a profile replaying the given outcomes in order.
+        
+        Args:
+            outcomes (iterable): True for each call that should fail
+            windows (list, optional): (start, end) seconds, measured from
+                creation or reset(), outside which no call fails
+            period_seconds (float, optional): Repeat the windows with this period
+            clock (callable): Clock returning seconds
+            
+        Raises:
+            ValueError: If there are no outcomes
+        """
+        self.outcomes = tuple(map(bool, outcomes))
+        if not self.outcomes:
+            raise ValueError("A failure profile needs at least one outcome")
+        self.windows = windows
+        self.period_seconds = period_seconds
+        self.clock = clock
+        self._next = cycle(self.outcomes).__next__
+        if windows is None:
+            self.should_fail = self._next
+        self.reset()
+    
+    def reset(self) -> None:
+        """Restart the windows' clock."""
+        self.started = self.clock()
+    
+    def should_fail(self) -> bool:
+        """Return whether the next call should fail."""
+        if self.windows is not None:
+            elapsed = self.clock() - self.started
+            if self.period_seconds:
+                elapsed %= self.period_seconds
+            if not any(start <= elapsed < end for start, end in self.windows):
+                return False
+        return self._next()
+    
+    @classmethod
+    def rate(cls, failure_rate: float, buffer_size: int = 4096,
+             seed: Optional[int] = None) -> 'FailureProfile':
+        """Independent failures with probability failure_rate per call."""
+        rng = random.Random(seed)
+        return cls(rng.random() < failure_rate for _ in range(buffer_size))
+    
+    @classmethod
+    def bursty(cls, failure_rate: float, mean_burst_length: float, buffer_size: int = 4096,
+               seed: Optional[int] = None) -> 'FailureProfile':
+        """
+        Failures that arrive in bursts, from a two-state Gilbert-Elliott model.
+        
+        Healthy runs average mean_burst_length * (1 - failure_rate) /
+        failure_rate calls and cannot be shorter than one call, so high
+        failure rates need long bursts.
+        
+        Args:
+            failure_rate (float): Long-run fraction of failing calls, below 1.0
+            mean_burst_length (float): Mean number of consecutive failures, at
+                least failure_rate / (1 - failure_rate)
+            buffer_size (int): Number of precomputed outcomes
+            seed (int, optional): Random seed
+            
+        Raises:
+            ValueError: If the rate or burst length is out of range, or the
+                bursts are too short for the rate
+        """
+        if not 0.0 <= failure_rate < 1.0 or mean_burst_length < 1.0:
+            raise ValueError("Need 0 <= failure_rate < 1 and mean_burst_length >= 1")
+        recover = 1.0 / mean_burst_length
+        fail = failure_rate * recover / (1.0 - failure_rate)
+        # The tolerance admits the exact boundary despite rounding
+        if fail > 1.0 + 1e-9:
+            raise ValueError(f"failure_rate {failure_rate} needs mean_burst_length >= "
+                             f"{failure_rate / (1.0 - failure_rate):g}")
+        rng = random.Random(seed)
+        failing = rng.random() < failure_rate
+        outcomes = []
+        for _ in range(buffer_size):
+            failing = rng.random() >= recover if failing else rng.random() < fail
+            outcomes.append(failing)
+        return cls(outcomes)
+    
+    @classmethod
+    def windowed(cls, windows: List[Tuple[float, float]], period_seconds: Optional[float] = None,
+                 failure_rate: float = 1.0, buffer_size: int = 4096, seed: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic) -> 'FailureProfile':
+        """
+        Outages: calls fail at failure_rate inside the windows and never outside.
+        
+        Args:
+            windows (list): (start, end) seconds from creation or reset()
+            period_seconds (float, optional): Repeat the windows with this
+                period, e.g. [(0, 2)] every 10 s
+            failure_rate (float): Failure probability inside a window
+            buffer_size (int): Number of precomputed outcomes
+            seed (int, optional): Random seed
+            clock (callable): Clock returning seconds
+        """
+        rng = random.Random(seed)
+        return cls((rng.random() < failure_rate for _ in range(buffer_size)),
+                   windows, period_seconds, clock)
+
+class Cursor:
+    """
+    Lazy result set yielding row copies on demand.
+    
+    Rows are read from storage and copied only as they are fetched, so a
+    large scan holds one batch at a time. Rows written after the cursor
+    was opened may or may not be returned, except on "mvcc" tables, which
+    read from the snapshot taken when the cursor was opened, and
+    "columnar" tables, which skip rows deleted since then and postpone
+    compaction while the cursor is open. Exhausting or closing the cursor
+    releases that snapshot or compaction pin; a closed cursor returns no
+    more rows.
+    """
+    
+    def __init__(self, rows: Iterator[Dict[str, Any]], arraysize: int = 100,
+                 on_close: Optional[Callable[[], Any]] = None):
+        """
+        Initialize a cursor; use DatabaseMock.cursor instead.
+        
+        Args:
+            rows (iterator): Iterator producing the result rows
+            arraysize (int): Default fetchmany batch size
+            on_close (callable, optional): Called once when the cursor closes
+        """
+        self._rows = rows
+        self._on_close = on_close
+        self.arraysize = arraysize
+        self.rownumber = 0
+        self.closed = False
+    
+    def __iter__(self) -> 'Cursor':
+        return self
+    
+    def __next__(self) -> Dict[str, Any]:
+        try:
+            row = next(self._rows)
+        except StopIteration:
+            self.close()
+            raise
+        self.rownumber += 1
+        return row
+    
+    def fetchone(self) -> Optional[Dict[str, Any]]:
+        """Return the next row, or None when the result set is exhausted."""
+        return next(self, None)
+    
+    def fetchmany(self, size: int = None) -> List[Dict[str, Any]]:
+        """
+        Return up to `size` more rows.
+        
+        Args:
+            size (int, optional): Batch size, default arraysize
+            
+        Returns:
+            list: The rows; shorter than size only at the end of the result set
+        """
+        size = self.arraysize if size is None else size
+        rows = list(islice(self._rows, size))
+        self.rownumber += len(rows)
+        if len(rows) < size:
+            self.close()
+        return rows
+    
+    def fetchall(self) -> List[Dict[str, Any]]:
+        """Return every remaining row."""
+        rows = list(self._rows)
+        self.rownumber += len(rows)
+        self.close()
+        return rows
+    
+    def close(self) -> None:
+        """Stop the scan and release its resources; safe to call twice."""
+        if self.closed:
+            return
+        self.closed = True
+        rows, self._rows = self._rows, iter(())
+        close = getattr(rows, 'close', None)
+        if close is not None:
+            close()
+        if self._on_close is not None:
+            self._on_close()
+    
+    def __enter__(self) -> 'Cursor':
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
+
+class DatabaseMock:
+    """
+    A comprehensive database mock for testing database operations.
+    """
+    
+    def __init__(self, auto_commit: bool = True):
+        """
+        Initialize the database mock.
+        
+        Args:
+            auto_commit (bool): Whether to auto-commit transactions
+        """
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}  # or ColumnarTable/VersionedTable/ShardedTable storage
+        self.table_schemas: Dict[str, Dict[str, Any]] = {}
+        self.indexes: Dict[str, Dict[str, Any]] = {}  # table -> column -> index
+        self.statistics: Dict[str, Dict[str, ColumnStatistics]] = {}
+        self._analyzed_rows: Dict[str, int] = {}
+        self._modifications: Dict[str, int] = defaultdict(int)
+        self.transactions = TransactionManager()
+        self.current_transaction: Optional[Transaction] = None
+        self._vacuum_thread: Optional[threading.Thread] = None
+        self._vacuum_stop = threading.Event()
+        self.persistence: Optional[DurableStorage] = None
+        self._deferred_constraints: set = set()
+        self._wal_state = threading.local()
+        # Held by logged writes from the change until its log record is
+        # written, and by checkpoint while the snapshot is cut, so no write
+        # can fall between a snapshot and the log generation it starts
+        self._persistence_lock = threading.RLock()
+        self.auto_commit = auto_commit
+        self.transaction_active = False
+        self.transaction_log: List[Dict[str, Any]] = []
+        self.query_log = QueryLog()
+        self.connection_count = 0
+        self.latency_simulation = 0  # milliseconds
+        self.failure_rate = 0.0  # 0.0 to 1.0
+        self.latency_profiles: Dict[Tuple[Optional[str], Optional[QueryType]], LatencyProfile] = {}
+        self.failure_profiles: Dict[Tuple[Optional[str], Optional[QueryType]], FailureProfile] = {}
+        # Keyed by id(query_type): members are singletons and Enum.__hash__ is slow
+        self._resolved_profiles: Dict[Tuple[Optional[str], int], Tuple] = {}
+        self.max_connections = 100
+        self.shard_count = 8  # shards per "sharded" table
+    
+    def create_table(self, table_name: str, schema: Dict[str, Any],
+                     storage: str = "row") -> QueryResult:
+        """
+        Create a new table with specified schema.
+        
+        Set up the table's storage through _create_storage.
+        
+        Args:
+            table_name (str): Name of the table
+            schema (dict): Table schema definition
+                Example: {
+                    "id": {"type": "int", "primary_key": True, "auto_increment": True},
+                    "name": {"type": "str", "nullable": False, "max_length": 100},
+                    "email": {"type": "str", "unique": True}
+                }
+            storage (str): Storage engine ("row", "columnar")
+        
+        Returns:
+            QueryResult: Result of the operation
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def drop_table(self, table_name: str) -> QueryResult:
+        """
+        Drop a table.
+        
+        Args:
+            table_name (str): Name of the table to drop
+            
+        Returns:
+            QueryResult: Result of the operation
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def create_index(self, table_name: str, column: str, kind: str = "hash") -> QueryResult:
+        """
+        Create a secondary index on a table column.
+        
+        Hash indexes serve equality and IN lookups; sorted indexes also serve
+        range conditions. Existing rows are indexed immediately and the index
+        is kept current by _store_row, _update_row and _remove_rows.
+        Sharded tables keep a separate index in every shard.
+        
+        Args:
+            table_name (str): Name of the table
+            column (str): Column to index
+            kind (str): Index type ("hash", "sorted")
+            
+        Returns:
+            QueryResult: Result of the operation
+        """
+        started = time.perf_counter()
+        if table_name not in self.tables:
+            return QueryResult(False, 0, [], f"Table '{table_name}' does not exist")
+        if kind not in INDEX_TYPES:
+            return QueryResult(False, 0, [], f"Unknown index kind '{kind}'")
+        table = self.tables[table_name]
+        if not isinstance(table, (list, ShardedTable)):
+            return QueryResult(False, 0, [], "Secondary indexes require row or sharded storage")
+        table_indexes = self.indexes.setdefault(table_name, {})
+        if column in table_indexes or column in getattr(table, 'index_kinds', ()):
+            return QueryResult(False, 0, [], f"Index on {table_name}.{column} already exists")
+        
+        with self._persistence_lock:
+            if isinstance(table, ShardedTable):
+                table.create_index(column, kind)
+            else:
+                index = INDEX_TYPES[kind](column)
+                for row in table:
+                    index.add(row)
+                table_indexes[column] = index
+            if self._logging():
+                self._log(('create_index', table_name, column, kind))
+        return QueryResult(True, 0, [], execution_time_ms=(time.perf_counter() - started) * 1000)
+    
+    def drop_index(self, table_name: str, column: str) -> bool:
+        """
+        Drop a secondary index.
+        
+        Args:
+            table_name (str): Name of the table
+            column (str): Indexed column
+            
+        Returns:
+            bool: True if an index was dropped
+        """
+        table = self.tables.get(table_name)
+        with self._persistence_lock:
+            if isinstance(table, ShardedTable):
+                dropped = table.drop_index(column)
+            else:
+                dropped = self.indexes.get(table_name, {}).pop(column, None) is not None
+            if dropped and self._logging():
+                self._log(('drop_index', table_name, column))
+        return dropped
+    
+    def insert(self, table_name: str, data: Dict[str, Any]) -> QueryResult:
+        """
+        Insert a record into a table.
+        
+        Store rows through _store_row so secondary indexes stay current.
+        
+        Args:
+            table_name (str): Name of the table
+            data (dict): Data to insert
+            
+        Returns:
+            QueryResult: Result of the operation
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def insert_many(self, table_name: str, data_list: List[Dict[str, Any]]) -> QueryResult:
+        """
+        Insert multiple records into a table.
+        
+        Store rows through _store_row so secondary indexes stay current;
+        bulk_insert is the batch fast path.
+        
+        Args:
+            table_name (str): Name of the table
+            data_list (list): List of data dictionaries to insert
+            
+        Returns:
+            QueryResult: Result of the operation
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def bulk_insert(self, table_name: str, data_list: List[Dict[str, Any]],
+                    defer_constraints: bool = False) -> QueryResult:
+        """
+        Insert a batch of records with one validation pass and one log entry.
+        
+        The batch is validated column by column with validate_batch and
+        stored with _store_rows, so latency and failure are simulated once
+        and query_log gets a single entry for the whole batch. Missing
+        auto_increment values are assigned in order. Either every row is
+        inserted or none is.
+        
+        Args:
+            table_name (str): Name of the table
+            data_list (list): List of data dictionaries to insert
+            defer_constraints (bool): Skip the unique and primary key checks
+                until check_constraints is called, e.g. after the last of
+                several batches
+            
+        Returns:
+            QueryResult: Result of the operation; data holds the validation
+                errors of a rejected batch
+        """
+        started = time.perf_counter()
+        if table_name not in self.tables:
+            return QueryResult(False, 0, [], f"Table '{table_name}' does not exist")
+        if self.inject_failure(table_name, QueryType.INSERT):
+            return QueryResult(False, 0, [], "Simulated database failure")
+        self.inject_latency(table_name, QueryType.INSERT)
+        
+        with _gc_paused():
+            rows = list(map(dict, data_list))
+            self._assign_auto_increment(table_name, rows)
+            errors = self.validate_batch(table_name, rows, check_unique=not defer_constraints)
+            if errors:
+                return QueryResult(False, 0, [{'error': error} for error in errors],
+                                   f"{len(errors)} validation errors, first: {errors[0]}",
+                                   (time.perf_counter() - started) * 1000)
+            try:
+                self._store_rows(table_name, rows)
+            except (KeyError, TypeError, ValueError, TransactionConflict) as error:
+                return QueryResult(False, 0, [], str(error), (time.perf_counter() - started) * 1000)
+        if defer_constraints:
+            self._deferred_constraints.add(table_name)
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.query_log.append({
+            'timestamp': datetime.now().isoformat(),
+            'query_type': QueryType.INSERT.value,
+            'table': table_name,
+            'rows_affected': len(rows),
+            'batch': True,
+            'execution_time_ms': elapsed_ms
+        })
+        return QueryResult(True, len(rows), [], execution_time_ms=elapsed_ms)
+    
+    def select(self, table_name: str, conditions: Dict[str, Any] = None,
+              columns: List[str] = None, limit: int = None,
+              offset: int = 0, order_by: str = None) -> QueryResult:
+        """
+        Select records from a table.
+        
+        find_rows resolves the conditions through any usable index; cursor
+        returns the same rows lazily.
+        
+        Args:
+            table_name (str): Name of the table
+            conditions (dict, optional): WHERE conditions
+            columns (list, optional): Columns to select
+            limit (int, optional): Maximum number of records
+            offset (int): Number of records to skip
+            order_by (str, optional): Column to order by
+            
+        Returns:
+            QueryResult: Result of the operation
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def cursor(self, table_name: str, conditions: Dict[str, Any] = None,
+               columns: List[str] = None, limit: int = None, offset: int = 0,
+               order_by: str = None, arraysize: int = 100) -> Cursor:
+        """
+        Open a lazy cursor over the rows select would return for the same arguments.
+        
+        LIMIT and OFFSET are pushed into the scan. Without order_by the scan
+        stops after offset + limit matches; with order_by and a limit only
+        the best offset + limit rows are kept, in a heap. Ordering without a
+        limit holds a reference to every matching row, but rows are still
+        copied one at a time as they are fetched. Latency and failure are
+        simulated once, when the cursor is opened, and query_log gets one
+        entry, with the number of rows fetched, when it closes.
+        
+        Args:
+            table_name (str): Name of the table
+            conditions (dict, optional): WHERE conditions
+            columns (list, optional): Columns to return, default all
+            limit (int, optional): Maximum number of rows
+            offset (int): Number of rows to skip
+            order_by (str, optional): Column to sort by, with an optional
+                " ASC" or " DESC" suffix; NULLs sort last ascending
+            arraysize (int): Default fetchmany batch size
+            
+        Returns:
+            Cursor: Cursor over the matching rows
+            
+        Raises:
+            ValueError: If the table does not exist or order_by is malformed
+            ConnectionError: On a simulated database failure
+        """
+        started = time.perf_counter()
+        if table_name not in self.tables:
+            raise ValueError(f"Table '{table_name}' does not exist")
+        sort_column, descending = _parse_order_by(order_by) if order_by else (None, False)
+        if self.inject_failure(table_name, QueryType.SELECT):
+            raise ConnectionError("Simulated database failure")
+        self.inject_latency(table_name, QueryType.SELECT)
+        
+        table = self.tables[table_name]
+        release = None
+        if isinstance(table, ColumnarTable):
+            # Positions stand in for rows until they are fetched, so the
+            # table may not renumber them by compacting while the cursor is
+            # open; rows deleted in the meantime are skipped
+            table.pin()
+            release = table.unpin
+            source = filter(lambda position: not table.deleted[position], table.find(conditions))
+            getters = {name: column.get for name, column in table.columns.items()}
+            missing = lambda position: None
+            value_of = getters.get(sort_column, missing)
+            if columns:
+                getters = [(name, getters.get(name, missing)) for name in columns]
+                materialize = lambda position: {name: get(position) for name, get in getters}
+            else:
+                materialize = table.row
+        else:
+            if isinstance(table, VersionedTable):
+                transaction = self.current_transaction
+                if transaction is None or transaction.status != "active":
+                    transaction = self.begin_snapshot()
+                    release = transaction.rollback
+                source = table.iter_scan(transaction, conditions)
+            elif isinstance(table, ShardedTable):
+                source = table.iter_find(conditions)
+            else:
+                plan = self.plan_query(table_name, conditions)
+                if plan.index_column:
+                    candidates = self.indexes[table_name][plan.index_column].candidates(plan.index_conditions)
+                else:
+                    # Bounded so rows appended during the scan do not extend it
+                    candidates = islice(table, len(table))
+                source = filter(plan.predicate, candidates) if plan.filters else iter(candidates)
+            value_of = methodcaller('get', sort_column)
+            if columns:
+                materialize = lambda row: {column: row.get(column) for column in columns}
+            elif isinstance(table, ShardedTable):
+                materialize = None  # iter_find already copies
+            else:
+                materialize = dict
+        
+        if sort_column is not None:
+            key = lambda item: _order_key(value_of(item))
+            if limit is not None:
+                best = (heapq.nlargest if descending else heapq.nsmallest)(offset + limit, source, key=key)
+                source = islice(best, offset, None)
+            else:
+                source = islice(sorted(source, key=key, reverse=descending), offset, None)
+        elif offset or limit is not None:
+            source = islice(source, offset, None if limit is None else offset + limit)
+        rows = source if materialize is None else map(materialize, source)
+        opened_ms = (time.perf_counter() - started) * 1000
+        
+        def close():
+            if release is not None:
+                release()
+            self.query_log.append({
+                'timestamp': datetime.now().isoformat(),
+                'query_type': QueryType.SELECT.value,
+                'table': table_name,
+                'rows_affected': cursor.rownumber,
+                'cursor': True,
+                'execution_time_ms': opened_ms
+            })
+        
+        cursor = Cursor(rows, arraysize, close)
+        return cursor
+    
+    def update(self, table_name: str, data: Dict[str, Any], 
+              conditions: Dict[str, Any]) -> QueryResult:
+        """
+        Update records in a table.
+        
+        Modify rows through _update_row so secondary indexes stay current.
+        
+        Args:
+            table_name (str): Name of the table
+            data (dict): Data to update
+            conditions (dict): WHERE conditions
+            
+        Returns:
+            QueryResult: Result of the operation
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def delete(self, table_name: str, conditions: Dict[str, Any]) -> QueryResult:
+        """
+        Delete records from a table.
+        
+        Remove rows through _remove_rows so secondary indexes stay current.
+        
+        Args:
+            table_name (str): Name of the table
+            conditions (dict): WHERE conditions
+            
+        Returns:
+            QueryResult: Result of the operation
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def execute_raw_query(self, query: str, params: List[Any] = None) -> QueryResult:
+        """
+        Execute a raw SQL query (simplified parsing).
+        
+        Delegates to execute_sql, which runs the supported SQL subset with
+        compiled, cached statements.
+        
+        Args:
+            query (str): SQL query string
+            params (list, optional): Query parameters
+            
+        Returns:
+            QueryResult: Result of the operation
+        """
+        return self.execute_sql(query, params)
+    
+    def execute_sql(self, query: str, params: List[Any] = None) -> QueryResult:
+        """
+        Execute a statement of the SQL subset supported by compile_sql.
+        
+        Statements are compiled once per query text and run on the storage
+        primitives, so WHERE clauses that are plain conjunctions use the
+        query planner and indexes.
+        
+        Args:
+            query (str): SQL query string with ? placeholders
+            params (list, optional): Query parameters
+            
+        Returns:
+            QueryResult: Result of the operation; SELECT rows are in data
+        """
+        started = time.perf_counter()
+        params = list(params or [])
+        try:
+            statement = compile_sql(query)
+            if len(params) != statement.parameter_count:
+                raise SQLSyntaxError(f"Expected {statement.parameter_count} parameters, got {len(params)}")
+            for table_name in (statement.table, (statement.join or {}).get('table')):
+                if table_name is not None and table_name not in self.tables:
+                    raise SQLSyntaxError(f"Table '{table_name}' does not exist")
+            execute = getattr(self, f'_execute_{statement.kind}')
+            if statement.kind != 'select' and self._logging():
+                rows_affected, data = self._logged_write(statement.table, ('execute_sql', query, params),
+                                                         execute, statement, params)
+            else:
+                rows_affected, data = execute(statement, params)
+        except (SQLSyntaxError, TransactionConflict, TypeError, ValueError) as error:
+            return QueryResult(False, 0, [], str(error), (time.perf_counter() - started) * 1000)
+        return QueryResult(True, rows_affected, data, None, (time.perf_counter() - started) * 1000)
+    
+    def _sql_conditions(self, statement: SQLStatement, params: List[Any]) -> Optional[Dict[str, Any]]:
+        """Bind a conjunctive WHERE clause into find_rows conditions, or None."""
+        if statement.predicate is None:
+            return {}
+        if statement.conditions is None:
+            return None
+        conditions: Dict[str, Dict[str, Any]] = {}
+        for column, op, value in statement.conditions:
+            operators = conditions.setdefault(column, {})
+            if op in operators:
+                return None
+            operators[op] = _bind(value, params)
+        return conditions
+    
+    def _sql_rows(self, statement: SQLStatement, params: List[Any]) -> List[Dict[str, Any]]:
+        conditions = self._sql_conditions(statement, params)
+        if conditions is not None:
+            return self.find_rows(statement.table, conditions)
+        predicate = statement.predicate
+        return [row for row in self.find_rows(statement.table) if predicate(row, params)]
+    
+    def _sql_joined_rows(self, statement: SQLStatement, params: List[Any]) -> List[Dict[str, Any]]:
+        """Hash-join the two tables; rows carry qualified and unqualified names."""
+        join = statement.join
+        left_name = statement.alias or statement.table
+        right_name = join['alias']
+        right_rows = self.find_rows(join['table'])
+        buckets: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        for row in right_rows:
+            buckets[row.get(join['right'])].append(row)
+        right_columns = list(self.table_schemas.get(join['table']) or
+                             (right_rows[0] if right_rows else []))
+        empty_right = dict.fromkeys(right_columns)
+        
+        joined = []
+        predicate = statement.predicate
+        for left in self.find_rows(statement.table):
+            key = left.get(join['left'])
+            matches = buckets.get(key) if key is not None else None
+            if not matches:
+                if not join['outer']:
+                    continue
+                matches = [empty_right]
+            for right in matches:
+                combined = {}
+                for column, value in right.items():
+                    combined[column] = combined[f"{right_name}.{column}"] = value
+                # Unqualified names resolve to the left table when both have the column
+                for column, value in left.items():
+                    combined[column] = combined[f"{left_name}.{column}"] = value
+                if predicate is None or predicate(combined, params):
+                    joined.append(combined)
+        return joined
+    
+    def _execute_select(self, statement: SQLStatement, params: List[Any]) -> Tuple[int, List[Dict[str, Any]]]:
+        rows = (self._sql_joined_rows(statement, params) if statement.join
+                else self._sql_rows(statement, params))
+        grouped = statement.group_by or any(kind == 'aggregate' for kind, _, _ in statement.columns)
+        if grouped:
+            rows = self._sql_group(statement, rows)
+        
+        for column, descending in reversed(statement.order_by):
+            rows = sorted(rows, key=lambda row: _order_key(row.get(column)), reverse=descending)
+        offset = _bind(statement.offset, params) if statement.offset else 0
+        limit = _bind(statement.limit, params) if statement.limit else None
+        if offset or limit is not None:
+            rows = rows[offset:None if limit is None else offset + limit]
+        
+        if grouped:
+            data = rows
+        elif statement.columns == [('star', None, '*')]:
+            data = ([{key: value for key, value in row.items() if '.' in key} for row in rows]
+                    if statement.join else [dict(row) for row in rows])
+        else:
+            data = [{label: row.get(expression) for _, expression, label in statement.columns}
+                    for row in rows]
+        return len(data), data
+    
+    def _sql_group(self, statement: SQLStatement, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        groups: Dict[Tuple, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(tuple(row.get(column) for column in statement.group_by), []).append(row)
+        if not groups and not statement.group_by:
+            groups[()] = []
+        
+        output = []
+        for key, members in groups.items():
+            values = dict(zip(statement.group_by, key))
+            result = {}
+            for kind, expression, label in statement.columns:
+                if kind == 'column':
+                    result[label] = values[expression]
+                    continue
+                function, argument = expression
+                if argument is None:
+                    result[label] = len(members)
+                else:
+                    present = [row[argument] for row in members if row.get(argument) is not None]
+                    result[label] = _aggregate(present, function.lower())
+            # ORDER BY may name grouped columns that are not selected
+            output.append({**values, **result})
+        return output
+    
+    def _execute_insert(self, statement: SQLStatement, params: List[Any]) -> Tuple[int, List[Dict[str, Any]]]:
+        columns = statement.insert_columns or list(self.table_schemas.get(statement.table, {}))
+        for values in statement.values:
+            if len(values) != len(columns):
+                raise SQLSyntaxError(f"Expected {len(columns)} values, got {len(values)}")
+        for values in statement.values:
+            self._store_row(statement.table, {column: _bind(value, params)
+                                              for column, value in zip(columns, values)})
+        return len(statement.values), []
+    
+    def _execute_update(self, statement: SQLStatement, params: List[Any]) -> Tuple[int, List[Dict[str, Any]]]:
+        conditions = self._sql_conditions(statement, params)
+        if conditions is not None and not any(reads_row for _, _, reads_row in statement.assignments):
+            changes = {column: evaluate(None, params) for column, evaluate, _ in statement.assignments}
+            return self._update_rows(statement.table, conditions, changes), []
+        if not isinstance(self.tables[statement.table], list):
+            raise ValueError("Row-dependent SET values and OR/NOT conditions need row storage")
+        rows = self._sql_rows(statement, params)
+        for row in rows:
+            self._update_row(statement.table, row, {column: evaluate(row, params)
+                                                    for column, evaluate, _ in statement.assignments})
+        return len(rows), []
+    
+    def _execute_delete(self, statement: SQLStatement, params: List[Any]) -> Tuple[int, List[Dict[str, Any]]]:
+        conditions = self._sql_conditions(statement, params)
+        if conditions is not None:
+            return self._delete_rows(statement.table, conditions), []
+        if not isinstance(self.tables[statement.table], list):
+            raise ValueError("OR/NOT conditions in DELETE need row storage")
+        return self._remove_rows(statement.table, self._sql_rows(statement, params)), []
+    
+    def begin_transaction(self) -> bool:
+        """
+        Begin a database transaction.
+        
+        begin_snapshot returns an MVCC Transaction; keeping it in
+        current_transaction makes "mvcc" tables read and write through it.
+        
+        Returns:
+            bool: True if successful
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def commit_transaction(self) -> bool:
+        """
+        Commit the current transaction.
+        
+        Transaction.commit is O(1); clear current_transaction afterwards.
+        
+        Returns:
+            bool: True if successful
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def rollback_transaction(self) -> bool:
+        """
+        Rollback the current transaction.
+        
+        Transaction.rollback hides the transaction's row versions without
+        copying or replaying anything; vacuum reclaims them later.
+        
+        Returns:
+            bool: True if successful
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def begin_snapshot(self) -> Transaction:
+        """
+        Start an MVCC transaction over the database's "mvcc" tables.
+        
+        Set it as current_transaction to route the storage primitives
+        through it; without one, each primitive runs in its own transaction.
+        
+        Returns:
+            Transaction: The new transaction
+        """
+        return self.transactions.begin()
+    
+    def _in_transaction(self, operation: Callable[[Transaction], Any]) -> Any:
+        """Run an operation in current_transaction, or in a new one committed afterwards."""
+        transaction = self.current_transaction
+        if transaction is not None and transaction.status == "active":
+            return operation(transaction)
+        with self.transactions.begin() as transaction:
+            return operation(transaction)
+    
+    def vacuum(self, table_name: str = None) -> int:
+        """
+        Reclaim dead row versions from MVCC tables.
+        
+        Args:
+            table_name (str, optional): Table to vacuum, default all
+            
+        Returns:
+            int: Number of versions reclaimed
+        """
+        names = [table_name] if table_name else list(self.tables)
+        aborted = set(self.transactions.aborted)
+        reclaimed = sum(self.tables[name].vacuum() for name in names
+                        if isinstance(self.tables.get(name), VersionedTable))
+        if not table_name:
+            # Every version stamped by these transactions is gone
+            with self.transactions.lock:
+                self.transactions.aborted -= aborted
+        return reclaimed
+    
+    def start_vacuum(self, interval_seconds: float = 1.0) -> bool:
+        """
+        Vacuum all MVCC tables periodically on a daemon thread.
+        
+        Args:
+            interval_seconds (float): Pause between passes
+            
+        Returns:
+            bool: False if the vacuum thread is already running
+        """
+        if self._vacuum_thread is not None and self._vacuum_thread.is_alive():
+            return False
+        self._vacuum_stop.clear()
+        
+        def run():
+            while not self._vacuum_stop.wait(interval_seconds):
+                self.vacuum()
+        
+        self._vacuum_thread = threading.Thread(target=run, name="database-mock-vacuum", daemon=True)
+        self._vacuum_thread.start()
+        return True
+    
+    def stop_vacuum(self) -> None:
+        """Stop the background vacuum thread and wait for it to exit."""
+        self._vacuum_stop.set()
+        if self._vacuum_thread is not None:
+            self._vacuum_thread.join()
+            self._vacuum_thread = None
+    
+    def validate_data(self, table_name: str, data: Dict[str, Any]) -> List[str]:
+        """
+        Validate data against table schema.
+        
+        Args:
+            table_name (str): Name of the table
+            data (dict): Data to validate
+            
+        Returns:
+            list: List of validation errors
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def validate_batch(self, table_name: str, rows: List[Dict[str, Any]],
+                       check_unique: bool = True) -> List[str]:
+        """
+        Validate a batch of rows against the table schema, one column at a time.
+        
+        Checks unknown columns, types ("int", "float", "str", "bool"), NOT
+        NULL (nullable False or primary_key), max_length and, optionally,
+        uniqueness of primary_key and unique columns within the batch and
+        against stored rows. Each check runs over a whole column, so a
+        batch with no errors costs a few passes instead of per-row calls.
+        
+        Args:
+            table_name (str): Name of the table
+            rows (list): Rows to validate
+            check_unique (bool): Whether to run the uniqueness checks
+            
+        Returns:
+            list: Validation errors, each naming the row index
+        """
+        schema = self.table_schemas.get(table_name) or {}
+        errors = []
+        if schema:
+            unknown = set().union(*rows) - schema.keys()
+            if unknown:
+                errors.extend(f"Row {i}: unknown column '{name}'" for i, row in enumerate(rows)
+                              for name in row.keys() & unknown)
+        
+        for name, definition in schema.items():
+            definition = definition or {}
+            values = list(map(dict.get, rows, repeat(name)))
+            # One pass over the types answers the NULL, type and string questions
+            types = set(map(type, values))
+            has_nulls = _NONE_TYPE in types
+            required = definition.get('nullable') is False or definition.get('primary_key')
+            if required and has_nulls:
+                errors.extend(f"Row {i}: '{name}' cannot be null" for i, value in enumerate(values)
+                              if value is None)
+            allowed = _SCHEMA_TYPES.get(definition.get('type'))
+            if allowed and not types - {_NONE_TYPE} <= allowed:
+                errors.extend(f"Row {i}: '{name}' must be {definition['type']}, got {type(value).__name__}"
+                              for i, value in enumerate(values)
+                              if value is not None and type(value) not in allowed)
+            max_length = definition.get('max_length')
+            if max_length is not None and str in types:
+                strings = values if types == {str} else [value for value in values if isinstance(value, str)]
+                if max(map(len, strings)) > max_length:
+                    errors.extend(f"Row {i}: '{name}' is longer than {max_length}"
+                                  for i, value in enumerate(values)
+                                  if isinstance(value, str) and len(value) > max_length)
+            if check_unique and (definition.get('unique') or definition.get('primary_key')):
+                errors.extend(self._uniqueness_errors(table_name, name, values, has_nulls))
+        return errors
+    
+    def _uniqueness_errors(self, table_name: str, column: str, values: List[Any],
+                           has_nulls: bool = True) -> List[str]:
+        """Errors for values repeated in the batch or already stored in the column."""
+        present = [value for value in values if value is not None] if has_nulls else values
+        seen = set(present)
+        errors = []
+        if len(seen) != len(present):
+            first = {}
+            errors.extend(f"Row {i}: duplicate {column} {value!r} in batch"
+                          for i, value in enumerate(values)
+                          if value is not None and first.setdefault(value, i) != i)
+        index = self.indexes.get(table_name, {}).get(column)
+        table = self.tables[table_name]
+        if index is not None:
+            stored = index.indexed_values(seen)
+        elif isinstance(table, ShardedTable) and column == table.key:
+            stored = {value for value in seen if value in table.shard_for(value).rows}
+        else:
+            stored = seen.intersection(self._column_values(table_name, column))
+        if stored:
+            errors.extend(f"Row {i}: {column} {value!r} already exists"
+                          for i, value in enumerate(values) if value in stored)
+        return errors
+    
+    def check_constraints(self, table_name: str = None) -> List[str]:
+        """
+        Run the unique and primary key checks deferred by bulk_insert.
+        
+        Args:
+            table_name (str, optional): Table to check, default every table
+                with deferred checks
+            
+        Returns:
+            list: Duplicate values found, per column
+        """
+        names = [table_name] if table_name else sorted(self._deferred_constraints)
+        errors = []
+        for name in names:
+            self._deferred_constraints.discard(name)
+            for column, definition in (self.table_schemas.get(name) or {}).items():
+                if not definition or not (definition.get('unique') or definition.get('primary_key')):
+                    continue
+                counts = Counter(value for value in self._column_values(name, column)
+                                 if value is not None)
+                if len(counts) != sum(counts.values()):
+                    errors.extend(f"{name}.{column}: {value!r} appears {count} times"
+                                  for value, count in counts.items() if count > 1)
+        return errors
+    
+    def _column_values(self, table_name: str, column: str) -> List[Any]:
+        """Non-NULL values of one column across the stored rows."""
+        table = self.tables[table_name]
+        if isinstance(table, ColumnarTable):
+            return table.columns[column].present(table.live_positions() if table.deleted_count else None)
+        return [value for value in map(methodcaller('get', column), table) if value is not None]
+    
+    def _assign_auto_increment(self, table_name: str, rows: List[Dict[str, Any]]) -> None:
+        """Fill missing auto_increment values after the largest existing one."""
+        for column, definition in (self.table_schemas.get(table_name) or {}).items():
+            if not definition or not definition.get('auto_increment'):
+                continue
+            missing = [row for row in rows if row.get(column) is None]
+            if not missing:
+                continue
+            given = [row[column] for row in rows if isinstance(row.get(column), int)]
+            next_value = max(max(self._column_values(table_name, column), default=0),
+                             max(given, default=0)) + 1
+            for value, row in enumerate(missing, next_value):
+                row[column] = value
+    
+    def apply_conditions(self, records: List[Dict[str, Any]], 
+                        conditions: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Apply WHERE conditions to filter records.
+        
+        Args:
+            records (list): List of records
+            conditions (dict): Conditions to apply
+            
+        Returns:
+            list: Filtered records
+            
+        TODO: Implement this method
+        """
+        pass
+    
+    def analyze(self, table_name: str) -> Dict[str, ColumnStatistics]:
+        """
+        Gather per-column cardinality statistics for the query planner.
+        
+        The planner calls this automatically once more than 10% of the
+        table has changed since the last run.
+        
+        Args:
+            table_name (str): Name of the table
+            
+        Returns:
+            dict: Column name mapped to ColumnStatistics
+        """
+        rows = self.tables[table_name]
+        columns = {}
+        for row in rows:
+            columns.update(dict.fromkeys(row))
+        table_indexes = self.indexes.get(table_name, {})
+        
+        statistics = {}
+        for column in columns:
+            values = [row.get(column) for row in rows]
+            present = [value for value in values if value is not None]
+            distinct = table_indexes[column].distinct_count() if column in table_indexes else None
+            if distinct is None:
+                try:
+                    distinct = len(set(present))
+                except TypeError:
+                    distinct = len(present)
+            try:
+                minimum, maximum = (min(present), max(present)) if present else (None, None)
+            except TypeError:
+                minimum = maximum = None
+            statistics[column] = ColumnStatistics(distinct, len(values) - len(present), minimum, maximum)
+        
+        self.statistics[table_name] = statistics
+        self._analyzed_rows[table_name] = len(rows)
+        self._modifications[table_name] = 0
+        return statistics
+    
+    def _table_statistics(self, table_name: str) -> Dict[str, ColumnStatistics]:
+        """Return statistics for a table, re-analyzing it when they are stale."""
+        row_count = len(self.tables[table_name])
+        analyzed = self._analyzed_rows.get(table_name)
+        if (analyzed is None or self._modifications[table_name] * 10 > row_count
+                or abs(row_count - analyzed) * 10 > analyzed):
+            return self.analyze(table_name)
+        return self.statistics[table_name]
+    
+    def plan_query(self, table_name: str, conditions: Dict[str, Any] = None) -> QueryPlan:
+        """
+        Choose an access path and filter order for WHERE conditions.
+        
+        Every condition gets a selectivity estimate from the column
+        statistics. The indexed column whose conditions are estimated to
+        return the fewest rows drives the lookup, unless a scan is cheaper;
+        the remaining conditions are compiled into one predicate ordered by
+        how many rows each removes per unit of evaluation cost.
+        
+        Args:
+            table_name (str): Name of the table
+            conditions (dict, optional): Conditions in the format accepted by
+                normalize_conditions
+            
+        Returns:
+            QueryPlan: The chosen plan
+        """
+        row_count = len(self.tables[table_name])
+        statistics = self._table_statistics(table_name)
+        estimates = [(column, op, operand,
+                      estimate_selectivity(statistics.get(column), row_count, op, operand))
+                     for column, op, operand in normalize_conditions(conditions)]
+        
+        plan = QueryPlan(table_name, row_count, float(row_count))
+        # Index lookups pay for slicing candidates out of the index
+        best_cost = float(row_count)
+        for column, index in self.indexes.get(table_name, {}).items():
+            served = [(op, operand, selectivity) for name, op, operand, selectivity in estimates
+                      if name == column and op in index.operators]
+            if not served:
+                continue
+            cost = 1.0 + 1.2 * row_count * _combined_selectivity(
+                [(op, selectivity) for op, _, selectivity in served])
+            if cost < best_cost:
+                best_cost = cost
+                plan.index_column, plan.index_kind = column, index.kind
+                plan.index_conditions = [(op, operand) for op, operand, _ in served]
+        
+        plan.filters = [estimate for estimate in estimates
+                        if not (estimate[0] == plan.index_column and
+                                (estimate[1], estimate[2]) in plan.index_conditions)]
+        plan.filters.sort(key=lambda estimate: -(1.0 - estimate[3]) / _OPERATOR_COSTS.get(estimate[1], 1.0))
+        plan.predicate = compile_predicate([(column, op, operand)
+                                            for column, op, operand, _ in plan.filters])
+        
+        by_column: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        for column, op, _, selectivity in estimates:
+            by_column[column].append((op, selectivity))
+        for column_estimates in by_column.values():
+            plan.estimated_rows *= _combined_selectivity(column_estimates)
+        return plan
+    
+    def explain(self, table_name: str, conditions: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Describe how find_rows would evaluate WHERE conditions.
+        
+        Args:
+            table_name (str): Name of the table
+            conditions (dict, optional): Conditions to plan
+            
+        Returns:
+            dict: Access path ("index" or "scan"), the driving index, the
+                ordered filters with their selectivity estimates, and the
+                estimated number of matching rows
+        """
+        plan = self.plan_query(table_name, conditions)
+        return {
+            'table': plan.table_name,
+            'access': 'index' if plan.index_column else 'scan',
+            'index': ({'column': plan.index_column, 'kind': plan.index_kind,
+                       'conditions': plan.index_conditions} if plan.index_column else None),
+            'filters': [{'column': column, 'operator': op, 'operand': operand,
+                         'selectivity': round(selectivity, 6)}
+                        for column, op, operand, selectivity in plan.filters],
+            'row_count': plan.row_count,
+            'estimated_rows': round(plan.estimated_rows, 2)
+        }
+    
+    def find_rows(self, table_name: str,
+                  conditions: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        Return the stored rows matching WHERE conditions.
+        
+        Conditions are evaluated according to plan_query. Rows are returned
+        by reference, in index order when an index drives the lookup and in
+        table order otherwise. Columnar tables evaluate the conditions
+        column at a time and return materialized copies; MVCC tables return
+        the rows visible to current_transaction. Sharded tables return
+        copies, routing primary key lookups to the owning shards.
+        
+        Args:
+            table_name (str): Name of the table
+            conditions (dict, optional): Conditions in the format accepted by
+                normalize_conditions
+            
+        Returns:
+            list: Matching rows
+        """
+        table = self.tables[table_name]
+        if isinstance(table, ColumnarTable):
+            return table.rows(table.find(conditions))
+        if isinstance(table, ShardedTable):
+            return table.find(conditions)
+        if isinstance(table, VersionedTable):
+            return self._in_transaction(lambda transaction: table.scan(transaction, conditions))
+        plan = self.plan_query(table_name, conditions)
+        if plan.index_column:
+            candidates = self.indexes[table_name][plan.index_column].candidates(plan.index_conditions)
+        else:
+            candidates = self.tables[table_name]
+        if not plan.filters:
+            return list(candidates)
+        return list(filter(plan.predicate, candidates))
+    
+    def _create_storage(self, table_name: str, schema: Dict[str, Any],
+                        storage: str = "row") -> None:
+        """
+        Register a table's schema and empty storage.
+        
+        Args:
+            table_name (str): Name of the table
+            schema (dict): Table schema definition
+            storage (str): "row" keeps a list of dicts; "columnar" keeps a
+                ColumnarTable; "mvcc" keeps a VersionedTable; "sharded" keeps
+                a ShardedTable of shard_count shards
+            
+        Raises:
+            ValueError: If the storage engine is unknown, or a sharded
+                schema has no primary key
+        """
+        if self._logging():
+            return self._logged_write(table_name, ('_create_storage', table_name, schema, storage),
+                                      self._create_storage, table_name, schema, storage)
+        if storage == "row":
+            self.tables[table_name] = []
+        elif storage == "columnar":
+            self.tables[table_name] = ColumnarTable(schema)
+        elif storage == "mvcc":
+            self.tables[table_name] = VersionedTable(schema, self.transactions)
+        elif storage == "sharded":
+            self.tables[table_name] = ShardedTable(schema, self.shard_count)
+        else:
+            raise ValueError(f"Unknown storage engine '{storage}'")
+        self.table_schemas[table_name] = schema
+        self.indexes.pop(table_name, None)
+        self.statistics.pop(table_name, None)
+        self._analyzed_rows.pop(table_name, None)
+    
+    def _store_row(self, table_name: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Append a row to a table and add it to the table's indexes.
+        
+        Args:
+            table_name (str): Name of the table
+            row (dict): Validated row to store
+            
+        Returns:
+            dict: The stored row
+        """
+        if self._logging():
+            return self._logged_write(table_name, ('_store_row', table_name, row),
+                                      self._store_row, table_name, row)
+        self._modifications[table_name] += 1
+        table = self.tables[table_name]
+        if isinstance(table, ColumnarTable):
+            table.append(row)
+            return row
+        if isinstance(table, VersionedTable):
+            self._in_transaction(lambda transaction: table.insert(transaction, row))
+            return row
+        if isinstance(table, ShardedTable):
+            table.insert(row)
+            return row
+        table.append(row)
+        for index in self.indexes.get(table_name, {}).values():
+            index.add(row)
+        return row
+    
+    def _store_rows(self, table_name: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Append a batch of rows and index them in one pass per index.
+        
+        Args:
+            table_name (str): Name of the table
+            rows (list): Validated rows to store
+            
+        Returns:
+            list: The stored rows
+        """
+        if self._logging():
+            return self._logged_write(table_name, ('_store_rows', table_name, rows),
+                                      self._store_rows, table_name, rows)
+        table = self.tables[table_name]
+        if isinstance(table, ColumnarTable):
+            table.extend(rows)
+        elif isinstance(table, VersionedTable):
+            self._in_transaction(lambda transaction: table.insert_many(transaction, rows))
+        elif isinstance(table, ShardedTable):
+            table.insert_many(rows)
+        else:
+            table.extend(rows)
+            for index in self.indexes.get(table_name, {}).values():
+                index.add_many(rows)
+        self._modifications[table_name] += len(rows)
+        return rows
+    
+    def _update_row(self, table_name: str, row: Dict[str, Any], changes: Dict[str, Any]) -> None:
+        """
+        Apply changes to a stored row in place and re-index changed columns.
+        
+        Row storage only; _update_rows works for every storage engine.
+        
+        Args:
+            table_name (str): Name of the table
+            row (dict): Stored row, as returned by find_rows
+            changes (dict): Column values to set
+        """
+        if self._logging():
+            position = next(i for i, stored in enumerate(self.tables[table_name]) if stored is row)
+            return self._logged_write(table_name, ('_update_row', table_name, position, changes),
+                                      self._update_row, table_name, row, changes)
+        table_indexes = self.indexes.get(table_name, {})
+        self._modifications[table_name] += 1
+        for column, value in changes.items():
+            index = table_indexes.get(column)
+            if index is not None and row.get(column, _MISSING) != value:
+                index.remove(row)
+                row[column] = value
+                index.add(row)
+            else:
+                row[column] = value
+    
+    def _remove_rows(self, table_name: str, rows: List[Dict[str, Any]]) -> int:
+        """
+        Remove stored rows from a table and its indexes in one pass.
+        
+        Row storage only; _delete_rows works for every storage engine.
+        
+        Args:
+            table_name (str): Name of the table
+            rows (list): Stored rows, as returned by find_rows
+            
+        Returns:
+            int: Number of rows removed
+        """
+        doomed = {id(row) for row in rows}
+        if not doomed:
+            return 0
+        if self._logging():
+            positions = [i for i, row in enumerate(self.tables[table_name]) if id(row) in doomed]
+            return self._logged_write(table_name, ('_remove_rows', table_name, positions),
+                                      self._remove_rows, table_name, rows)
+        for index in self.indexes.get(table_name, {}).values():
+            for row in rows:
+                index.remove(row)
+        table = self.tables[table_name]
+        kept = [row for row in table if id(row) not in doomed]
+        removed = len(table) - len(kept)
+        table[:] = kept
+        self._modifications[table_name] += removed
+        return removed
+    
+    def _update_rows(self, table_name: str, conditions: Dict[str, Any],
+                     changes: Dict[str, Any]) -> int:
+        """
+        Apply changes to every row matching WHERE conditions.
+        
+        Args:
+            table_name (str): Name of the table
+            conditions (dict): WHERE conditions
+            changes (dict): Column values to set
+            
+        Returns:
+            int: Number of rows updated
+        """
+        if self._logging():
+            return self._logged_write(table_name, ('_update_rows', table_name, conditions, changes),
+                                      self._update_rows, table_name, conditions, changes)
+        table = self.tables[table_name]
+        if isinstance(table, ColumnarTable):
+            updated = table.update(table.find(conditions), changes)
+            self._modifications[table_name] += updated
+            return updated
+        if isinstance(table, ShardedTable):
+            updated = table.update(conditions, changes)
+            self._modifications[table_name] += updated
+            return updated
+        if isinstance(table, VersionedTable):
+            updated = self._in_transaction(
+                lambda transaction: table.update(transaction, conditions, changes))
+            self._modifications[table_name] += updated
+            return updated
+        rows = self.find_rows(table_name, conditions)
+        for row in rows:
+            self._update_row(table_name, row, changes)
+        return len(rows)
+    
+    def _delete_rows(self, table_name: str, conditions: Dict[str, Any]) -> int:
+        """
+        Delete every row matching WHERE conditions.
+        
+        Args:
+            table_name (str): Name of the table
+            conditions (dict): WHERE conditions
+            
+        Returns:
+            int: Number of rows deleted
+        """
+        if self._logging():
+            return self._logged_write(table_name, ('_delete_rows', table_name, conditions),
+                                      self._delete_rows, table_name, conditions)
+        table = self.tables[table_name]
+        if isinstance(table, ColumnarTable):
+            deleted = table.delete(table.find(conditions))
+            self._modifications[table_name] += deleted
+            return deleted
+        if isinstance(table, ShardedTable):
+            deleted = table.delete(conditions)
+            self._modifications[table_name] += deleted
+            return deleted
+        if isinstance(table, VersionedTable):
+            deleted = self._in_transaction(
+                lambda transaction: table.delete(transaction, conditions))
+            self._modifications[table_name] += deleted
+            return deleted
+        return self._remove_rows(table_name, self.find_rows(table_name, conditions))
+    
+    def aggregate(self, table_name: str, column: str, function: str,
+                  conditions: Dict[str, Any] = None) -> Any:
+        """
+        Compute COUNT/SUM/AVG/MIN/MAX of a column over matching rows.
+        
+        Columnar tables aggregate straight from the column arrays without
+        materializing rows.
+        
+        Args:
+            table_name (str): Name of the table
+            column (str): Column to aggregate
+            function (str): "count", "sum", "avg", "min" or "max"
+            conditions (dict, optional): WHERE conditions
+            
+        Returns:
+            any: Aggregate over non-NULL values (None for an empty avg/min/max)
+        """
+        table = self.tables[table_name]
+        if isinstance(table, ColumnarTable):
+            return table.aggregate(column, function, table.find(conditions) if conditions else None)
+        rows = self.find_rows(table_name, conditions) if conditions else table
+        return _aggregate([row[column] for row in rows if row.get(column) is not None], function)
+    
+    def enable_persistence(self, directory: str, checkpoint_every: int = 100_000,
+                           fsync: bool = False) -> Dict[str, Any]:
+        """
+        Keep the database on disk in a write-ahead log plus snapshots.
+        
+        If the directory holds a snapshot or log, the saved tables replace
+        the current ones: the snapshot is loaded memory-mapped and the log
+        tail replayed. Otherwise the current tables are checkpointed into
+        it. From then on every write through the storage primitives,
+        create_index/drop_index and execute_sql is logged before returning.
+        Writes to "mvcc" tables must be auto-committed while persistence is
+        enabled.
+        
+        Args:
+            directory (str): Directory for the snapshot and log files
+            checkpoint_every (int): Log records between automatic
+                checkpoints; 0 disables them
+            fsync (bool): Whether to fsync every log record
+            
+        Returns:
+            dict: Tables and rows loaded, log records replayed and load time
+            
+        Raises:
+            ValueError: If persistence is already enabled
+        """
+        if self.persistence is not None:
+            raise ValueError("Persistence is already enabled")
+        started = time.perf_counter()
+        storage = DurableStorage(directory, checkpoint_every, fsync)
+        saved = storage.read_snapshot()
+        saved_rows = sum(len(entry.get('rows') or entry.get('table') or ()) for entry in saved)
+        records = storage.recover()
+        if saved or records:
+            self.tables.clear()
+            self.table_schemas.clear()
+            self.indexes.clear()
+            for entry in saved:
+                self._restore_table(entry)
+            for record in records:
+                self._replay(record)
+        self.persistence = storage
+        if not saved and not records:
+            self.checkpoint()
+        return {
+            'tables': len(saved),
+            'rows': saved_rows,
+            'replayed': len(records),
+            'load_ms': (time.perf_counter() - started) * 1000
+        }
+    
+    def checkpoint(self) -> bool:
+        """
+        Write every table to a new snapshot and truncate the write-ahead log.
+        
+        Logged writes wait while the snapshot is written, so each one lands
+        either in the snapshot or in the new log.
+        
+        Returns:
+            bool: False if persistence is not enabled
+        """
+        if self.persistence is None:
+            return False
+        with self._persistence_lock:
+            tables = []
+            for name, table in list(self.tables.items()):
+                entry = {'name': name, 'schema': self.table_schemas.get(name, {}),
+                         'indexes': [(column, index.kind) for column, index in
+                                     self.indexes.get(name, {}).items()]}
+                if isinstance(table, ColumnarTable):
+                    entry.update(storage='columnar', table=table)
+                elif isinstance(table, VersionedTable):
+                    entry.update(storage='mvcc', rows=list(table))
+                elif isinstance(table, ShardedTable):
+                    entry.update(storage='sharded', rows=list(table),
+                                 indexes=list(table.index_kinds.items()))
+                else:
+                    entry.update(storage='row', rows=table)
+                tables.append(entry)
+            self.persistence.write_snapshot(tables)
+        return True
+    
+    def disable_persistence(self, checkpoint: bool = True) -> None:
         """
-        Initialize the database mock.
+        Stop logging writes and close the log.
         
         Args:
-            auto_commit (bool): Whether to auto-commit transactions
+            checkpoint (bool): Whether to write a final snapshot first
         """
-        self.tables: Dict[str, List[Dict[str, Any]]] = {}
-        self.table_schemas: Dict[str, Dict[str, Any]] = {}
-        self.auto_commit = auto_commit
-        self.transaction_active = False
-        self.transaction_log: List[Dict[str, Any]] = []
-        self.query_log: List[Dict[str, Any]] = []
-        self.connection_count = 0
-        self.latency_simulation = 0  # milliseconds
-        self.failure_rate = 0.0  # 0.0 to 1.0
-        self.max_connections = 100
+        if self.persistence is None:
+            return
+        if checkpoint:
+            self.checkpoint()
+        self.persistence.close()
+        self.persistence = None
+    
+    def _restore_table(self, entry: Dict[str, Any]) -> None:
+        """Install a table loaded by DurableStorage.read_snapshot."""
+        name = entry['name']
+        self._create_storage(name, entry['schema'], entry['storage'])
+        if entry['storage'] == 'columnar':
+            self.tables[name] = entry['table']
+        elif entry['storage'] == 'mvcc':
+            table = self.tables[name]
+            with self.transactions.begin() as transaction:
+                table.versions = [RowVersion(row, transaction.txid) for row in entry['rows']]
+        elif entry['storage'] == 'sharded':
+            self.tables[name].insert_many(entry['rows'])
+        else:
+            self.tables[name] = entry['rows']
+        for column, kind in entry['indexes']:
+            self.create_index(name, column, kind)
+    
+    def _replay(self, record: Tuple) -> None:
+        """Re-apply a write-ahead log record; failures repeat the original outcome."""
+        operation, *args = record
+        try:
+            if operation == '_update_row':
+                table_name, position, changes = args
+                self._update_row(table_name, self.tables[table_name][position], changes)
+            elif operation == '_remove_rows':
+                table_name, positions = args
+                table = self.tables[table_name]
+                self._remove_rows(table_name, [table[position] for position in positions])
+            else:
+                getattr(self, operation)(*args)
+        except (TransactionConflict, TypeError, KeyError, ValueError):
+            pass
+    
+    def _logging(self) -> bool:
+        """Whether writes made now should be logged (not nested in a logged write)."""
+        return self.persistence is not None and not getattr(self._wal_state, 'depth', 0)
     
-    def create_table(self, table_name: str, schema: Dict[str, Any]) -> QueryResult:
+    def _log(self, record: Tuple) -> None:
+        """Append a record to the write-ahead log, checkpointing when due."""
+        if self.persistence.append(record):
+            self.checkpoint()
+    
+    def _logged_write(self, table_name: str, record: Tuple, operation: Callable, *args) -> Any:
         """
-        Create a new table with specified schema.
+        Run a write and log it, without logging the writes it makes itself.
         
-        Args:
-            table_name (str): Name of the table
-            schema (dict): Table schema definition
-                Example: {
-                    "id": {"type": "int", "primary_key": True, "auto_increment": True},
-                    "name": {"type": "str", "nullable": False, "max_length": 100},
-                    "email": {"type": "str", "unique": True}
-                }
+        A write that fails after changing rows is still logged, so replay
+        reproduces the same partial outcome.
+        """
+        if (isinstance(self.tables.get(table_name), VersionedTable) and
+                self.current_transaction is not None and self.current_transaction.status == "active"):
+            raise ValueError("Writes to mvcc tables must be auto-committed while persistence is enabled")
+        state = self._wal_state
+        with self._persistence_lock:
+            before = self._modifications[table_name]
+            state.depth = getattr(state, 'depth', 0) + 1
+            try:
+                result = operation(*args)
+            except Exception:
+                if self._modifications[table_name] != before:
+                    self._log(record)
+                raise
+            finally:
+                state.depth -= 1
+            self._log(record)
+        return result
+    
+    def simulate_latency(self) -> None:
+        """
+        Simulate database latency.
+        
+        inject_latency() sleeps for a delay drawn from any configured
+        latency profile.
+        
+        TODO: Implement this method
+        """
+        pass
+    
+    def simulate_failure(self) -> bool:
+        """
+        Simulate database failures based on failure rate.
+        
+        inject_failure() applies any configured failure profile.
         
         Returns:
-            QueryResult: Result of the operation
+            bool: True if operation should fail
             
         TODO: Implement this method
         """
         pass
     
-    def drop_table(self, table_name: str) -> QueryResult:
+    def set_latency_profile(self, profile: Optional[LatencyProfile], table_name: str = None,
+                            query_type: QueryType = None) -> None:
         """
-        Drop a table.
+        Use a latency profile for a table, a query type, both, or every call.
+        
+        The most specific profile applies: table and query type, then
+        table, then query type, then the one set with neither. Calls
+        matching no profile fall back to latency_simulation.
         
         Args:
-            table_name (str): Name of the table to drop
+            profile (LatencyProfile or None): Profile, or None to remove one
+            table_name (str, optional): Table the profile applies to
+            query_type (QueryType, optional): Query type it applies to
+        """
+        self._set_profile(self.latency_profiles, profile, table_name, query_type)
+    
+    def set_failure_profile(self, profile: Optional[FailureProfile], table_name: str = None,
+                            query_type: QueryType = None) -> None:
+        """
+        Use a failure profile for a table, a query type, both, or every call.
+        
+        Profiles are chosen as for set_latency_profile; calls matching no
+        profile fall back to failure_rate.
+        
+        Args:
+            profile (FailureProfile or None): Profile, or None to remove one
+            table_name (str, optional): Table the profile applies to
+            query_type (QueryType, optional): Query type it applies to
+        """
+        self._set_profile(self.failure_profiles, profile, table_name, query_type)
+    
+    def _set_profile(self, profiles: Dict[Tuple[Optional[str], Optional[QueryType]], Any],
+                     profile: Any, table_name: Optional[str],
+                     query_type: Optional[QueryType]) -> None:
+        if profile is None:
+            profiles.pop((table_name, query_type), None)
+        else:
+            profiles[(table_name, query_type)] = profile
+        self._resolved_profiles.clear()
+    
+    def _resolve_profiles(self, table_name: Optional[str], query_type: Optional[QueryType]) -> Tuple:
+        """Find the latency and failure profiles for a call and cache them."""
+        lookups = ((table_name, query_type), (table_name, None), (None, query_type), (None, None))
+        resolved = self._resolved_profiles[(table_name, id(query_type))] = tuple(
+            next((profiles[lookup] for lookup in lookups if lookup in profiles), None)
+            for profiles in (self.latency_profiles, self.failure_profiles))
+        return resolved
+    
+    def sample_latency_ms(self, table_name: str = None, query_type: QueryType = None) -> float:
+        """
+        Draw the simulated latency of one call.
+        
+        Args:
+            table_name (str, optional): Table the call reads or writes
+            query_type (QueryType, optional): Type of the call
             
         Returns:
-            QueryResult: Result of the operation
-            
-        TODO: Implement this method
+            float: Latency in milliseconds
         """
-        pass
+        resolved = (self._resolved_profiles.get((table_name, id(query_type)))
+                    or self._resolve_profiles(table_name, query_type))
+        return resolved[0].sample() if resolved[0] is not None else self.latency_simulation
     
-    def insert(self, table_name: str, data: Dict[str, Any]) -> QueryResult:
+    def inject_latency(self, table_name: str = None, query_type: QueryType = None) -> float:
         """
-        Insert a record into a table.
+        Sleep for the simulated latency of one call.
         
         Args:
-            table_name (str): Name of the table
-            data (dict): Data to insert
+            table_name (str, optional): Table the call reads or writes
+            query_type (QueryType, optional): Type of the call
             
         Returns:
-            QueryResult: Result of the operation
+            float: Latency slept, in milliseconds
+        """
+        latency_ms = self.sample_latency_ms(table_name, query_type)
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000)
+        return latency_ms
+    
+    def inject_failure(self, table_name: str = None, query_type: QueryType = None) -> bool:
+        """
+        Decide whether one call fails.
+        
+        Args:
+            table_name (str, optional): Table the call reads or writes
+            query_type (QueryType, optional): Type of the call
             
-        TODO: Implement this method
+        Returns:
+            bool: True if the call should fail
         """
-        pass
+        resolved = (self._resolved_profiles.get((table_name, id(query_type)))
+                    or self._resolve_profiles(table_name, query_type))
+        if resolved[1] is not None:
+            return resolved[1].should_fail()
+        return self.failure_rate > 0 and random.random() < self.failure_rate
     
-    def insert_many(self, table_name: str, data_list: List[Dict[str, Any]]) -> QueryResult:
+    def get_table_info(self, table_name: str) -> Dict[str, Any]:
         """
-        Insert multiple records into a table.
+        Get information about a table.
+        
+        ColumnarTable.describe() reports columnar tables without a scan.
         
         Args:
             table_name (str): Name of the table
-            data_list (list): List of data dictionaries to insert
             
         Returns:
-            QueryResult: Result of the operation
+            dict: Table information
             
         TODO: Implement this method
         """
         pass
     
-    def select(self, table_name: str, conditions: Dict[str, Any] = None,
-              columns: List[str] = None, limit: int = None,
-              offset: int = 0, order_by: str = None) -> QueryResult:
+    def configure_query_log(self, capacity: int = 10_000, sample_rate: float = 1.0,
+                            counters: bool = True, histograms: bool = True) -> QueryLog:
         """
-        Select records from a table.
+        Replace the query log with an empty one using new settings.
         
         Args:
-            table_name (str): Name of the table
-            conditions (dict, optional): WHERE conditions
-            columns (list, optional): Columns to select
-            limit (int, optional): Maximum number of records
-            offset (int): Number of records to skip
-            order_by (str, optional): Column to order by
+            capacity (int): Maximum number of entries kept
+            sample_rate (float): Fraction of entries stored, 0.0 to 1.0
+            counters (bool): Whether to count entries per query type
+            histograms (bool): Whether to keep latency histograms per type
             
         Returns:
-            QueryResult: Result of the operation
+            QueryLog: The new log
+        """
+        self.query_log = QueryLog(capacity, sample_rate, counters, histograms)
+        return self.query_log
+    
+    def get_query_log(self, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Get query execution log.
+        
+        query_log.recent(limit) reads the newest entries from the ring
+        without copying the rest.
+        
+        Args:
+            limit (int, optional): Maximum number of entries
             
+        Returns:
+            list: Query log entries
+        """
+        return self.query_log.recent(limit)
+    
+    def clear_query_log(self) -> None:
+        """
+        Clear the query log.
+        
+        query_log.clear() also resets its counters and histograms.
+        
         TODO: Implement this method
         """
         pass
     
-    def update(self, table_name: str, data: Dict[str, Any], 
-              conditions: Dict[str, Any]) -> QueryResult:
+    def export_data(self, table_name: str, format_type: str = "json") -> str:
         """
-        Update records in a table.
+        Export table data.
+        
+        enable_persistence keeps tables on disk between runs without
+        serializing them through an export.
         
         Args:
             table_name (str): Name of the table
-            data (dict): Data to update
-            conditions (dict): WHERE conditions
+            format_type (str): Export format ("json", "csv")
             
         Returns:
-            QueryResult: Result of the operation
+            str: Exported data as string
             
         TODO: Implement this method
         """
         pass
     
-    def delete(self, table_name: str, conditions: Dict[str, Any]) -> QueryResult:
+    def import_data(self, table_name: str, data: str, format_type: str = "json") -> QueryResult:
         """
-        Delete records from a table.
+        Import data into a table.
         
         Args:
             table_name (str): Name of the table
-            conditions (dict): WHERE conditions
+            data (str): Data to import
+            format_type (str): Data format ("json", "csv")
             
         Returns:
             QueryResult: Result of the operation
@@ -171,26 +4374,43 @@ class DatabaseMock:
         TODO: Implement this method
         """
         pass
+
+class ConnectionPool:
+    """
+    Database connection pool mock.
+    """
     
-    def execute_raw_query(self, query: str, params: List[Any] = None) -> QueryResult:
+    def __init__(self, database_mock: DatabaseMock, max_connections: int = 10):
         """
-        Execute a raw SQL query (simplified parsing).
+        Initialize connection pool.
         
         Args:
-            query (str): SQL query string
-            params (list, optional): Query parameters
-            
+            database_mock (DatabaseMock): Database mock instance
+            max_connections (int): Maximum number of connections
+        """
+        self.database_mock = database_mock
+        self.max_connections = max_connections
+        self.active_connections = 0
+        self.connection_queue = []
+    
+    def get_connection(self) -> Optional[DatabaseMock]:
+        """
+        Get a database connection.
+        
         Returns:
-            QueryResult: Result of the operation
+            DatabaseMock or None: Database connection or None if pool is full
             
         TODO: Implement this method
         """
         pass
     
-    def begin_transaction(self) -> bool:
+    def release_connection(self, connection: DatabaseMock) -> bool:
         """
-        Begin a database transaction.
+        Release a database connection back to the pool.
         
+        Args:
+            connection (DatabaseMock): Connection to release
+            
         Returns:
             bool: True if successful
             
@@ -198,198 +4418,658 @@ class DatabaseMock:
         """
         pass
     
-    def commit_transaction(self) -> bool:
+    def get_pool_stats(self) -> Dict[str, Any]:
         """
-        Commit the current transaction.
+        Get connection pool statistics.
         
         Returns:
-            bool: True if successful
+            dict: Pool statistics
             
         TODO: Implement this method
         """
         pass
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time."""
+    pass
+
+class PooledConnection:
+    """
+    Connection handed out by BlockingConnectionPool.
     
-    def rollback_transaction(self) -> bool:
+    Attribute access is forwarded to the database mock, so a pooled
+    connection can be used wherever a DatabaseMock is expected.
+    """
+    
+    def __init__(self, database_mock: DatabaseMock, connection_id: int):
         """
-        Rollback the current transaction.
+        Initialize an open connection.
+        
+        Args:
+            database_mock (DatabaseMock): Database the connection talks to
+            connection_id (int): Pool-unique connection id
+        """
+        self.database_mock = database_mock
+        self.connection_id = connection_id
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self.closed = False
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.database_mock, name)
+    
+    def ping(self) -> bool:
+        """Return True if the connection is usable."""
+        return not self.closed
+    
+    def close(self) -> None:
+        """Close the connection; the pool discards closed connections."""
+        self.closed = True
+
+class BlockingConnectionPool(ConnectionPool):
+    """
+    Thread-safe connection pool with blocking acquisition.
+    
+    Callers that find the pool exhausted queue up in connection_queue and
+    are served strictly in arrival order as connections are released.
+    Idle connections are health-checked before reuse and replaced when
+    they fail or exceed their maximum lifetime.
+    """
+    
+    def __init__(self, database_mock: DatabaseMock, max_connections: int = 10,
+                 timeout: Optional[float] = 30.0,
+                 health_check: Optional[Callable[[PooledConnection], bool]] = None,
+                 max_lifetime_seconds: Optional[float] = None,
+                 wait_samples: int = 10_000):
+        """
+        Initialize the pool; connections are opened lazily.
+        
+        Args:
+            database_mock (DatabaseMock): Database mock instance
+            max_connections (int): Maximum number of connections
+            timeout (float, optional): Default seconds to wait for a
+                connection; None waits indefinitely
+            health_check (callable, optional): Returns False for connections
+                that must be replaced; closed connections are always replaced
+            max_lifetime_seconds (float, optional): Replace connections older than this
+            wait_samples (int): Number of recent wait times kept for percentiles
+        """
+        super().__init__(database_mock, max_connections)
+        self.timeout = timeout
+        self.health_check = health_check or PooledConnection.ping
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.connection_queue = deque()  # one condition per waiting caller, FIFO
+        self._lock = threading.Lock()
+        self._idle: deque = deque()
+        self._in_use: Dict[int, PooledConnection] = {}
+        self._next_id = 1
+        self._wait_times = deque(maxlen=wait_samples)
+        self._counters = Counter()
+        self._peak_active = 0
+    
+    def _healthy(self, connection: PooledConnection) -> bool:
+        if connection.closed:
+            return False
+        if self.max_lifetime_seconds is not None and \
+                time.monotonic() - connection.created_at > self.max_lifetime_seconds:
+            return False
+        try:
+            return bool(self.health_check(connection))
+        except Exception:
+            return False
+    
+    def _wake_next(self) -> None:
+        """Wake the head waiter if a connection is available; caller holds the lock."""
+        if self.connection_queue and (self._idle or self.active_connections < self.max_connections):
+            self.connection_queue[0].notify()
+    
+    def _checkout(self) -> PooledConnection:
+        """Take a healthy idle connection or open a new one; caller holds the lock."""
+        connection = None
+        while self._idle:
+            candidate = self._idle.popleft()
+            if self._healthy(candidate):
+                connection = candidate
+                break
+            candidate.close()
+            self._counters['discarded'] += 1
+        if connection is None:
+            connection = PooledConnection(self.database_mock, self._next_id)
+            self._next_id += 1
+            self._counters['created'] += 1
+        connection.last_used = time.monotonic()
+        connection.uses += 1
+        self._in_use[connection.connection_id] = connection
+        self.active_connections = len(self._in_use)
+        self._peak_active = max(self._peak_active, self.active_connections)
+        self._counters['acquired'] += 1
+        return connection
+    
+    def get_connection(self, timeout: Optional[float] = _MISSING) -> Optional[PooledConnection]:
+        """
+        Get a database connection, waiting for one if the pool is exhausted.
         
+        Args:
+            timeout (float, optional): Seconds to wait; 0 does not wait, None
+                waits indefinitely, default is the pool's timeout
+            
         Returns:
-            bool: True if successful
+            PooledConnection or None: Connection, or None on timeout
+        """
+        timeout = self.timeout if timeout is _MISSING else timeout
+        started = time.monotonic()
+        with self._lock:
+            if not self.connection_queue and (self._idle or self.active_connections < self.max_connections):
+                self._wait_times.append(0.0)
+                return self._checkout()
+            self._counters['exhausted'] += 1
+            if timeout is not None and timeout <= 0:
+                self._counters['timeouts'] += 1
+                return None
             
-        TODO: Implement this method
+            # Each waiter sleeps on its own condition so a release wakes
+            # exactly the caller at the head of the queue
+            waiter = threading.Condition(self._lock)
+            self.connection_queue.append(waiter)
+            deadline = None if timeout is None else started + timeout
+            try:
+                while not (self.connection_queue[0] is waiter and
+                           (self._idle or self.active_connections < self.max_connections)):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._counters['timeouts'] += 1
+                        return None
+                    waiter.wait(remaining)
+                connection = self._checkout()
+            finally:
+                self.connection_queue.remove(waiter)
+                self._wake_next()
+            self._wait_times.append(time.monotonic() - started)
+            return connection
+    
+    def release_connection(self, connection: PooledConnection) -> bool:
         """
-        pass
+        Release a database connection back to the pool.
+        
+        Unhealthy connections are closed instead of returned to the idle set.
+        
+        Args:
+            connection (PooledConnection): Connection to release
+            
+        Returns:
+            bool: True if the connection was checked out from this pool
+        """
+        with self._lock:
+            connection_id = getattr(connection, 'connection_id', None)
+            if self._in_use.get(connection_id) is not connection:
+                return False
+            del self._in_use[connection_id]
+            self.active_connections = len(self._in_use)
+            if self._healthy(connection):
+                connection.last_used = time.monotonic()
+                self._idle.append(connection)
+            else:
+                connection.close()
+                self._counters['discarded'] += 1
+            self._wake_next()
+        return True
     
-    def validate_data(self, table_name: str, data: Dict[str, Any]) -> List[str]:
+    @contextmanager
+    def connection(self, timeout: Optional[float] = _MISSING) -> Iterator[PooledConnection]:
         """
-        Validate data against table schema.
+        Acquire a connection for the duration of a with block.
         
         Args:
-            table_name (str): Name of the table
-            data (dict): Data to validate
+            timeout (float, optional): As for get_connection
+            
+        Yields:
+            PooledConnection: The acquired connection
             
+        Raises:
+            PoolTimeout: If no connection became available in time
+        """
+        connection = self.get_connection(timeout)
+        if connection is None:
+            raise PoolTimeout("No connection available before the timeout")
+        try:
+            yield connection
+        finally:
+            self.release_connection(connection)
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics.
+        
+        Wait-time percentiles cover the most recent acquisitions, including
+        ones that did not wait; saturation is the fraction of acquisition
+        attempts that found the pool exhausted.
+        
         Returns:
-            list: List of validation errors
+            dict: Pool statistics
+        """
+        with self._lock:
+            waits = sorted(self._wait_times)
+            counters = dict(self._counters)
+            stats = {
+                'max_connections': self.max_connections,
+                'active_connections': self.active_connections,
+                'idle_connections': len(self._idle),
+                'waiting': len(self.connection_queue),
+                'peak_active': self._peak_active,
+            }
+        attempts = counters.get('acquired', 0) + counters.get('timeouts', 0)
+        stats.update({
+            'acquired': counters.get('acquired', 0),
+            'timeouts': counters.get('timeouts', 0),
+            'created': counters.get('created', 0),
+            'discarded': counters.get('discarded', 0),
+            'utilization': stats['active_connections'] / self.max_connections,
+            'saturation': counters.get('exhausted', 0) / attempts if attempts else 0.0,
+        })
+        for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+            stats[f'wait_{name}_ms'] = waits[min(len(waits) - 1, int(fraction * len(waits)))] * 1000 if waits else 0.0
+        stats['wait_max_ms'] = waits[-1] * 1000 if waits else 0.0
+        return stats
+
+class AsyncDatabaseMock:
+    """
+    asyncio facade over a DatabaseMock.
+    
+    Each call first awaits the database's simulated latency (its latency
+    profiles, or latency_simulation) with asyncio.sleep, so concurrent
+    calls overlap in one event loop instead of blocking it, then runs
+    synchronously on the storage primitives. Calls fail according to the
+    database's failure profiles or failure_rate. Each facade has its own
+    transaction, so give each concurrent task its own facade (for example
+    from an AsyncConnectionPool) when using transactions.
+    """
+    
+    def __init__(self, database_mock: DatabaseMock):
+        """
+        Initialize the facade.
+        
+        Args:
+            database_mock (DatabaseMock): Database to operate on
+        """
+        self.database = database_mock
+        self.transaction: Optional[Transaction] = None
+    
+    async def _latency(self, table_name: str = None, query_type: QueryType = None) -> None:
+        """Await the database's simulated latency without blocking the event loop."""
+        latency_ms = self.database.sample_latency_ms(table_name, query_type)
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000)
+    
+    async def _simulate(self, table_name: str = None,
+                        query_type: QueryType = None) -> Optional[QueryResult]:
+        """Await the simulated latency; return a failed result for a simulated failure."""
+        await self._latency(table_name, query_type)
+        if self.database.inject_failure(table_name, query_type):
+            return QueryResult(False, 0, [], "Simulated database failure")
+        return None
+    
+    async def _run(self, query_type: QueryType, table_name: Optional[str],
+                   operation: Callable[[], Tuple[int, List[Dict[str, Any]]]]) -> QueryResult:
+        """Simulate latency and failure, then run an operation inside this facade's transaction."""
+        started = time.perf_counter()
+        failed = await self._simulate(table_name, query_type)
+        if failed is not None:
+            return failed
+        if table_name is not None and table_name not in self.database.tables:
+            return QueryResult(False, 0, [], f"Table '{table_name}' does not exist")
+        
+        # No await below, so no other task can observe the swapped transaction
+        database = self.database
+        outer = database.current_transaction
+        database.current_transaction = self.transaction
+        try:
+            rows_affected, data = operation()
+        except (TransactionConflict, KeyError, TypeError, ValueError) as error:
+            return QueryResult(False, 0, [], str(error), (time.perf_counter() - started) * 1000)
+        finally:
+            database.current_transaction = outer
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        database.query_log.append({
+            'timestamp': datetime.now().isoformat(),
+            'query_type': query_type.value,
+            'table': table_name,
+            'rows_affected': rows_affected,
+            'execution_time_ms': elapsed_ms
+        })
+        return QueryResult(True, rows_affected, data, execution_time_ms=elapsed_ms)
+    
+    async def select(self, table_name: str, conditions: Dict[str, Any] = None,
+                     columns: List[str] = None, limit: int = None,
+                     offset: int = 0, order_by: str = None) -> QueryResult:
+        """
+        Select records from a table.
+        
+        Args:
+            table_name (str): Name of the table
+            conditions (dict, optional): WHERE conditions
+            columns (list, optional): Columns to return, default all
+            limit (int, optional): Maximum number of rows
+            offset (int): Number of rows to skip
+            order_by (str, optional): Column to sort by, with an optional
+                " DESC" suffix
             
-        TODO: Implement this method
+        Returns:
+            QueryResult: Matching rows as copies
         """
-        pass
+        def operation():
+            rows = self.database.find_rows(table_name, conditions)
+            if order_by:
+                column, descending = _parse_order_by(order_by)
+                rows = sorted(rows, key=lambda row: _order_key(row.get(column)), reverse=descending)
+            rows = rows[offset:None if limit is None else offset + limit]
+            if columns:
+                data = [{column: row.get(column) for column in columns} for row in rows]
+            else:
+                data = [dict(row) for row in rows]
+            return len(data), data
+        return await self._run(QueryType.SELECT, table_name, operation)
     
-    def apply_conditions(self, records: List[Dict[str, Any]], 
-                        conditions: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def insert(self, table_name: str, data: Dict[str, Any]) -> QueryResult:
         """
-        Apply WHERE conditions to filter records.
+        Insert a record after validating it against the schema.
         
         Args:
-            records (list): List of records
-            conditions (dict): Conditions to apply
+            table_name (str): Name of the table
+            data (dict): Data to insert
             
         Returns:
-            list: Filtered records
-            
-        TODO: Implement this method
+            QueryResult: Result of the operation; data holds the stored row
         """
-        pass
+        return await self.insert_many(table_name, [data])
     
-    def simulate_latency(self) -> None:
+    async def insert_many(self, table_name: str, data_list: List[Dict[str, Any]]) -> QueryResult:
         """
-        Simulate database latency.
+        Insert a batch of records with one validation pass.
         
-        TODO: Implement this method
+        Args:
+            table_name (str): Name of the table
+            data_list (list): List of data dictionaries to insert
+            
+        Returns:
+            QueryResult: Result of the operation; data holds the stored rows
         """
-        pass
+        def operation():
+            database = self.database
+            rows = list(map(dict, data_list))
+            database._assign_auto_increment(table_name, rows)
+            errors = database.validate_batch(table_name, rows)
+            if errors:
+                raise ValueError('; '.join(errors))
+            database._store_rows(table_name, rows)
+            return len(rows), [dict(row) for row in rows]
+        return await self._run(QueryType.INSERT, table_name, operation)
     
-    def simulate_failure(self) -> bool:
+    async def update(self, table_name: str, data: Dict[str, Any],
+                     conditions: Dict[str, Any]) -> QueryResult:
         """
-        Simulate database failures based on failure rate.
+        Update records matching conditions.
         
-        Returns:
-            bool: True if operation should fail
+        Args:
+            table_name (str): Name of the table
+            data (dict): Column values to set
+            conditions (dict): WHERE conditions
             
-        TODO: Implement this method
+        Returns:
+            QueryResult: Result of the operation
         """
-        pass
+        return await self._run(QueryType.UPDATE, table_name, lambda: (
+            self.database._update_rows(table_name, conditions, data), []))
     
-    def get_table_info(self, table_name: str) -> Dict[str, Any]:
+    async def delete(self, table_name: str, conditions: Dict[str, Any]) -> QueryResult:
         """
-        Get information about a table.
+        Delete records matching conditions.
         
         Args:
             table_name (str): Name of the table
+            conditions (dict): WHERE conditions
             
         Returns:
-            dict: Table information
-            
-        TODO: Implement this method
+            QueryResult: Result of the operation
         """
-        pass
+        return await self._run(QueryType.DELETE, table_name, lambda: (
+            self.database._delete_rows(table_name, conditions), []))
     
-    def get_query_log(self, limit: int = None) -> List[Dict[str, Any]]:
+    async def execute_sql(self, query: str, params: List[Any] = None) -> QueryResult:
         """
-        Get query execution log.
+        Execute a statement of the SQL subset supported by compile_sql.
         
         Args:
-            limit (int, optional): Maximum number of entries
+            query (str): SQL query string with ? placeholders
+            params (list, optional): Query parameters
             
         Returns:
-            list: Query log entries
-            
-        TODO: Implement this method
+            QueryResult: Result of the operation
         """
-        pass
+        try:
+            statement = compile_sql(query)
+            table_name, query_type = statement.table, QueryType(statement.kind.upper())
+        except SQLSyntaxError:
+            # execute_sql reports the error
+            table_name = query_type = None
+        failed = await self._simulate(table_name, query_type)
+        if failed is not None:
+            return failed
+        database = self.database
+        outer = database.current_transaction
+        database.current_transaction = self.transaction
+        try:
+            return database.execute_sql(query, params)
+        finally:
+            database.current_transaction = outer
     
-    def clear_query_log(self) -> None:
+    async def begin_transaction(self) -> bool:
         """
-        Clear the query log.
+        Begin an MVCC transaction for this facade's "mvcc" table operations.
         
-        TODO: Implement this method
+        Returns:
+            bool: False if a transaction is already active
         """
-        pass
+        if self.transaction is not None and self.transaction.status == "active":
+            return False
+        await self._latency()
+        self.transaction = self.database.begin_snapshot()
+        return True
     
-    def export_data(self, table_name: str, format_type: str = "json") -> str:
+    async def commit_transaction(self) -> bool:
         """
-        Export table data.
+        Commit the current transaction.
         
-        Args:
-            table_name (str): Name of the table
-            format_type (str): Export format ("json", "csv")
-            
         Returns:
-            str: Exported data as string
-            
-        TODO: Implement this method
+            bool: False if no transaction is active
         """
-        pass
+        await self._latency()
+        transaction, self.transaction = self.transaction, None
+        return transaction is not None and transaction.commit()
     
-    def import_data(self, table_name: str, data: str, format_type: str = "json") -> QueryResult:
+    async def rollback_transaction(self) -> bool:
         """
-        Import data into a table.
+        Roll back the current transaction.
         
-        Args:
-            table_name (str): Name of the table
-            data (str): Data to import
-            format_type (str): Data format ("json", "csv")
-            
         Returns:
-            QueryResult: Result of the operation
+            bool: False if no transaction is active
+        """
+        await self._latency()
+        transaction, self.transaction = self.transaction, None
+        return transaction is not None and transaction.rollback()
+    
+    @asynccontextmanager
+    async def transaction_scope(self) -> AsyncIterator['AsyncDatabaseMock']:
+        """
+        Run a block in a transaction, committing on success and rolling back on error.
+        
+        Yields:
+            AsyncDatabaseMock: This facade
             
-        TODO: Implement this method
+        Raises:
+            ValueError: If a transaction is already active
         """
-        pass
+        if not await self.begin_transaction():
+            raise ValueError("A transaction is already active")
+        try:
+            yield self
+        except BaseException:
+            await self.rollback_transaction()
+            raise
+        await self.commit_transaction()
 
-class ConnectionPool:
+class AsyncConnectionPool:
     """
-    Database connection pool mock.
+    Connection pool of AsyncDatabaseMock facades for asyncio code.
+    
+    Tasks that find the pool exhausted wait on a future of their own in a
+    FIFO queue. A released connection is handed straight to the task at the
+    head, so a task arriving later cannot take it first and waiters are
+    served in arrival order without blocking the event loop. Connections
+    are created lazily up to max_connections.
     """
     
-    def __init__(self, database_mock: DatabaseMock, max_connections: int = 10):
+    def __init__(self, database_mock: DatabaseMock, max_connections: int = 10,
+                 timeout: Optional[float] = 30.0, wait_samples: int = 10_000):
         """
-        Initialize connection pool.
+        Initialize the pool.
         
         Args:
-            database_mock (DatabaseMock): Database mock instance
+            database_mock (DatabaseMock): Database shared by all connections
             max_connections (int): Maximum number of connections
+            timeout (float, optional): Default seconds to wait for a
+                connection; None waits indefinitely
+            wait_samples (int): Number of recent wait times kept for percentiles
         """
         self.database_mock = database_mock
         self.max_connections = max_connections
-        self.active_connections = 0
-        self.connection_queue = []
+        self.timeout = timeout
+        self._idle: deque = deque()
+        self._waiters: deque = deque()  # one future per waiting task, FIFO
+        self._in_use: set = set()
+        self._created = 0
+        self._wait_times = deque(maxlen=wait_samples)
+        self._counters = Counter()
     
-    def get_connection(self) -> Optional[DatabaseMock]:
+    async def get_connection(self, timeout: Optional[float] = _MISSING) -> Optional[AsyncDatabaseMock]:
         """
-        Get a database connection.
+        Get a connection, waiting for one if the pool is exhausted.
         
-        Returns:
-            DatabaseMock or None: Database connection or None if pool is full
+        Args:
+            timeout (float, optional): Seconds to wait; 0 does not wait, None
+                waits indefinitely, default is the pool's timeout
             
-        TODO: Implement this method
+        Returns:
+            AsyncDatabaseMock or None: Connection, or None on timeout
         """
-        pass
+        timeout = self.timeout if timeout is _MISSING else timeout
+        started = time.monotonic()
+        if not self._waiters and self._idle:
+            connection = self._idle.popleft()
+        elif not self._waiters and self._created < self.max_connections:
+            self._created += 1
+            self._counters['created'] += 1
+            connection = AsyncDatabaseMock(self.database_mock)
+        else:
+            self._counters['exhausted'] += 1
+            if timeout is not None and timeout <= 0:
+                self._counters['timeouts'] += 1
+                return None
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                connection = await asyncio.wait_for(waiter, timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+                if waiter.done() and not waiter.cancelled():
+                    # Handed a connection as the wait ended: pass it on
+                    self._in_use.discard(waiter.result())
+                    self._hand_off(waiter.result())
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                if isinstance(error, asyncio.CancelledError):
+                    raise
+                self._counters['timeouts'] += 1
+                return None
+        self._wait_times.append(time.monotonic() - started)
+        self._in_use.add(connection)
+        self._counters['acquired'] += 1
+        return connection
     
-    def release_connection(self, connection: DatabaseMock) -> bool:
+    async def release_connection(self, connection: AsyncDatabaseMock) -> bool:
         """
-        Release a database connection back to the pool.
+        Return a connection to the pool, rolling back any open transaction.
         
         Args:
-            connection (DatabaseMock): Connection to release
+            connection (AsyncDatabaseMock): Connection from get_connection
             
         Returns:
-            bool: True if successful
+            bool: False if the connection is not checked out from this pool
+        """
+        if connection not in self._in_use:
+            return False
+        self._in_use.discard(connection)
+        if connection.transaction is not None:
+            connection.transaction.rollback()
+            connection.transaction = None
+        self._hand_off(connection)
+        return True
+    
+    def _hand_off(self, connection: AsyncDatabaseMock) -> None:
+        """Give a free connection to the head waiter, or make it idle."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_use.add(connection)
+                waiter.set_result(connection)
+                return
+        self._idle.append(connection)
+    
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[float] = _MISSING) -> AsyncIterator[AsyncDatabaseMock]:
+        """
+        Borrow a connection for the duration of an async with block.
+        
+        Args:
+            timeout (float, optional): Seconds to wait, as for get_connection
             
-        TODO: Implement this method
+        Yields:
+            AsyncDatabaseMock: The borrowed connection
+            
+        Raises:
+            PoolTimeout: If no connection became available in time
         """
-        pass
+        connection = await self.get_connection(timeout)
+        if connection is None:
+            raise PoolTimeout("Timed out waiting for a database connection")
+        try:
+            yield connection
+        finally:
+            await self.release_connection(connection)
     
     def get_pool_stats(self) -> Dict[str, Any]:
         """
-        Get connection pool statistics.
+        Get pool usage statistics.
         
         Returns:
-            dict: Pool statistics
-            
-        TODO: Implement this method
+            dict: Connection counts, acquisition counters and wait-time
+                percentiles in milliseconds
         """
-        pass
+        waits = sorted(self._wait_times)
+        
+        def percentile(fraction):
+            return waits[min(len(waits) - 1, int(fraction * len(waits)))] * 1000 if waits else 0.0
+        
+        return {
+            'max_connections': self.max_connections,
+            'created_connections': self._created,
+            'active_connections': len(self._in_use),
+            'idle_connections': len(self._idle),
+            'acquired': self._counters['acquired'],
+            'exhausted': self._counters['exhausted'],
+            'timeouts': self._counters['timeouts'],
+            'wait_p50_ms': percentile(0.50),
+            'wait_p99_ms': percentile(0.99)
+        }
 
 class DatabaseTestHelper:
     """
@@ -496,6 +5176,643 @@ def create_sample_schemas() -> Dict[str, Dict[str, Any]]:
     """
     pass
 
+def benchmark_indexed_select(row_count: int = 500_000, lookups: int = 200,
+                             seed: int = 42) -> Dict[str, float]:
+    """
+    Compare full-table scans with hash and sorted index lookups.
+    
+    Args:
+        row_count (int): Number of rows in the benchmark table
+        lookups (int): Number of queries per strategy
+        seed (int): Random seed for reproducible data
+        
+    Returns:
+        dict: Per-query timings in ms for scans and index lookups, and speedups
+    """
+    rng = random.Random(seed)
+    db = DatabaseMock()
+    db.tables["users"] = []
+    for user_id in range(row_count):
+        db._store_row("users", {"id": user_id, "email": f"user{user_id}@example.com",
+                                "age": rng.randint(18, 90)})
+    emails = [f"user{rng.randrange(row_count)}@example.com" for _ in range(lookups)]
+    ages = [rng.randint(18, 88) for _ in range(lookups)]
+    
+    def time_queries(conditions_list):
+        started = time.perf_counter()
+        hits = sum(len(db.find_rows("users", conditions)) for conditions in conditions_list)
+        return (time.perf_counter() - started) * 1000 / len(conditions_list), hits
+    
+    equality = [{"email": email} for email in emails]
+    ranges = [{"age": {">=": age, "<": age + 2}} for age in ages]
+    # Scans are slow enough that a tenth of the queries gives a stable mean
+    sample = max(1, lookups // 10)
+    scan_equality_ms, _ = time_queries(equality[:sample])
+    scan_range_ms, scan_range_hits = time_queries(ranges[:sample])
+    
+    started = time.perf_counter()
+    db.create_index("users", "email", "hash")
+    db.create_index("users", "age", "sorted")
+    build_ms = (time.perf_counter() - started) * 1000
+    hash_ms, _ = time_queries(equality)
+    sorted_ms, _ = time_queries(ranges)
+    
+    if time_queries(ranges[:sample])[1] != scan_range_hits:
+        raise AssertionError("indexed and scanned results disagree")
+    
+    return {
+        'rows': row_count,
+        'index_build_ms': build_ms,
+        'scan_equality_ms': scan_equality_ms,
+        'hash_equality_ms': hash_ms,
+        'scan_range_ms': scan_range_ms,
+        'sorted_range_ms': sorted_ms,
+        'equality_speedup': scan_equality_ms / hash_ms if hash_ms else float('inf'),
+        'range_speedup': scan_range_ms / sorted_ms if sorted_ms else float('inf')
+    }
+
+def benchmark_columnar_storage(row_count: int = 1_000_000, seed: int = 42) -> Dict[str, float]:
+    """
+    Compare memory use and aggregate speed of row and columnar storage.
+    
+    Memory is measured with tracemalloc while each table is loaded, so it
+    covers everything the storage keeps alive.
+    
+    Args:
+        row_count (int): Number of rows per table
+        seed (int): Random seed for reproducible data
+        
+    Returns:
+        dict: Bytes per row and aggregate timings in ms for both engines
+    """
+    schema = {"id": {"type": "int"}, "name": {"type": "str"}, "city": {"type": "str"},
+              "age": {"type": "int"}, "score": {"type": "float"}, "active": {"type": "bool"}}
+    first_names = ["Ana", "Ben", "Chloe", "Dev", "Eli", "Fay", "Gus", "Hana"]
+    cities = [f"City{i}" for i in range(50)]
+    
+    def rows():
+        rng = random.Random(seed)
+        for row_id in range(row_count):
+            yield {"id": row_id, "name": f"{rng.choice(first_names)} {row_id}",
+                   "city": rng.choice(cities), "age": rng.randint(18, 90),
+                   "score": rng.random() * 100, "active": rng.random() < 0.7}
+    
+    db = DatabaseMock()
+    results = {'rows': row_count}
+    for storage in ("row", "columnar"):
+        tracemalloc.start()
+        db._create_storage(storage, schema, storage)
+        for row in rows():
+            db._store_row(storage, row)
+        results[f'{storage}_bytes_per_row'] = tracemalloc.get_traced_memory()[0] / row_count
+        tracemalloc.stop()
+        
+        started = time.perf_counter()
+        average = db.aggregate(storage, "age", "avg", {"active": True, "city": "City7"})
+        total = db.aggregate(storage, "score", "sum")
+        results[f'{storage}_aggregate_ms'] = (time.perf_counter() - started) * 1000
+        results[f'{storage}_result'] = (average, round(total, 6))
+    
+    if results['row_result'] != results['columnar_result']:
+        raise AssertionError("row and columnar aggregates disagree")
+    del results['row_result'], results['columnar_result']
+    results['memory_ratio'] = results['row_bytes_per_row'] / results['columnar_bytes_per_row']
+    results['aggregate_speedup'] = results['row_aggregate_ms'] / results['columnar_aggregate_ms']
+    return results
+
+def benchmark_mvcc_rollback(row_count: int = 100_000, changed_rows: int = 100,
+                            repeats: int = 5) -> Dict[str, float]:
+    """
+    Compare copy-based rollback with MVCC rollback.
+    
+    Each round opens a transaction, updates `changed_rows` rows and rolls
+    back. The copy-based baseline deep-copies the table at begin and
+    restores it on rollback, which is what a mock without versioning has
+    to do.
+    
+    Args:
+        row_count (int): Rows in the table
+        changed_rows (int): Rows updated per transaction
+        repeats (int): Transactions per strategy
+        
+    Returns:
+        dict: Mean per-transaction timings in ms and the speedup
+    """
+    schema = {"id": {"type": "int"}, "balance": {"type": "int"}}
+    db = DatabaseMock()
+    db._create_storage("copied", schema)
+    db._create_storage("versioned", schema, storage="mvcc")
+    for row_id in range(row_count):
+        db._store_row("copied", {"id": row_id, "balance": 100})
+        db._store_row("versioned", {"id": row_id, "balance": 100})
+    changed = {"id": {"<": changed_rows}}
+    
+    started = time.perf_counter()
+    for _ in range(repeats):
+        backup = copy.deepcopy(db.tables["copied"])
+        db._update_rows("copied", changed, {"balance": 0})
+        db.tables["copied"] = backup
+    copy_ms = (time.perf_counter() - started) * 1000 / repeats
+    
+    started = time.perf_counter()
+    for _ in range(repeats):
+        db.current_transaction = db.begin_snapshot()
+        db._update_rows("versioned", changed, {"balance": 0})
+        db.current_transaction.rollback()
+        db.current_transaction = None
+    mvcc_ms = (time.perf_counter() - started) * 1000 / repeats
+    
+    if db.aggregate("versioned", "balance", "sum") != db.aggregate("copied", "balance", "sum"):
+        raise AssertionError("rollback strategies disagree")
+    reclaimed = db.vacuum()
+    
+    return {
+        'rows': row_count,
+        'copy_rollback_ms': copy_ms,
+        'mvcc_rollback_ms': mvcc_ms,
+        'speedup': copy_ms / mvcc_ms if mvcc_ms else float('inf'),
+        'versions_reclaimed': reclaimed
+    }
+
+def benchmark_connection_pool(threads: int = 64, operations_per_thread: int = 100,
+                              max_connections: int = 8, hold_ms: float = 1.0) -> Dict[str, Any]:
+    """
+    Hammer a BlockingConnectionPool from many threads.
+    
+    Each operation acquires a connection, holds it for `hold_ms` (standing
+    in for query time) and releases it.
+    
+    Args:
+        threads (int): Concurrent worker threads
+        operations_per_thread (int): Acquisitions per thread
+        max_connections (int): Pool size
+        hold_ms (float): Time each connection is held
+        
+    Returns:
+        dict: Throughput against the pool's theoretical maximum, and the
+            pool's statistics
+    """
+    pool = BlockingConnectionPool(DatabaseMock(), max_connections=max_connections, timeout=None)
+    completed = [0] * threads
+    errors = []
+    start = threading.Barrier(threads + 1)
+    
+    def worker(index):
+        start.wait()
+        try:
+            for _ in range(operations_per_thread):
+                with pool.connection() as connection:
+                    if connection.connection_id > max_connections:
+                        raise AssertionError("pool exceeded max_connections")
+                    time.sleep(hold_ms / 1000)
+                completed[index] += 1
+        except Exception as error:
+            errors.append(error)
+    
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+    
+    stats = pool.get_pool_stats()
+    return {
+        'threads': threads,
+        'operations': threads * operations_per_thread,
+        'ops_per_sec': threads * operations_per_thread / elapsed,
+        'ideal_ops_per_sec': max_connections * 1000 / hold_ms,
+        'pool_stats': stats
+    }
+
+def benchmark_sql_plan_cache(row_count: int = 10_000, executions: int = 5_000) -> Dict[str, float]:
+    """
+    Compare parsing a statement on every call with the compiled plan cache.
+    
+    Args:
+        row_count (int): Rows in the indexed users table
+        executions (int): Statements parsed and executed per measurement
+        
+    Returns:
+        dict: Per-statement parse, cache lookup and end-to-end times in
+            microseconds
+    """
+    db = DatabaseMock()
+    db._create_storage('users', {'id': {'type': 'int'}, 'name': {'type': 'str'}, 'email': {'type': 'str'}})
+    for i in range(row_count):
+        db._store_row('users', {'id': i, 'name': f'user{i}', 'email': f'user{i}@example.com'})
+    db.create_index('users', 'id')
+    query = 'SELECT name, email FROM users WHERE id = ?'
+    
+    started = time.perf_counter()
+    for _ in range(executions):
+        compile_sql.__wrapped__(query)
+    parse_us = (time.perf_counter() - started) * 1e6 / executions
+    
+    compile_sql(query)
+    started = time.perf_counter()
+    for _ in range(executions):
+        compile_sql(query)
+    cached_us = (time.perf_counter() - started) * 1e6 / executions
+    
+    started = time.perf_counter()
+    for i in range(executions):
+        result = db.execute_sql(query, [i % row_count])
+        if result.rows_affected != 1:
+            raise AssertionError(f"expected one row for id {i % row_count}")
+    execute_us = (time.perf_counter() - started) * 1e6 / executions
+    
+    return {
+        'parse_us': parse_us,
+        'cached_lookup_us': cached_us,
+        'cached_execute_us': execute_us,
+        'parse_speedup': parse_us / cached_us
+    }
+
+def benchmark_persistence(row_count: int = 1_000_000, wal_tail: int = 1_000) -> Dict[str, Any]:
+    """
+    Compare seeding a table row by row with loading it from a snapshot.
+    
+    Builds the same users table with row and columnar storage, checkpoints
+    each, appends `wal_tail` logged inserts, and reopens the directory in a
+    fresh DatabaseMock.
+    
+    Args:
+        row_count (int): Rows in the fixture table
+        wal_tail (int): Inserts logged after the checkpoint
+        
+    Returns:
+        dict: Seed, checkpoint and load times in milliseconds per storage
+            engine, and the snapshot size
+    """
+    schema = {'id': {'type': 'int'}, 'name': {'type': 'str'}, 'email': {'type': 'str'},
+              'age': {'type': 'int'}, 'active': {'type': 'bool'}}
+    rows = [{'id': i, 'name': f'user{i}', 'email': f'user{i}@example.com',
+             'age': 20 + i % 50, 'active': i % 3 != 0} for i in range(row_count)]
+    results: Dict[str, Any] = {'rows': row_count, 'wal_tail': wal_tail}
+    
+    for storage in ('row', 'columnar'):
+        with tempfile.TemporaryDirectory() as directory:
+            db = DatabaseMock()
+            started = time.perf_counter()
+            db._create_storage('users', schema, storage)
+            for row in rows:
+                db._store_row('users', dict(row))
+            results[f'{storage}_seed_ms'] = (time.perf_counter() - started) * 1000
+            
+            started = time.perf_counter()
+            db.enable_persistence(directory, checkpoint_every=0)
+            results[f'{storage}_checkpoint_ms'] = (time.perf_counter() - started) * 1000
+            results[f'{storage}_snapshot_bytes'] = os.path.getsize(db.persistence.snapshot_path)
+            for i in range(row_count, row_count + wal_tail):
+                db._store_row('users', {'id': i, 'name': f'user{i}', 'email': f'user{i}@example.com',
+                                        'age': 20, 'active': True})
+            db.disable_persistence(checkpoint=False)
+            
+            reopened = DatabaseMock()
+            loaded = reopened.enable_persistence(directory)
+            results[f'{storage}_load_ms'] = loaded['load_ms']
+            reopened.disable_persistence(checkpoint=False)
+            if len(reopened.tables['users']) != row_count + wal_tail:
+                raise AssertionError("reloaded table is missing rows")
+    return results
+
+def benchmark_bulk_insert(row_count: int = 100_000, storage: str = "row") -> Dict[str, float]:
+    """
+    Compare inserting a batch row by row with bulk_insert.
+    
+    The row-by-row path runs what insert_many does per record: validation,
+    failure and latency simulation, _store_row and a query_log entry. The
+    table has a primary key and a unique email column, both hash-indexed
+    for row storage.
+    
+    Args:
+        row_count (int): Rows per batch
+        storage (str): Storage engine of the table
+        
+    Returns:
+        dict: Rows per second for each path and the speedup
+    """
+    schema = {
+        'id': {'type': 'int', 'primary_key': True, 'auto_increment': True},
+        'name': {'type': 'str', 'nullable': False, 'max_length': 100},
+        'email': {'type': 'str', 'unique': True},
+        'age': {'type': 'int'},
+        'active': {'type': 'bool'}
+    }
+    rows = [{'id': i, 'name': f'user{i}', 'email': f'user{i}@example.com',
+             'age': 20 + i % 50, 'active': i % 3 != 0} for i in range(1, row_count + 1)]
+    
+    def fresh_database():
+        db = DatabaseMock()
+        db._create_storage('users', schema, storage)
+        if storage == 'row':
+            db.create_index('users', 'id')
+            db.create_index('users', 'email')
+        return db
+    
+    db = fresh_database()
+    started = time.perf_counter()
+    for row in rows:
+        row_started = time.perf_counter()
+        if db.validate_batch('users', [row]) or db.simulate_failure():
+            raise AssertionError(f"row {row['id']} rejected")
+        db.simulate_latency()
+        db._store_row('users', dict(row))
+        db.query_log.append({'timestamp': datetime.now().isoformat(),
+                             'query_type': QueryType.INSERT.value, 'table': 'users',
+                             'rows_affected': 1,
+                             'execution_time_ms': (time.perf_counter() - row_started) * 1000})
+    per_row_seconds = time.perf_counter() - started
+    
+    db = fresh_database()
+    started = time.perf_counter()
+    result = db.bulk_insert('users', rows)
+    bulk_seconds = time.perf_counter() - started
+    if not result.success:
+        raise AssertionError(result.error_message)
+    
+    return {
+        'rows': row_count,
+        'per_row_rows_per_sec': row_count / per_row_seconds,
+        'bulk_rows_per_sec': row_count / bulk_seconds,
+        'speedup': per_row_seconds / bulk_seconds
+    }
+
+def benchmark_query_log(entries: int = 500_000, capacity: int = 10_000,
+                        sample_rate: float = 0.1) -> Dict[str, float]:
+    """
+    Compare an unbounded list query log with a sampled QueryLog ring.
+    
+    Memory is what each log still holds after `entries` queries, measured
+    with tracemalloc; time is per logged query.
+    
+    Args:
+        entries (int): Queries logged
+        capacity (int): Ring capacity
+        sample_rate (float): Ring sample rate
+        
+    Returns:
+        dict: Retained megabytes and per-entry microseconds for both logs,
+            and the time to read the newest 100 entries from the ring
+    """
+    query_types = [query_type.value for query_type in QueryType]
+    
+    def fill(log):
+        for i in range(entries):
+            log.append({'timestamp': datetime.now().isoformat(),
+                        'query_type': query_types[i % 4], 'table': 'users',
+                        'rows_affected': 1, 'execution_time_ms': (i % 97) / 10})
+    
+    results: Dict[str, float] = {'entries': entries}
+    for name, make_log in (('list', list), ('ring', lambda: QueryLog(capacity, sample_rate))):
+        tracemalloc.start()
+        log = make_log()
+        fill(log)
+        results[f'{name}_mb'] = tracemalloc.get_traced_memory()[0] / 2 ** 20
+        tracemalloc.stop()
+        del log
+        
+        log = make_log()
+        started = time.perf_counter()
+        fill(log)
+        results[f'{name}_append_us'] = (time.perf_counter() - started) * 1e6 / entries
+    
+    started = time.perf_counter()
+    newest = log.recent(100)
+    results['ring_recent_100_us'] = (time.perf_counter() - started) * 1e6
+    if len(newest) != min(100, len(log)):
+        raise AssertionError("recent() returned the wrong number of entries")
+    results['memory_ratio'] = results['list_mb'] / results['ring_mb']
+    return results
+
+def benchmark_async_latency(requests: int = 2_000, latency_ms: float = 10.0,
+                            max_connections: int = 100) -> Dict[str, float]:
+    """
+    Measure how simulated latency overlaps under asyncio.
+    
+    Runs `requests` concurrent selects through one AsyncDatabaseMock and
+    through an AsyncConnectionPool, and compares their wall time with the
+    time the same latency costs when the calls run one after another.
+    
+    Args:
+        requests (int): Concurrent selects
+        latency_ms (float): Simulated latency per call
+        max_connections (int): Pool size
+        
+    Returns:
+        dict: Serial, gathered and pooled wall times in milliseconds, the
+            overlap factor and pooled throughput in requests per second
+    """
+    db = DatabaseMock()
+    db._create_storage('users', {'id': {'type': 'int', 'primary_key': True}})
+    db.create_index('users', 'id')
+    db._store_rows('users', [{'id': i} for i in range(1_000)])
+    db.latency_simulation = latency_ms
+    facade = AsyncDatabaseMock(db)
+    pool = AsyncConnectionPool(db, max_connections=max_connections)
+    
+    async def pooled(user_id):
+        async with pool.connection() as connection:
+            return await connection.select('users', {'id': user_id})
+    
+    async def run(make_call):
+        started = time.perf_counter()
+        results = await asyncio.gather(*(make_call(i % 1_000) for i in range(requests)))
+        if not all(result.success and result.rows_affected == 1 for result in results):
+            raise AssertionError("a concurrent select failed")
+        return (time.perf_counter() - started) * 1000
+    
+    gathered_ms = asyncio.run(run(lambda user_id: facade.select('users', {'id': user_id})))
+    pooled_ms = asyncio.run(run(pooled))
+    serial_ms = requests * latency_ms
+    return {
+        'requests': requests,
+        'serial_ms': serial_ms,
+        'gathered_ms': gathered_ms,
+        'pooled_ms': pooled_ms,
+        'overlap_factor': serial_ms / gathered_ms,
+        'pooled_rps': requests / pooled_ms * 1000
+    }
+
+def benchmark_sharded_writes(thread_counts: Tuple[int, ...] = (1, 2, 4, 8),
+                             operations_per_thread: int = 500, shard_count: int = 16,
+                             hold_ms: float = 0.2, row_count: int = 10_000) -> Dict[str, Any]:
+    """
+    Compare write throughput under one global lock and per-shard locks.
+    
+    Each operation is a read-modify-write of one random row by primary
+    key, done while holding the lock and sleeping hold_ms inside it to
+    stand in for I/O such as a log write. With the global lock the
+    operations run one at a time; with sharded storage they only queue
+    behind operations on the same shard. With hold_ms=0 the work is pure
+    Python and the GIL, not the locks, bounds throughput.
+    
+    Args:
+        thread_counts (tuple): Writer thread counts to measure
+        operations_per_thread (int): Operations each thread performs
+        shard_count (int): Shards of the sharded table
+        hold_ms (float): Simulated I/O time inside each critical section
+        row_count (int): Rows in the table
+        
+    Returns:
+        dict: Operations per second for each mode and thread count, and
+            the sharded/global ratio per thread count
+    """
+    schema = {'id': {'type': 'int', 'primary_key': True}, 'balance': {'type': 'int'}}
+    hold = hold_ms / 1000
+    results: Dict[str, Any] = {'shard_count': shard_count, 'hold_ms': hold_ms}
+    
+    for threads in thread_counts:
+        for mode in ('global', 'sharded'):
+            db = DatabaseMock()
+            db.shard_count = shard_count
+            db._create_storage('accounts', schema, 'row' if mode == 'global' else 'sharded')
+            db._store_rows('accounts', [{'id': i, 'balance': 0} for i in range(row_count)])
+            if mode == 'global':
+                db.create_index('accounts', 'id')
+                global_lock = threading.Lock()
+                lock_for = lambda key: global_lock
+            else:
+                lock_for = lambda key: db.tables['accounts'].shard_for(key).lock
+            
+            def writer(seed):
+                rng = random.Random(seed)
+                for _ in range(operations_per_thread):
+                    key = rng.randrange(row_count)
+                    with lock_for(key):
+                        balance = db.find_rows('accounts', {'id': key})[0]['balance']
+                        if hold:
+                            time.sleep(hold)
+                        db._update_rows('accounts', {'id': key}, {'balance': balance + 1})
+            
+            workers = [threading.Thread(target=writer, args=(seed,)) for seed in range(threads)]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+            if db.aggregate('accounts', 'balance', 'sum') != threads * operations_per_thread:
+                raise AssertionError(f"{mode} storage lost updates")
+            results[f'{mode}_{threads}_ops_per_sec'] = threads * operations_per_thread / elapsed
+        results[f'speedup_{threads}'] = (results[f'sharded_{threads}_ops_per_sec'] /
+                                         results[f'global_{threads}_ops_per_sec'])
+    return results
+
+def benchmark_cursor_scan(row_count: int = 1_000_000, batch_size: int = 1_000) -> Dict[str, float]:
+    """
+    Compare a materialized scan with a cursor scan of the same rows.
+    
+    The materialized scan copies every matching row into one list, as a
+    select returning all its data would; the cursor scan fetches batches
+    with fetchmany. Peak memory is measured with tracemalloc, which also
+    slows both scans, so times are measured in separate runs.
+    
+    Args:
+        row_count (int): Rows in the table
+        batch_size (int): fetchmany batch size
+        
+    Returns:
+        dict: Peak megabytes and milliseconds for both scans, and the time
+            to open a cursor with LIMIT 10 and fetch its rows, with and
+            without order_by
+    """
+    db = DatabaseMock()
+    db._create_storage('users', {'id': {'type': 'int'}, 'age': {'type': 'int'},
+                                 'email': {'type': 'str'}})
+    db._store_rows('users', [{'id': i, 'age': 20 + i % 50, 'email': f'user{i}@example.com'}
+                             for i in range(row_count)])
+    conditions = {'age': {'>=': 20}}
+    
+    def materialized():
+        return sum(len(row) for row in [dict(row) for row in db.find_rows('users', conditions)])
+    
+    def cursor_scan():
+        total = 0
+        with db.cursor('users', conditions, arraysize=batch_size) as cursor:
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    return total
+                total += sum(map(len, rows))
+    
+    results: Dict[str, float] = {'rows': row_count}
+    for name, scan in (('materialized', materialized), ('cursor', cursor_scan)):
+        gc.collect()
+        tracemalloc.start()
+        scanned = scan()
+        results[f'{name}_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        if scanned != 3 * row_count:
+            raise AssertionError(f"{name} scan returned the wrong rows")
+        started = time.perf_counter()
+        scan()
+        results[f'{name}_ms'] = (time.perf_counter() - started) * 1000
+    
+    for name, order_by in (('limit_10_ms', None), ('ordered_limit_10_ms', 'age DESC')):
+        started = time.perf_counter()
+        with db.cursor('users', conditions, limit=10, offset=5, order_by=order_by) as cursor:
+            if len(cursor.fetchall()) != 10:
+                raise AssertionError("LIMIT returned the wrong number of rows")
+        results[name] = (time.perf_counter() - started) * 1000
+    results['memory_ratio'] = results['materialized_peak_mb'] / results['cursor_peak_mb']
+    return results
+
+def benchmark_fault_injection(calls: int = 1_000_000, tables: int = 20) -> Dict[str, float]:
+    """
+    Measure the per-call cost of choosing a simulated latency and failure.
+    
+    Compares profile-driven injection (per-table log-normal latency and a
+    bursty failure profile, resolved from precomputed buffers) with
+    drawing the same distributions with random on every call, and with an
+    empty loop. Nothing sleeps: only the decision is timed.
+    
+    Args:
+        calls (int): Calls to simulate
+        tables (int): Distinct tables the calls are spread over
+        
+    Returns:
+        dict: Nanoseconds per call for each approach, and the p50/p99 of
+            the injected latencies against the profile's target median
+    """
+    db = DatabaseMock()
+    names = [f'table{i}' for i in range(tables)]
+    for i, name in enumerate(names):
+        db.set_latency_profile(LatencyProfile.lognormal(2.0, 1.0, seed=i), name)
+    db.set_failure_profile(FailureProfile.bursty(0.01, 5, seed=0))
+    select = QueryType.SELECT
+    targets = [names[i % tables] for i in range(calls)]
+    mu = math.log(2.0)
+    
+    def profiled():
+        sample, fail = db.sample_latency_ms, db.inject_failure
+        return [sample(name, select) for name in targets if not fail(name, select)]
+    
+    def drawn():
+        lognormvariate, draw = random.lognormvariate, random.random
+        return [lognormvariate(mu, 1.0) for name in targets if not draw() < 0.01]
+    
+    def empty():
+        return [0.0 for name in targets]
+    
+    results: Dict[str, float] = {'calls': calls}
+    for name, run in (('profile', profiled), ('random', drawn), ('empty', empty)):
+        started = time.perf_counter()
+        latencies = run()
+        results[f'{name}_ns'] = (time.perf_counter() - started) * 1e9 / calls
+        if name == 'profile':
+            latencies.sort()
+            results['profile_p50_ms'] = latencies[len(latencies) // 2]
+            results['profile_p99_ms'] = latencies[int(len(latencies) * 0.99)]
+            results['failed_fraction'] = 1 - len(latencies) / calls
+    results['profile_overhead_ns'] = results['profile_ns'] - results['empty_ns']
+    return results
+
 # Test cases and demonstrations
 if __name__ == "__main__":
     print("=== Database Mock Exercise ===\n")
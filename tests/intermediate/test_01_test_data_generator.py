@@ -13,7 +13,7 @@ from datetime import datetime
 try:
     from _01_test_data_generator import (
         GenerationConfig, TestDataGenerator, DataType,
-        validate_generated_data, create_test_scenarios
+        validate_generated_data, create_test_scenarios, benchmark_batch_generation
     )
 except ImportError:
     # Alternative import method
@@ -32,6 +32,7 @@ except ImportError:
         DataType = test_data_generator.DataType
         validate_generated_data = test_data_generator.validate_generated_data
         create_test_scenarios = test_data_generator.create_test_scenarios
+        benchmark_batch_generation = test_data_generator.benchmark_batch_generation
     except:
         pytest.skip("Could not import test data generator module")
 
@@ -561,6 +562,87 @@ class TestErrorHandling:
         # Don't require exact count for very large numbers
         assert len(dataset) > 0
 
+class TestBatchGeneration:
+    """Test column-at-a-time batch generation."""
+    
+    @pytest.fixture
+    def generator(self):
+        return TestDataGenerator(GenerationConfig(seed=42))
+    
+    def test_generate_batch_user_records(self, generator):
+        """Test that batch users have the expected fields and formats."""
+        users = generator.generate_batch(DataType.USER, 500)
+        
+        assert len(users) == 500
+        for user in users:
+            assert set(user) == {"id", "first_name", "last_name", "email", "phone",
+                                 "date_of_birth", "is_active"}
+            assert user["email"].startswith(f"{user['first_name'].lower()}.{user['last_name'].lower()}")
+            assert "@" in user["email"]
+            area, exchange, line = user["phone"].split("-")
+            assert len(area) == len(exchange) == 3 and len(line) == 4
+            assert area[0] not in "01" and exchange[0] not in "01"
+            assert "1950-01-01" <= user["date_of_birth"] <= "2005-12-31"
+            datetime.strptime(user["date_of_birth"], "%Y-%m-%d")
+            assert isinstance(user["is_active"], bool)
+    
+    @pytest.mark.parametrize("data_type", list(DataType))
+    def test_generate_batch_all_types(self, generator, data_type):
+        """Test that every data type generates complete records."""
+        records = generator.generate_batch(data_type, 50)
+        
+        assert len(records) == 50
+        assert all(record.keys() == records[0].keys() for record in records)
+        assert all(value is not None for record in records for value in record.values())
+    
+    def test_generate_batch_financial_digits(self, generator):
+        """Test digit-string fields of financial records."""
+        for record in generator.generate_batch(DataType.FINANCIAL, 200):
+            assert record["account_number"].isdigit() and len(record["account_number"]) == 10
+            assert record["card_number"].startswith("4000") and len(record["card_number"]) == 16
+            assert record["card_number"].isdigit()
+    
+    def test_generate_batch_ids_continue(self, generator):
+        """Test that ids are sequential across batches."""
+        first = generator.generate_batch(DataType.PRODUCT, 3)
+        second = generator.generate_batch(DataType.ORDER, 2)
+        
+        assert [record["id"] for record in first + second] == [1, 2, 3, 4, 5]
+    
+    def test_generate_batch_reproducible(self):
+        """Test that seeded generators produce the same batches."""
+        batch1 = TestDataGenerator(GenerationConfig(seed=7)).generate_batch(DataType.USER, 100)
+        batch2 = TestDataGenerator(GenerationConfig(seed=7)).generate_batch(DataType.USER, 100)
+        
+        assert batch1 == batch2
+    
+    def test_generate_batch_include_invalid(self, generator):
+        """Test that about one record in ten is made invalid."""
+        users = generator.generate_batch(DataType.USER, 1000, include_invalid=True)
+        products = generator.generate_batch(DataType.PRODUCT, 10, include_invalid=True)
+        
+        assert sum("@" not in user["email"] for user in users) == 100
+        assert sum(product["price"] < 0 for product in products) == 1
+    
+    def test_generate_batch_as_columns(self, generator):
+        """Test the column-oriented result."""
+        columns = generator.generate_batch(DataType.ADDRESS, 20, as_columns=True)
+        
+        assert list(columns) == ["id", "street", "city", "state", "zip_code"]
+        assert all(len(values) == 20 for values in columns.values())
+        assert all(len(zip_code) == 5 and zip_code.isdigit() for zip_code in columns["zip_code"])
+    
+    def test_generate_batch_empty(self, generator):
+        """Test that a zero or negative count yields no records."""
+        assert generator.generate_batch(DataType.USER, 0) == []
+        assert generator.generate_batch(DataType.USER, -5) == []
+        assert generator.generate_batch(DataType.COMPANY, 0, as_columns=True)["name"] == []
+    
+    def test_generate_batch_invalid_type(self, generator):
+        """Test that an unknown data type is rejected."""
+        with pytest.raises(ValueError):
+            generator.generate_batch("user", 10)
+
 class TestPerformance:
     """Test performance characteristics."""
     
@@ -588,6 +670,15 @@ class TestPerformance:
             
             assert len(dataset) == 100
             assert all(isinstance(item, dict) for item in dataset)
+    
+    @pytest.mark.slow
+    def test_batch_generation_benchmark(self):
+        """Test that batch generation outpaces per-record generation."""
+        results = benchmark_batch_generation(n=50_000)
+        
+        assert results["rows"] == 50_000
+        assert results["batch_speedup"] > 1
+        assert results["columns_speedup"] > results["batch_speedup"]
 
 class TestIntegrationScenarios:
     """Test complete integration scenarios."""
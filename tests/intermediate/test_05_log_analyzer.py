@@ -0,0 +1,1055 @@
+"""
+Tests for Exercise 5: Log File Analyzer (Intermediate)
+"""
+
+import pytest
+from unittest.mock import patch, Mock
+import sys
+import os
+import re
+import bz2
+import gzip
+import lzma
+import random
+import multiprocessing
+from collections import Counter
+from datetime import datetime, timedelta
+
+# Import the exercise module
+try:
+    from _05_log_analyzer import (
+        LogLevel, LogEntry, LogAnalyzer, PerformanceAnalyzer,
+        ColumnarLogStore, LogEntryView, TimeIndex, benchmark_time_index,
+        _newline_aligned_ranges, PatternEngine, benchmark_pattern_engine,
+        _required_literal, _benchmark_log_lines, RollingLogStatistics,
+        RunningStats, EwmaStats, StreamingAnomalyDetector,
+        SpaceSavingCounter, LatencyHistogram, SecurityScanner, _importable_by_workers
+    )
+except ImportError:
+    # Alternative import method
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '2-intermediate-exercises'))
+    try:
+        import importlib.util
+        spec = importlib.util.spec_from_file_location(
+            "log_analyzer",
+            os.path.join(os.path.dirname(__file__), '..', '..', '2-intermediate-exercises', '05_log_analyzer.py')
+        )
+        log_analyzer = importlib.util.module_from_spec(spec)
+        # Registered so worker processes can unpickle the analyzer class
+        sys.modules[spec.name] = log_analyzer
+        spec.loader.exec_module(log_analyzer)
+        
+        LogLevel = log_analyzer.LogLevel
+        LogEntry = log_analyzer.LogEntry
+        LogAnalyzer = log_analyzer.LogAnalyzer
+        PerformanceAnalyzer = log_analyzer.PerformanceAnalyzer
+        ColumnarLogStore = log_analyzer.ColumnarLogStore
+        LogEntryView = log_analyzer.LogEntryView
+        TimeIndex = log_analyzer.TimeIndex
+        benchmark_time_index = log_analyzer.benchmark_time_index
+        _newline_aligned_ranges = log_analyzer._newline_aligned_ranges
+        PatternEngine = log_analyzer.PatternEngine
+        benchmark_pattern_engine = log_analyzer.benchmark_pattern_engine
+        _required_literal = log_analyzer._required_literal
+        _benchmark_log_lines = log_analyzer._benchmark_log_lines
+        RollingLogStatistics = log_analyzer.RollingLogStatistics
+        RunningStats = log_analyzer.RunningStats
+        EwmaStats = log_analyzer.EwmaStats
+        StreamingAnomalyDetector = log_analyzer.StreamingAnomalyDetector
+        SpaceSavingCounter = log_analyzer.SpaceSavingCounter
+        LatencyHistogram = log_analyzer.LatencyHistogram
+        SecurityScanner = log_analyzer.SecurityScanner
+        _importable_by_workers = log_analyzer._importable_by_workers
+    except:
+        pytest.skip("Could not import log analyzer module")
+
+LINE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) (\w+) \[([^\]]*)\] (.*)$')
+
+def simple_parse_log_line(self, line, log_format="standard"):
+    """Minimal stand-in for the parse_log_line exercise."""
+    match = LINE_PATTERN.match(line)
+    if not match:
+        return None
+    timestamp, level, source, message = match.groups()
+    return LogEntry(
+        timestamp=datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S"),
+        level=LogLevel(level),
+        message=message,
+        source=source,
+        raw_line=line
+    )
+
+def make_log_lines(count, start=datetime(2024, 1, 15, 10, 0, 0), step_seconds=1):
+    """Build standard-format log lines with a rotating level."""
+    levels = ["INFO", "DEBUG", "ERROR", "WARNING"]
+    lines = []
+    for i in range(count):
+        timestamp = (start + timedelta(seconds=i * step_seconds)).strftime("%Y-%m-%d %H:%M:%S")
+        level = levels[i % len(levels)]
+        lines.append(f"{timestamp} {level} [worker-{i % 3}] Event {i} request_id=req-{i}")
+    return lines
+
+@pytest.fixture
+def analyzer():
+    """Create an analyzer whose line parser is stubbed with a simple regex."""
+    with patch.object(LogAnalyzer, "parse_log_line", simple_parse_log_line):
+        yield LogAnalyzer()
+
+@pytest.fixture
+def log_file(tmp_path):
+    """Write a small standard-format log file."""
+    path = tmp_path / "app.log"
+    path.write_text("\n".join(make_log_lines(40)) + "\n")
+    return str(path)
+
+class TestStreamingIngestion:
+    """Test the generator-based ingestion path."""
+    
+    def test_iter_log_file_yields_all_entries(self, analyzer, log_file):
+        """Test that every parsable line is yielded in file order."""
+        entries = list(analyzer.iter_log_file(log_file))
+        
+        assert len(entries) == 40
+        assert entries[0].message.startswith("Event 0 ")
+        assert entries[-1].message.startswith("Event 39 ")
+        assert analyzer.log_entries == []
+    
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 1024 * 1024])
+    def test_iter_log_file_chunk_boundaries(self, analyzer, log_file, chunk_size):
+        """Test that lines split across window boundaries are reassembled."""
+        entries = list(analyzer.iter_log_file(log_file, chunk_size=chunk_size))
+        
+        assert [entry.message for entry in entries] == [
+            entry.message for entry in analyzer.iter_log_file(log_file)
+        ]
+    
+    def test_iter_log_file_skips_blank_and_unparsable_lines(self, analyzer, tmp_path):
+        """Test that blank, garbage and CRLF-terminated lines are handled."""
+        lines = make_log_lines(3)
+        path = tmp_path / "mixed.log"
+        path.write_bytes(("\r\n".join([lines[0], "", "garbage", lines[1], lines[2]])).encode())
+        
+        entries = list(analyzer.iter_log_file(str(path)))
+        
+        assert len(entries) == 3
+        assert not entries[-1].message.endswith("\r")
+    
+    def test_iter_log_file_empty_file(self, analyzer, tmp_path):
+        """Test streaming an empty file."""
+        path = tmp_path / "empty.log"
+        path.write_text("")
+        
+        assert list(analyzer.iter_log_file(str(path))) == []
+    
+    def test_iter_log_file_is_lazy(self, analyzer, log_file):
+        """Test that entries are parsed on demand."""
+        with patch.object(LogAnalyzer, "parse_log_line",
+                          side_effect=lambda line, fmt: simple_parse_log_line(None, line, fmt)) as parser:
+            stream = analyzer.iter_log_file(log_file)
+            next(stream)
+            
+            assert parser.call_count == 1
+            stream.close()
+    
+    def test_invalid_chunk_size(self, analyzer, log_file):
+        """Test that a non-positive chunk size is rejected."""
+        with pytest.raises(ValueError):
+            list(analyzer.iter_log_file(log_file, chunk_size=0))
+    
+    def test_pipeline_stages(self, analyzer, log_file):
+        """Test chaining level, time range and pattern stages."""
+        start = datetime(2024, 1, 15, 10, 0, 10)
+        end = datetime(2024, 1, 15, 10, 0, 30)
+        
+        stream = analyzer.iter_log_file(log_file)
+        stream = analyzer.stream_filter_by_level(stream, LogLevel.ERROR)
+        stream = analyzer.stream_filter_by_time_range(stream, start, end)
+        stream = analyzer.stream_search_by_pattern(stream, "EVENT", use_regex=False)
+        result = list(stream)
+        
+        assert [entry.message.split()[1] for entry in result] == ["10", "14", "18", "22", "26", "30"]
+    
+    def test_stream_search_by_regex(self, analyzer, log_file):
+        """Test the regex search stage."""
+        stream = analyzer.stream_search_by_pattern(analyzer.iter_log_file(log_file), r"req-3\d$")
+        
+        assert len(list(stream)) == 10
+
+class TestColumnarLogStore:
+    """Test the array-backed entry store."""
+    
+    @pytest.fixture
+    def entries(self, analyzer):
+        return [simple_parse_log_line(None, line) for line in make_log_lines(20, step_seconds=90)]
+    
+    @pytest.fixture
+    def store(self, entries):
+        store = ColumnarLogStore()
+        store.extend(entries)
+        return store
+    
+    def test_round_trip(self, store, entries):
+        """Test that views expose the same data as the original entries."""
+        assert len(store) == 20
+        
+        for view, entry in zip(store, entries):
+            assert view.timestamp == entry.timestamp
+            assert view.level == entry.level
+            assert view.message == entry.message
+            assert view.source == entry.source
+            assert view.user_id is None
+        
+        assert store[-1].to_entry() == LogEntry(
+            timestamp=entries[-1].timestamp, level=entries[-1].level,
+            message=entries[-1].message, source=entries[-1].source
+        )
+    
+    def test_views_use_slots(self, store):
+        """Test that per-entry views carry no instance dictionary."""
+        view = store[0]
+        
+        assert isinstance(view, LogEntryView)
+        assert not hasattr(view, "__dict__")
+    
+    def test_index_out_of_range(self, store):
+        """Test out-of-range access."""
+        with pytest.raises(IndexError):
+            store[20]
+    
+    def test_interned_source_column(self, store):
+        """Test that repeated sources share one vocabulary slot."""
+        assert len(store.sources.values) == 4  # None + worker-0..2
+    
+    def test_level_counts(self, store):
+        """Test per-level counting."""
+        assert store.level_counts() == {"DEBUG": 5, "INFO": 5, "WARNING": 5, "ERROR": 5}
+    
+    def test_time_bounds(self, store, entries):
+        """Test first/last timestamp lookup."""
+        assert store.time_bounds() == (entries[0].timestamp, entries[-1].timestamp)
+        assert ColumnarLogStore().time_bounds() is None
+    
+    def test_timeline_counts(self, store):
+        """Test bucketing by interval."""
+        timeline = store.timeline_counts(interval_minutes=10)
+        
+        assert list(timeline) == [
+            datetime(2024, 1, 15, 10, 0), datetime(2024, 1, 15, 10, 10),
+            datetime(2024, 1, 15, 10, 20)
+        ]
+        assert sum(sum(counts.values()) for counts in timeline.values()) == 20
+        assert timeline[datetime(2024, 1, 15, 10, 0)] == {"DEBUG": 2, "INFO": 2, "WARNING": 1, "ERROR": 2}
+    
+    def test_timeline_invalid_interval(self, store):
+        """Test that a non-positive interval is rejected."""
+        with pytest.raises(ValueError):
+            store.timeline_counts(0)
+    
+    def test_message_counts(self):
+        """Test counting repeated error messages."""
+        store = ColumnarLogStore()
+        base = datetime(2024, 1, 15, 10, 0, 0)
+        for message, level in [("disk full", LogLevel.ERROR), ("disk full", LogLevel.CRITICAL),
+                               ("timeout", LogLevel.ERROR), ("disk full", LogLevel.INFO)]:
+            store.append(LogEntry(timestamp=base, level=level, message=message))
+        
+        assert store.message_counts().most_common() == [("disk full", 2), ("timeout", 1)]
+        assert store.message_counts([LogLevel.INFO]) == {"disk full": 1}
+    
+    def test_compact_memory(self, store):
+        """Test that the store stays well below dataclass-per-entry costs."""
+        assert store.nbytes() / len(store) < 100
+    
+    def test_load_log_file_columnar(self, analyzer, log_file):
+        """Test loading a file straight into the column store."""
+        assert analyzer.load_log_file_columnar(log_file) == 40
+        assert len(analyzer.column_store) == 40
+        assert analyzer.log_entries == []
+
+class TestTimeIndex:
+    """Test the sorted timestamp index."""
+    
+    def test_from_timestamps_sorts(self):
+        """Test that building sorts keys and keeps positions aligned."""
+        index = TimeIndex.from_timestamps([30, 10, 20, 10])
+        
+        assert list(index.keys) == [10, 10, 20, 30]
+        assert list(index.positions) == [1, 3, 2, 0]
+    
+    def test_out_of_order_add(self):
+        """Test that late entries are inserted in place."""
+        index = TimeIndex()
+        for position, key in enumerate([10, 20, 40, 30, 5]):
+            index.add(key, position)
+        
+        assert list(index.keys) == [5, 10, 20, 30, 40]
+        assert list(index.positions) == [4, 0, 1, 3, 2]
+        assert index.out_of_order_inserts == 2
+    
+    def test_range_positions_inclusive(self):
+        """Test inclusive range boundaries."""
+        index = TimeIndex.from_timestamps([10, 20, 30, 40])
+        
+        assert list(index.range_positions(20, 30)) == [1, 2]
+        assert list(index.range_positions(41, 50)) == []
+    
+    def test_iter_buckets_skips_empty(self):
+        """Test that empty buckets are not produced."""
+        index = TimeIndex.from_timestamps([0, 5, 9, 10, 35])
+        
+        assert list(index.iter_buckets(10)) == [(0, 0, 3), (10, 3, 4), (30, 4, 5)]
+
+class TestIndexedQueries:
+    """Test time-indexed analyzer queries."""
+    
+    @pytest.fixture
+    def loaded(self, analyzer):
+        lines = make_log_lines(30, step_seconds=60)
+        lines[5], lines[25] = lines[25], lines[5]
+        for line in lines:
+            analyzer.add_entry(simple_parse_log_line(None, line))
+        return analyzer
+    
+    def test_filter_by_time_range_indexed(self, loaded):
+        """Test indexed range filtering against a linear scan."""
+        start = datetime(2024, 1, 15, 10, 3, 0)
+        end = datetime(2024, 1, 15, 10, 7, 0)
+        
+        result = loaded.filter_by_time_range_indexed(start, end)
+        expected = sorted((e for e in loaded.log_entries if start <= e.timestamp <= end),
+                          key=lambda e: e.timestamp)
+        
+        assert result == expected
+        assert len(result) == 5
+    
+    def test_add_entry_maintains_index(self, loaded):
+        """Test that entries added after the index is built are indexed."""
+        loaded.build_time_index()
+        late = simple_parse_log_line(None, "2024-01-15 09:00:00 ERROR [late] Late entry")
+        loaded.add_entry(late)
+        
+        assert loaded.time_index.out_of_order_inserts == 1
+        assert loaded.filter_by_time_range_indexed(
+            datetime(2024, 1, 15, 8, 0), datetime(2024, 1, 15, 9, 30)) == [late]
+    
+    def test_index_rebuilt_when_stale(self, loaded):
+        """Test that entries appended directly to log_entries are picked up."""
+        loaded.build_time_index()
+        loaded.log_entries.append(simple_parse_log_line(None, "2024-01-15 12:00:00 INFO [x] Direct"))
+        
+        result = loaded.filter_by_time_range_indexed(datetime(2024, 1, 15, 12, 0), datetime(2024, 1, 15, 12, 0))
+        
+        assert len(result) == 1
+    
+    def test_generate_timeline_indexed(self, loaded):
+        """Test indexed timeline bucketing."""
+        timeline = loaded.generate_timeline_indexed(interval_minutes=10)
+        
+        assert list(timeline) == [datetime(2024, 1, 15, 10, 0), datetime(2024, 1, 15, 10, 10),
+                                  datetime(2024, 1, 15, 10, 20)]
+        assert all(sum(counts.values()) == 10 for counts in timeline.values())
+
+class TestParallelIngestion:
+    """Test multi-process parsing."""
+    
+    @pytest.fixture
+    def big_log_file(self, tmp_path):
+        path = tmp_path / "big.log"
+        path.write_text("\n".join(make_log_lines(500)) + "\n")
+        return str(path)
+    
+    @pytest.mark.parametrize("parts", [1, 3, 8, 64])
+    def test_ranges_align_on_newlines(self, big_log_file, parts):
+        """Test that ranges are contiguous and start at line beginnings."""
+        ranges = _newline_aligned_ranges(big_log_file, parts)
+        data = open(big_log_file, "rb").read()
+        
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == len(data)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+            assert data[start - 1:start] == b"\n"
+    
+    def test_ranges_empty_file(self, tmp_path):
+        """Test splitting an empty file."""
+        path = tmp_path / "empty.log"
+        path.write_text("")
+        
+        assert _newline_aligned_ranges(str(path), 4) == []
+    
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_parallel_matches_sequential(self, analyzer, big_log_file, workers):
+        """Test that parallel parsing preserves content and order."""
+        loaded = analyzer.load_log_file_parallel(big_log_file, workers=workers, ranges_per_worker=3)
+        expected = list(analyzer.iter_log_file(big_log_file))
+        
+        assert loaded == 500
+        assert analyzer.log_entries == expected
+    
+    def test_parallel_uses_custom_patterns(self, analyzer, big_log_file):
+        """Test that worker analyzers receive the caller's patterns."""
+        seen = []
+        
+        def parse_with_pattern_check(self, line, log_format="standard"):
+            seen.append(self.custom_patterns.get("marker"))
+            return simple_parse_log_line(self, line, log_format)
+        
+        analyzer.custom_patterns["marker"] = r"Event"
+        with patch.object(LogAnalyzer, "parse_log_line", parse_with_pattern_check):
+            analyzer.load_log_file_parallel(big_log_file, workers=1)
+        
+        assert set(seen) == {r"Event"}
+    
+    def test_parallel_spawn_context(self, analyzer, big_log_file):
+        """Test that a spawn pool parses correctly even if workers cannot import the module."""
+        loaded = analyzer.load_log_file_parallel(big_log_file, workers=2, ranges_per_worker=2,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        
+        assert loaded == 500
+        assert analyzer.log_entries == list(analyzer.iter_log_file(big_log_file))
+    
+    def test_importable_by_workers(self):
+        """Test detection of classes fresh worker processes can import."""
+        unimportable = type("Unimportable", (), {"__module__": "no_such_module_for_workers"})
+        
+        assert _importable_by_workers(Counter)
+        assert not _importable_by_workers(unimportable)
+
+class TestPatternEngine:
+    """Test the compiled, prefiltered pattern engine."""
+    
+    @pytest.mark.parametrize("pattern,expected", [
+        (r"https?://[^\s]+", "http"),
+        (r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", "@"),
+        (r"user[_-]?id[:\s=]+(\w+)", "user"),
+        (r"response_time[:\s=]+(\d+)ms", "response_time"),
+        (r"a{2}bc", "bc"),
+        (r"error\.code", "error.code"),
+        (r"\b(?:\d{1,3}\.){3}\d{1,3}\b", ""),
+        (r"(GET|POST)\s+/api", "/api"),
+        (r"foo|bar", ""),
+        (r"(?i)timeout", ""),
+    ])
+    def test_required_literal(self, pattern, expected):
+        """Test required-literal detection for prefiltering."""
+        assert _required_literal(pattern) == expected
+    
+    def test_extract_matches_plain_findall(self):
+        """Test that prefiltering never changes the results."""
+        patterns = LogAnalyzer().patterns
+        engine = PatternEngine(patterns)
+        
+        for line in _benchmark_log_lines(300):
+            expected = {name: re.findall(pattern, line) for name, pattern in patterns.items()}
+            expected = {name: found for name, found in expected.items() if found}
+            assert engine.extract(line) == expected
+    
+    def test_search_uses_prefilter(self):
+        """Test that a missing literal skips the regex entirely."""
+        engine = PatternEngine({"email": r"\b\w+@\w+\.com\b"})
+        engine.compiled["email"] = Mock()
+        
+        assert engine.search("email", "no address here") is None
+        engine.compiled["email"].search.assert_not_called()
+    
+    def test_engines_cached_per_pattern_set(self):
+        """Test that identical pattern sets share one compiled engine."""
+        first = PatternEngine.for_patterns({"a": "x+", "b": "y+"})
+        second = PatternEngine.for_patterns({"b": "y+", "a": "x+"})
+        
+        assert first is second
+        assert PatternEngine.for_patterns({"a": "x+"}) is not first
+    
+    def test_analyzer_engine_includes_custom_patterns(self):
+        """Test that custom patterns are compiled and override built-ins."""
+        analyzer = LogAnalyzer()
+        analyzer.custom_patterns["transaction_id"] = r"txn[_-]?([a-zA-Z0-9]+)"
+        analyzer.custom_patterns["level"] = r"(ERROR|FATAL)"
+        
+        fields = analyzer.extract_fields("2024-01-15 10:30:15 FATAL txn-abc123 user_id=42")
+        
+        assert fields["transaction_id"] == "abc123"
+        assert fields["level"] == "FATAL"
+        assert fields["user_id"] == "42"
+        assert fields["timestamp"] == "2024-01-15 10:30:15"
+
+class TestFollowMode:
+    """Test tail-follow ingestion with rolling statistics."""
+    
+    @pytest.fixture
+    def live_log(self, tmp_path):
+        return tmp_path / "live.log"
+    
+    def append(self, path, lines, terminate=True):
+        with open(path, "a") as handle:
+            handle.write("\n".join(lines) + ("\n" if terminate else ""))
+    
+    def test_poll_reads_only_appended_lines(self, analyzer, live_log):
+        """Test that each poll parses just the new bytes."""
+        lines = make_log_lines(10)
+        self.append(live_log, lines[:6])
+        
+        with analyzer.follow(str(live_log)) as follower:
+            assert len(follower.poll()) == 6
+            assert follower.poll() == []
+            
+            self.append(live_log, lines[6:])
+            new_entries = follower.poll()
+        
+        assert [entry.message.split()[1] for entry in new_entries] == ["6", "7", "8", "9"]
+        assert follower.stats.total_entries == 10
+        assert follower.offset == live_log.stat().st_size
+    
+    def test_partial_line_held_back(self, analyzer, live_log):
+        """Test that an unterminated line waits for its newline."""
+        line = make_log_lines(1)[0]
+        self.append(live_log, [line[:20]], terminate=False)
+        
+        with analyzer.follow(str(live_log)) as follower:
+            assert follower.poll() == []
+            self.append(live_log, [line[20:]])
+            assert len(follower.poll()) == 1
+    
+    def test_from_end_skips_existing_content(self, analyzer, live_log):
+        """Test following only lines written after the follower starts."""
+        lines = make_log_lines(5)
+        self.append(live_log, lines[:3])
+        
+        with analyzer.follow(str(live_log), from_start=False) as follower:
+            assert follower.poll() == []
+            self.append(live_log, lines[3:])
+            assert len(follower.poll()) == 2
+    
+    def test_truncation_restarts_from_beginning(self, analyzer, live_log):
+        """Test that a truncated file is re-read from offset zero."""
+        lines = make_log_lines(6)
+        self.append(live_log, lines)
+        
+        with analyzer.follow(str(live_log)) as follower:
+            follower.poll()
+            live_log.write_text(lines[0] + "\n")
+            entries = follower.poll()
+        
+        assert len(entries) == 1
+        assert follower.truncations == 1
+    
+    def test_rotation_drains_old_file(self, analyzer, live_log, tmp_path):
+        """Test that rotation finishes the old file before the new one."""
+        lines = make_log_lines(9)
+        self.append(live_log, lines[:3])
+        
+        with analyzer.follow(str(live_log)) as follower:
+            follower.poll()
+            self.append(live_log, lines[3:5])
+            live_log.rename(tmp_path / "live.log.1")
+            self.append(live_log, lines[5:])
+            entries = follower.poll()
+        
+        assert [entry.message.split()[1] for entry in entries] == ["3", "4", "5", "6", "7", "8"]
+        assert follower.rotations == 1
+        assert follower.stats.total_entries == 9
+    
+    def test_rotation_emits_unterminated_last_line(self, analyzer, live_log, tmp_path):
+        """Test that the old file's unterminated last line survives rotation."""
+        lines = make_log_lines(4)
+        self.append(live_log, lines[:1])
+        self.append(live_log, lines[1:2], terminate=False)
+        
+        with analyzer.follow(str(live_log)) as follower:
+            assert len(follower.poll()) == 1
+            live_log.rename(tmp_path / "live.log.1")
+            self.append(live_log, lines[2:])
+            entries = follower.poll()
+        
+        assert [entry.message.split()[1] for entry in entries] == ["1", "2", "3"]
+        assert follower.stats.total_entries == 4
+    
+    def test_missing_file_polls_empty(self, analyzer, live_log):
+        """Test following a file that does not exist yet."""
+        follower = analyzer.follow(str(live_log))
+        
+        assert follower.poll() == []
+        self.append(live_log, make_log_lines(2))
+        assert len(follower.poll()) == 2
+        follower.close()
+    
+    def test_store_entries(self, analyzer, live_log):
+        """Test optionally keeping followed entries on the analyzer."""
+        self.append(live_log, make_log_lines(3))
+        
+        with analyzer.follow(str(live_log), store_entries=True) as follower:
+            follower.poll()
+        
+        assert len(analyzer.log_entries) == 3
+    
+    def test_rolling_statistics_match_full_recompute(self):
+        """Test incremental counters against a from-scratch computation."""
+        entries = [simple_parse_log_line(None, line) for line in make_log_lines(50, step_seconds=45)]
+        stats = RollingLogStatistics(interval_minutes=15)
+        for entry in entries:
+            stats.update(entry)
+        
+        store = ColumnarLogStore()
+        store.extend(entries)
+        
+        summary = stats.statistics()
+        assert summary["total_entries"] == 50
+        assert summary["level_counts"] == store.level_counts()
+        assert summary["time_span"] == entries[-1].timestamp - entries[0].timestamp
+        assert stats.timeline_snapshot() == store.timeline_counts(15)
+        assert stats.frequent_errors(3) == store.message_counts().most_common(3)
+
+def make_entries(per_minute, level=LogLevel.INFO, message="Request completed in {ms}ms", latency=None):
+    """Build entries with a given count per minute (one bucket per minute)."""
+    start = datetime(2024, 1, 15, 10, 0, 0)
+    entries = []
+    for minute, count in enumerate(per_minute):
+        for i in range(count):
+            ms = latency[minute] if latency else 100
+            entries.append(LogEntry(
+                timestamp=start + timedelta(minutes=minute, seconds=i % 60),
+                level=level,
+                message=message.format(ms=ms)
+            ))
+    return entries
+
+class TestStreamingAnomalyDetection:
+    """Test online anomaly detection."""
+    
+    def test_running_stats_matches_statistics_module(self):
+        """Test Welford moments against the standard library."""
+        import statistics
+        values = [3.0, 7.5, 1.25, 9.0, 4.0, 4.0]
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+        
+        assert stats.mean == pytest.approx(statistics.mean(values))
+        assert stats.variance == pytest.approx(statistics.variance(values))
+    
+    def test_ewma_tracks_recent_values(self):
+        """Test that the moving mean follows a level shift."""
+        ewma = EwmaStats(alpha=0.5, mean=10.0)
+        for _ in range(20):
+            ewma.add(50.0)
+        
+        assert ewma.mean == pytest.approx(50.0, rel=1e-4)
+    
+    def test_invalid_parameters(self):
+        """Test parameter validation."""
+        with pytest.raises(ValueError):
+            EwmaStats(alpha=0)
+        with pytest.raises(ValueError):
+            StreamingAnomalyDetector(metrics=("bogus",))
+        with pytest.raises(ValueError):
+            StreamingAnomalyDetector(interval_minutes=0)
+    
+    def test_volume_spike_flagged(self, analyzer):
+        """Test that a burst of entries is reported for its bucket."""
+        entries = make_entries([10, 11, 9, 10, 10, 11, 10, 60, 10, 9])
+        
+        anomalies = list(analyzer.detect_anomalies_streaming(entries, interval_minutes=1))
+        
+        assert [a["type"] for a in anomalies] == ["volume_spike"]
+        assert anomalies[0]["timestamp"] == datetime(2024, 1, 15, 10, 7)
+        assert anomalies[0]["value"] == 60
+    
+    def test_steady_stream_has_no_anomalies(self, analyzer):
+        """Test that steady traffic is not flagged."""
+        entries = make_entries([10, 11, 9, 10, 10, 11, 10, 9, 10, 11])
+        
+        assert list(analyzer.detect_anomalies_streaming(entries, interval_minutes=1)) == []
+    
+    def test_error_spike_flagged(self, analyzer):
+        """Test error-count anomalies."""
+        entries = make_entries([10] * 8)
+        entries += make_entries([0] * 7 + [12], level=LogLevel.ERROR, message="boom")
+        entries.sort(key=lambda entry: entry.timestamp)
+        
+        anomalies = list(analyzer.detect_anomalies_streaming(entries, interval_minutes=1))
+        
+        assert {a["type"] for a in anomalies} == {"volume_spike", "error_spike"}
+    
+    def test_memory_is_bounded(self):
+        """Test that detector state does not grow with the stream."""
+        detector = StreamingAnomalyDetector(interval_minutes=1)
+        list(detector.process(make_entries([5] * 200)))
+        
+        assert detector.buckets_seen == 200
+        assert set(vars(detector)) == set(vars(StreamingAnomalyDetector(interval_minutes=1)))
+    
+    def test_latency_degradation(self, analyzer):
+        """Test latency degradation detection on the performance analyzer."""
+        latency = [100, 110, 95, 105, 100, 98, 400, 102]
+        entries = make_entries([5] * len(latency), latency=latency)
+        performance = PerformanceAnalyzer(analyzer)
+        
+        issues = list(performance.detect_performance_degradation_streaming(entries, interval_minutes=1))
+        
+        assert len(issues) == 1
+        assert issues[0]["type"] == "latency_degradation"
+        assert issues[0]["value"] == 400
+
+def zipf_stream(length, distinct, seed=7):
+    """Skewed stream of message ids, like real error logs."""
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, distinct + 1)]
+    return [f"error {i}" for i in rng.choices(range(distinct), weights=weights, k=length)]
+
+class TestApproximateAnalytics:
+    """Test top-N and percentile sketches."""
+    
+    def test_space_saving_exact_below_capacity(self):
+        """Test that counts are exact while all items fit."""
+        stream = zipf_stream(2_000, 50)
+        sketch = SpaceSavingCounter(capacity=50)
+        for item in stream:
+            sketch.add(item)
+        
+        assert sketch.top(5) == Counter(stream).most_common(5)
+        assert all(error == 0 for error in sketch.errors.values())
+    
+    def test_space_saving_error_bound(self):
+        """Test the documented N / capacity overestimate bound."""
+        stream = zipf_stream(20_000, 2_000)
+        exact = Counter(stream)
+        sketch = SpaceSavingCounter(capacity=100)
+        for item in stream:
+            sketch.add(item)
+        
+        assert len(sketch.counts) == 100
+        for item, estimate in sketch.counts.items():
+            assert exact[item] <= estimate <= exact[item] + sketch.error_bound
+            assert estimate - sketch.errors[item] <= exact[item]
+        # Every item above the bound must be tracked
+        heavy = {item for item, count in exact.items() if count > sketch.error_bound}
+        assert heavy <= set(sketch.counts)
+        assert sketch.top(1)[0][0] == exact.most_common(1)[0][0]
+    
+    def test_space_saving_merge(self):
+        """Test merging per-file sketches keeps the bound for N1 + N2."""
+        first, second = zipf_stream(10_000, 1_000, seed=1), zipf_stream(10_000, 1_000, seed=2)
+        exact = Counter(first) + Counter(second)
+        sketches = []
+        for stream in (first, second):
+            sketch = SpaceSavingCounter(capacity=100)
+            for item in stream:
+                sketch.add(item)
+            sketches.append(sketch)
+        
+        merged = sketches[0].merge(sketches[1])
+        
+        assert merged.total == 20_000
+        assert len(merged.counts) <= 100
+        for item, estimate in merged.counts.items():
+            assert exact[item] <= estimate <= exact[item] + merged.error_bound
+        assert merged.top(3)[0][0] == exact.most_common(1)[0][0]
+    
+    def test_space_saving_invalid_capacity(self):
+        """Test capacity validation."""
+        with pytest.raises(ValueError):
+            SpaceSavingCounter(0)
+    
+    @pytest.mark.parametrize("relative_error", [0.01, 0.05])
+    def test_histogram_percentiles_within_relative_error(self, relative_error):
+        """Test percentile accuracy against exact order statistics."""
+        rng = random.Random(3)
+        samples = [rng.lognormvariate(4, 1) for _ in range(10_000)]
+        histogram = LatencyHistogram(relative_error)
+        for sample in samples:
+            histogram.add(sample)
+        
+        ordered = sorted(samples)
+        for percent in (1, 50, 90, 95, 99, 99.9):
+            exact = ordered[int(percent / 100 * (len(ordered) - 1))]
+            assert histogram.percentile(percent) == pytest.approx(exact, rel=relative_error * 1.01)
+    
+    def test_histogram_merge_and_summary(self):
+        """Test merging histograms and the summary fields."""
+        first, second = LatencyHistogram(), LatencyHistogram()
+        for value in range(1, 501):
+            first.add(float(value))
+        for value in range(501, 1001):
+            second.add(float(value))
+        second.add(0.0)
+        
+        merged = first.merge(second)
+        summary = merged.summary()
+        
+        assert summary["count"] == 1001
+        assert summary["min_latency"] == 0.0
+        assert summary["max_latency"] == 1000.0
+        assert summary["p50"] == pytest.approx(500, rel=0.01)
+        with pytest.raises(ValueError):
+            first.merge(LatencyHistogram(0.05))
+    
+    def test_histogram_empty(self):
+        """Test an empty histogram."""
+        assert LatencyHistogram().percentile(50) is None
+    
+    def test_analyzer_integration(self, analyzer):
+        """Test the approximate analyzer entry points."""
+        errors = [LogEntry(timestamp=datetime(2024, 1, 15), level=LogLevel.ERROR, message=message)
+                  for message in zipf_stream(1_000, 20)]
+        analyzer.log_entries = errors + make_entries([3, 3], latency=[120, 80])
+        performance = PerformanceAnalyzer(analyzer)
+        
+        assert analyzer.find_frequent_errors_approx(3) == Counter(
+            entry.message for entry in errors).most_common(3)
+        latency = performance.analyze_request_latency_approx()
+        assert latency["count"] == 6
+        assert latency["avg_latency"] == pytest.approx(100)
+
+class TestCompressedInput:
+    """Test reading rotated, compressed logs."""
+    
+    OPENERS = {"gz": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+    
+    def write(self, path, lines, compression=None):
+        opener = self.OPENERS[compression] if compression else open
+        with opener(path, "wt") as handle:
+            handle.write("\n".join(lines) + "\n")
+        return str(path)
+    
+    @pytest.mark.parametrize("compression", ["gz", "bz2", "xz"])
+    def test_iter_log_file_decompresses(self, analyzer, tmp_path, compression):
+        """Test that archives are streamed without extraction."""
+        path = self.write(tmp_path / f"app.log.{compression}", make_log_lines(25), compression)
+        
+        entries = list(analyzer.iter_log_file(path, chunk_size=64))
+        
+        assert len(entries) == 25
+        assert entries[-1].message.startswith("Event 24 ")
+    
+    @pytest.mark.parametrize("chunk_size", [16, 4096])
+    def test_plain_and_compressed_split_alike(self, analyzer, tmp_path, chunk_size):
+        """Test that control characters inside messages split neither kind of file."""
+        lines = make_log_lines(6)
+        lines[1] += " carriage\rreturn"
+        lines[3] += " form\x0cfeed and \x1e separator"
+        data = "\r\n".join(lines).encode() + b"\r\n"
+        (tmp_path / "app.log").write_bytes(data)
+        with gzip.open(tmp_path / "app.log.gz", "wb") as handle:
+            handle.write(data)
+        
+        plain = list(analyzer.iter_log_file(str(tmp_path / "app.log"), chunk_size=chunk_size))
+        compressed = list(analyzer.iter_log_file(str(tmp_path / "app.log.gz"), chunk_size=chunk_size))
+        
+        assert len(plain) == 6
+        assert plain == compressed
+        assert plain[1].message.endswith("carriage\rreturn")
+    
+    def test_detection_uses_magic_bytes(self, analyzer, tmp_path):
+        """Test that a misleading extension does not matter."""
+        path = self.write(tmp_path / "app.log", make_log_lines(5), "gz")
+        
+        assert len(list(analyzer.iter_log_file(path))) == 5
+    
+    def test_parallel_load_falls_back_for_archives(self, analyzer, tmp_path):
+        """Test that compressed files are loaded sequentially."""
+        path = self.write(tmp_path / "app.log.gz", make_log_lines(30), "gz")
+        
+        assert analyzer.load_log_file_parallel(path, workers=4) == 30
+    
+    def test_load_log_files_in_timestamp_order(self, analyzer, tmp_path):
+        """Test loading a rotated set oldest first, whatever the names."""
+        start = datetime(2024, 1, 15, 0, 0, 0)
+        self.write(tmp_path / "app.log", make_log_lines(3, start=start + timedelta(hours=2)))
+        self.write(tmp_path / "app.log.1.gz", make_log_lines(3, start=start + timedelta(hours=1)), "gz")
+        self.write(tmp_path / "app.log.2.bz2", make_log_lines(3, start=start), "bz2")
+        self.write(tmp_path / "app.log.3.xz", ["not a log line"], "xz")
+        
+        loaded = analyzer.load_log_files(str(tmp_path / "app.log*"))
+        timestamps = [entry.timestamp for entry in analyzer.log_entries]
+        
+        assert loaded == 9
+        assert timestamps == sorted(timestamps)
+
+class TestIndexCache:
+    """Test the persistent sidecar cache."""
+    
+    def test_cache_written_and_reused(self, analyzer, log_file):
+        """Test that a second load maps the cache instead of parsing."""
+        assert analyzer.load_log_file_cached(log_file) == 40
+        assert os.path.exists(log_file + ".lacache")
+        expected = [view.to_entry() for view in analyzer.column_store]
+        
+        second = LogAnalyzer()
+        with patch.object(LogAnalyzer, "parse_log_line") as parser:
+            assert second.load_log_file_cached(log_file) == 40
+            parser.assert_not_called()
+        
+        store = second.column_store
+        assert store.read_only
+        assert [view.to_entry() for view in store] == expected
+        assert store.level_counts() == analyzer.column_store.level_counts()
+        assert store.timeline_counts(1) == analyzer.column_store.timeline_counts(1)
+    
+    def test_cached_indexes(self, analyzer, log_file):
+        """Test level and time lookups served from the mapped indexes."""
+        analyzer.load_log_file_cached(log_file)
+        reloaded = LogAnalyzer()
+        reloaded.load_log_file_cached(log_file)
+        store = reloaded.column_store
+        
+        errors = store.positions_for_level(LogLevel.ERROR)
+        window = store.range_positions(datetime(2024, 1, 15, 10, 0, 5), datetime(2024, 1, 15, 10, 0, 9))
+        
+        assert list(errors) == list(range(2, 40, 4))
+        assert list(window) == [5, 6, 7, 8, 9]
+    
+    def test_read_only_store_rejects_appends(self, analyzer, log_file):
+        """Test that cache-backed stores cannot be modified."""
+        analyzer.load_log_file_cached(log_file)
+        reloaded = LogAnalyzer()
+        reloaded.load_log_file_cached(log_file)
+        
+        with pytest.raises(ValueError):
+            reloaded.column_store.append(analyzer.column_store[0].to_entry())
+    
+    def test_stale_when_file_changes(self, analyzer, log_file):
+        """Test that appending to the log invalidates the cache."""
+        analyzer.load_log_file_cached(log_file)
+        with open(log_file, "a") as handle:
+            handle.write(make_log_lines(1, start=datetime(2024, 1, 16))[0] + "\n")
+        
+        assert analyzer.load_log_file_cached(log_file) == 41
+        assert not analyzer.column_store.read_only
+    
+    def test_stale_when_patterns_change(self, analyzer, log_file):
+        """Test that a different pattern set forces a re-parse."""
+        analyzer.load_log_file_cached(log_file)
+        analyzer.custom_patterns["txn"] = r"txn-(\w+)"
+        
+        with patch.object(LogAnalyzer, "parse_log_line", side_effect=lambda line, fmt: None) as parser:
+            assert analyzer.load_log_file_cached(log_file) == 0
+            assert parser.called
+    
+    def test_corrupt_cache_falls_back_to_parsing(self, analyzer, log_file):
+        """Test that an unreadable cache is ignored and rewritten."""
+        cache_path = log_file + ".lacache"
+        with open(cache_path, "wb") as handle:
+            handle.write(b"garbage" * 10)
+        
+        assert analyzer.load_log_file_cached(log_file) == 40
+        with open(cache_path, "rb") as handle:
+            assert handle.read(7) == b"LACACHE"
+    
+    def test_custom_cache_path(self, analyzer, log_file, tmp_path):
+        """Test writing the cache to an explicit location."""
+        cache_path = str(tmp_path / "cache" / "app.bin")
+        os.makedirs(os.path.dirname(cache_path))
+        
+        analyzer.load_log_file_cached(log_file, cache_path=cache_path)
+        
+        assert os.path.exists(cache_path)
+    
+    @pytest.mark.parametrize("cache_name", ["missing/app.bin", "taken"])
+    def test_unwritable_cache_still_loads(self, analyzer, log_file, tmp_path, cache_name):
+        """Test that a failed cache write keeps the parsed store and no temp file."""
+        (tmp_path / "taken").mkdir()
+        cache_path = str(tmp_path / cache_name)
+        
+        assert analyzer.load_log_file_cached(log_file, cache_path=cache_path) == 40
+        assert not analyzer.column_store.read_only
+        assert not list(tmp_path.rglob("*.tmp"))
+
+class TestSecurityScanner:
+    """Test single-pass security scanning"""
+    
+    def make_entry(self, message, seconds=0, level=LogLevel.WARNING):
+        return LogEntry(datetime(2024, 1, 1) + timedelta(seconds=seconds), level, message)
+    
+    @pytest.mark.parametrize("message,issue_type", [
+        ("Query: SELECT * FROM users WHERE name='' OR 1=1", "sql_injection"),
+        ("GET /search?q=<SCRIPT>alert(1)</script>", "xss"),
+        ("GET /static/../../etc/passwd", "path_traversal"),
+        ("POST /ping host=8.8.8.8; rm -rf /", "command_injection"),
+    ])
+    def test_signatures_case_insensitive(self, message, issue_type):
+        issues = SecurityScanner().scan_entry(self.make_entry(message))
+        assert issue_type in {issue['type'] for issue in issues}
+    
+    def test_signature_sliced_from_original_message(self):
+        """Test the reported signature when lowercasing changes the length."""
+        issues = SecurityScanner().scan_entry(self.make_entry("İstanbul GET /q=<SCRIPT>x"))
+        assert issues[0]['signature'] == "<SCRIPT"
+    
+    def test_clean_message(self):
+        scanner = SecurityScanner()
+        assert scanner.scan_entry(self.make_entry("User login successful from 10.0.0.1")) == []
+    
+    def test_one_issue_per_category(self):
+        issues = SecurityScanner().scan_entry(self.make_entry("../../a/../b/../etc/passwd"))
+        assert [issue['type'] for issue in issues] == ['path_traversal']
+    
+    def test_brute_force_within_window(self):
+        scanner = SecurityScanner(brute_force_threshold=3, window_seconds=60)
+        entries = [self.make_entry(f"Failed login for admin from 192.168.1.{ip}", seconds)
+                   for seconds, ip in [(0, 5), (10, 5), (15, 9), (20, 5), (25, 5)]]
+        issues = list(scanner.scan(entries))
+        
+        assert len(issues) == 1
+        assert issues[0]['type'] == 'brute_force'
+        assert issues[0]['ip_address'] == '192.168.1.5'
+        assert issues[0]['timestamp'] == entries[3].timestamp
+    
+    def test_brute_force_outside_window(self):
+        scanner = SecurityScanner(brute_force_threshold=3, window_seconds=60)
+        entries = [self.make_entry("Authentication failed from 10.1.1.1", seconds)
+                   for seconds in (0, 45, 90, 135)]
+        assert list(scanner.scan(entries)) == []
+    
+    def test_custom_signatures(self):
+        scanner = SecurityScanner(signatures={'scanner': ['nikto', 'sqlmap']})
+        issues = scanner.scan_entry(self.make_entry("User-Agent: SQLMap/1.7"))
+        assert [issue['type'] for issue in issues] == ['scanner']
+        assert scanner.scan_entry(self.make_entry("' or 1=1")) == []
+    
+    def test_prune_amortized_with_many_live_ips(self):
+        scanner = SecurityScanner(window_seconds=3600)
+        entries = [self.make_entry(f"Failed login from 10.{ip >> 16}.{(ip >> 8) & 255}.{ip & 255}",
+                                   ip // 100) for ip in range(40_000)]
+        with patch.object(scanner, "_prune", wraps=scanner._prune) as prune:
+            assert list(scanner.scan(entries)) == []
+        
+        # Every IP stays inside the window, so pruning only runs on doublings
+        assert prune.call_count == 2
+        assert len(scanner._failed_logins) == 40_000
+    
+    def test_prune_forgets_idle_ips(self):
+        scanner = SecurityScanner(window_seconds=60)
+        scanner.PRUNE_THRESHOLD = scanner._prune_at = 10
+        entries = [self.make_entry(f"Failed login from 10.0.0.{ip}", ip * 10) for ip in range(50)]
+        list(scanner.scan(entries))
+        
+        assert len(scanner._failed_logins) <= 20
+        assert "10.0.0.49" in scanner._failed_logins
+    
+    def test_analyzer_integration(self, analyzer, tmp_path):
+        path = tmp_path / "security.log"
+        lines = [f"2024-01-01 10:00:{second:02d} ERROR [auth] Failed password for root from 172.16.0.4"
+                 for second in range(5)]
+        lines.append("2024-01-01 10:00:10 INFO [web] GET /index.php?id=1 UNION SELECT password FROM users")
+        path.write_text("\n".join(lines) + "\n")
+        
+        issues = analyzer.scan_security_issues(analyzer.iter_log_file(str(path)))
+        assert sorted(issue['type'] for issue in issues) == ['brute_force', 'sql_injection']
+    
+class TestPerformance:
+    """Test performance helpers."""
+    
+    @pytest.mark.slow
+    def test_benchmark_time_index(self):
+        """Test the time index benchmark at a small size."""
+        results = benchmark_time_index(sizes=(20_000,), queries=3)
+        
+        assert results[20_000]["indexed_query_ms"] < results[20_000]["linear_query_ms"]
+    
+    @pytest.mark.slow
+    def test_benchmark_pattern_engine(self):
+        """Test the pattern engine microbenchmark at a small size."""
+        results = benchmark_pattern_engine(line_count=2_000)
+        
+        assert results["engine_lines_per_sec"] > 0
+        assert results["baseline_lines_per_sec"] > 0
@@ -0,0 +1,1898 @@
+"""
+Tests for Exercise 6: Database Mock (Intermediate)
+"""
+
+import pytest
+from unittest.mock import patch, Mock
+import sys
+import os
+import time
+import asyncio
+import threading
+
+# Import the exercise module
+try:
+    from _06_database_mock import (
+        QueryType, QueryResult, DatabaseMock, HashIndex, SortedIndex,
+        normalize_conditions, compile_predicate, benchmark_indexed_select,
+        ColumnStatistics, estimate_selectivity, ColumnarTable,
+        benchmark_columnar_storage, Transaction, TransactionConflict,
+        VersionedTable, benchmark_mvcc_rollback, BlockingConnectionPool,
+        PooledConnection, PoolTimeout, benchmark_connection_pool,
+        SQLSyntaxError, compile_sql, benchmark_sql_plan_cache,
+        DurableStorage, benchmark_persistence, benchmark_bulk_insert,
+        QueryLog, benchmark_query_log, AsyncDatabaseMock, AsyncConnectionPool,
+        benchmark_async_latency, ShardedTable, benchmark_sharded_writes,
+        Cursor, benchmark_cursor_scan, LatencyProfile, FailureProfile,
+        benchmark_fault_injection
+    )
+except ImportError:
+    # Alternative import method
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '2-intermediate-exercises'))
+    try:
+        import importlib.util
+        spec = importlib.util.spec_from_file_location(
+            "database_mock",
+            os.path.join(os.path.dirname(__file__), '..', '..', '2-intermediate-exercises', '06_database_mock.py')
+        )
+        database_mock = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = database_mock
+        spec.loader.exec_module(database_mock)
+        
+        QueryType = database_mock.QueryType
+        QueryResult = database_mock.QueryResult
+        DatabaseMock = database_mock.DatabaseMock
+        HashIndex = database_mock.HashIndex
+        SortedIndex = database_mock.SortedIndex
+        normalize_conditions = database_mock.normalize_conditions
+        compile_predicate = database_mock.compile_predicate
+        benchmark_indexed_select = database_mock.benchmark_indexed_select
+        ColumnStatistics = database_mock.ColumnStatistics
+        estimate_selectivity = database_mock.estimate_selectivity
+        ColumnarTable = database_mock.ColumnarTable
+        benchmark_columnar_storage = database_mock.benchmark_columnar_storage
+        Transaction = database_mock.Transaction
+        TransactionConflict = database_mock.TransactionConflict
+        VersionedTable = database_mock.VersionedTable
+        benchmark_mvcc_rollback = database_mock.benchmark_mvcc_rollback
+        BlockingConnectionPool = database_mock.BlockingConnectionPool
+        PooledConnection = database_mock.PooledConnection
+        PoolTimeout = database_mock.PoolTimeout
+        benchmark_connection_pool = database_mock.benchmark_connection_pool
+        SQLSyntaxError = database_mock.SQLSyntaxError
+        compile_sql = database_mock.compile_sql
+        benchmark_sql_plan_cache = database_mock.benchmark_sql_plan_cache
+        DurableStorage = database_mock.DurableStorage
+        benchmark_persistence = database_mock.benchmark_persistence
+        benchmark_bulk_insert = database_mock.benchmark_bulk_insert
+        QueryLog = database_mock.QueryLog
+        benchmark_query_log = database_mock.benchmark_query_log
+        AsyncDatabaseMock = database_mock.AsyncDatabaseMock
+        AsyncConnectionPool = database_mock.AsyncConnectionPool
+        benchmark_async_latency = database_mock.benchmark_async_latency
+        ShardedTable = database_mock.ShardedTable
+        benchmark_sharded_writes = database_mock.benchmark_sharded_writes
+        Cursor = database_mock.Cursor
+        benchmark_cursor_scan = database_mock.benchmark_cursor_scan
+        LatencyProfile = database_mock.LatencyProfile
+        FailureProfile = database_mock.FailureProfile
+        benchmark_fault_injection = database_mock.benchmark_fault_injection
+    except:
+        pytest.skip("Could not import database mock module")
+
+def make_users(count):
+    """Rows for a users table with a few low-cardinality columns."""
+    return [{"id": i, "name": f"user{i}", "email": f"user{i}@example.com",
+             "age": 20 + i % 50, "active": i % 3 != 0}
+            for i in range(count)]
+
+@pytest.fixture
+def db():
+    """Database with a populated users table stored through _store_row."""
+    database = DatabaseMock()
+    database.tables["users"] = []
+    for row in make_users(200):
+        database._store_row("users", row)
+    return database
+
+USER_SCHEMA = {
+    "id": {"type": "int", "primary_key": True},
+    "name": {"type": "str"},
+    "email": {"type": "str"},
+    "age": {"type": "int"},
+    "active": {"type": "bool"},
+}
+
+@pytest.fixture
+def columnar_db():
+    """Database holding the same users in row and columnar storage."""
+    database = DatabaseMock()
+    database._create_storage("rows", USER_SCHEMA)
+    database._create_storage("columns", USER_SCHEMA, storage="columnar")
+    for row in make_users(200):
+        database._store_row("rows", row)
+        database._store_row("columns", dict(row))
+    return database
+
+class TestConditions:
+    """Test condition normalization and predicates."""
+    
+    def test_plain_values_mean_equality(self):
+        assert normalize_conditions({"name": "x", "age": {">": 3, "<=": 9}}) == [
+            ("name", "=", "x"), ("age", ">", 3), ("age", "<=", 9)]
+    
+    def test_unknown_operator(self):
+        with pytest.raises(ValueError):
+            normalize_conditions({"age": {"~": 1}})
+    
+    @pytest.mark.parametrize("conditions,expected", [
+        ({"age": {"!=": 30}}, True),
+        ({"age": {"in": [1, 2, 31]}}, True),
+        ({"name": {"like": "J_hn%"}}, True),
+        ({"name": {"like": "%doe"}}, False),
+        ({"score": {">": 1}}, False),
+        ({"name": "John Doe", "age": {">=": 31}}, True),
+    ])
+    def test_compile_predicate(self, conditions, expected):
+        predicate = compile_predicate(normalize_conditions(conditions))
+        assert predicate({"name": "John Doe", "age": 31, "score": None}) is expected
+
+class TestSecondaryIndexes:
+    """Test hash and sorted secondary indexes."""
+    
+    @pytest.mark.parametrize("kind", ["hash", "sorted"])
+    @pytest.mark.parametrize("conditions", [
+        {"age": 25},
+        {"age": {"in": [21, 22, 60]}},
+        {"age": 25, "active": True},
+        {"email": "user7@example.com"},
+    ])
+    def test_index_matches_scan(self, db, kind, conditions):
+        expected = db.find_rows("users", conditions)
+        db.create_index("users", "age", kind)
+        db.create_index("users", "email", kind)
+        
+        assert sorted(row["id"] for row in db.find_rows("users", conditions)) == \
+            sorted(row["id"] for row in expected)
+    
+    @pytest.mark.parametrize("conditions", [
+        {"age": {">=": 30, "<": 35}},
+        {"age": {">": 30, ">=": 30, "<=": 40, "<": 60}},
+        {"age": {"<": 22}},
+        {"age": {">": 68}},
+    ])
+    def test_sorted_index_ranges(self, db, conditions):
+        expected = sorted(row["id"] for row in db.find_rows("users", conditions))
+        db.create_index("users", "age", "sorted")
+        
+        rows = db.find_rows("users", conditions)
+        assert sorted(row["id"] for row in rows) == expected
+        assert [row["age"] for row in rows] == sorted(row["age"] for row in rows)
+    
+    def test_hash_index_ignores_ranges(self, db):
+        db.create_index("users", "age", "hash")
+        assert len(db.find_rows("users", {"age": {"<": 22}})) == 8
+    
+    def test_maintained_on_writes(self, db):
+        db.create_index("users", "age", "sorted")
+        db.create_index("users", "email", "hash")
+        
+        db._store_row("users", {"id": 500, "name": "new", "email": "new@example.com", "age": 99})
+        assert [row["id"] for row in db.find_rows("users", {"age": {">": 90}})] == [500]
+        
+        row = db.find_rows("users", {"email": "user5@example.com"})[0]
+        db._update_row("users", row, {"email": "changed@example.com", "age": 95})
+        assert db.find_rows("users", {"email": "user5@example.com"}) == []
+        assert db.find_rows("users", {"email": "changed@example.com"}) == [row]
+        assert [r["id"] for r in db.find_rows("users", {"age": {">": 90}})] == [5, 500]
+        
+        removed = db._remove_rows("users", db.find_rows("users", {"age": {">": 90}}))
+        assert removed == 2
+        assert len(db.tables["users"]) == 200 - 1
+        assert db.find_rows("users", {"age": {">": 90}}) == []
+        assert len(db.indexes["users"]["age"]) == len(db.indexes["users"]["email"]) == 199
+    
+    def test_remove_uses_identity(self, db):
+        db.create_index("users", "age", "sorted")
+        duplicate = dict(db.tables["users"][0])
+        db._store_row("users", duplicate)
+        
+        db._remove_rows("users", [duplicate])
+        assert db.tables["users"][0] is not duplicate
+        assert len(db.find_rows("users", {"age": 20})) == 4
+    
+    def test_null_values(self):
+        index = SortedIndex("score")
+        rows = [{"score": None}, {"score": 3}, {"score": 1}]
+        for row in rows:
+            index.add(row)
+        
+        assert index.candidates([(">=", 0)]) == [rows[2], rows[1]]
+        index.remove(rows[0])
+        assert len(index) == 2
+    
+    def test_create_index_errors(self, db):
+        assert not db.create_index("missing", "id").success
+        assert not db.create_index("users", "id", "btree").success
+        assert db.create_index("users", "id").success
+        assert not db.create_index("users", "id").success
+        assert db.drop_index("users", "id")
+        assert not db.drop_index("users", "id")
+
+class TestQueryPlanner:
+    """Test statistics, selectivity estimates and plan choice."""
+    
+    def test_analyze(self, db):
+        stats = db.analyze("users")
+        
+        assert stats["age"] == ColumnStatistics(distinct=50, nulls=0, minimum=20, maximum=69)
+        assert stats["active"].distinct == 2
+    
+    @pytest.mark.parametrize("op,operand,expected", [
+        ("=", 5, 0.009),
+        ("=", None, 0.1),
+        ("!=", 5, 0.991),
+        ("in", [1, 2, 3], 0.027),
+        ("<", 25, 0.225),
+        (">=", 25, 0.675),
+        (">", 500, 0.0),
+        ("like", "a%", 0.09),
+    ])
+    def test_estimate_selectivity(self, op, operand, expected):
+        stats = ColumnStatistics(distinct=100, nulls=10, minimum=0, maximum=100)
+        assert estimate_selectivity(stats, 100, op, operand) == pytest.approx(expected)
+    
+    def test_scan_without_indexes(self, db):
+        plan = db.explain("users", {"age": 30})
+        
+        assert plan["access"] == "scan"
+        assert plan["index"] is None
+        assert plan["estimated_rows"] == pytest.approx(4)
+    
+    def test_most_selective_index_drives(self, db):
+        db.create_index("users", "active", "hash")
+        db.create_index("users", "email", "hash")
+        db.create_index("users", "age", "sorted")
+        
+        plan = db.explain("users", {"active": True, "email": "user4@example.com", "age": {">": 21}})
+        assert plan["index"] == {"column": "email", "kind": "hash",
+                                 "conditions": [("=", "user4@example.com")]}
+        assert [f["column"] for f in plan["filters"]] == ["active", "age"]
+        
+        plan = db.explain("users", {"active": False, "age": {">=": 30, "<": 33}})
+        assert plan["index"]["column"] == "age"
+        assert plan["index"]["conditions"] == [(">=", 30), ("<", 33)]
+    
+    def test_filters_ordered_by_selectivity_and_cost(self, db):
+        plan = db.explain("users", {"active": True, "name": {"like": "user1%"}, "age": 33})
+        
+        assert [f["column"] for f in plan["filters"]] == ["age", "active", "name"]
+    
+    def test_residual_conditions_on_index_column(self, db):
+        db.create_index("users", "age", "hash")
+        
+        rows = db.find_rows("users", {"age": {"in": [20, 21], "!=": 21}})
+        assert {row["age"] for row in rows} == {20}
+        assert db.explain("users", {"age": {"in": [20, 21], "!=": 21}})["filters"][0]["operator"] == "!="
+    
+    def test_statistics_refresh_after_changes(self, db):
+        db.analyze("users")
+        for row in make_users(100):
+            db._store_row("users", dict(row, id=row["id"] + 1000, age=99))
+        
+        assert db.explain("users", {"age": 99})["estimated_rows"] == pytest.approx(300 / 51, abs=0.01)
+        assert db.statistics["users"]["age"].maximum == 99
+    
+    @pytest.mark.parametrize("conditions", [
+        {"active": True, "age": {">=": 30, "<": 40}, "name": {"like": "%1%"}},
+        {"email": {"in": ["user1@example.com", "user2@example.com"]}, "age": 22},
+        {"age": {"in": [25, 26], ">": 25}},
+        {"age": {">": 60}, "active": {"!=": True}},
+    ])
+    def test_plans_agree_with_scan(self, db, conditions):
+        expected = sorted(row["id"] for row in db.find_rows("users", conditions))
+        for column, kind in [("active", "hash"), ("email", "hash"), ("age", "sorted")]:
+            db.create_index("users", column, kind)
+        
+        assert sorted(row["id"] for row in db.find_rows("users", conditions)) == expected
+    
+class TestColumnarStorage:
+    """Test the columnar storage engine."""
+    
+    @pytest.mark.parametrize("conditions", [
+        None,
+        {"age": 25},
+        {"active": False, "age": {">=": 60}},
+        {"name": {"like": "user1_"}},
+        {"email": {"in": ["user3@example.com", "nobody@example.com"]}},
+        {"name": {">": "user5"}, "age": {"!=": 30}},
+        {"missing": None},
+    ])
+    def test_find_matches_row_storage(self, columnar_db, conditions):
+        assert columnar_db.find_rows("columns", conditions) == columnar_db.find_rows("rows", conditions)
+    
+    def test_values_round_trip(self):
+        table = ColumnarTable({"n": {"type": "int"}, "x": {"type": "float"},
+                               "flag": {"type": "bool"}, "s": {"type": "str"},
+                               "meta": {"type": "dict"}})
+        table.append({"n": 5, "x": 1.5, "flag": True, "s": "a", "meta": {"k": 1}})
+        table.append({"n": None, "flag": False})
+        
+        assert list(table) == [
+            {"n": 5, "x": 1.5, "flag": True, "s": "a", "meta": {"k": 1}},
+            {"n": None, "x": None, "flag": False, "s": None, "meta": None},
+        ]
+        assert table.find({"n": None}) == [1]
+        assert table.find({"n": {">": 1}}) == [0]
+    
+    def test_invalid_values_keep_columns_aligned(self):
+        table = ColumnarTable(USER_SCHEMA)
+        table.append(make_users(1)[0])
+        
+        with pytest.raises(TypeError):
+            table.append({"id": 1, "name": "x", "age": "old"})
+        with pytest.raises(TypeError):
+            table.append({"id": 2, "name": 42})
+        with pytest.raises(KeyError):
+            table.append({"id": 3, "nickname": "x"})
+        
+        table.append({"id": 4, "name": "ok"})
+        assert [row["id"] for row in table] == [0, 4]
+        assert table.rows([1]) == [{"id": 4, "name": "ok", "email": None, "age": None, "active": None}]
+    
+    def test_update_and_delete(self, columnar_db):
+        for name in ("rows", "columns"):
+            assert columnar_db._update_rows(name, {"age": {"<": 22}}, {"active": False, "name": "young"}) == 8
+            assert columnar_db._delete_rows(name, {"age": {">=": 60}}) == 40
+        
+        assert columnar_db.find_rows("columns") == columnar_db.find_rows("rows")
+        assert len(columnar_db.tables["columns"]) == 160
+        assert columnar_db.tables["columns"].deleted_count == 40
+    
+    def test_compaction(self, columnar_db):
+        assert columnar_db._delete_rows("columns", {"id": {"<": 150}}) == 150
+        table = columnar_db.tables["columns"]
+        
+        assert table.deleted_count == 0
+        assert len(table.deleted) == 50
+        assert [row["id"] for row in table] == list(range(150, 200))
+    
+    def test_distinct_strings_are_packed(self):
+        table = ColumnarTable(USER_SCHEMA)
+        for row in make_users(3000):
+            table.append(row)
+        
+        assert type(table.columns["email"]).__name__ == "_PackedStringColumn"
+        assert type(table.columns["name"]).__name__ == "_PackedStringColumn"
+        assert table.find({"email": "user2500@example.com"}) == [2500]
+        assert len(table.find({"name": {"like": "user29%"}})) == 111
+        
+        table.update([7], {"email": "changed@example.com"})
+        table.delete(range(0, 2000))
+        assert table.find({"email": "changed@example.com"}) == []
+        assert table.row(0)["email"] == "user2000@example.com"
+    
+    def test_failed_extend_keeps_packed_strings(self):
+        table = ColumnarTable(USER_SCHEMA)
+        table.extend(make_users(3000))
+        assert type(table.columns["name"]).__name__ == "_PackedStringColumn"
+        table.update([5], {"name": "renamed"})
+        
+        # The NULL first name records start 0; age fails after name was appended
+        with pytest.raises(TypeError):
+            table.extend([{"id": 3000, "name": None, "age": 1},
+                          {"id": 3001, "name": "late", "age": "bad"}])
+        
+        assert len(table) == 3000
+        assert table.row(0)["name"] == "user0"
+        assert table.row(5)["name"] == "renamed"
+        assert table.row(2999)["name"] == "user2999"
+        assert table.find({"name": "renamed"}) == [5]
+    
+    @pytest.mark.parametrize("function,conditions", [
+        ("count", None), ("sum", None), ("avg", {"active": True}),
+        ("min", {"age": {">": 40}}), ("max", {"name": {"like": "%9"}}),
+    ])
+    def test_aggregates_match_row_storage(self, columnar_db, function, conditions):
+        assert columnar_db.aggregate("columns", "age", function, conditions) == \
+            columnar_db.aggregate("rows", "age", function, conditions)
+    
+    def test_aggregate_empty_and_unknown(self, columnar_db):
+        assert columnar_db.aggregate("columns", "age", "avg", {"age": 0}) is None
+        with pytest.raises(ValueError):
+            columnar_db.aggregate("columns", "age", "median")
+    
+    def test_describe_and_indexes(self, columnar_db):
+        info = columnar_db.tables["columns"].describe()
+        
+        assert info["record_count"] == 200
+        assert info["columns"] == list(USER_SCHEMA)
+        assert info["storage"] == "columnar"
+        assert not columnar_db.create_index("columns", "age").success
+    
+    def test_unknown_storage(self, columnar_db):
+        with pytest.raises(ValueError):
+            columnar_db._create_storage("other", USER_SCHEMA, storage="btree")
+    
+@pytest.fixture
+def mvcc_db():
+    """Database with an MVCC accounts table of three committed rows."""
+    database = DatabaseMock()
+    database._create_storage("accounts", {"id": {"type": "int"}, "balance": {"type": "int"}},
+                             storage="mvcc")
+    for account_id in range(3):
+        database._store_row("accounts", {"id": account_id, "balance": 100})
+    return database
+
+def balances(table, transaction):
+    return {row["id"]: row["balance"] for row in table.scan(transaction)}
+
+class TestMVCC:
+    """Test multi-version snapshot transactions."""
+    
+    def test_snapshot_isolation(self, mvcc_db):
+        table = mvcc_db.tables["accounts"]
+        reader = mvcc_db.begin_snapshot()
+        
+        mvcc_db._update_rows("accounts", {"id": 0}, {"balance": 50})
+        mvcc_db._delete_rows("accounts", {"id": 1})
+        mvcc_db._store_row("accounts", {"id": 3, "balance": 7})
+        
+        assert balances(table, reader) == {0: 100, 1: 100, 2: 100}
+        assert {row["id"]: row["balance"] for row in mvcc_db.find_rows("accounts")} == \
+            {0: 50, 2: 100, 3: 7}
+        reader.commit()
+    
+    def test_uncommitted_writes_are_private(self, mvcc_db):
+        table = mvcc_db.tables["accounts"]
+        writer = mvcc_db.begin_snapshot()
+        mvcc_db.current_transaction = writer
+        mvcc_db._update_rows("accounts", {"id": 2}, {"balance": 0})
+        mvcc_db._store_row("accounts", {"id": 9, "balance": 1})
+        mvcc_db.current_transaction = None
+        
+        assert balances(table, writer) == {0: 100, 1: 100, 2: 0, 9: 1}
+        assert len(mvcc_db.find_rows("accounts", {"balance": 100})) == 3
+        
+        assert writer.commit()
+        assert not writer.commit()
+        assert len(mvcc_db.find_rows("accounts", {"balance": 100})) == 2
+        assert len(table) == 4
+    
+    def test_rollback_discards_versions(self, mvcc_db):
+        with pytest.raises(RuntimeError):
+            with mvcc_db.begin_snapshot() as transaction:
+                mvcc_db.current_transaction = transaction
+                mvcc_db._delete_rows("accounts", {})
+                mvcc_db._store_row("accounts", {"id": 5, "balance": 5})
+                assert mvcc_db.find_rows("accounts") == [{"id": 5, "balance": 5}]
+                raise RuntimeError("boom")
+        mvcc_db.current_transaction = None
+        
+        assert transaction.status == "aborted"
+        assert mvcc_db.aggregate("accounts", "balance", "sum") == 300
+    
+    def test_write_conflicts(self, mvcc_db):
+        table = mvcc_db.tables["accounts"]
+        first, second = mvcc_db.begin_snapshot(), mvcc_db.begin_snapshot()
+        table.update(first, {"id": 0}, {"balance": 1})
+        
+        with pytest.raises(TransactionConflict):
+            table.update(second, {"id": 0}, {"balance": 2})
+        assert table.update(second, {"id": 1}, {"balance": 2}) == 1
+        
+        first.rollback()
+        assert table.update(second, {"id": 0}, {"balance": 2}) == 1
+        second.commit()
+        
+        late = mvcc_db.begin_snapshot()
+        third = mvcc_db.begin_snapshot()
+        table.delete(late, {"id": 2})
+        late.commit()
+        with pytest.raises(TransactionConflict):
+            table.delete(third, {"id": 2})
+    
+    def test_vacuum_respects_running_snapshots(self, mvcc_db):
+        table = mvcc_db.tables["accounts"]
+        reader = mvcc_db.begin_snapshot()
+        mvcc_db._update_rows("accounts", {}, {"balance": 0})
+        aborted = mvcc_db.begin_snapshot()
+        table.insert(aborted, {"id": 8, "balance": 8})
+        table.delete(aborted, {"id": 0})
+        aborted.rollback()
+        
+        assert mvcc_db.vacuum() == 1
+        assert balances(table, reader) == {0: 100, 1: 100, 2: 100}
+        reader.commit()
+        
+        assert mvcc_db.vacuum() == 3
+        assert len(table.versions) == 3
+        assert all(version.deleted_by == 0 for version in table.versions)
+        assert mvcc_db.transactions.aborted == set()
+    
+    def test_background_vacuum(self, mvcc_db):
+        mvcc_db._delete_rows("accounts", {"id": {"<": 2}})
+        assert mvcc_db.start_vacuum(interval_seconds=0.01)
+        assert not mvcc_db.start_vacuum()
+        
+        deadline = time.time() + 5
+        while len(mvcc_db.tables["accounts"].versions) > 1 and time.time() < deadline:
+            time.sleep(0.01)
+        mvcc_db.stop_vacuum()
+        
+        assert len(mvcc_db.tables["accounts"].versions) == 1
+    
+    def test_indexes_require_row_storage(self, mvcc_db):
+        assert not mvcc_db.create_index("accounts", "id").success
+    
+class TestBlockingConnectionPool:
+    """Test the thread-safe connection pool."""
+    
+    def test_acquire_and_release(self):
+        database = DatabaseMock()
+        pool = BlockingConnectionPool(database, max_connections=2)
+        first, second = pool.get_connection(), pool.get_connection()
+        
+        assert first.connection_id != second.connection_id
+        assert first.tables is database.tables
+        assert pool.active_connections == 2
+        assert pool.release_connection(first)
+        assert not pool.release_connection(first)
+        assert not pool.release_connection(PooledConnection(database, 99))
+        assert pool.get_connection() is first
+    
+    def test_release_foreign_connection_with_same_id(self):
+        database = DatabaseMock()
+        pool = BlockingConnectionPool(database, max_connections=1)
+        held = pool.get_connection()
+        
+        assert not pool.release_connection(PooledConnection(database, held.connection_id))
+        assert pool.active_connections == 1
+        assert pool.release_connection(held)
+    
+    def test_exhausted_pool_without_waiting(self):
+        pool = BlockingConnectionPool(DatabaseMock(), max_connections=1)
+        pool.get_connection()
+        
+        assert pool.get_connection(timeout=0) is None
+        started = time.monotonic()
+        assert pool.get_connection(timeout=0.05) is None
+        assert time.monotonic() - started >= 0.05
+        
+        stats = pool.get_pool_stats()
+        assert stats["timeouts"] == 2
+        assert stats["saturation"] == pytest.approx(2 / 3)
+        assert stats["utilization"] == 1.0
+    
+    def test_blocks_until_release(self):
+        pool = BlockingConnectionPool(DatabaseMock(), max_connections=1)
+        held = pool.get_connection()
+        timer = threading.Timer(0.05, pool.release_connection, args=(held,))
+        timer.start()
+        
+        assert pool.get_connection(timeout=5) is held
+        timer.join()
+        assert pool.get_pool_stats()["wait_max_ms"] >= 40
+    
+    def test_waiters_served_in_arrival_order(self):
+        pool = BlockingConnectionPool(DatabaseMock(), max_connections=1, timeout=5)
+        held = pool.get_connection()
+        order = []
+        
+        def waiter(index):
+            with pool.connection():
+                order.append(index)
+        
+        threads = []
+        for index in range(6):
+            thread = threading.Thread(target=waiter, args=(index,))
+            thread.start()
+            threads.append(thread)
+            while len(pool.connection_queue) <= index:
+                time.sleep(0.001)
+        pool.release_connection(held)
+        for thread in threads:
+            thread.join()
+        
+        assert order == list(range(6))
+    
+    def test_context_manager(self):
+        pool = BlockingConnectionPool(DatabaseMock(), max_connections=1)
+        with pytest.raises(KeyError):
+            with pool.connection() as connection:
+                raise KeyError("query failed")
+        assert pool.active_connections == 0
+        
+        with pool.connection():
+            with pytest.raises(PoolTimeout):
+                with pool.connection(timeout=0):
+                    pass
+    
+    def test_health_checks(self):
+        pool = BlockingConnectionPool(DatabaseMock(), max_connections=2,
+                                      health_check=lambda connection: connection.uses < 3)
+        connection = pool.get_connection()
+        connection.close()
+        pool.release_connection(connection)
+        
+        replacement = pool.get_connection()
+        assert replacement is not connection
+        pool.release_connection(replacement)
+        for _ in range(2):
+            assert pool.get_connection() is replacement
+            pool.release_connection(replacement)
+        
+        assert pool.get_connection() is not replacement
+        stats = pool.get_pool_stats()
+        assert stats["discarded"] == 2
+        assert stats["created"] == 3
+    
+    def test_max_lifetime(self):
+        pool = BlockingConnectionPool(DatabaseMock(), max_lifetime_seconds=0.01)
+        connection = pool.get_connection()
+        time.sleep(0.02)
+        pool.release_connection(connection)
+        
+        assert pool.get_connection() is not connection
+    
+    def test_concurrent_use_respects_limit(self):
+        results = benchmark_connection_pool(threads=16, operations_per_thread=10,
+                                            max_connections=3, hold_ms=0.2)
+        stats = results["pool_stats"]
+        
+        assert stats["acquired"] == 160
+        assert stats["peak_active"] == 3
+        assert stats["created"] == 3
+        assert stats["active_connections"] == 0
+    
+@pytest.fixture
+def sql_db():
+    """Database with users and orders tables populated through SQL."""
+    database = DatabaseMock()
+    database._create_storage("users", USER_SCHEMA)
+    database._create_storage("orders", {"id": {"type": "int"}, "user_id": {"type": "int"},
+                                        "total": {"type": "float"}})
+    database.execute_sql(
+        "INSERT INTO users (id, name, email, age, active) VALUES "
+        "(1, 'John Doe', 'john@example.com', 30, TRUE), "
+        "(2, 'Jane Smith', 'jane@example.com', 25, TRUE), "
+        "(3, 'Bob O''Brien', 'bob@example.com', 35, FALSE)"
+    )
+    database.execute_sql("INSERT INTO orders VALUES (1, 1, 9.5), (2, 1, 10.0), (3, 3, 2.25), (4, 9, 1.0)")
+    return database
+
+class TestSQL:
+    """Test the SQL subset behind execute_sql."""
+    
+    def test_select_where(self, sql_db):
+        """Test column selection with a WHERE clause."""
+        result = sql_db.execute_sql("SELECT name, email FROM users WHERE age > 25")
+        
+        assert result.success
+        assert result.data == [{"name": "John Doe", "email": "john@example.com"},
+                               {"name": "Bob O'Brien", "email": "bob@example.com"}]
+    
+    def test_select_with_parameters(self, sql_db):
+        """Test ? placeholders bind in order."""
+        result = sql_db.execute_sql("SELECT * FROM users WHERE active = ? AND age >= ?", [True, 30])
+        
+        assert [row["id"] for row in result.data] == [1]
+        assert result.data[0]["email"] == "john@example.com"
+    
+    def test_execute_raw_query(self, sql_db):
+        """Test the raw query entry point runs the SQL subset."""
+        result = sql_db.execute_raw_query("SELECT id FROM users WHERE age >= ?", [30])
+        failed = sql_db.execute_raw_query("SELECT * FROM missing")
+        
+        assert isinstance(result, QueryResult)
+        assert [row["id"] for row in result.data] == [1, 3]
+        assert not failed.success
+    
+    def test_parameter_count_mismatch(self, sql_db):
+        """Test a missing parameter fails the query."""
+        result = sql_db.execute_sql("SELECT * FROM users WHERE id = ?")
+        
+        assert not result.success
+        assert "parameters" in result.error_message
+    
+    def test_or_in_like_between(self, sql_db):
+        """Test predicates that are not plain conjunctions."""
+        query = ("SELECT id FROM users WHERE name LIKE 'Jane%' OR (age BETWEEN 31 AND 40 "
+                 "AND id NOT IN (1, 2)) ORDER BY id")
+        result = sql_db.execute_sql(query)
+        
+        assert [row["id"] for row in result.data] == [2, 3]
+    
+    def test_order_limit_offset(self, sql_db):
+        """Test ORDER BY DESC with LIMIT and OFFSET."""
+        result = sql_db.execute_sql("SELECT name AS who FROM users ORDER BY age DESC LIMIT 2 OFFSET 1")
+        
+        assert result.data == [{"who": "John Doe"}, {"who": "Jane Smith"}]
+    
+    def test_order_by_nulls(self, sql_db):
+        """Test several NULLs in the sort column sort last, or first when descending."""
+        sql_db.execute_sql("INSERT INTO orders VALUES (5, 2, NULL), (6, 2, NULL)")
+        
+        ascending = sql_db.execute_sql("SELECT id FROM orders ORDER BY total")
+        descending = sql_db.execute_sql("SELECT id FROM orders ORDER BY total DESC")
+        
+        assert ascending.success and descending.success
+        assert [row["id"] for row in ascending.data] == [4, 3, 1, 2, 5, 6]
+        assert [row["id"] for row in descending.data] == [5, 6, 2, 1, 3, 4]
+    
+    def test_inner_join(self, sql_db):
+        """Test a hash join between two tables."""
+        result = sql_db.execute_sql(
+            "SELECT u.name, o.total FROM users u JOIN orders o ON u.id = o.user_id ORDER BY o.total"
+        )
+        
+        assert result.data == [{"u.name": "Bob O'Brien", "o.total": 2.25},
+                               {"u.name": "John Doe", "o.total": 9.5},
+                               {"u.name": "John Doe", "o.total": 10.0}]
+    
+    def test_left_join_group_by(self, sql_db):
+        """Test LEFT JOIN keeps unmatched rows and aggregates per group."""
+        result = sql_db.execute_sql(
+            "SELECT u.name, COUNT(o.id) AS orders FROM users u "
+            "LEFT JOIN orders o ON o.user_id = u.id GROUP BY u.name ORDER BY u.name"
+        )
+        
+        assert result.data == [{"u.name": "Bob O'Brien", "orders": 1},
+                               {"u.name": "Jane Smith", "orders": 0},
+                               {"u.name": "John Doe", "orders": 2}]
+    
+    def test_aggregates_without_group_by(self, sql_db):
+        """Test aggregates over the whole table form one group."""
+        result = sql_db.execute_sql("SELECT COUNT(*), MAX(age), AVG(age) FROM users")
+        
+        assert result.data == [{"COUNT(*)": 3, "MAX(age)": 35, "AVG(age)": 30.0}]
+    
+    def test_ungrouped_column_rejected(self, sql_db):
+        """Test selecting a column outside GROUP BY is an error."""
+        result = sql_db.execute_sql("SELECT name, COUNT(*) FROM users")
+        
+        assert not result.success
+    
+    def test_update_with_expression(self, sql_db):
+        """Test SET expressions that read the current row."""
+        result = sql_db.execute_sql("UPDATE users SET age = age + 1 WHERE name LIKE '%John%'")
+        
+        assert result.success and result.rows_affected == 1
+        assert sql_db.execute_sql("SELECT age FROM users WHERE id = 1").data == [{"age": 31}]
+    
+    def test_update_static_values(self, sql_db):
+        """Test a static SET goes through the bulk update path."""
+        result = sql_db.execute_sql("UPDATE users SET active = ? WHERE age < 35", [False])
+        
+        assert result.rows_affected == 2
+        assert sql_db.execute_sql("SELECT COUNT(*) AS n FROM users WHERE active = FALSE").data == [{"n": 3}]
+    
+    def test_delete(self, sql_db):
+        """Test DELETE with an OR condition."""
+        result = sql_db.execute_sql("DELETE FROM users WHERE active = FALSE OR age > 100")
+        
+        assert result.rows_affected == 1
+        assert len(sql_db.tables["users"]) == 2
+    
+    def test_uses_indexes(self, sql_db):
+        """Test conjunctive WHERE clauses reach the query planner."""
+        sql_db.create_index("users", "id")
+        
+        with patch.object(sql_db, "plan_query", wraps=sql_db.plan_query) as plan:
+            result = sql_db.execute_sql("SELECT name FROM users WHERE id = ?", [2])
+        
+        assert result.data == [{"name": "Jane Smith"}]
+        assert plan.call_args[0][1] == {"id": {"=": 2}}
+    
+    def test_errors_return_failed_result(self, sql_db):
+        """Test syntax errors and unknown tables fail without raising."""
+        for query in ["SELEC * FROM users", "SELECT * FROM missing", "SELECT * FROM users WHERE",
+                      "SELECT * FROM users WHERE name = 'unterminated"]:
+            result = sql_db.execute_sql(query)
+            assert not result.success
+            assert result.error_message
+    
+    def test_compile_errors(self):
+        """Test compile_sql raises SQLSyntaxError."""
+        with pytest.raises(SQLSyntaxError):
+            compile_sql("SELECT FROM")
+    
+    def test_plan_cache(self, sql_db):
+        """Test repeated query text reuses the compiled statement."""
+        query = "SELECT id, age FROM users WHERE age = ?"
+        before = compile_sql.cache_info()
+        for age in (25, 30, 35):
+            sql_db.execute_sql(query, [age])
+        after = compile_sql.cache_info()
+        
+        assert after.misses - before.misses == 1
+        assert after.hits - before.hits == 2
+        assert compile_sql(query) is compile_sql(query)
+
+@pytest.fixture
+def durable_db(tmp_path):
+    """Persistent database with one table per storage engine."""
+    database = DatabaseMock()
+    database.enable_persistence(str(tmp_path), checkpoint_every=0)
+    database._create_storage("users", USER_SCHEMA)
+    database._create_storage("events", {"id": {"type": "int"}, "kind": {"type": "str"}}, "columnar")
+    database._create_storage("accounts", {"id": {"type": "int"}, "balance": {"type": "int"}}, "mvcc")
+    for row in make_users(20):
+        database._store_row("users", row)
+        database._store_row("events", {"id": row["id"], "kind": "login"})
+        database._store_row("accounts", {"id": row["id"], "balance": 100})
+    database.create_index("users", "age", "sorted")
+    return database
+
+def table_state(database):
+    """Comparable contents of the durable_db tables."""
+    return (
+        [dict(row) for row in database.tables["users"]],
+        list(database.tables["events"]),
+        sorted((row["id"], row["balance"]) for row in database.tables["accounts"]),
+        {column: index.kind for column, index in database.indexes.get("users", {}).items()}
+    )
+
+def reopen(path):
+    """Load a persistent database from a directory into a new DatabaseMock."""
+    database = DatabaseMock()
+    stats = database.enable_persistence(str(path), checkpoint_every=0)
+    return database, stats
+
+class TestPersistence:
+    """Test the write-ahead log and snapshots."""
+    
+    def test_replays_log_without_checkpoint(self, durable_db, tmp_path):
+        """Test every kind of write survives a restart through the log alone."""
+        durable_db.execute_sql("UPDATE users SET age = age + 100 WHERE id < 3")
+        durable_db._update_rows("accounts", {"id": 1}, {"balance": 50})
+        durable_db._delete_rows("events", {"id": {">": 15}})
+        durable_db._remove_rows("users", durable_db.find_rows("users", {"id": 19}))
+        durable_db._update_row("users", durable_db.find_rows("users", {"id": 18})[0], {"name": "renamed"})
+        expected = table_state(durable_db)
+        durable_db.persistence.close()
+        
+        reopened, stats = reopen(tmp_path)
+        
+        assert table_state(reopened) == expected
+        assert stats["tables"] == 0
+        assert stats["replayed"] > 60
+        assert reopened.explain("users", {"age": {">": 100}})["access"] == "index"
+    
+    def test_checkpoint_concurrent_with_writes(self, durable_db, tmp_path):
+        """Test writes made while checkpoints run end up in the snapshot or the new log."""
+        done = threading.Event()
+        
+        def writer():
+            for i in range(100, 400):
+                durable_db._store_row("users", {"id": i, "name": f"user{i}", "email": f"u{i}@x",
+                                                "age": 30, "active": True})
+            done.set()
+        
+        thread = threading.Thread(target=writer)
+        thread.start()
+        while not done.is_set():
+            durable_db.checkpoint()
+        thread.join()
+        expected = table_state(durable_db)
+        durable_db.persistence.close()
+        
+        reopened, _ = reopen(tmp_path)
+        
+        assert len(reopened.tables["users"]) == 320
+        assert table_state(reopened) == expected
+    
+    def test_checkpoint_then_tail(self, durable_db, tmp_path):
+        """Test startup loads the snapshot and replays only later records."""
+        durable_db.checkpoint()
+        durable_db._store_row("users", {"id": 100, "name": "late", "email": "late@example.com",
+                                        "age": 40, "active": True})
+        expected = table_state(durable_db)
+        durable_db.persistence.close()
+        
+        reopened, stats = reopen(tmp_path)
+        
+        assert table_state(reopened) == expected
+        assert stats["tables"] == 3
+        assert stats["rows"] == 60
+        assert stats["replayed"] == 1
+    
+    def test_failed_writes_are_not_logged(self, durable_db, tmp_path):
+        """Test a write that changes nothing leaves no record."""
+        durable_db.checkpoint()
+        result = durable_db.execute_sql("INSERT INTO users (id) VALUES (1, 2)")
+        
+        assert not result.success
+        assert durable_db.persistence.records_since_checkpoint == 0
+    
+    def test_torn_tail_is_discarded(self, durable_db, tmp_path):
+        """Test a partial record at the end of the log is ignored and truncated."""
+        durable_db.checkpoint()
+        durable_db._store_row("users", {"id": 100, "name": "kept"})
+        durable_db.persistence.close()
+        wal_path = tmp_path / "wal.log"
+        intact_size = wal_path.stat().st_size
+        with open(wal_path, "ab") as wal:
+            wal.write(b"\x40\x00\x00\x00\x00\x00\x00\x00partial")
+        
+        reopened, stats = reopen(tmp_path)
+        
+        assert stats["replayed"] == 1
+        assert reopened.tables["users"][-1]["name"] == "kept"
+        assert wal_path.stat().st_size == intact_size
+    
+    def test_stale_log_generation_is_skipped(self, durable_db, tmp_path):
+        """Test a log left behind by a crash during checkpoint is not replayed twice."""
+        durable_db.persistence.close()
+        stale_log = (tmp_path / "wal.log").read_bytes()
+        durable_db.persistence = DurableStorage(str(tmp_path))
+        durable_db.persistence.read_snapshot()
+        durable_db.persistence.recover()
+        durable_db.checkpoint()
+        durable_db.persistence.close()
+        (tmp_path / "wal.log").write_bytes(stale_log)
+        
+        reopened, stats = reopen(tmp_path)
+        
+        assert stats["replayed"] == 0
+        assert len(reopened.tables["users"]) == 20
+    
+    def test_automatic_checkpoint(self, tmp_path):
+        """Test the log is folded into a snapshot every checkpoint_every records."""
+        database = DatabaseMock()
+        database.enable_persistence(str(tmp_path), checkpoint_every=5)
+        database._create_storage("users", USER_SCHEMA)
+        for row in make_users(7):
+            database._store_row("users", row)
+        
+        assert database.persistence.generation == 2
+        assert database.persistence.records_since_checkpoint == 3
+        
+        database.disable_persistence()
+        reopened, stats = reopen(tmp_path)
+        assert stats["rows"] == 7 and stats["replayed"] == 0
+    
+    def test_existing_tables_are_checkpointed(self, tmp_path):
+        """Test enabling persistence on a populated database saves it."""
+        database = DatabaseMock()
+        database._create_storage("users", USER_SCHEMA)
+        for row in make_users(5):
+            database._store_row("users", row)
+        database.enable_persistence(str(tmp_path))
+        
+        with pytest.raises(ValueError):
+            database.enable_persistence(str(tmp_path))
+        
+        reopened, stats = reopen(tmp_path)
+        assert reopened.tables["users"] == make_users(5)
+    
+    def test_mvcc_writes_inside_transaction_rejected(self, durable_db):
+        """Test uncommitted MVCC writes cannot reach the log."""
+        durable_db.current_transaction = durable_db.begin_snapshot()
+        
+        with pytest.raises(ValueError):
+            durable_db._update_rows("accounts", {"id": 1}, {"balance": 0})
+        
+        durable_db.current_transaction.rollback()
+    
+    def test_snapshot_uses_typed_columns(self, durable_db, tmp_path):
+        """Test homogeneous columns are stored as raw arrays."""
+        durable_db.checkpoint()
+        
+        with open(tmp_path / "snapshot.db", "rb") as snapshot:
+            data = snapshot.read()
+        
+        # 20 ids as 8-byte integers appear contiguously
+        assert b"".join(i.to_bytes(8, "little") for i in range(20)) in data
+
+BULK_SCHEMA = {
+    "id": {"type": "int", "primary_key": True, "auto_increment": True},
+    "name": {"type": "str", "nullable": False, "max_length": 10},
+    "email": {"type": "str", "unique": True},
+    "score": {"type": "float"}
+}
+
+@pytest.fixture(params=["row", "columnar", "mvcc"])
+def bulk_db(request):
+    """Empty table with constraints, once per storage engine."""
+    database = DatabaseMock()
+    database._create_storage("users", BULK_SCHEMA, request.param)
+    return database
+
+def bulk_rows(count, start=1):
+    return [{"id": i, "name": f"u{i}", "email": f"u{i}@example.com", "score": i / 2}
+            for i in range(start, start + count)]
+
+class TestBulkInsert:
+    """Test the bulk_insert fast path."""
+    
+    def test_inserts_batch_with_one_log_entry(self, bulk_db):
+        """Test a valid batch is stored and logged once."""
+        rows = bulk_rows(50)
+        
+        result = bulk_db.bulk_insert("users", rows)
+        
+        assert result.success and result.rows_affected == 50
+        assert len(bulk_db.find_rows("users")) == 50
+        assert bulk_db.find_rows("users", {"email": "u7@example.com"})[0]["score"] == 3.5
+        assert len(bulk_db.query_log) == 1
+        assert bulk_db.query_log[0]["rows_affected"] == 50
+        assert bulk_db.query_log[0]["query_type"] == QueryType.INSERT.value
+    
+    def test_caller_rows_are_copied(self, bulk_db):
+        """Test stored rows are not the caller's dicts."""
+        rows = [{"name": "a", "email": "a@example.com"}]
+        
+        bulk_db.bulk_insert("users", rows)
+        
+        assert rows == [{"name": "a", "email": "a@example.com"}]
+    
+    def test_auto_increment(self, bulk_db):
+        """Test missing ids continue after the largest id."""
+        bulk_db.bulk_insert("users", bulk_rows(3, start=10))
+        
+        bulk_db.bulk_insert("users", [{"name": "x", "email": "x@example.com"},
+                                      {"name": "y", "email": "y@example.com", "id": None}])
+        
+        ids = sorted(row["id"] for row in bulk_db.find_rows("users"))
+        assert ids == [10, 11, 12, 13, 14]
+    
+    def test_nullable_columns_accept_none(self, bulk_db):
+        """Test None passes type checks on nullable columns."""
+        result = bulk_db.bulk_insert("users", [{"id": 1, "name": "a", "email": None, "score": None}])
+        
+        assert result.success
+    
+    @pytest.mark.parametrize("bad_row, message", [
+        ({"id": 100, "name": None}, "cannot be null"),
+        ({"id": 100, "name": "a", "score": "high"}, "must be float"),
+        ({"id": True, "name": "a"}, "must be int"),
+        ({"id": 100, "name": "much too long"}, "longer than 10"),
+        ({"id": 100, "name": "a", "extra": 1}, "unknown column"),
+        ({"id": 100, "name": "a", "email": "u1@example.com"}, "duplicate email"),
+        ({"id": 2, "name": "a"}, "already exists"),
+    ])
+    def test_rejects_invalid_batch(self, bulk_db, bad_row, message):
+        """Test one bad row rejects the whole batch and names the row."""
+        bulk_db.bulk_insert("users", bulk_rows(2, start=2))
+        batch = bulk_rows(3, start=1)[:1] + [bad_row]
+        batch[0]["id"] = 50
+        
+        result = bulk_db.bulk_insert("users", batch)
+        
+        assert not result.success
+        assert "Row 1" in result.error_message and message in result.error_message
+        assert len(bulk_db.find_rows("users")) == 2
+    
+    def test_uses_indexes_for_uniqueness(self, db):
+        """Test stored values are found through a hash index."""
+        db.create_index("users", "email")
+        db.table_schemas["users"] = {"email": {"type": "str", "unique": True}}
+        
+        errors = db.validate_batch("users", [{"email": "user5@example.com"},
+                                             {"email": "new@example.com"}])
+        
+        assert errors == ["Row 0: email 'user5@example.com' already exists"]
+    
+    def test_deferred_constraints(self, bulk_db):
+        """Test uniqueness checks can run once after several batches."""
+        bulk_db.bulk_insert("users", bulk_rows(5), defer_constraints=True)
+        result = bulk_db.bulk_insert("users", bulk_rows(2, start=5), defer_constraints=True)
+        
+        assert result.success
+        assert bulk_db.check_constraints() == [
+            "users.id: 5 appears 2 times",
+            "users.email: 'u5@example.com' appears 2 times"
+        ]
+        assert bulk_db.check_constraints() == []
+    
+    def test_missing_table(self):
+        """Test bulk_insert into an unknown table fails."""
+        result = DatabaseMock().bulk_insert("missing", bulk_rows(1))
+        
+        assert not result.success
+    
+    def test_columnar_extend_is_atomic(self):
+        """Test a bad value leaves every column at its old length."""
+        table = ColumnarTable({"id": {"type": "int"}, "name": {"type": "str"}})
+        table.extend([{"id": 1, "name": "a"}])
+        
+        with pytest.raises(TypeError):
+            table.extend([{"id": 2, "name": "b"}, {"id": 3, "name": 4}])
+        
+        assert list(table) == [{"id": 1, "name": "a"}]
+        assert len(table.columns["id"].values) == 1
+    
+    def test_index_batches(self):
+        """Test add_many and indexed_values on both index types."""
+        rows = [{"v": value} for value in (3, 1, None, 3)]
+        for index in (HashIndex("v"), SortedIndex("v")):
+            index.add_many(rows)
+            
+            assert len(index) == 4
+            assert index.indexed_values({1, 2, 3}) == {1, 3}
+            assert index.candidates([("=", 3)]) == [rows[0], rows[3]]
+    
+    def test_logged_as_one_record(self, tmp_path):
+        """Test a persistent bulk insert writes one log record and replays."""
+        database = DatabaseMock()
+        database.enable_persistence(str(tmp_path), checkpoint_every=0)
+        database._create_storage("users", BULK_SCHEMA)
+        database.persistence.records_since_checkpoint = 0
+        
+        database.bulk_insert("users", bulk_rows(100))
+        
+        assert database.persistence.records_since_checkpoint == 1
+        database.persistence.close()
+        reopened, stats = reopen(tmp_path)
+        assert len(reopened.tables["users"]) == 100
+
+def log_entry(number, query_type="SELECT", latency_ms=0.2):
+    return {"id": number, "query_type": query_type, "execution_time_ms": latency_ms}
+
+class TestQueryLog:
+    """Test the bounded, sampled query log."""
+    
+    def test_ring_keeps_newest(self):
+        """Test the oldest entries are dropped at capacity."""
+        log = QueryLog(capacity=3)
+        for number in range(5):
+            log.append(log_entry(number))
+        
+        assert len(log) == 3
+        assert [entry["id"] for entry in log] == [2, 3, 4]
+        assert log[0]["id"] == 2
+    
+    def test_recent(self):
+        """Test recent() returns the newest entries oldest first."""
+        log = QueryLog(capacity=10)
+        for number in range(6):
+            log.append(log_entry(number))
+        
+        assert [entry["id"] for entry in log.recent(2)] == [4, 5]
+        assert len(log.recent()) == 6
+        assert log.recent(0) == []
+    
+    def test_sampling_is_deterministic(self):
+        """Test a 0.25 sample rate stores every fourth entry."""
+        log = QueryLog(capacity=100, sample_rate=0.25)
+        stored = [log.append(log_entry(number)) for number in range(8)]
+        
+        assert stored == [False, False, False, True] * 2
+        assert [entry["id"] for entry in log] == [3, 7]
+        assert log.recorded == 8
+    
+    def test_counters_include_unsampled_entries(self):
+        """Test counters see every entry regardless of sampling."""
+        log = QueryLog(capacity=1, sample_rate=0.0)
+        for number in range(5):
+            log.append(log_entry(number, "INSERT" if number % 2 else "SELECT"))
+        
+        assert len(log) == 0
+        assert log.counters == {"SELECT": 3, "INSERT": 2}
+    
+    def test_latency_summary(self):
+        """Test percentiles come from the histogram buckets."""
+        log = QueryLog()
+        for latency in [0.2] * 90 + [4.0] * 9 + [700.0]:
+            log.append(log_entry(0, latency_ms=latency))
+        
+        summary = log.latency_summary()["SELECT"]
+        
+        assert summary["count"] == 100
+        assert summary["p50_ms"] == 0.25
+        assert summary["p95_ms"] == 5
+        assert summary["p99_ms"] == 5
+        assert summary["buckets"] == {0.25: 90, 5: 9, 1000: 1}
+    
+    def test_optional_stats(self):
+        """Test counters and histograms can be switched off."""
+        log = QueryLog(counters=False, histograms=False)
+        log.append(log_entry(0))
+        
+        assert log.counters is None
+        assert log.latency_summary() == {}
+    
+    def test_clear(self):
+        """Test clear() resets entries and statistics."""
+        log = QueryLog()
+        log.append(log_entry(0))
+        log.clear()
+        
+        assert len(log) == 0 and log.recorded == 0
+        assert log.counters == {} and log.latency_summary() == {}
+    
+    @pytest.mark.parametrize("kwargs", [{"capacity": 0}, {"sample_rate": 1.5}])
+    def test_invalid_settings(self, kwargs):
+        """Test out-of-range settings are rejected."""
+        with pytest.raises(ValueError):
+            QueryLog(**kwargs)
+    
+    def test_database_log_is_bounded(self):
+        """Test DatabaseMock logs into a configurable ring."""
+        database = DatabaseMock()
+        database._create_storage("users", BULK_SCHEMA)
+        log = database.configure_query_log(capacity=2)
+        for start in range(1, 30, 10):
+            database.bulk_insert("users", bulk_rows(10, start=start))
+        
+        assert database.query_log is log
+        assert len(log) == 2
+        assert log.counters[QueryType.INSERT.value] == 3
+    
+    def test_get_query_log(self):
+        """Test get_query_log returns the newest entries from the ring."""
+        database = DatabaseMock()
+        database._create_storage("users", BULK_SCHEMA)
+        for start in range(1, 30, 10):
+            database.bulk_insert("users", bulk_rows(10, start=start))
+        
+        newest = database.get_query_log(2)
+        
+        assert newest == list(database.query_log)[-2:]
+        assert len(database.get_query_log()) == 3
+
+@pytest.fixture
+def async_db():
+    """AsyncDatabaseMock over a users table with a schema and no latency."""
+    database = DatabaseMock()
+    database._create_storage("users", USER_SCHEMA)
+    database._store_rows("users", make_users(20))
+    return AsyncDatabaseMock(database)
+
+class TestAsyncDatabaseMock:
+    """Test the asyncio facade and pool."""
+    
+    @pytest.mark.asyncio
+    async def test_select_filters_orders_and_projects(self, async_db):
+        result = await async_db.select("users", {"age": {"<": 25}}, columns=["id"],
+                                       order_by="id DESC", limit=3, offset=1)
+        
+        assert result.success
+        assert [row["id"] for row in result.data] == [3, 2, 1]
+        assert result.rows_affected == 3
+        assert async_db.database.query_log[-1]["query_type"] == "SELECT"
+    
+    @pytest.mark.asyncio
+    async def test_select_orders_nulls_last(self, async_db):
+        async_db.database._store_rows("users", [
+            {"id": 50, "name": "a", "email": "a@x", "age": None, "active": True},
+            {"id": 51, "name": "b", "email": "b@x", "age": None, "active": True},
+        ])
+        result = await async_db.select("users", order_by="age", columns=["id"])
+        
+        assert result.success
+        assert [row["id"] for row in result.data[-2:]] == [50, 51]
+    
+    @pytest.mark.asyncio
+    async def test_select_returns_copies(self, async_db):
+        result = await async_db.select("users", {"id": 1})
+        result.data[0]["name"] = "changed"
+        
+        assert async_db.database.find_rows("users", {"id": 1})[0]["name"] == "user1"
+    
+    @pytest.mark.asyncio
+    async def test_insert_update_delete(self, async_db):
+        inserted = await async_db.insert("users", {"id": 100, "name": "new", "email": "n@x",
+                                                   "age": 30, "active": True})
+        updated = await async_db.update("users", {"age": 31}, {"id": 100})
+        deleted = await async_db.delete("users", {"age": {">=": 60}})
+        
+        assert inserted.success and inserted.data[0]["id"] == 100
+        assert updated.rows_affected == 1
+        assert async_db.database.find_rows("users", {"id": 100})[0]["age"] == 31
+        assert deleted.success
+    
+    @pytest.mark.asyncio
+    async def test_invalid_insert_and_missing_table(self, async_db):
+        duplicate = await async_db.insert("users", {"id": 1, "name": "x", "email": "x",
+                                                    "age": 1, "active": True})
+        missing = await async_db.select("nope")
+        
+        assert not duplicate.success
+        assert not missing.success and "does not exist" in missing.error_message
+        assert len(async_db.database.find_rows("users")) == 20
+    
+    @pytest.mark.asyncio
+    async def test_simulated_failure(self, async_db):
+        async_db.database.failure_rate = 1.0
+        
+        result = await async_db.select("users")
+        
+        assert not result.success
+        assert result.error_message == "Simulated database failure"
+    
+    @pytest.mark.asyncio
+    async def test_latency_overlaps(self, async_db):
+        async_db.database.latency_simulation = 50
+        started = time.perf_counter()
+        
+        results = await asyncio.gather(*(async_db.select("users", {"id": i}) for i in range(20)))
+        
+        assert all(result.rows_affected == 1 for result in results)
+        assert time.perf_counter() - started < 0.5
+    
+    @pytest.mark.asyncio
+    async def test_transactions_are_per_facade(self, mvcc_db):
+        writer, reader = AsyncDatabaseMock(mvcc_db), AsyncDatabaseMock(mvcc_db)
+        
+        async with writer.transaction_scope():
+            await writer.update("accounts", {"balance": 0}, {"id": 0})
+            inside = await reader.select("accounts", {"id": 0})
+            assert inside.data[0]["balance"] == 100
+            assert mvcc_db.current_transaction is None
+        after = await reader.select("accounts", {"id": 0})
+        
+        assert after.data[0]["balance"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_transaction_rolls_back_on_error(self, mvcc_db):
+        connection = AsyncDatabaseMock(mvcc_db)
+        
+        with pytest.raises(RuntimeError):
+            async with connection.transaction_scope():
+                await connection.delete("accounts", {"id": 0})
+                raise RuntimeError("boom")
+        
+        assert len((await connection.select("accounts")).data) == 3
+        assert await connection.begin_transaction()
+        assert not await connection.begin_transaction()
+        assert await connection.rollback_transaction()
+        assert not await connection.commit_transaction()
+    
+    @pytest.mark.asyncio
+    async def test_pool_limits_and_reuses_connections(self):
+        pool = AsyncConnectionPool(DatabaseMock(), max_connections=2)
+        first, second = await pool.get_connection(), await pool.get_connection()
+        
+        assert first is not second
+        assert await pool.get_connection(timeout=0) is None
+        assert await pool.get_connection(timeout=0.01) is None
+        assert await pool.release_connection(first)
+        assert not await pool.release_connection(first)
+        assert await pool.get_connection() is first
+        
+        stats = pool.get_pool_stats()
+        assert stats["created_connections"] == 2
+        assert stats["timeouts"] == 2
+        assert stats["active_connections"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_pool_waiters_served_in_order(self):
+        pool = AsyncConnectionPool(DatabaseMock(), max_connections=1, timeout=5)
+        held = await pool.get_connection()
+        order = []
+        
+        async def waiter(number):
+            async with pool.connection() as connection:
+                order.append(number)
+                await asyncio.sleep(0)
+        
+        tasks = [asyncio.create_task(waiter(number)) for number in range(5)]
+        await asyncio.sleep(0.01)
+        await pool.release_connection(held)
+        await asyncio.gather(*tasks)
+        
+        assert order == list(range(5))
+        assert pool.get_pool_stats()["created_connections"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_pool_newcomer_does_not_overtake_waiter(self):
+        pool = AsyncConnectionPool(DatabaseMock(), max_connections=1, timeout=5)
+        held = await pool.get_connection()
+        waiting = asyncio.create_task(pool.get_connection())
+        expired = asyncio.create_task(pool.get_connection(timeout=0.01))
+        await asyncio.sleep(0.05)
+        
+        await pool.release_connection(held)
+        
+        # The released connection already belongs to the waiting task
+        assert await pool.get_connection(timeout=0) is None
+        assert await expired is None
+        assert await waiting is held
+        assert pool.get_pool_stats()["active_connections"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_pool_connection_raises_on_timeout(self, mvcc_db):
+        pool = AsyncConnectionPool(mvcc_db, max_connections=1)
+        held = await pool.get_connection()
+        await held.begin_transaction()
+        
+        with pytest.raises(PoolTimeout):
+            async with pool.connection(timeout=0.01):
+                pass
+        await pool.release_connection(held)
+        assert held.transaction is None
+
+@pytest.fixture
+def sharded_db():
+    """Database with the users table hash-partitioned across four shards."""
+    database = DatabaseMock()
+    database.shard_count = 4
+    database._create_storage("users", USER_SCHEMA, "sharded")
+    database._store_rows("users", make_users(200))
+    return database
+
+class TestShardedStorage:
+    """Test hash-partitioned storage with per-shard locks."""
+    
+    def test_rows_spread_across_shards(self, sharded_db):
+        table = sharded_db.tables["users"]
+        
+        assert isinstance(table, ShardedTable)
+        assert len(table) == 200
+        assert sum(table.shard_sizes()) == 200
+        assert min(table.shard_sizes()) > 0
+        assert all(table.shard_for(row["id"]).rows[row["id"]] == row for row in table)
+    
+    def test_find_matches_row_storage(self, sharded_db, db):
+        for conditions in ({"id": 7}, {"id": {"in": [1, 2, 500]}}, {"age": {">=": 60}},
+                           {"active": False, "age": 21}, None):
+            expected = sorted(row["id"] for row in db.find_rows("users", conditions))
+            assert sorted(row["id"] for row in sharded_db.find_rows("users", conditions)) == expected
+    
+    def test_point_lookup_locks_one_shard(self, sharded_db):
+        table = sharded_db.tables["users"]
+        other = next(shard for shard in table.shards if shard is not table.shard_for(7))
+        acquired = threading.Event()
+        
+        def hold():
+            with other.lock:
+                acquired.set()
+                time.sleep(0.2)
+        
+        holder = threading.Thread(target=hold)
+        holder.start()
+        acquired.wait()
+        started = time.monotonic()
+        assert sharded_db.find_rows("users", {"id": 7})[0]["name"] == "user7"
+        assert time.monotonic() - started < 0.1
+        holder.join()
+    
+    def test_returns_copies(self, sharded_db):
+        sharded_db.find_rows("users", {"id": 1})[0]["name"] = "changed"
+        
+        assert sharded_db.find_rows("users", {"id": 1})[0]["name"] == "user1"
+    
+    def test_update_and_delete_keep_indexes_current(self, sharded_db):
+        assert sharded_db.create_index("users", "age", "sorted").success
+        assert not sharded_db.create_index("users", "age").success
+        
+        assert sharded_db._update_rows("users", {"age": 20}, {"age": 99}) == 4
+        assert sharded_db._delete_rows("users", {"age": {">": 68}}) == 8
+        
+        assert sharded_db.find_rows("users", {"age": 20}) == []
+        assert sharded_db.find_rows("users", {"age": 99}) == []
+        assert len(sharded_db.tables["users"]) == 192
+        assert sharded_db.drop_index("users", "age")
+        assert not sharded_db.drop_index("users", "age")
+    
+    def test_primary_key_rules(self, sharded_db):
+        table = sharded_db.tables["users"]
+        
+        with pytest.raises(ValueError, match="Duplicate"):
+            table.insert({"id": 5})
+        with pytest.raises(ValueError, match="Duplicate"):
+            table.insert_many([{"id": 1000}, {"id": 3}])
+        with pytest.raises(ValueError, match="cannot be updated"):
+            table.update({"id": 1}, {"id": 2})
+        with pytest.raises(ValueError, match="primary key"):
+            sharded_db._create_storage("logs", {"message": {"type": "str"}}, "sharded")
+        assert len(table) == 200
+        assert sharded_db.validate_batch("users", [{"id": 5, "name": "x"}]) == [
+            "Row 0: id 5 already exists"]
+    
+    def test_concurrent_writers_lose_no_updates(self, sharded_db):
+        table = sharded_db.tables["users"]
+        
+        def writer(offset):
+            for i in range(200):
+                key = (i + offset) % 200
+                with table.shard_for(key).lock:
+                    age = sharded_db.find_rows("users", {"id": key})[0]["age"]
+                    sharded_db._update_rows("users", {"id": key}, {"age": age + 1})
+            table.insert_many([{"id": 1000 + offset * 100 + i} for i in range(100)])
+        
+        workers = [threading.Thread(target=writer, args=(offset,)) for offset in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        assert sharded_db.aggregate("users", "age", "sum") == sum(20 + i % 50 for i in range(200)) + 1600
+        assert len(table) == 1000
+    
+    def test_survives_checkpoint_and_restart(self, tmp_path):
+        database = DatabaseMock()
+        database.enable_persistence(str(tmp_path), checkpoint_every=0)
+        database._create_storage("users", USER_SCHEMA, "sharded")
+        database._store_rows("users", make_users(20))
+        database.create_index("users", "age")
+        database.checkpoint()
+        database._update_rows("users", {"id": 3}, {"name": "renamed"})
+        database.persistence.close()
+        
+        reopened, _ = reopen(tmp_path)
+        
+        assert sorted(reopened.tables["users"], key=lambda row: row["id"]) == sorted(
+            database.tables["users"], key=lambda row: row["id"])
+        assert reopened.tables["users"].index_kinds == {"age": "hash"}
+
+@pytest.fixture(params=["row", "columnar", "mvcc", "sharded"])
+def cursor_db(request):
+    """Users table with a few NULL ages, once per storage engine."""
+    database = DatabaseMock()
+    database._create_storage("users", USER_SCHEMA, request.param)
+    rows = make_users(50)
+    for row in rows[::7]:
+        row["age"] = None
+    database._store_rows("users", rows)
+    return database
+
+def ordered_ids(rows, descending=False):
+    """Ids ordered by age with NULLs last (first when descending), ties by table order."""
+    present = sorted((row for row in rows if row["age"] is not None),
+                     key=lambda row: row["age"], reverse=descending)
+    nulls = [row for row in rows if row["age"] is None]
+    return [row["id"] for row in (nulls + present if descending else present + nulls)]
+
+class TestCursor:
+    """Test lazy cursors over select results."""
+    
+    def test_returns_find_rows_results(self, cursor_db):
+        for conditions in (None, {"active": True}, {"age": {"<": 30}}, {"id": {"in": [3, 4]}}):
+            with cursor_db.cursor("users", conditions) as cursor:
+                rows = cursor.fetchall()
+            assert rows == cursor_db.find_rows("users", conditions)
+    
+    def test_fetchmany_batches(self, cursor_db):
+        cursor = cursor_db.cursor("users", arraysize=20)
+        
+        assert isinstance(cursor, Cursor)
+        assert len(cursor.fetchmany()) == 20
+        assert len(cursor.fetchmany(25)) == 25
+        assert cursor.fetchone()["id"] is not None
+        assert len(cursor.fetchmany()) == 4
+        assert cursor.closed
+        assert cursor.rownumber == 50
+        assert cursor.fetchmany() == [] and cursor.fetchone() is None
+    
+    def test_limit_offset_and_order(self, cursor_db):
+        for descending in (False, True):
+            order_by = "age DESC" if descending else "age"
+            expected = ordered_ids(list(cursor_db.tables["users"]), descending)
+            ordered = [row["id"] for row in cursor_db.cursor("users", order_by=order_by)]
+            limited = [row["id"] for row in cursor_db.cursor("users", limit=5, offset=3,
+                                                               order_by=order_by)]
+            assert ordered == expected
+            assert limited == expected[3:8]
+        unordered = cursor_db.cursor("users", limit=4, offset=10).fetchall()
+        assert unordered == list(cursor_db.tables["users"])[10:14]
+    
+    def test_projects_columns(self, cursor_db):
+        rows = cursor_db.cursor("users", {"id": 8}, columns=["id", "name", "missing"]).fetchall()
+        
+        assert rows == [{"id": 8, "name": "user8", "missing": None}]
+    
+    def test_copies_rows_when_fetched(self, db):
+        cursor = db.cursor("users", {"id": {"in": [1, 2]}})
+        first = cursor.fetchone()
+        db.find_rows("users", {"id": 2})[0]["name"] = "renamed"
+        second = cursor.fetchone()
+        first["name"] = "changed"
+        
+        assert second["name"] == "renamed"
+        assert db.find_rows("users", {"id": 1})[0]["name"] == "user1"
+    
+    def test_limit_stops_the_scan(self, db):
+        calls = []
+        original = db.plan_query
+        
+        def counting_plan(table_name, conditions=None):
+            plan = original(table_name, conditions)
+            predicate = plan.predicate
+            plan.predicate = lambda row: calls.append(row["id"]) or predicate(row)
+            return plan
+        
+        db.plan_query = counting_plan
+        rows = db.cursor("users", {"active": True}, limit=2).fetchall()
+        
+        assert [row["id"] for row in rows] == [1, 2]
+        assert calls == [0, 1, 2]
+    
+    def test_mvcc_cursor_reads_its_snapshot(self, mvcc_db):
+        cursor = mvcc_db.cursor("accounts", arraysize=1)
+        mvcc_db._update_rows("accounts", {}, {"balance": 0})
+        
+        assert [row["balance"] for row in cursor] == [100, 100, 100]
+        assert not mvcc_db.transactions.is_running(mvcc_db.transactions.next_txid - 1)
+        assert mvcc_db.vacuum("accounts") == 3
+    
+    def test_columnar_cursor_survives_compacting_delete(self):
+        database = DatabaseMock()
+        database._create_storage("c", {"id": {"type": "int"}, "name": {"type": "str"}}, "columnar")
+        database._store_rows("c", [{"id": i, "name": f"row{i}"} for i in range(10)])
+        table = database.tables["c"]
+        
+        cursor = database.cursor("c", arraysize=2)
+        assert [row["id"] for row in cursor.fetchmany()] == [0, 1]
+        assert database._delete_rows("c", {"id": {"<": 8}}) == 8
+        
+        # Compaction waits for the cursor; deleted rows are skipped meanwhile
+        assert table.deleted_count == 8
+        assert [row["id"] for row in cursor.fetchall()] == [8, 9]
+        assert cursor.closed
+        assert table.deleted_count == 0
+        assert [row["id"] for row in table] == [8, 9]
+    
+    def test_errors(self, db):
+        with pytest.raises(ValueError, match="does not exist"):
+            db.cursor("missing")
+        with pytest.raises(ValueError, match="order_by"):
+            db.cursor("users", order_by="age SIDEWAYS")
+        db.set_failure_profile(FailureProfile.rate(1.0), "users", QueryType.SELECT)
+        with pytest.raises(ConnectionError):
+            db.cursor("users")
+    
+    def test_logs_rows_fetched_on_close(self, db):
+        with db.cursor("users", {"age": 20}) as cursor:
+            cursor.fetchmany(2)
+        
+        entry = db.query_log[-1]
+        assert entry["cursor"] and entry["rows_affected"] == 2
+    
+    def test_sql_order_by_with_several_nulls(self, db):
+        for row in db.find_rows("users", {"id": {"in": [1, 2, 3]}}):
+            row["age"] = None
+        
+        result = db.execute_sql("SELECT id FROM users ORDER BY age DESC LIMIT 4")
+        
+        assert [row["id"] for row in result.data] == [1, 2, 3, 49]
+
+class FakeClock:
+    """Manually advanced clock for time-windowed failure profiles."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+def burst_lengths(outcomes):
+    """Lengths of the runs of consecutive failures."""
+    lengths, run = [], 0
+    for failed in outcomes:
+        if failed:
+            run += 1
+        elif run:
+            lengths.append(run)
+            run = 0
+    return lengths
+
+class TestFaultInjection:
+    """Test latency and failure profiles."""
+    
+    def test_latency_distributions(self):
+        normal = LatencyProfile.normal(10, 3, buffer_size=20_000, seed=1)
+        lognormal = LatencyProfile.lognormal(2, 1.0, buffer_size=20_000, seed=1)
+        samples = sorted(lognormal.samples_ms)
+        
+        assert LatencyProfile.constant(5).sample() == 5
+        assert sum(normal.samples_ms) / 20_000 == pytest.approx(10, rel=0.05)
+        assert min(normal.samples_ms) >= 0
+        assert samples[10_000] == pytest.approx(2, rel=0.05)
+        assert samples[19_800] / samples[10_000] == pytest.approx(10.2, rel=0.15)
+    
+    def test_profiles_replay_deterministically(self):
+        first = LatencyProfile.lognormal(2, 1.0, buffer_size=8, seed=3)
+        second = LatencyProfile.lognormal(2, 1.0, buffer_size=8, seed=3)
+        
+        drawn = [first.sample() for _ in range(16)]
+        assert drawn == [second.sample() for _ in range(16)]
+        assert drawn[:8] == drawn[8:]
+        with pytest.raises(ValueError):
+            LatencyProfile([])
+        with pytest.raises(ValueError):
+            LatencyProfile([1.0, -1.0])
+    
+    def test_histogram_replays_query_log(self):
+        log = QueryLog()
+        for latency_ms in [0.3] * 90 + [30] * 10:
+            log.append({"query_type": "SELECT", "execution_time_ms": latency_ms})
+        buckets = log.latency_summary()["SELECT"]["buckets"]
+        
+        profile = LatencyProfile.histogram(buckets, buffer_size=10_000, seed=0)
+        
+        assert buckets == {0.5: 90, 50: 10}
+        assert all(0.25 <= sample <= 0.5 or 25 <= sample <= 50 for sample in profile.samples_ms)
+        assert sum(sample > 25 for sample in profile.samples_ms) == pytest.approx(1_000, rel=0.1)
+        assert set(LatencyProfile.histogram({float("inf"): 1}, buffer_size=3).samples_ms) == {1000}
+        with pytest.raises(ValueError):
+            LatencyProfile.histogram({1: 0})
+    
+    def test_failure_rate_and_bursts(self):
+        independent = FailureProfile.rate(0.1, buffer_size=50_000, seed=2)
+        bursty = FailureProfile.bursty(0.1, 8, buffer_size=50_000, seed=2)
+        bursts = burst_lengths(bursty.outcomes)
+        
+        assert sum(independent.outcomes) == pytest.approx(5_000, rel=0.1)
+        assert sum(bursty.outcomes) == pytest.approx(5_000, rel=0.2)
+        assert sum(bursts) / len(bursts) == pytest.approx(8, rel=0.2)
+        assert [independent.should_fail() for _ in range(5)] == list(independent.outcomes[:5])
+        assert FailureProfile.rate(0).should_fail() is False
+        with pytest.raises(ValueError):
+            FailureProfile.bursty(1.0, 5)
+    
+    @pytest.mark.parametrize("failure_rate,mean_burst_length", [(0.5, 1.0), (0.75, 4.0), (0.9, 9.0)])
+    def test_bursty_long_run_rate(self, failure_rate, mean_burst_length):
+        profile = FailureProfile.bursty(failure_rate, mean_burst_length, buffer_size=200_000, seed=3)
+        
+        assert sum(profile.outcomes) / 200_000 == pytest.approx(failure_rate, abs=0.02)
+    
+    def test_bursty_rejects_bursts_too_short_for_rate(self):
+        with pytest.raises(ValueError, match="mean_burst_length >= 9"):
+            FailureProfile.bursty(0.9, 1.0)
+    
+    def test_windowed_failures(self):
+        clock = FakeClock()
+        profile = FailureProfile.windowed([(1, 2)], period_seconds=10, clock=clock)
+        
+        outcomes = []
+        for now in (0.5, 1.0, 1.5, 2.0, 9.9, 11.2, 12.5):
+            clock.now = now
+            outcomes.append(profile.should_fail())
+        
+        assert outcomes == [False, True, True, False, False, True, False]
+        clock.now = 101.5
+        profile.reset()
+        assert not profile.should_fail()
+    
+    def test_most_specific_profile_applies(self):
+        database = DatabaseMock()
+        database.latency_simulation = 7
+        database.set_latency_profile(LatencyProfile.constant(1))
+        database.set_latency_profile(LatencyProfile.constant(2), query_type=QueryType.INSERT)
+        database.set_latency_profile(LatencyProfile.constant(3), "users")
+        database.set_latency_profile(LatencyProfile.constant(4), "users", QueryType.INSERT)
+        
+        assert database.sample_latency_ms("users", QueryType.INSERT) == 4
+        assert database.sample_latency_ms("users", QueryType.SELECT) == 3
+        assert database.sample_latency_ms("orders", QueryType.INSERT) == 2
+        assert database.sample_latency_ms("orders", QueryType.SELECT) == 1
+        database.set_latency_profile(None, "users", QueryType.INSERT)
+        database.set_latency_profile(None)
+        assert database.sample_latency_ms("users", QueryType.INSERT) == 3
+        assert database.sample_latency_ms("orders") == 7
+        assert not database.inject_failure("users")
+    
+    def test_inject_latency_sleeps(self):
+        database = DatabaseMock()
+        database.set_latency_profile(LatencyProfile.constant(30), "users")
+        started = time.perf_counter()
+        
+        assert database.inject_latency("users", QueryType.SELECT) == 30
+        assert time.perf_counter() - started >= 0.03
+        assert database.inject_latency("orders") == 0
+    
+    def test_profiles_drive_bulk_insert_and_cursor(self, db):
+        db._create_storage("orders", {"id": {"type": "int"}})
+        db.set_failure_profile(FailureProfile.rate(1.0), "orders", QueryType.INSERT)
+        
+        failed = db.bulk_insert("orders", [{"id": 1}])
+        
+        assert not failed.success and failed.error_message == "Simulated database failure"
+        assert db.bulk_insert("users", [{"id": 1000}]).success
+        assert db.cursor("orders").fetchall() == []
+    
+    @pytest.mark.asyncio
+    async def test_async_facade_uses_profiles(self, async_db):
+        async_db.database.set_latency_profile(LatencyProfile.constant(50), "users", QueryType.SELECT)
+        async_db.database.set_failure_profile(FailureProfile.rate(1.0), "users", QueryType.DELETE)
+        started = time.perf_counter()
+        
+        results = await asyncio.gather(*(async_db.select("users", {"id": i}) for i in range(10)))
+        deleted = await async_db.execute_sql("DELETE FROM users WHERE id = ?", [1])
+        
+        assert 0.05 <= time.perf_counter() - started < 0.3
+        assert all(result.success for result in results)
+        assert not deleted.success
+        assert (await async_db.update("users", {"age": 1}, {"id": 1})).success
+
+class TestPerformance:
+    """Test performance helpers."""
+    
+    @pytest.mark.slow
+    def test_benchmark_indexed_select(self):
+        """Test the index benchmark at a small size."""
+        results = benchmark_indexed_select(row_count=20_000, lookups=20)
+        
+        assert results["hash_equality_ms"] < results["scan_equality_ms"]
+        assert results["sorted_range_ms"] < results["scan_range_ms"]
+    
+    @pytest.mark.slow
+    def test_benchmark_columnar_storage(self):
+        """Test the storage benchmark at a small size."""
+        results = benchmark_columnar_storage(row_count=5_000)
+        
+        assert results["columnar_bytes_per_row"] < results["row_bytes_per_row"]
+        assert results["aggregate_speedup"] > 0
+    
+    @pytest.mark.slow
+    def test_benchmark_mvcc_rollback(self):
+        """Test the rollback benchmark at a small size."""
+        results = benchmark_mvcc_rollback(row_count=5_000, changed_rows=10, repeats=2)
+        
+        assert results["versions_reclaimed"] == 20
+        assert results["mvcc_rollback_ms"] > 0
+    
+    @pytest.mark.slow
+    def test_benchmark_connection_pool(self):
+        """Test the pool benchmark with the full thread count."""
+        results = benchmark_connection_pool(threads=64, operations_per_thread=5)
+        
+        assert results["pool_stats"]["acquired"] == 320
+        assert results["pool_stats"]["wait_p99_ms"] >= results["pool_stats"]["wait_p50_ms"]
+    
+    @pytest.mark.slow
+    def test_benchmark_sql_plan_cache(self):
+        """Test the plan cache benchmark at a small size."""
+        results = benchmark_sql_plan_cache(row_count=500, executions=200)
+        
+        assert results["cached_lookup_us"] < results["parse_us"]
+        assert results["cached_execute_us"] > 0
+    
+    @pytest.mark.slow
+    def test_benchmark_persistence(self):
+        """Test the persistence benchmark at a small size."""
+        results = benchmark_persistence(row_count=2_000, wal_tail=10)
+        
+        assert results["row_load_ms"] > 0
+        assert results["columnar_snapshot_bytes"] > 0
+    
+    @pytest.mark.slow
+    def test_benchmark_bulk_insert(self):
+        """Test the bulk insert benchmark at a small size."""
+        results = benchmark_bulk_insert(row_count=2_000)
+        
+        assert results["bulk_rows_per_sec"] > results["per_row_rows_per_sec"]
+    
+    @pytest.mark.slow
+    def test_benchmark_query_log(self):
+        """Test the query log benchmark at a small size."""
+        results = benchmark_query_log(entries=5_000, capacity=100, sample_rate=0.5)
+        
+        assert results["ring_mb"] < results["list_mb"]
+    
+    @pytest.mark.slow
+    def test_benchmark_async_latency(self):
+        """Test the async latency benchmark at a small size."""
+        results = benchmark_async_latency(requests=200, latency_ms=5, max_connections=20)
+        
+        assert results["overlap_factor"] > 10
+        assert results["pooled_ms"] < results["serial_ms"]
+    
+    @pytest.mark.slow
+    def test_benchmark_sharded_writes(self):
+        """Test the sharding benchmark at a small size."""
+        results = benchmark_sharded_writes(thread_counts=(1, 4), operations_per_thread=50,
+                                           hold_ms=1.0, row_count=1_000)
+        
+        assert results["speedup_4"] > 1.5
+        assert results["global_4_ops_per_sec"] > 0
+    
+    @pytest.mark.slow
+    def test_benchmark_cursor_scan(self):
+        """Test the cursor benchmark at a small size."""
+        results = benchmark_cursor_scan(row_count=20_000, batch_size=100)
+        
+        assert results["cursor_peak_mb"] < results["materialized_peak_mb"]
+        assert results["limit_10_ms"] < results["cursor_ms"]
+    
+    @pytest.mark.slow
+    def test_benchmark_fault_injection(self):
+        """Test the fault injection benchmark at a small size."""
+        results = benchmark_fault_injection(calls=50_000)
+        
+        assert results["profile_p50_ms"] == pytest.approx(2, rel=0.2)
+        assert results["profile_p99_ms"] > 5 * results["profile_p50_ms"]
+        assert 0 < results["failed_fraction"] < 0.05